@@ -9,6 +9,8 @@ from sbol2 import Document
 from basic_assembly.dna_bot import dnabot_app
 from biobricks_assembly.biobricks10 import bbinput
 from moclo_assembly.moclo_transformation import moclo_transform_generator
+from sbol_parser_api.protocol_simulation import (
+    TimingModel, get_command_log_path, simulate_outputs)
 
 
 class CommonLabware(graphene.InputObjectType):
@@ -41,6 +43,7 @@ class LabwareDictBASIC(graphene.InputObjectType):
 class InputSpecsBASIC(graphene.InputObjectType):
     ethanol_well_for_stage_2 = graphene.String()
     deep_well_plate_stage_4 = graphene.String()
+    p10_multi_mount = graphene.String()
     labware_dict = graphene.Argument(LabwareDictBASIC)
 
 
@@ -75,6 +78,41 @@ class LinkerInType(graphene.InputObjectType):
     well = graphene.String()
 
 
+class TimingModelType(graphene.InputObjectType):
+    move = graphene.Float()
+    move_per_slot = graphene.Float()
+    pick_up_tip = graphene.Float()
+    drop_tip = graphene.Float()
+    aspirate = graphene.Float()
+    dispense = graphene.Float()
+    flow_rate = graphene.Float()
+    mix = graphene.Float()
+    blow_out = graphene.Float()
+    touch_tip = graphene.Float()
+    air_gap = graphene.Float()
+    module = graphene.Float()
+    temperature_wait = graphene.Float()
+    home = graphene.Float()
+    other = graphene.Float()
+
+
+class RunTimeEstimate(graphene.ObjectType):
+    script = graphene.String()
+    run_time = graphene.Float()
+    tips_used = graphene.Int()
+    distance = graphene.Float()
+    pauses = graphene.Int()
+    command_log = graphene.String()
+    error = graphene.String()
+
+
+class PlanDiagnostic(graphene.ObjectType):
+    severity = graphene.String()
+    code = graphene.String()
+    message = graphene.String()
+    stage = graphene.String()
+
+
 class LinkerList(graphene.Mutation):
     class Arguments:
         sbol_file_string = graphene.String()
@@ -98,13 +136,19 @@ class FinalSpec(graphene.Mutation):
         specifications_basic = graphene.Argument(InputSpecsBASIC)
         specifications_bio_bricks = graphene.Argument(InputSpecsBioBricks)
         specifications_mo_clo = graphene.Argument(InputSpecsMoClo)
+        # Run the scripts through the Opentrons simulator
+        simulate = graphene.Boolean(default_value=False)
+        timing_model = graphene.Argument(TimingModelType)
 
     # output
     output_links = graphene.List(graphene.String)
+    run_time_estimates = graphene.List(RunTimeEstimate)
+    diagnostics = graphene.List(PlanDiagnostic)
 
     # Function that is run: call other functions from here
     def mutate(self, info, linker_types, assembly_type, sbol_file_string, specifications_basic,
-               specifications_bio_bricks, specifications_mo_clo):
+               specifications_bio_bricks, specifications_mo_clo, simulate=False,
+               timing_model=None):
 
         def convert_part_info(part_types_list):
             return {part_type.linker_id: {
@@ -120,16 +164,17 @@ class FinalSpec(graphene.Mutation):
         part_types_dictionary = convert_part_info(linker_types)
         print('part_types_dictionary=', part_types_dictionary)
         parser = ParserSBOL(sbol_document=sbol_document, outdir=output_folder)
+        diagnostics = []
         if assembly_type == "basic":
-            csv_links = parser.generate_csv(assembly=assembly_type, part_info=part_types_dictionary)
+            plan = parser.generate_plan(assembly=assembly_type, part_info=part_types_dictionary)[0]
             labware_dict = specifications_basic.labware_dict
             common_labware = labware_dict.common_labware
             links = dnabot_app.dnabot(output_folder=output_folder,
                                       ethanol_well_for_stage_2=specifications_basic.ethanol_well_for_stage_2,
                                       deep_well_plate_stage_4=specifications_basic.deep_well_plate_stage_4,
-                                      input_construct_path=csv_links['construct_path'],
-                                      output_sources_paths=csv_links['part_path'],
+                                      plan=plan,
                                       p10_mount=common_labware.p10_mount,
+                                      p10_multi_mount=specifications_basic.p10_multi_mount,
                                       p300_mount=common_labware.p300_mount,
                                       p10_type=common_labware.p10_type,
                                       p300_type=common_labware.p300_type,
@@ -140,15 +185,15 @@ class FinalSpec(graphene.Mutation):
                                       aluminum_block=labware_dict.aluminum_block,
                                       bead_container=labware_dict.bead_container,
                                       soc_plate=labware_dict.soc_plate,
-                                      agar_plate=labware_dict.agar_plate
+                                      agar_plate=labware_dict.agar_plate,
+                                      diagnostics=diagnostics
                                       )
         elif assembly_type == "bio_bricks":
             labware_dict = specifications_bio_bricks.labware_dict
             common_labware = labware_dict.common_labware
-            csv_links = parser.generate_csv(assembly=assembly_type, part_info=part_types_dictionary)
+            plan = parser.generate_plan(assembly=assembly_type, part_info=part_types_dictionary)[0]
             links = bbinput.biobricks(output_folder=output_folder,
-                                      construct_path=csv_links["construct_path"],
-                                      part_path=csv_links["part_path"],
+                                      plan=plan,
                                       thermocycle=specifications_bio_bricks.thermocycle,
                                       p10_mount=common_labware.p10_mount,
                                       p300_mount=common_labware.p300_mount,
@@ -157,16 +202,16 @@ class FinalSpec(graphene.Mutation):
                                       well_plate=common_labware.well_plate,
                                       tube_rack=labware_dict.tube_rack,
                                       soc_plate=labware_dict.soc_plate,
-                                      transformation_plate=labware_dict.transformation_plate
+                                      transformation_plate=labware_dict.transformation_plate,
+                                      diagnostics=diagnostics
                                       )
         elif assembly_type == "moclo":
             labware_dict = specifications_mo_clo.labware_dict
             common_labware = labware_dict.common_labware
-            csv_links = parser.generate_csv(assembly=assembly_type, part_info=part_types_dictionary)
+            plan = parser.generate_plan(assembly=assembly_type, part_info=part_types_dictionary)[0]
             links = moclo_transform_generator.moclo_function(
                 output_folder=output_folder,
-                construct_path=csv_links["construct_path"],
-                part_path=csv_links["part_path"],
+                plan=plan,
                 thermocycle=specifications_mo_clo.thermocycle,
                 p10_mount=common_labware.p10_mount,
                 p300_mount=common_labware.p300_mount,
@@ -175,12 +220,32 @@ class FinalSpec(graphene.Mutation):
                 well_plate=common_labware.well_plate,
                 trough=labware_dict.trough,
                 reagent_plate=labware_dict.reagent_plate,
-                agar_plate=labware_dict.agar_plate
+                agar_plate=labware_dict.agar_plate,
+                diagnostics=diagnostics
             )
         else:
             links = []
+        estimates = []
+        if simulate:
+            timing = None if timing_model is None else \
+                TimingModel.from_dict(dict(timing_model))
+            for report in simulate_outputs(links, timing):
+                estimates.append(RunTimeEstimate(
+                    script=report.script,
+                    run_time=report.run_time,
+                    tips_used=report.tips_used,
+                    distance=report.distance_travelled,
+                    pauses=report.pauses,
+                    command_log=get_command_log_path(report.script),
+                    error=report.error))
         # return classes with outputs
-        return FinalSpec(output_links=links)
+        return FinalSpec(output_links=links, run_time_estimates=estimates,
+                         diagnostics=[PlanDiagnostic(
+                             severity=diagnostic.severity,
+                             code=diagnostic.code,
+                             message=diagnostic.message,
+                             stage=diagnostic.stage)
+                             for diagnostic in diagnostics])
 
 
 class Mutation(graphene.ObjectType):
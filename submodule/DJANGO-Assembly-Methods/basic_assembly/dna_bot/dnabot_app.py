@@ -2,9 +2,19 @@ import pandas as pd
 import os
 import csv
 import numpy as np
-import json
 import sys
+import itertools
+from collections import Counter
 from typing import List, Dict, Tuple
+from sbol_parser_api.assembly_plan import AssemblyPlan
+from sbol_parser_api.plan_encoding import get_plan_header
+from sbol_parser_api.protocol_validation import (
+    COLUMNS_PER_RACK, WARNING, Diagnostic, check_count, check_deck_slots,
+    check_mounts, check_tip_racks, check_transfer_volumes,
+    check_well_volumes, count_tip_racks, raise_for_errors)
+from sbol_parser_api.run_scheduling import (
+    ROBOT, THERMOCYCLER, RunJob, RunStage, schedule_runs, write_schedule_csv,
+    write_schedule_json)
 
 """
 Created on Thu Apr 11 14:26:07 2019
@@ -28,6 +38,7 @@ THERMOCYCLE_FNAME = '1_5_thermocycle.ot2.py'
 CLIPS_INFO_FNAME = 'clip_run_info.csv'
 FINAL_ASSEMBLIES_INFO_FNAME = 'final_assembly_run_info.csv'
 WELL_OUTPUT_FNAME = 'wells.txt'
+SCHEDULE_FNAME = 'run_schedule'
 
 # Constant floats/ints
 CLIP_DEAD_VOL = 60
@@ -39,12 +50,60 @@ CLIP_MAST_WATER = 15.5
 PART_PER_CLIP = 200
 MIN_VOL = 1
 MAX_CONSTRUCTS = 96
+# CLIP wells purified on the clip plate, eluted into its second half
 MAX_CLIPS = 48
+# CLIP wells of the clip plate, purified in batches into an elution plate
+# above MAX_CLIPS
+MAX_CLIP_WELLS = 96
 FINAL_ASSEMBLIES_PER_CLIP = 15
 DEFAULT_PART_VOL = 1
 MAX_SOURCE_PLATES = 6
 MAX_FINAL_ASSEMBLY_TIPRACKS = 7
 PART_DEAD_VOL = 15
+CLIP_MASTER_MIX_VOL = T4_BUFF_VOL + BSAI_VOL + T4_LIG_VOL + CLIP_MAST_WATER
+LINKER_VOL = 1
+P10_MAX_VOL = 10
+CLIP_MIX_SETTINGS = (4, 10)
+CLIP_MASTER_MIX_WELL = 'A1'
+CLIP_WATER_WELL = 'A2'
+ROWS_PER_COLUMN = 8
+# Single-channel transfers per CLIP well (DNA parts and linkers) added by
+# replicating a clip reaction into a magbead column
+CLIP_TRANSFERS_PER_WELL = 3
+# Maximum number of construct orders tried by optimise_column_layout
+MAX_LAYOUT_ORDERS = 120
+# Tip rack slots and volumes of the templates, checked by validate_plan
+CLIP_TIPRACK_SLOTS = 3
+MAGBEAD_TIPS_PER_SAMPLE = 9
+# Free deck slots of the purification, taken in order by the tip racks and
+# the last one by the elution plate
+MAGBEAD_SLOTS = ['3', '6', '9', '2', '5', '10', '11']
+# Wells of the 22 mL 12-well reagent reservoir of the purification, each
+# keeping RESERVOIR_DEAD_VOL as dead volume of a source or free in the waste
+RESERVOIR_WELL_VOL = 22000
+RESERVOIR_DEAD_VOL = 2000
+# Volumes per sample well of the purification template: two ethanol washes,
+# elution buffer, and the 30 uL sample with 54 uL of beads, 5 uL dead volume
+# and the ethanol into the liquid waste
+MAGBEAD_ETHANOL_VOL = 2 * 150
+MAGBEAD_ELUTION_VOL = 40
+MAGBEAD_WASTE_VOL = 30 + 54 + 5 + MAGBEAD_ETHANOL_VOL
+# Deck slots of the labware of the templates, checked by validate_plan
+# together with the source plates, tip racks and elution plate of the plan
+CLIP_DECK = {'clip plate': '1', 'reagents': '4'}
+CLIP_TIPRACK_DECK = ['3', '6', '9']
+MAGBEAD_DECK = {'magnetic module': '1', 'mix plate': '4', 'reagents': '7',
+                'magbeads': '8'}
+ASSEMBLY_DECK = {'magbead plate': '1', 'tempdeck': '4', 'tube rack': '7'}
+ASSEMBLY_TIPRACK_DECK = ['3', '6', '9', '2', '5', '8', '11']
+TRANSFORMATION_DECK = {'agar plate': '1', 'p10 tip rack 1': '9',
+                       'p10 tip rack 2': '2', 'p10 tip rack 3': '5',
+                       'p300 tip rack 1': '3', 'p300 tip rack 2': '6',
+                       'soc plate': '7', 'assembly plate': '8',
+                       'tempdeck': '10', 'tube rack': '11'}
+FINAL_ASSEMBLY_VOL = 15
+FINAL_ASSEMBLY_PART_VOL = 1.5
+SOURCE_WELL_MAX_VOL = 200
 
 # Constant dicts
 SPOTTING_VOLS_DICT = {2: 5, 3: 5, 4: 5, 5: 5, 6: 5, 7: 5}
@@ -52,6 +111,18 @@ SPOTTING_VOLS_DICT = {2: 5, 3: 5, 4: 5, 5: 5, 6: 5, 7: 5}
 # Constant lists
 # These are positions that the dna source plate can take
 SOURCE_DECK_POS = ['2', '5', '8', '7', '10', '11']
+# Stages of a BASIC job in the order they run: name, script, equipment held
+# and a rough duration in seconds for scripts without a simulated run time.
+# Thermocycling is the profile of the thermocycle template, 20 x (120 s +
+# 60 s) + 300 s + 1200 s, on the thermocycler module of an OT-2, so it
+# holds the OT-2 as well; purification and transformation include their
+# incubations
+BASIC_STAGES = [('clip', CLIP_FNAME, (ROBOT,), 1800),
+                ('thermocycle', THERMOCYCLE_FNAME, (ROBOT, THERMOCYCLER),
+                 5100),
+                ('purification', MAGBEAD_FNAME, (ROBOT,), 2700),
+                ('assembly', F_ASSEMBLY_FNAME, (ROBOT,), 900),
+                ('transformation', TRANS_SPOT_FNAME, (ROBOT,), 6000)]
 
 # labware dictionary - filled in by front end
 labware_dict = {'p10_mount': 'right', 'p300_mount': 'left',
@@ -69,8 +140,8 @@ labware_dict = {'p10_mount': 'right', 'p300_mount': 'left',
 
 def dnabot(
     output_folder: str, ethanol_well_for_stage_2: str,
-    deep_well_plate_stage_4: str, input_construct_path: List[str],
-    output_sources_paths: List[str],
+    deep_well_plate_stage_4: str, input_construct_path: List[str] = None,
+    output_sources_paths: List[str] = None,
     p10_mount: str = 'right',
     p300_mount: str = 'left',
     p10_type: str = 'p10_single',
@@ -82,7 +153,10 @@ def dnabot(
     aluminum_block: str = 'opentrons_96_aluminumblock_biorad_wellplate_200ul',
     bead_container: str = 'usascientific_96_wellplate_2.4ml_deep',
     soc_plate: str = 'usascientific_96_wellplate_2.4ml_deep',
-    agar_plate: str = 'thermofisher_96_wellplate_180ul'
+    agar_plate: str = 'thermofisher_96_wellplate_180ul',
+    plan: AssemblyPlan = None,
+    p10_multi_mount: str = None,
+    diagnostics: List[Diagnostic] = None
 ) -> List[str]:
 
     '''
@@ -99,15 +173,26 @@ def dnabot(
             construct csv
             part_path: a list of full paths to part csv(s) (one or more)
             see labware_dict for rest of arguments
+            plan: assembly plan from the SBOL parser, used instead of the
+            construct and part csvs if given
+            p10_multi_mount: mount of a p10_multi used alongside the p10
+            single in the clip and assembly scripts, e.g. swapped in for the
+            p300. If given, the wells are laid out for column transfers by
+            optimise_column_layout, and the transformation script uses the
+            p10_multi on p10_mount, in place of the p10 single, to spot
+            whole columns
+            diagnostics: if given, extended with the diagnostics of
+            validate_plan; the scripts are only written if there are no
+            errors
 
         Returns:
             List of output paths
             If there is an exception, the list of output paths will contain
             only one element = the error path
             Otherwise the list of output paths will contain:
-            OT-2 script paths (clip, thermocycle, purification, assembly,
-            transformation), metainformation (clip run info, final assembly
-            dict, wells - ethanol well and soc well)
+            OT-2 script paths (clip, purification, assembly,
+            transformation, thermocycle), metainformation (clip run info,
+            final assembly dict, wells - ethanol well and soc well)
     '''
     # Parent directories
     generator_dir = os.getcwd()
@@ -130,30 +215,48 @@ def dnabot(
        but given that the well plate has 96 wells already this is
        not a priority.
     '''
-    if type(input_construct_path) == list:
-        input_construct_path = input_construct_path[0]
+    if plan is None:
+        if type(input_construct_path) == list:
+            input_construct_path = input_construct_path[0]
 
-    construct_base = os.path.basename(input_construct_path)
-    construct_base = os.path.splitext(construct_base)[0]
+        construct_base = os.path.basename(input_construct_path)
+        construct_base = os.path.splitext(construct_base)[0]
+        source_names = output_sources_paths
+    else:
+        construct_base = 'construct'
+        source_names = [plate.name for plate in plan.plates]
 
     all_my_output_paths = []
 
     try:
-        constructs_list = generate_constructs_list(input_construct_path)
-        clips_df = generate_clips_df(constructs_list)
-        sources_dict, parts_df = generate_sources_dict(output_sources_paths)
+        if plan is None:
+            constructs_list = generate_constructs_list(input_construct_path)
+            sources_dict, parts_df = generate_sources_dict(
+                output_sources_paths)
+        else:
+            constructs_list = generate_constructs_list_from_plan(plan)
+            sources_dict, parts_df = generate_sources_dict_from_plan(plan)
+        if p10_multi_mount is None:
+            clips_df = generate_clips_df(constructs_list)
+            assignments, multi_transfers = None, []
+        else:
+            constructs_list, clips_df, assignments, multi_transfers = \
+                optimise_column_layout(constructs_list)
         parts_df_temp = fill_parts_df(clips_df, parts_df)
         parts_df = parts_df_temp.copy()
 
         # calculate OT2 script variables
         clips_dict = generate_clips_dict(clips_df, sources_dict, parts_df)
+        clip_commands = plan_clip_transfers(
+            clips_dict, multi=p10_multi_mount is not None)
         magbead_sample_number = clips_df['number'].sum()
         final_assembly_dict, clips_df, parts_df = generate_final_assembly_dict(
-            constructs_list, clips_df, parts_df)
+            constructs_list, clips_df, parts_df, assignments)
         final_assembly_tipracks = calculate_final_assembly_tipracks(
-            final_assembly_dict)
-        spotting_tuples = generate_spotting_tuples(constructs_list,
-                                                   SPOTTING_VOLS_DICT)
+            final_assembly_dict, multi_transfers)
+        spotting_tuples = generate_spotting_tuples(
+            constructs_list, SPOTTING_VOLS_DICT,
+            multi=p10_multi_mount is not None)
 
         # check if p300_single (1 channel) or p300_multi (8 channel)
         if 'multi' in p300_type.lower():
@@ -161,13 +264,25 @@ def dnabot(
         else:
             multi = False
 
+        purification_plan = plan_purification(magbead_sample_number, multi)
+
+        # check the plan before writing any scripts
+        plan_diagnostics = validate_plan(
+            clips_df, parts_df, clips_dict, clip_commands,
+            final_assembly_dict, final_assembly_tipracks, multi_transfers,
+            p10_mount, p300_mount, p10_multi_mount, purification_plan)
+        if diagnostics is not None:
+            diagnostics.extend(plan_diagnostics)
+        raise_for_errors(plan_diagnostics)
+
         # Write OT2 scripts
         out_full_path_1 = generate_ot2_script(
             full_output_path, CLIP_FNAME,
             os.path.join(template_dir_path, CLIP_TEMP_FNAME),
-            clips_dict=clips_dict,
+            clips_dict=clips_dict, clip_commands=clip_commands,
             p10_mount=p10_mount, p10_type=p10_type, well_plate_type=well_plate,
-            tube_rack_type=tube_rack)
+            tube_rack_type=tube_rack, p10_multi_mount=p10_multi_mount,
+            reagent_plate_type=reagent_plate)
 
         out_full_path_2 = generate_ot2_script(
             full_output_path, MAGBEAD_FNAME,
@@ -177,7 +292,8 @@ def dnabot(
             reagent_plate_type=reagent_plate,
             multi=multi, bead_container_type=bead_container,
             sample_number=magbead_sample_number,
-            ethanol_well=ethanol_well_for_stage_2)
+            ethanol_well=ethanol_well_for_stage_2,
+            purification_plan=purification_plan)
 
         out_full_path_3 = generate_ot2_script(
             full_output_path, F_ASSEMBLY_FNAME,
@@ -185,7 +301,8 @@ def dnabot(
             final_assembly_dict=final_assembly_dict,
             tiprack_num=final_assembly_tipracks,
             p10_mount=p10_mount, p10_type=p10_type, mag_plate_type=mag_plate,
-            tube_rack_type=tube_rack, aluminum_block_type=aluminum_block)
+            tube_rack_type=tube_rack, aluminum_block_type=aluminum_block,
+            multi_transfers=multi_transfers, p10_multi_mount=p10_multi_mount)
 
         out_full_path_4 = generate_ot2_script(
             full_output_path, TRANS_SPOT_FNAME,
@@ -194,7 +311,8 @@ def dnabot(
             p10_mount=p10_mount,
             p300_mount=p300_mount, p10_type=p10_type, p300_type=p300_type,
             well_plate_type=well_plate, tube_rack_type=tube_rack,
-            soc_plate_type=soc_plate, agar_plate_type=agar_plate)
+            soc_plate_type=soc_plate, agar_plate_type=agar_plate,
+            p10_multi_mount=None if p10_multi_mount is None else p10_mount)
 
         # optional thermocycling script; run between clip reactions and
         # purification
@@ -224,7 +342,7 @@ def dnabot(
 
         # give information on source paths
         sources_paths_df = generate_sources_paths_df(
-            output_sources_paths, SOURCE_DECK_POS)
+            source_names, SOURCE_DECK_POS)
 
         # create labware dataframe from labware_dict
         labwareDf = pd.DataFrame(
@@ -236,7 +354,7 @@ def dnabot(
                    MASTER_MIX=master_mix_df, SOURCE_PLATES=sources_paths_df,
                    CLIP_REACTIONS=clips_df, PART_INFO=parts_df,
                    LABWARE=labwareDf)
-        output_sources_paths.append(os.path.join(
+        all_my_output_paths.append(os.path.join(
             my_meta_dir, construct_base + '_' + CLIPS_INFO_FNAME))
         # final assembly dictionary - from original dnabot
         with open(construct_base + '_' + FINAL_ASSEMBLIES_INFO_FNAME,
@@ -244,7 +362,7 @@ def dnabot(
             csvwriter = csv.writer(csvfile)
             for final_assembly_well, construct_clips in final_assembly_dict.items():
                 csvwriter.writerow([final_assembly_well, construct_clips])
-        output_sources_paths.append(os.path.join(
+        all_my_output_paths.append(os.path.join(
             my_meta_dir, construct_base + '_' + FINAL_ASSEMBLIES_INFO_FNAME))
 
         # additional well info - from original dnabot
@@ -252,14 +370,25 @@ def dnabot(
             f.write('Magbead ethanol well: {}'.format(ethanol_well_for_stage_2))
             f.write('\n')
             f.write('SOC column: {}'.format(deep_well_plate_stage_4))
-        output_sources_paths.append(os.path.join(
+            blanks = get_spotting_blanks(
+                [well for wells, _, _ in spotting_tuples for well in wells])
+            if p10_multi_mount is not None and blanks:
+                f.write('\n')
+                f.write('Blank agar wells, spotted with competent cells '
+                        'without DNA: {}'.format(', '.join(blanks)))
+            if purification_plan['elution_plate_slot'] is not None:
+                f.write('\n')
+                f.write('Elution plate: slot {}, used as the magbead plate '
+                        'of the assembly'.format(
+                            purification_plan['elution_plate_slot']))
+        all_my_output_paths.append(os.path.join(
             my_meta_dir, construct_base + '_' + WELL_OUTPUT_FNAME))
         os.chdir(generator_dir)
 
     except Exception as e:
         # write error to file in case of failure
         error_path = os.path.join(full_output_path, 'BASIC_error.txt')
-        with open(error_path) as f:
+        with open(error_path, 'w') as f:
             f.write("Failed to generate BASIC scripts: {}\n".format(str(e)))
         all_my_output_paths.append(error_path)
 
@@ -279,6 +408,45 @@ def generate_constructs_list(
         Args: path = the absolute path of the constructs file
         Returns: List of dataframes, in which each dataframe = construct
     """
+    constructs = []
+    # myworkingd = os.getcwd()
+    # print('my working directory {}'.format(myworkingd))
+    with open(path, 'r') as csvfile:
+        csv_reader = csv.reader(csvfile)
+        for index, construct in enumerate(csv_reader):
+            if index != 0:  # Checks if row is header.
+                construct = list(filter(None, construct))
+                if not construct[1:]:
+                    break
+                else:
+                    constructs.append(construct[1:])
+    return process_constructs(constructs)
+
+
+def generate_constructs_list_from_plan(
+    plan: AssemblyPlan
+) -> List[pd.DataFrame]:
+    """
+        Generates a list of dataframes corresponding to each construct of an
+        assembly plan, without going through the constructs file.
+        Args: plan = assembly plan produced by the SBOL parser
+        Returns: List of dataframes, in which each dataframe = construct
+    """
+    return process_constructs([construct.components for construct
+                               in plan.constructs if construct.components])
+
+
+def process_constructs(
+    constructs: List[List[str]]
+) -> List[pd.DataFrame]:
+    """
+        Processes constructs given as alternating linkers and parts into
+        dataframes of the CLIP reactions required.
+        Args: constructs = list of constructs, each a list of linker and
+        part names starting with a linker
+        Returns: List of dataframes, in which each dataframe = construct
+        Raises: ValueError if the number of constructs > MAX_CONSTRUCTS
+    """
 
     def process_construct(construct):
         """Processes an individual construct into a dataframe of CLIP reactions
@@ -313,18 +481,8 @@ def generate_constructs_list(
                     clips_info['suffixes'].append(suffix_linker)
         return pd.DataFrame.from_dict(clips_info)
 
-    constructs_list = []
-    # myworkingd = os.getcwd()
-    # print('my working directory {}'.format(myworkingd))
-    with open(path, 'r') as csvfile:
-        csv_reader = csv.reader(csvfile)
-        for index, construct in enumerate(csv_reader):
-            if index != 0:  # Checks if row is header.
-                construct = list(filter(None, construct))
-                if not construct[1:]:
-                    break
-                else:
-                    constructs_list.append(process_construct(construct[1:]))
+    constructs_list = [process_construct(construct)
+                       for construct in constructs]
 
     # Errors
     if len(constructs_list) > MAX_CONSTRUCTS:
@@ -348,11 +506,6 @@ def generate_clips_df(
     unique_clips_df = unique_clips_df.reset_index(drop=True)
     clips_df = unique_clips_df.copy()
 
-    # Error
-    if len(unique_clips_df.index) > MAX_CLIPS:
-        raise ValueError(
-            'Number of CLIP reactions exceeds 48. Reduce number of constructs in construct.csv.')
-
     # Count number of each CLIP reaction
     clip_count = np.zeros(len(clips_df.index))
     for i, unique_clip in unique_clips_df.iterrows():
@@ -361,6 +514,7 @@ def generate_clips_df(
                 clip_count[i] = clip_count[i] + 1
     clip_count = clip_count // FINAL_ASSEMBLIES_PER_CLIP + 1
     clips_df['number'] = [int(i) for i in clip_count.tolist()]
+    sample_number = int(clips_df['number'].sum())
 
     # Associate well/s for each CLIP reaction
     clips_df['clip_well'] = pd.Series(['0'] * len(clips_df.index),
@@ -374,7 +528,7 @@ def generate_clips_df(
             mag_wells = []
             for x in range(number):
                 clip_wells.append(final_well(x + 1))
-                mag_wells.append(final_well(x + 1 + 48))
+                mag_wells.append(mag_well(x + 1, sample_number))
             clips_df.at[index, 'clip_well'] = tuple(clip_wells)
             clips_df.at[index, 'mag_well'] = tuple(mag_wells)
         else:
@@ -382,14 +536,179 @@ def generate_clips_df(
             mag_wells = []
             for x in range(number):
                 well_count = clips_df.loc[
-                    :index - 1, 'number'].sum() + x + 1 + 48
-                clip_wells.append(final_well(well_count - 48))
-                mag_wells.append(final_well(well_count))
+                    :index - 1, 'number'].sum() + x + 1
+                clip_wells.append(final_well(well_count))
+                mag_wells.append(mag_well(well_count, sample_number))
             clips_df.at[index, 'clip_well'] = tuple(clip_wells)
             clips_df.at[index, 'mag_well'] = tuple(mag_wells)
     return clips_df
 
 
+def optimise_column_layout(
+    constructs_list: List[pd.DataFrame],
+    max_clips: int = MAX_CLIPS
+) -> Tuple[List[pd.DataFrame], pd.DataFrame, List[List[str]],
+           List[Tuple[str, str]]]:
+    """
+        Rearranges the final assembly wells (construct order) and the CLIP
+        and magbead wells so that transfers of the final assembly line up
+        into full columns for an 8-channel pipette.
+        A magbead column holding, row by row, the clips at one position of
+        the 8 constructs of a final assembly column serves that column in
+        one transfer, and every other column with the same clips. CLIP
+        reactions are replicated into such columns while the CLIP wells
+        stay within max_clips, trying several construct orders. Magbead
+        wells are given by mag_well.
+        Args:
+            constructs_list: list of constructs, constructs = dataframes
+            max_clips: maximum number of CLIP wells once clip reactions are
+            replicated for column transfers
+        Returns:
+            constructs_list reordered, construct i going to final assembly
+            well i
+            clips_df with one row per run of CLIP wells holding the same
+            clip reaction, in well order
+            magbead well of each clip of each construct
+            list of column transfers as (magbead well, final assembly well)
+            in row A
+        Raises: ValueError if the CLIP wells needed exceed MAX_CLIP_WELLS
+    """
+    clip_columns = ['prefixes', 'parts', 'suffixes']
+    constructs = [list(construct[clip_columns].itertuples(
+        index=False, name=None)) for construct in constructs_list]
+    max_len = max(len(construct) for construct in constructs)
+    best = None
+    for order in itertools.islice(
+            itertools.permutations(range(max_len)), MAX_LAYOUT_ORDERS):
+        indices = sorted(range(len(constructs)), key=lambda i: (
+            len(constructs[i]),
+            [constructs[i][j] for j in order if j < len(constructs[i])]))
+        ordered = [constructs[i] for i in indices]
+        columns, saved = select_clip_columns(ordered, max_clips)
+        if best is None or saved > best[0]:
+            best = (saved, indices, ordered, columns)
+    _, indices, constructs, columns = best
+
+    # CLIP wells: the selected columns, then the remaining replicates
+    well_clips = []
+    aligned = {}
+    multi_transfers = []
+    for column, (vector, column_uses) in enumerate(columns):
+        well_clips.extend(vector)
+        for start, position in column_uses:
+            for row in range(ROWS_PER_COLUMN):
+                aligned[start + row, position] = \
+                    column * ROWS_PER_COLUMN + row
+            multi_transfers.append((start, position, column))
+    capacity = Counter()
+    for i in aligned.values():
+        capacity[i] += 1
+    uses = Counter(clip for construct in constructs for clip in construct)
+    for clip, number in uses.items():
+        remaining = number - well_clips.count(clip) * \
+            FINAL_ASSEMBLIES_PER_CLIP
+        if remaining > 0:
+            well_clips.extend([clip] * -(-remaining //
+                                         FINAL_ASSEMBLIES_PER_CLIP))
+    sample_number = len(well_clips)
+    if sample_number > MAX_CLIP_WELLS:
+        raise ValueError(
+            'Number of CLIP reactions exceeds 96. Reduce number of constructs in construct.csv.')
+
+    # Magbead well of every clip of every construct
+    assignments = []
+    for i, construct in enumerate(constructs):
+        construct_wells = []
+        for j, clip in enumerate(construct):
+            if (i, j) in aligned:
+                well = aligned[i, j]
+            else:
+                well = next(
+                    k for k, well_clip in enumerate(well_clips)
+                    if well_clip == clip and
+                    capacity[k] < FINAL_ASSEMBLIES_PER_CLIP)
+                capacity[well] += 1
+            construct_wells.append(mag_well(well + 1, sample_number))
+        assignments.append(construct_wells)
+
+    # Runs of CLIP wells holding the same clip reaction
+    clips_info = {'prefixes': [], 'parts': [], 'suffixes': [], 'number': [],
+                  'clip_well': [], 'mag_well': []}
+    for clip, run in itertools.groupby(
+            enumerate(well_clips), key=lambda item: item[1]):
+        wells = [i for i, _ in run]
+        for key, value in zip(clip_columns, clip):
+            clips_info[key].append(value)
+        clips_info['number'].append(len(wells))
+        clips_info['clip_well'].append(
+            tuple(final_well(i + 1) for i in wells))
+        clips_info['mag_well'].append(
+            tuple(mag_well(i + 1, sample_number) for i in wells))
+    clips_df = pd.DataFrame(data=clips_info)
+
+    multi_transfers = [
+        (mag_well(column * ROWS_PER_COLUMN + 1, sample_number),
+         final_well(start + 1))
+        for start, _, column in sorted(multi_transfers)]
+    return ([constructs_list[i] for i in indices], clips_df, assignments,
+            multi_transfers)
+
+
+def select_clip_columns(
+    constructs: List[List[Tuple[str, str, str]]],
+    max_clips: int = MAX_CLIPS
+) -> Tuple[List[Tuple[Tuple, List[Tuple[int, int]]]], int]:
+    """
+        Selects the magbead columns of clips to replicate for column
+        transfers, greedily by the number of final assembly columns served.
+        A column is selected if the single-channel final assembly transfers
+        it saves outnumber the CLIP transfers of the extra wells it needs,
+        and the CLIP wells needed stay within max_clips.
+        Args:
+            constructs: clips (prefix, part, suffix) of each construct, in
+            final assembly well order
+            max_clips: maximum number of CLIP wells
+        Returns:
+            list of (clips of the column by row, list of (index of the first
+            construct of the final assembly column, clip position) served)
+            net number of single-channel transfers saved
+    """
+    vectors = {}
+    for start in range(0, len(constructs) - ROWS_PER_COLUMN + 1,
+                       ROWS_PER_COLUMN):
+        column = constructs[start:start + ROWS_PER_COLUMN]
+        for position in range(min(len(construct) for construct in column)):
+            vector = tuple(construct[position] for construct in column)
+            vectors.setdefault(vector, []).append((start, position))
+    uses = Counter(clip for construct in constructs for clip in construct)
+
+    def count_wells(aligned_wells):
+        wells = sum(aligned_wells.values())
+        for clip, number in uses.items():
+            remaining = number - aligned_wells[clip] * \
+                FINAL_ASSEMBLIES_PER_CLIP
+            if remaining > 0:
+                wells += -(-remaining // FINAL_ASSEMBLIES_PER_CLIP)
+        return wells
+
+    selected = []
+    saved = 0
+    aligned_wells = Counter()
+    wells = count_wells(aligned_wells)
+    for vector, column_uses in sorted(
+            vectors.items(), key=lambda item: -len(item[1])):
+        column_uses = column_uses[:FINAL_ASSEMBLIES_PER_CLIP]
+        trial_wells = aligned_wells + Counter(vector)
+        trial = count_wells(trial_wells)
+        gain = (ROWS_PER_COLUMN - 1) * len(column_uses) - \
+            CLIP_TRANSFERS_PER_WELL * (trial - wells)
+        if gain > 0 and trial <= max_clips:
+            selected.append((vector, column_uses))
+            saved += gain
+            aligned_wells, wells = trial_wells, trial
+    return selected, saved
+
+
 def generate_sources_dict(
     paths: List[str]
 ) -> Tuple[Dict[str, Tuple], pd.DataFrame]:
@@ -408,49 +727,90 @@ def generate_sources_dict(
         plate
 
     """
-    sources_dict = {}
-    part_dict = {}
-    part_dict_list = []
+    plates = []
     # print('my paths: {}'.format(paths))
-    for deck_index, path in enumerate(paths):
+    for path in paths:
         # print('my path: {}'.format(path))
         with open(path, 'r') as csvfile:
             csv_reader = csv.reader(csvfile)
-            for index, source in enumerate(csv_reader):
-                if index != 0:
-                    if len(source) > 2:
-                        if source[2]:
-                            csv_values = source[1:]
-                            part_dict['concentration'] = [str(source[2])]
-                        else:
-                            csv_values = [source[1]]
-                            part_dict['concentration'] = [PART_PER_CLIP]
-                    else:
-                        csv_values = [source[1]]
-                        part_dict['concentration'] = [PART_PER_CLIP]
-                    csv_values.append(SOURCE_DECK_POS[deck_index])
-                    name = str(source[0])
-                    if name.find('_Prefix') > 0:
-                        index = name.index('Prefix')
-                        if name[index-1] == '-':
-                            name = name.replace('Prefix', 'P')
-                        elif name[index-1] == '_':
-                            name = name.replace('_Prefix', '-P')
-                        else:
-                            name = name.replace('Prefix', '-P')
-                    elif 'Suffix' in name:
-                        index = name.index('Suffix')
-                        if name[index-1] == '-':
-                            name = name.replace('Suffix', 'S')
-                        elif name[index-1] == '_':
-                            name = name.replace('_Suffix', '-S')
-                        else:
-                            name = name.replace('Suffix', '-S')
-                    sources_dict[name] = tuple(csv_values)
-                    part_dict['name'] = [name]
-                    part_dict['well'] = [str(source[1])]
-                    part_dict['plate'] = [SOURCE_DECK_POS[deck_index]]
-                    part_dict_list.append(pd.DataFrame.from_dict(part_dict))
+            plates.append([source for index, source in enumerate(csv_reader)
+                           if index != 0])
+    return process_sources(plates)
+
+
+def generate_sources_dict_from_plan(
+    plan: AssemblyPlan
+) -> Tuple[Dict[str, Tuple], pd.DataFrame]:
+    """Generates the sources dictionary and parts dataframe from the part
+    plates of an assembly plan, without going through the sources csvs.
+
+    Args:
+        plan (AssemblyPlan): assembly plan produced by the SBOL parser.
+    Returns:
+        sources_dict and parts_df, as returned by generate_sources_dict()
+
+    """
+    plates = []
+    for plate in plan.plates:
+        plates.append([
+            [part.name, part.well,
+             '' if part.concentration is None else str(part.concentration)]
+            for part in plate.parts])
+    return process_sources(plates)
+
+
+def process_sources(
+    plates: List[List[List[str]]]
+) -> Tuple[Dict[str, Tuple], pd.DataFrame]:
+    """Processes the parts/linkers of each source plate into a dictionary
+    where the key corresponds with part/linker and the value contains a tuple
+    of corresponding information.
+
+    Args:
+        plates (list): list of source plates in deck order, each a list of
+                       [name, well] or [name, well, concentration] rows.
+    Returns:
+        sources_dict and parts_df, as returned by generate_sources_dict()
+
+    """
+    sources_dict = {}
+    part_dict = {}
+    part_dict_list = []
+    for deck_index, sources in enumerate(plates):
+        for source in sources:
+            if len(source) > 2:
+                if source[2]:
+                    csv_values = source[1:]
+                    part_dict['concentration'] = [str(source[2])]
+                else:
+                    csv_values = [source[1]]
+                    part_dict['concentration'] = [PART_PER_CLIP]
+            else:
+                csv_values = [source[1]]
+                part_dict['concentration'] = [PART_PER_CLIP]
+            csv_values.append(SOURCE_DECK_POS[deck_index])
+            name = str(source[0])
+            if name.find('_Prefix') > 0:
+                index = name.index('Prefix')
+                if name[index-1] == '-':
+                    name = name.replace('Prefix', 'P')
+                elif name[index-1] == '_':
+                    name = name.replace('_Prefix', '-P')
+                else:
+                    name = name.replace('Prefix', '-P')
+            elif 'Suffix' in name:
+                index = name.index('Suffix')
+                if name[index-1] == '-':
+                    name = name.replace('Suffix', 'S')
+                elif name[index-1] == '_':
+                    name = name.replace('_Suffix', '-S')
+                else:
+                    name = name.replace('Suffix', '-S')
+            sources_dict[name] = tuple(csv_values)
+            part_dict['name'] = [name]
+            part_dict['well'] = [str(source[1])]
+            part_dict['plate'] = [SOURCE_DECK_POS[deck_index]]
+            part_dict_list.append(pd.DataFrame.from_dict(part_dict))
     parts_df = pd.concat(part_dict_list, ignore_index=True)
     # print('essential: {}'.format(sources_dict))
     return sources_dict, parts_df
@@ -632,10 +992,179 @@ def generate_clips_dict(
     return clips_dict
 
 
+def plan_clip_transfers(
+    clips_dict: Dict[str, List],
+    max_vol: float = P10_MAX_VOL,
+    multi: bool = False
+) -> List[Dict]:
+    """
+        Plans the ordered pipetting commands of the clip reactions, reusing
+        tips wherever no DNA can be carried over:
+        - master mix and water go to the clean clip wells with one tip each,
+        water dispensed from the top of the wells
+        - the first DNA added to each clip well comes from a multi-dispense:
+        one tip aspirates the volume for several clip wells from the same
+        source and dispenses it into wells holding no DNA yet
+        - the other DNA gets a fresh tip, and the last DNA added to a clip
+        well is mixed in
+        Args:
+            clips_dict: dictionary generated by generate_clips_dict
+            max_vol: maximum volume of the p10 pipette
+            multi: if True, master mix and water come from the reagent
+            reservoir and the 8-channel pipette fills full clip columns
+        Returns:
+            list of commands, executed in order by 1_clip.ot2.py
+            each command is a dictionary with the 'command' name and where
+            needed the 'labware' (source plate position, 'destination',
+            'tube_rack' or 'reservoir'), 'well', 'volume', 'position' ('top'
+            or 'bottom'), 'slow' (aspirate with a slow z speed),
+            'repetitions' and 'pipette' ('multi' for the 8-channel pipette)
+    """
+    destinations = [final_well(i + 1)
+                    for i in range(len(clips_dict['parts_wells']))]
+    water_vols = [float(vol) for vol in clips_dict['water_vols']]
+    reagents = 'reservoir' if multi else 'tube_rack'
+    commands = []
+
+    def add(command, labware=None, well=None, pipette='single', **kwargs):
+        step = {'command': command}
+        if labware is not None:
+            step.update(labware=labware, well=well)
+        step.update(kwargs)
+        if pipette != 'single':
+            step['pipette'] = pipette
+        commands.append(step)
+
+    def add_master_mix(wells, pipette):
+        num_aspirates = int(np.ceil(CLIP_MASTER_MIX_VOL / max_vol))
+        master_mix_vol = float(CLIP_MASTER_MIX_VOL / num_aspirates)
+        add('pick_up_tip', pipette=pipette)
+        for well in wells:
+            for _ in range(num_aspirates):
+                add('aspirate', reagents, CLIP_MASTER_MIX_WELL,
+                    volume=master_mix_vol, pipette=pipette)
+                add('dispense', 'destination', well, volume=master_mix_vol,
+                    pipette=pipette)
+                add('touch_tip', 'destination', well, pipette=pipette)
+                add('blow_out', 'destination', well, position='top',
+                    pipette=pipette)
+        add('drop_tip', pipette=pipette)
+
+    def add_water(water, pipette):
+        add('pick_up_tip', pipette=pipette)
+        for group in group_by_volume(water, max_vol):
+            add('aspirate', reagents, CLIP_WATER_WELL,
+                volume=sum(vol for _, vol in group), pipette=pipette)
+            for well, vol in group:
+                add('dispense', 'destination', well, volume=vol,
+                    position='top', pipette=pipette)
+                add('touch_tip', 'destination', well, pipette=pipette)
+            add('blow_out', reagents, CLIP_WATER_WELL, position='top',
+                pipette=pipette)
+        add('drop_tip', pipette=pipette)
+
+    # Master mix and water to the empty clip wells, by full columns with
+    # the 8-channel pipette
+    columns = range(0, len(destinations) - ROWS_PER_COLUMN + 1,
+                    ROWS_PER_COLUMN) if multi else []
+    single_wells = set(destinations) - {
+        destinations[i + row] for i in columns
+        for row in range(ROWS_PER_COLUMN)}
+    if columns:
+        add_master_mix([destinations[i] for i in columns], 'multi')
+    if single_wells:
+        add_master_mix([well for well in destinations
+                        if well in single_wells], 'single')
+    water_columns = [
+        i for i in columns if water_vols[i] > 0 and
+        len(set(water_vols[i:i + ROWS_PER_COLUMN])) == 1]
+    if water_columns:
+        add_water([(destinations[i], water_vols[i]) for i in water_columns],
+                  'multi')
+    multi_water = {i + row for i in water_columns
+                   for row in range(ROWS_PER_COLUMN)}
+    water = [(destinations[i], vol) for i, vol in enumerate(water_vols)
+             if vol > 0 and i not in multi_water]
+    if water:
+        add_water(water, 'single')
+
+    # DNA of each clip well as (source plate, source well, volume)
+    dna = [[(clips_dict[key + '_plates'][i], clips_dict[key + '_wells'][i],
+             float(vol))
+            for key, vol in [('prefixes', LINKER_VOL),
+                             ('suffixes', LINKER_VOL),
+                             ('parts', clips_dict['parts_vols'][i])]]
+           for i in range(len(destinations))]
+    source_counts = {}
+    for sources in dna:
+        for source in sources:
+            source_counts[source[:2]] = source_counts.get(source[:2], 0) + 1
+
+    # Multi-dispense the most shared source of each well first
+    first_groups = {}
+    for i, sources in enumerate(dna):
+        first = max(range(len(sources)),
+                    key=lambda j: source_counts[sources[j][:2]])
+        first_groups.setdefault(sources[first][:2], []).append(
+            (destinations[i], sources[first][2]))
+        dna[i] = sources[:first] + sources[first + 1:]
+    for (plate, well), group in first_groups.items():
+        for chunk in group_by_volume(group, max_vol):
+            add('pick_up_tip')
+            add('aspirate', plate, well, position='bottom', slow=True,
+                volume=sum(vol for _, vol in chunk))
+            for destination, vol in chunk:
+                add('dispense', 'destination', destination, volume=vol)
+                add('touch_tip', 'destination', destination)
+            add('drop_tip')
+
+    # Remaining DNA with a fresh tip each, mixing after the last
+    for destination, sources in zip(destinations, dna):
+        if not sources:
+            add('pick_up_tip')
+        for j, (plate, well, vol) in enumerate(sources):
+            if j > 0:
+                add('drop_tip')
+            add('pick_up_tip')
+            add('aspirate', plate, well, volume=vol, position='bottom',
+                slow=True)
+            add('dispense', 'destination', destination, volume=vol)
+            add('touch_tip', 'destination', destination)
+        add('mix', 'destination', destination,
+            repetitions=CLIP_MIX_SETTINGS[0], volume=CLIP_MIX_SETTINGS[1])
+        add('drop_tip')
+    return commands
+
+
+def group_by_volume(
+    transfers: List[Tuple[str, float]],
+    max_vol: float
+) -> List[List[Tuple[str, float]]]:
+    """
+        Splits transfers from one source into consecutive groups that fit
+        in one aspirate of the pipette.
+        Args:
+            transfers: list of (destination well, volume)
+            max_vol: maximum volume of the pipette
+        Returns:
+            list of groups of transfers
+    """
+    groups = []
+    total = max_vol
+    for destination, vol in transfers:
+        if total + vol > max_vol:
+            groups.append([])
+            total = 0
+        groups[-1].append((destination, vol))
+        total += vol
+    return groups
+
+
 def generate_final_assembly_dict(
     constructs_list: pd.DataFrame,
     clips_df: pd.DataFrame,
-    parts_df: pd.DataFrame
+    parts_df: pd.DataFrame,
+    assignments: List[List[str]] = None
 ) -> Tuple[Dict[str, List[str]], pd.DataFrame, pd.DataFrame]:
     """
         Using constructs_list and clips_df, returns a dictionary of final
@@ -645,6 +1174,9 @@ def generate_final_assembly_dict(
             constructs_list: list of constructs, constructs = dataframes
             clips_df: dataframe of clip reactions
             parts_df: dataframe of parts
+            assignments: magbead well of each clip of each construct, as
+            given by optimise_column_layout, instead of filling the
+            replicates of each clip in turn
         Returns:
             dictionary of final assemblies with keys = destination plate,
             values = list of clip wells
@@ -658,15 +1190,21 @@ def generate_final_assembly_dict(
                                            index=clips_df.index)
     for construct_index, construct_df in enumerate(constructs_list):
         construct_well_list = []
-        for _, clip in construct_df.iterrows():
-            clip_info = clips_df[(clips_df['prefixes'] == clip['prefixes']) &
-                                 (clips_df['parts'] == clip['parts']) &
-                                 (clips_df['suffixes'] == clip['suffixes'])]
-            clip_wells = clip_info.at[clip_info.index[0], 'mag_well']
-            clip_num = int(clip_info.index[0])
-            clip_well = clip_wells[int(clips_count[clip_num] //
-                                       FINAL_ASSEMBLIES_PER_CLIP)]
-            clips_count[clip_num] = clips_count[clip_num] + 1
+        for position, (_, clip) in enumerate(construct_df.iterrows()):
+            if assignments is None:
+                clip_info = clips_df[
+                    (clips_df['prefixes'] == clip['prefixes']) &
+                    (clips_df['parts'] == clip['parts']) &
+                    (clips_df['suffixes'] == clip['suffixes'])]
+                clip_wells = clip_info.at[clip_info.index[0], 'mag_well']
+                clip_num = int(clip_info.index[0])
+                clip_well = clip_wells[int(clips_count[clip_num] //
+                                           FINAL_ASSEMBLIES_PER_CLIP)]
+                clips_count[clip_num] = clips_count[clip_num] + 1
+            else:
+                clip_well = assignments[construct_index][position]
+                clip_num = int(clips_df.index[clips_df['mag_well'].apply(
+                    lambda wells: clip_well in wells)][0])
             construct_well_list.append(clip_well)
             if clips_df.at[clip_num, 'construct_well'] == '0':
                 clips_df.at[clip_num, 'construct_well'] = [str(
@@ -707,73 +1245,308 @@ def generate_final_assembly_dict(
 
 
 def calculate_final_assembly_tipracks(
-    final_assembly_dict: Dict[str, List[str]]
+    final_assembly_dict: Dict[str, List[str]],
+    multi_transfers: List[Tuple[str, str]] = ()
 ) -> int:
     """
-        Calculates the number of final assembly tipracks required ensuring
-        no more than MAX_FINAL_ASSEMBLY_TIPRACKS are used.
+        Calculates the number of final assembly tipracks required by the
+        single channel pipette. validate_plan checks they fit on the deck.
         Args: final_assembly_dict = dictionary with keys = final assembly
         wells, values = list of clip wells
+        multi_transfers = column transfers of the 8-channel pipette, see
+        optimise_column_layout
         Returns: number of tipracks needed in final assembly
-        (3_assembly.ot2.py)
-        Raises: ValueError if final assembly tiprack number > tiprack slots
+        (3_assembly.ot2.py) by the single channel pipette
 
     """
     final_assembly_lens = []
     for values in final_assembly_dict.values():
         final_assembly_lens.append(len(values))
     master_mix_tips = len(list(set(final_assembly_lens)))
-    total_tips = master_mix_tips + sum(final_assembly_lens)
-    final_assembly_tipracks = total_tips // 96 + (
-        1 if total_tips % 96 > 0 else 0)
-    if final_assembly_tipracks > MAX_FINAL_ASSEMBLY_TIPRACKS:
-        raise ValueError(
-            'Final assembly tiprack number exceeds number of slots. Reduce number of constructs in constructs.csv')
-    else:
-        return final_assembly_tipracks
+    single_transfers = get_single_transfers(
+        final_assembly_dict, multi_transfers)
+    total_tips = master_mix_tips + sum(
+        len(values) for values in single_transfers.values())
+    # wells only reached by column transfers are mixed with a single tip
+    # unless their whole column is
+    for well, values in single_transfers.items():
+        column = [row + well[1:] for row in 'ABCDEFGH']
+        if not values and any(single_transfers.get(column_well, [None])
+                              for column_well in column):
+            total_tips += 1
+    return count_tip_racks(total_tips)
+
+
+def get_single_transfers(
+    final_assembly_dict: Dict[str, List[str]],
+    multi_transfers: List[Tuple[str, str]] = ()
+) -> Dict[str, List[str]]:
+    """
+        Removes the transfers made by column transfers of the 8-channel
+        pipette from the final assembly dictionary.
+        Args: final_assembly_dict = dictionary with keys = final assembly
+        wells, values = list of clip wells
+        multi_transfers = list of (magbead well, final assembly well) in
+        row A
+        Returns: dictionary of final assemblies with the clip wells left
+        to the single channel pipette
+    """
+    covered = set()
+    for mag_well, final_assembly_well in multi_transfers:
+        for row in 'ABCDEFGH':
+            covered.add((row + final_assembly_well[1:], row + mag_well[1:]))
+    return {well: [value for value in values if (well, value) not in covered]
+            for well, values in final_assembly_dict.items()}
 
 
 def generate_spotting_tuples(
     constructs_list: List[pd.DataFrame],
-    spotting_vols_dict: Dict[int, int]
+    spotting_vols_dict: Dict[int, int],
+    multi: bool = False
 ) -> List[Tuple]:
     """Using constructs_list, generates a spotting tuple
-    (Refer to 'transformation_spotting_template.py') for every column of 
-    constructs, assuming the 1st construct is located in well A1 and wells
-    increase linearly. Target wells locations are equivalent to construct well
-    locations and spotting volumes are defined by spotting_vols_dict.
+    (Refer to 'transformation_spotting_template.py') for every column of
+    constructs, the construct i being located in well final_well(i + 1).
+    Each tuple holds the wells of one physical column, which the p300 mixes
+    once before it is spotted. Target wells locations are equivalent to
+    construct well locations and spotting volumes are defined by
+    spotting_vols_dict.
 
     Args:
         spotting_vols_dict (dict): Part number defined by keys, spotting
             volumes defined by corresponding value.
+        multi (bool): If True, every column is spotted in one pass of an
+            8-channel p10, at the largest spotting volume of its
+            constructs. optimise_column_layout orders constructs by part
+            number, so only columns between two part numbers mix volumes.
     Returns:
         List of three tuples as instructions for transformation script
     """
-    # Calculate wells and volumes
-    wells = [final_well(x + 1) for x in range(len(constructs_list))]
-    vols = [SPOTTING_VOLS_DICT[len(construct_df.index)]
-            for construct_df in constructs_list]
+    # Wells and volumes by column
+    columns = {}
+    for x, construct_df in enumerate(constructs_list):
+        well = final_well(x + 1)
+        columns.setdefault(int(well[1:]), []).append(
+            (well, spotting_vols_dict[len(construct_df.index)]))
 
     # Package spotting tuples
-    spotting_tuple_num = len(constructs_list)//8 + (1
-                                                    if len(constructs_list) % 8 > 0 else 0)
     spotting_tuples = []
-    for x in range(spotting_tuple_num):
-        if x == spotting_tuple_num - 1:
-            tuple_wells = tuple(wells[8*x:])
-            tuple_vols = tuple(vols[8*x:])
-        else:
-            tuple_wells = tuple(wells[8*x:8*x + 8])
-            tuple_vols = tuple(vols[8*x:8*x + 8])
+    for column in sorted(columns):
+        tuple_wells = tuple(well for well, _ in columns[column])
+        tuple_vols = tuple(vol for _, vol in columns[column])
+        if multi:
+            tuple_vols = (max(tuple_vols),) * len(tuple_vols)
         spotting_tuples.append((tuple_wells, tuple_wells, tuple_vols))
     return spotting_tuples
 
 
+def get_spotting_blanks(
+    wells: List[str]
+) -> List[str]:
+    """
+        Finds the spare rows of the partial columns of wells, which the
+        8-channel p10 transforms and spots with competent cells that got no
+        DNA. They are marked as blanks of the agar plate.
+        Args: wells = transformation wells, e.g. the final assembly wells
+        Returns: list of the wells of the spare rows, column by column
+    """
+    wells = set(wells)
+    columns = sorted({int(well[1:]) for well in wells})
+    return [row + str(column) for column in columns for row in 'ABCDEFGH'
+            if row + str(column) not in wells]
+
+
+def plan_purification(
+    sample_number: int,
+    multi: bool = True,
+    slots: List[str] = MAGBEAD_SLOTS
+) -> Dict:
+    """
+        Splits the magbead purification into batches run one after the
+        other by 2_purification.ot2.py, each within the tip racks that fit
+        on the deck and the ethanol and liquid waste wells of the reagent
+        reservoir, which are replaced, refilled and emptied between
+        batches. Up to MAX_CLIPS samples are eluted into the second half of
+        the clip plate; more fill the whole clip plate and are eluted into
+        the same wells of an elution plate, taking the last of the slots.
+        Args: sample_number = number of CLIP wells
+        multi = True if the p300 is an 8-channel pipette, picking up a
+        column of tips at a time
+        slots = free deck slots of the purification
+        Returns: dictionary with 'batches' = list of [first sample, number
+        of samples] starting on full columns, 'tiprack_slots' = slots of
+        the tip racks of the largest batch, 'elution_plate_slot' = slot of
+        the elution plate or None
+    """
+    slots = list(slots)
+    elution_plate_slot = slots.pop() if sample_number > MAX_CLIPS else None
+    columns = -(-sample_number // ROWS_PER_COLUMN)
+    # a column of samples uses MAGBEAD_TIPS_PER_SAMPLE columns of tips, and
+    # the 8 wells of a column fill the reservoir wells
+    max_columns = min(
+        len(slots) * COLUMNS_PER_RACK // MAGBEAD_TIPS_PER_SAMPLE,
+        (RESERVOIR_WELL_VOL - RESERVOIR_DEAD_VOL) // (
+            ROWS_PER_COLUMN * max(MAGBEAD_ETHANOL_VOL, MAGBEAD_WASTE_VOL)))
+    batch_number = -(-columns // max_columns)
+    batches = []
+    if batch_number:
+        batch_columns = -(-columns // batch_number)
+        for column in range(0, columns, batch_columns):
+            first = column * ROWS_PER_COLUMN
+            batches.append([first, min(batch_columns * ROWS_PER_COLUMN,
+                                       sample_number - first)])
+    if multi:
+        tips = [MAGBEAD_TIPS_PER_SAMPLE * -(-number // ROWS_PER_COLUMN)
+                for _, number in batches]
+        tip_racks = count_tip_racks(max(tips, default=0), COLUMNS_PER_RACK)
+    else:
+        tips = [MAGBEAD_TIPS_PER_SAMPLE * number for _, number in batches]
+        tip_racks = count_tip_racks(max(tips, default=0))
+    return {'batches': batches, 'tiprack_slots': slots[:tip_racks],
+            'elution_plate_slot': elution_plate_slot}
+
+
+def validate_plan(
+    clips_df: pd.DataFrame,
+    parts_df: pd.DataFrame,
+    clips_dict: Dict[str, List],
+    clip_commands: List[Dict],
+    final_assembly_dict: Dict[str, List[str]],
+    final_assembly_tipracks: int,
+    multi_transfers: List[Tuple[str, str]],
+    p10_mount: str,
+    p300_mount: str,
+    p10_multi_mount: str = None,
+    purification_plan: Dict = None
+) -> List[Diagnostic]:
+    """
+        Checks the plan of the OT-2 scripts against the labware, tip racks,
+        deck slots and pipettes of the templates, before the scripts are
+        written.
+        Args: clips_df = dataframe of clip reactions
+        parts_df = dataframe of parts, from fill_parts_df
+        clips_dict = dictionary from generate_clips_dict
+        clip_commands = commands from plan_clip_transfers
+        final_assembly_dict = dictionary with keys = final assembly wells,
+        values = list of clip wells
+        final_assembly_tipracks = tipracks from
+        calculate_final_assembly_tipracks
+        multi_transfers = column transfers of the 8-channel pipette
+        p10_mount, p300_mount, p10_multi_mount = pipette mounts
+        purification_plan = dictionary from plan_purification, planned
+        for the 8-channel p300 if not given
+        Returns: list of diagnostics, empty if the plan can run
+    """
+    diagnostics = []
+
+    # Clip reactions, each in a CLIP well of the clip plate
+    sample_number = int(clips_df['number'].sum())
+    diagnostics += check_count(len(clips_df.index), MAX_CLIP_WELLS, 'clips',
+                               'CLIP reactions', 'clip')
+    diagnostics += check_count(
+        parts_df['plate'].nunique(), MAX_SOURCE_PLATES, 'source-plates',
+        'source plates', 'clip')
+    source_volumes = {
+        'plate {} well {}'.format(row['plate'], row['well']):
+        float(row['total_vol']) for _, row in parts_df.iterrows()}
+    diagnostics += check_well_volumes(
+        source_volumes, SOURCE_WELL_MAX_VOL, 'Source', 'clip')
+    diagnostics += check_transfer_volumes(
+        [vol for vol in clips_dict['water_vols'] if vol > 0], MIN_VOL,
+        'water into CLIP reactions', 'clip')
+    tips = Counter(step.get('pipette', 'single') for step in clip_commands
+                   if step['command'] == 'pick_up_tip')
+    clip_tipracks = count_tip_racks(tips['single']) + \
+        count_tip_racks(tips['multi'], COLUMNS_PER_RACK)
+    diagnostics += check_tip_racks(clip_tipracks, CLIP_TIPRACK_SLOTS, 'clip')
+    labware = dict(CLIP_DECK)
+    for slot in parts_df['plate'].unique():
+        labware['source plate in slot {}'.format(slot)] = slot
+    for index, slot in enumerate(CLIP_TIPRACK_DECK[:clip_tipracks]):
+        labware['tip rack {}'.format(index + 1)] = slot
+    diagnostics += check_deck_slots(labware, 'clip')
+    pipettes = {'p10': p10_mount}
+    if p10_multi_mount is not None:
+        pipettes['p10_multi'] = p10_multi_mount
+    diagnostics += check_mounts(pipettes, 'clip')
+
+    # Purification, in batches within the tip racks
+    if purification_plan is None:
+        purification_plan = plan_purification(sample_number)
+    diagnostics += check_count(sample_number, MAX_CLIP_WELLS, 'samples',
+                               'purification samples', 'purification')
+    elution_plate_slot = purification_plan['elution_plate_slot']
+    diagnostics += check_tip_racks(
+        len(purification_plan['tiprack_slots']),
+        len(MAGBEAD_SLOTS) - (elution_plate_slot is not None),
+        'purification')
+    labware = dict(MAGBEAD_DECK)
+    for index, slot in enumerate(purification_plan['tiprack_slots']):
+        labware['tip rack {}'.format(index + 1)] = slot
+    if elution_plate_slot is not None:
+        labware['elution plate'] = elution_plate_slot
+    diagnostics += check_deck_slots(labware, 'purification')
+    # Reagent reservoir wells for the largest batch, counting whole columns
+    # of samples as the 8-channel p300 fills and empties them
+    wells = ROWS_PER_COLUMN * max(
+        (-(-number // ROWS_PER_COLUMN)
+         for _, number in purification_plan['batches']), default=0)
+    diagnostics += check_well_volumes(
+        {'of ethanol': wells * MAGBEAD_ETHANOL_VOL,
+         'of elution buffer': wells * MAGBEAD_ELUTION_VOL,
+         'of liquid waste': wells * MAGBEAD_WASTE_VOL},
+        RESERVOIR_WELL_VOL - RESERVOIR_DEAD_VOL, 'Reagent reservoir',
+        'purification')
+    if len(purification_plan['batches']) > 1:
+        diagnostics.append(Diagnostic(
+            WARNING, 'batches',
+            'The purification runs in {} batches: replace the tip racks, '
+            'refill the ethanol and elution buffer and empty the liquid '
+            'waste when it pauses.'.format(
+                len(purification_plan['batches'])), 'purification'))
+    if elution_plate_slot is not None:
+        diagnostics.append(Diagnostic(
+            WARNING, 'elution-plate',
+            'Samples are eluted into a plate in slot {}, used as the '
+            'magbead plate of the assembly.'.format(elution_plate_slot),
+            'purification'))
+
+    # Final assembly
+    diagnostics += check_count(len(final_assembly_dict), MAX_CONSTRUCTS,
+                               'constructs', 'final assemblies', 'assembly')
+    assembly_tipracks = final_assembly_tipracks + \
+        count_tip_racks(len(multi_transfers), COLUMNS_PER_RACK)
+    diagnostics += check_tip_racks(
+        assembly_tipracks, MAX_FINAL_ASSEMBLY_TIPRACKS, 'assembly')
+    labware = dict(ASSEMBLY_DECK)
+    for index, slot in enumerate(ASSEMBLY_TIPRACK_DECK[:assembly_tipracks]):
+        labware['tip rack {}'.format(index + 1)] = slot
+    diagnostics += check_deck_slots(labware, 'assembly')
+    diagnostics += check_transfer_volumes(
+        [FINAL_ASSEMBLY_VOL - len(values) * FINAL_ASSEMBLY_PART_VOL
+         for values in final_assembly_dict.values()], MIN_VOL,
+        'final assembly master mix', 'assembly')
+
+    # Transformation
+    diagnostics += check_deck_slots(TRANSFORMATION_DECK, 'transformation')
+    diagnostics += check_mounts({'p10': p10_mount, 'p300': p300_mount},
+                                'transformation')
+    blanks = get_spotting_blanks(final_assembly_dict)
+    if p10_multi_mount is not None and blanks:
+        diagnostics.append(Diagnostic(
+            WARNING, 'blank-spots',
+            'Agar wells {} are spotted as blanks, with competent cells '
+            'that got no DNA.'.format(', '.join(blanks)), 'transformation'))
+    return diagnostics
+
+
 def generate_ot2_script(parent_dir, ot2_script_path, template_path, **kwargs):
     """Generates an ot2 script named 'ot2_script_path', where kwargs are
     written as global variables at the top of the script. For each kwarg, the
     keyword defines the variable name while the value defines the name of the
-    variable. The remainder of template file is subsequently written below.
+    variable. Dictionaries and lists are written as one compact payload, see
+    plan_encoding.get_plan_header. The remainder of template file is
+    subsequently written below.
     Args:
         parent_dir (str): output folder dir
         ot2_script_path (str): where the script should be saved, relative to
@@ -797,11 +1570,15 @@ def generate_ot2_script(parent_dir, ot2_script_path, template_path, **kwargs):
                     break
                 else:
                     wf.write(line)
+            plan = {key: value for key, value in kwargs.items()
+                    if isinstance(value, (dict, list, tuple))}
+            if plan:
+                wf.write(get_plan_header(plan))
             for key, value in kwargs.items():
+                if key in plan:
+                    continue
                 wf.write('{}='.format(key))
-                if type(value) == dict:
-                    wf.write(json.dumps(value))
-                elif type(value) == str:
+                if type(value) == str:
                     wf.write("'{}'".format(value))
                 else:
                     wf.write(str(value))
@@ -816,6 +1593,65 @@ def generate_ot2_script(parent_dir, ot2_script_path, template_path, **kwargs):
     return this_object_output_path
 
 
+def get_basic_jobs(
+    job_outputs: Dict[str, List[str]],
+    run_times: Dict[str, float] = None
+) -> List[RunJob]:
+    """
+        Gets the stages of BASIC jobs from the outputs of dnabot.
+        Args: job_outputs = output paths returned by dnabot, by job name
+        run_times = estimated run time in seconds by script path, e.g. from
+        protocol_simulation.simulate_outputs; BASIC_STAGES durations are
+        used for scripts without one
+        Returns: list of jobs, in the order given
+        Raises: ValueError if a job has no script for a stage, e.g. if
+        dnabot failed
+    """
+    run_times = {} if run_times is None else run_times
+    jobs = []
+    for name, paths in job_outputs.items():
+        job = RunJob(name)
+        for stage, script_name, resources, duration in BASIC_STAGES:
+            scripts = [path for path in paths
+                       if os.path.basename(path) == script_name]
+            if not scripts:
+                raise ValueError(
+                    'Job {} has no {} script'.format(name, stage))
+            job.stages.append(RunStage(
+                stage, run_times.get(scripts[0], duration), resources))
+        jobs.append(job)
+    return jobs
+
+
+def schedule_basic_runs(
+    job_outputs: Dict[str, List[str]],
+    output_folder: str,
+    robots: int = 1,
+    thermocyclers: int = 1,
+    run_times: Dict[str, float] = None
+) -> List[str]:
+    """
+        Schedules the stages of several BASIC jobs across OT-2s and their
+        thermocycler modules, interleaving the jobs, and saves the schedule
+        as a Gantt table in CSV and JSON. Thermocycling holds an OT-2 and
+        a thermocycler, so no other stage runs on that OT-2 meanwhile.
+        Args: job_outputs = output paths returned by dnabot, by job name
+        output_folder = folder the schedule is saved in
+        robots = number of OT-2s
+        thermocyclers = number of OT-2 thermocycler modules for the clip
+        reactions, one on each of the first OT-2s
+        run_times = see get_basic_jobs
+        Returns: paths of the CSV and JSON schedules
+    """
+    schedule = schedule_runs(get_basic_jobs(job_outputs, run_times),
+                             {ROBOT: robots, THERMOCYCLER: thermocyclers})
+    csv_path = os.path.join(output_folder, SCHEDULE_FNAME + '.csv')
+    json_path = os.path.join(output_folder, SCHEDULE_FNAME + '.json')
+    write_schedule_csv(schedule, csv_path)
+    write_schedule_json(schedule, json_path)
+    return [csv_path, json_path]
+
+
 def generate_master_mix_df(
     clip_number: int
 ) -> pd.DataFrame:
@@ -898,6 +1734,22 @@ def handle_2_columns(datalist):
     return datalist
 
 
+def mag_well(
+    clip_number: int,
+    sample_number: int
+) -> str:
+    """Determines the well a CLIP well is eluted into by the purification.
+        Args: clip_number = integer, e.g. 1 = CLIP well A1
+        sample_number = number of CLIP wells
+        Returns: well 6 columns to the right on the clip plate if the CLIP
+        wells fit in its first half, otherwise the same well of the
+        elution plate, see plan_purification
+    """
+    if sample_number > MAX_CLIPS:
+        return final_well(clip_number)
+    return final_well(clip_number + MAX_CLIPS)
+
+
 def final_well(
     sample_number: int
 ) -> str:
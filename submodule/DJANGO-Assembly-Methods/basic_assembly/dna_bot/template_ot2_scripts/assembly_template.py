@@ -14,12 +14,17 @@ def run(protocol: protocol_api.ProtocolContext):
                        p10_mount='right', p10_type='p10_single',
                        mag_plate_type='biorad_96_wellplate_200ul_pcr',
                        tube_rack_type='opentrons_24_tuberack_nest_1.5ml_snapcap',
-                       aluminum_block_type='opentrons_96_aluminumblock_biorad_wellplate_200ul'):
+                       aluminum_block_type='opentrons_96_aluminumblock_biorad_wellplate_200ul',
+                       multi_transfers=(), p10_multi_mount=None):
         """Implements final assembly reactions using an opentrons OT-2.
 
         Args:
         final_assembly_dict (dict): Dictionary with keys and values corresponding to destination and associated linker-ligated part wells, respectively.
         tiprack_num (int): Number of tipracks required during run.
+        multi_transfers (list): Column transfers of the 8-channel pipette as
+            (magbead well, destination well) in row A.
+        p10_multi_mount (str): Mount of the 8-channel pipette, None if the
+            single channel pipette makes every transfer.
 
         """
         # Constants
@@ -45,12 +50,24 @@ def run(protocol: protocol_api.ProtocolContext):
         if sample_number > 96:
             raise ValueError('Final assembly nummber cannot exceed 96.')
 
+        if p10_multi_mount is None:
+            multi_transfers = []
+        multi_tiprack_num = len(multi_transfers) // 12 + (
+            1 if len(multi_transfers) % 12 > 0 else 0)
         slots = CANDIDATE_TIPRACK_SLOTS[:tiprack_num]
+        multi_slots = CANDIDATE_TIPRACK_SLOTS[
+            tiprack_num:tiprack_num + multi_tiprack_num]
         tipracks = [protocol.load_labware(tiprack_type, slot)
                     for slot in slots]
         pipette = protocol.load_instrument(p10_type, PIPETTE_MOUNT,
                                            tip_racks=tipracks)
         pipette.flow_rate.aspirate = 20
+        if multi_transfers:
+            multi_tipracks = [protocol.load_labware(tiprack_type, slot)
+                              for slot in multi_slots]
+            multi_pipette = protocol.load_instrument(
+                'p10_multi', p10_multi_mount, tip_racks=multi_tipracks)
+            multi_pipette.flow_rate.aspirate = 20
         # Define Labware and set temperature
         temp_mod = protocol.load_module('temperature module', TEMPDECK_SLOT)
         tube_rack = protocol.load_labware(TUBE_RACK_TYPE, TUBE_RACK_POSITION)
@@ -82,8 +99,44 @@ def run(protocol: protocol_api.ProtocolContext):
                              new_tip='never')
             pipette.drop_tip()
 
+        # Column transfers, the clips of 8 destination wells at once
+        covered = set()
+        for mag_well, dest_well in multi_transfers:
+            for row in 'ABCDEFGH':
+                covered.add((row + dest_well[1:], row + mag_well[1:]))
+        single_dict = {
+            key: [value for value in values if (key, value) not in covered]
+            for key, values in final_assembly_dict.items()}
+        for i, (mag_well, dest_well) in enumerate(multi_transfers):
+            column = [row + dest_well[1:] for row in 'ABCDEFGH']
+            source = magbead_plate.wells_by_name()[mag_well]
+            destination = destination_plate.wells_by_name()[dest_well]
+            multi_pipette.pick_up_tip()
+            multi_pipette.move_to(source.bottom())
+            protocol.max_speeds['Z'] = 10
+            multi_pipette.aspirate(PART_VOL, source)
+            multi_pipette.move_to(destination.top())
+            protocol.max_speeds['Z'] = None
+            multi_pipette.dispense(PART_VOL, destination)
+            multi_pipette.touch_tip(destination)
+            # Mix columns left without single transfers after their last
+            # column transfer
+            last = i == len(multi_transfers) - 1 or \
+                multi_transfers[i + 1][1] != dest_well
+            if last and not any(single_dict.get(well, [None])
+                                for well in column):
+                multi_pipette.mix(MIX_SETTINGS[0], MIX_SETTINGS[1],
+                                  destination)
+            multi_pipette.drop_tip()
+
         # Part transfers
-        for key, values in list(final_assembly_dict.items()):
+        for key, values in list(single_dict.items()):
+            column = [row + key[1:] for row in 'ABCDEFGH']
+            if not values and not any(single_dict.get(well, [None])
+                                      for well in column):
+                continue
+            if not values:
+                pipette.pick_up_tip()
             mag_bead_wells = [magbead_plate.wells_by_name()[value]
                               for value in values]
             for i, mag_bead_well in enumerate(mag_bead_wells):
@@ -109,4 +162,6 @@ def run(protocol: protocol_api.ProtocolContext):
                    tiprack_num=tiprack_num, p10_mount=p10_mount,
                    p10_type=p10_type, mag_plate_type=mag_plate_type,
                    tube_rack_type=tube_rack_type,
-                   aluminum_block_type=aluminum_block_type)
\ No newline at end of file
+                   aluminum_block_type=aluminum_block_type,
+                   multi_transfers=multi_transfers,
+                   p10_multi_mount=p10_multi_mount)
\ No newline at end of file
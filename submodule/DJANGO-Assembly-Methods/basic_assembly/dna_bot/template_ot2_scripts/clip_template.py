@@ -20,7 +20,10 @@ def run(protocol: protocol_api.ProtocolContext):
         p10_mount='right',
         p10_type='p10_single',
         well_plate_type='biorad_96_wellplate_200ul_pcr',
-        tube_rack_type='opentrons_24_tuberack_nest_1.5ml_snapcap'):
+        tube_rack_type='opentrons_24_tuberack_nest_1.5ml_snapcap',
+        clip_commands=(),
+        p10_multi_mount=None,
+        reagent_plate_type='usascientific_12_reservoir_22ml'):
     
         """Implements linker ligation reactions using an opentrons OT-2."""
 
@@ -38,21 +41,17 @@ def run(protocol: protocol_api.ProtocolContext):
         # TUBE_RACK_TYPE = 'opentrons_24_tuberack_nest_1.5ml_snapcap'
         TUBE_RACK_TYPE = tube_rack_type
         TUBE_RACK_POSITION = '4'
-        MASTER_MIX_WELL = 'A1'
-        WATER_WELL = 'A2'
-        INITIAL_DESTINATION_WELL = 'A1'
-        MASTER_MIX_VOLUME = 20
-        LINKER_MIX_SETTINGS = (4, 10)
-        PART_MIX_SETTINGS = (4, 10)
 
         # Tiprack slots
-        total_tips = 4 * len(parts_wells)
+        total_tips = len([step for step in clip_commands
+                          if step['command'] == 'pick_up_tip' and
+                          step.get('pipette', 'single') == 'single'])
+        multi_tips = len([step for step in clip_commands
+                          if step['command'] == 'pick_up_tip' and
+                          step.get('pipette') == 'multi'])
         letter_dict = {'A': 0, 'B': 1, 'C': 2,
                        'D': 3, 'E': 4, 'F': 5, 'G': 6, 'H': 7}
 
-        initial_destination_well_index = letter_dict[INITIAL_DESTINATION_WELL[0]]*12 \
-            + int(INITIAL_DESTINATION_WELL[1]) - 1
-
         tiprack_1_tips = (
             13 - int(INITIAL_TIP[1:])) * 8 - letter_dict[INITIAL_TIP[0]]
         if total_tips > tiprack_1_tips:
@@ -61,6 +60,12 @@ def run(protocol: protocol_api.ProtocolContext):
         else:
             tiprack_num = 1
         slots = CANDIDATE_TIPRACK_SLOTS[:tiprack_num]
+        multi_tiprack_num = multi_tips // 12 + (
+            1 if multi_tips % 12 > 0 else 0)
+        multi_slots = CANDIDATE_TIPRACK_SLOTS[
+            tiprack_num:tiprack_num + multi_tiprack_num]
+        if len(slots) + len(multi_slots) < tiprack_num + multi_tiprack_num:
+            raise ValueError('Clip tiprack number exceeds number of slots.')
 
         source_plates = {}
         source_plates_keys = list(set((
@@ -76,76 +81,55 @@ def run(protocol: protocol_api.ProtocolContext):
         pipette = protocol.load_instrument('p10_single', PIPETTE_MOUNT,
                                            tip_racks=tipracks)
         pipette.flow_rate.aspirate = 20
+        pipettes = {'single': pipette}
+        if p10_multi_mount is not None:
+            multi_tipracks = [protocol.load_labware(tiprack_type, slot)
+                              for slot in multi_slots]
+            pipettes['multi'] = protocol.load_instrument(
+                'p10_multi', p10_multi_mount, tip_racks=multi_tipracks)
+            pipettes['multi'].flow_rate.aspirate = 20
         #pipette.pick_up_tip(tipracks[0].well(INITIAL_TIP))
         destination_plate = protocol.load_labware(
             DESTINATION_PLATE_TYPE, DESTINATION_PLATE_POSITION)
-        tube_rack = protocol.load_labware(TUBE_RACK_TYPE, TUBE_RACK_POSITION)
-        master_mix = tube_rack.wells_by_name()[MASTER_MIX_WELL]
-        water = tube_rack.wells_by_name()[WATER_WELL]
-        #destination_wells = destination_plate.wells(
-            #INITIAL_DESTINATION_WELL, length=int(len(parts_wells)))
-        destination_wells = destination_plate.wells()[
-            initial_destination_well_index:(
-                initial_destination_well_index + int(len(parts_wells)))]
-
-        # Transfers
-        #pipette.pick_up_tip()
-        pipette.pick_up_tip(tipracks[0].well(INITIAL_TIP))
-        pipette.transfer(MASTER_MIX_VOLUME, master_mix,
-                         destination_wells, new_tip='never', touch_tip=True,
-                         blow_out=True)
-        pipette.drop_tip()
-        pipette.transfer(water_vols, water,
-                         destination_wells, touch_tip=True,
-                         new_tip='always')
-        for clip_num in range(len(parts_wells)):
-            prefix_wells = [prefix_well.bottom() for prefix_well in
-                            source_plates[prefixes_plates[clip_num]].wells(
-                prefixes_wells[clip_num])]
-            for prefix_well in prefix_wells:
-                pipette.pick_up_tip()
-                pipette.move_to(prefix_well)
-                protocol.max_speeds['Z'] = 10
-                pipette.aspirate(1, prefix_well)
-                pipette.move_to(destination_wells[clip_num].top())
-                protocol.max_speeds['Z'] = None
-                pipette.dispense(1, destination_wells[clip_num])
-                pipette.touch_tip(destination_wells[clip_num])
-                pipette.mix(LINKER_MIX_SETTINGS[0], LINKER_MIX_SETTINGS[1],
-                            destination_wells[clip_num])
-                pipette.drop_tip()
-
-            suffix_wells = [suffix_well.bottom() for suffix_well in
-                            source_plates[suffixes_plates[clip_num]].wells(
-                suffixes_wells[clip_num])]
-            for suffix_well in suffix_wells:
-                pipette.pick_up_tip()
-                pipette.move_to(suffix_well)
-                protocol.max_speeds['Z'] = 10
-                pipette.aspirate(1, suffix_well)
-                pipette.move_to(destination_wells[clip_num].top())
-                protocol.max_speeds['Z'] = None
-                pipette.dispense(1, destination_wells[clip_num])
-                pipette.touch_tip(destination_wells[clip_num])
-                pipette.mix(LINKER_MIX_SETTINGS[0], LINKER_MIX_SETTINGS[1],
-                            destination_wells[clip_num])
-                pipette.drop_tip()
+        # Master mix and water are in a reservoir for the 8-channel pipette
+        if p10_multi_mount is None:
+            reagents = {'tube_rack': protocol.load_labware(
+                TUBE_RACK_TYPE, TUBE_RACK_POSITION)}
+        else:
+            reagents = {'reservoir': protocol.load_labware(
+                reagent_plate_type, TUBE_RACK_POSITION)}
 
-            part_wells = [part_well.bottom() for part_well in
-                          source_plates[parts_plates[clip_num]].wells(
-                                 parts_wells[clip_num])]
-            for part_well in part_wells:
+        # Transfers, planned by the generator to reuse tips where no DNA
+        # can be carried over
+        labware = {'destination': destination_plate}
+        labware.update(reagents)
+        labware.update(source_plates)
+        for step in clip_commands:
+            command = step['command']
+            pipette = pipettes[step.get('pipette', 'single')]
+            if 'well' in step:
+                well = labware[step['labware']].wells_by_name()[step['well']]
+                location = {'top': well.top(), 'bottom': well.bottom()}.get(
+                    step.get('position'), well)
+            if command == 'pick_up_tip':
                 pipette.pick_up_tip()
-                pipette.move_to(part_well)
-                protocol.max_speeds['Z'] = 10
-                pipette.aspirate(parts_vols[clip_num], part_well)
-                pipette.move_to(destination_wells[clip_num].top())
-                protocol.max_speeds['Z'] = None
-                pipette.dispense(parts_vols[clip_num],
-                                 destination_wells[clip_num])
-                pipette.touch_tip(destination_wells[clip_num])
-                pipette.mix(PART_MIX_SETTINGS[0], PART_MIX_SETTINGS[1],
-                            destination_wells[clip_num])
+            elif command == 'drop_tip':
                 pipette.drop_tip()
+            elif command == 'aspirate':
+                if step.get('slow'):
+                    pipette.move_to(location)
+                    protocol.max_speeds['Z'] = 10
+                pipette.aspirate(step['volume'], location)
+                if step.get('slow'):
+                    pipette.move_to(well.top())
+                    protocol.max_speeds['Z'] = None
+            elif command == 'dispense':
+                pipette.dispense(step['volume'], location)
+            elif command == 'touch_tip':
+                pipette.touch_tip(well)
+            elif command == 'blow_out':
+                pipette.blow_out(location)
+            elif command == 'mix':
+                pipette.mix(step['repetitions'], step['volume'], location)
 
-    clip(**clips_dict, p10_mount=p10_mount, p10_type=p10_type, well_plate_type=well_plate_type, tube_rack_type=tube_rack_type)
+    clip(**clips_dict, clip_commands=clip_commands, p10_mount=p10_mount, p10_type=p10_type, well_plate_type=well_plate_type, tube_rack_type=tube_rack_type, p10_multi_mount=p10_multi_mount, reagent_plate_type=reagent_plate_type)
@@ -25,13 +25,27 @@ def run(protocol: protocol_api.ProtocolContext):
         well_plate_type='biorad_96_wellplate_200ul_pcr',
         reagent_plate_type='usascientific_12_reservoir_22ml',
         bead_container_type='usascientific_96_wellplate_2.4ml_deep',
-        multi=True):
+        multi=True,
+        batches=None,
+        tiprack_slots=None,
+        elution_plate_slot=None):
         """Implements magbead purification reactions for BASIC assembly using an opentrons OT-2.
 
         Selected args:
             ethanol_well (str): well in reagent container containing ethanol.
-            elution_buffer_well (str): well in reagent container containing elution buffer.
-            sample_offset (int): offset the intial sample column by the specified value.
+            elution_buffer_well (str): well in reagent container containing
+                elution buffer.
+            sample_offset (int): offset the intial sample column by the
+                specified value.
+            batches (list): batches purified one after the other as
+                [first sample, number of samples], pausing to replace the tip
+                racks in between. Defaults to one batch of sample_number
+                samples from sample_offset.
+            tiprack_slots (list): slots of the tip racks. Defaults to enough
+                slots for the samples.
+            elution_plate_slot (str): slot of a plate the samples are eluted
+                into, in the same wells. Defaults to the second half of the
+                magnetic plate.
 
         """
 
@@ -69,23 +83,22 @@ def run(protocol: protocol_api.ProtocolContext):
         ELUTION_DEAD_VOL = 2
 
         # Errors
-        if sample_number > 48:
-            raise ValueError('sample number cannot exceed 48')
+        if sample_number > 96:
+            raise ValueError('sample number cannot exceed 96')
+        if sample_number > 48 and elution_plate_slot is None:
+            raise ValueError(
+                'sample number cannot exceed 48 without an elution plate')
+        if batches is None:
+            batches = [[sample_offset * 8 if multi else sample_offset,
+                        sample_number]]
 
         # Tips and pipette
-        if multi:
+        if tiprack_slots is None:
             total_tips = sample_number * 2 * TIPS_PER_SAMPLE
-        else:
-            if sample_number % 8 > 0:
-                tip_mult = 8*((sample_number // 8) + 1)
-            else:
-                tip_mult = sample_number
-            total_tips = tip_mult * 2 * TIPS_PER_SAMPLE
-        total_tips = sample_number * 2 * TIPS_PER_SAMPLE
-        tiprack_num = total_tips // 96 + (1 if total_tips % 96 > 0 else 0)
-        slots = CANDIDATE_TIPRACK_SLOTS[:tiprack_num]
+            tiprack_num = total_tips // 96 + (1 if total_tips % 96 > 0 else 0)
+            tiprack_slots = CANDIDATE_TIPRACK_SLOTS[:tiprack_num]
         tipracks = [protocol.load_labware(tiprack_type, slot)
-                    for slot in slots]
+                    for slot in tiprack_slots]
         pipette = protocol.load_instrument(p300_type, PIPETTE_MOUNT,
                                            tip_racks=tipracks)
 
@@ -103,23 +116,15 @@ def run(protocol: protocol_api.ProtocolContext):
             REAGENT_CONTAINER_TYPE, REAGENT_CONTAINER_POSITION)
         bead_container = protocol.load_labware(BEAD_CONTAINER_TYPE,
                                                BEAD_CONTAINER_POSITION)
-        col_num = sample_number // 8 + (1 if sample_number % 8 > 0 else 0)
-
-        if multi:
-            samples = [col for col in mag_plate.rows()[0][
-                sample_offset:sample_offset+col_num]]
-            mixing = [col for col in mix_plate.rows()[0][
-                sample_offset:sample_offset+col_num]]
-            output = [col for col in mag_plate.rows()[0][
-                sample_offset+6:sample_offset+6+col_num]]
+        # Samples are eluted 6 columns to the right on the magnetic plate,
+        # or into the same wells of the elution plate
+        if elution_plate_slot is None:
+            output_plate = mag_plate
+            output_offset = 6
         else:
-            start = sample_offset
-            stop = start + sample_number
-            samples = mag_plate.wells()[start:stop]
-            mixing = mix_plate.wells()[start:stop]
-            start = sample_offset + 6*8
-            stop = start + sample_number
-            output = mag_plate.wells()[start:stop]
+            output_plate = protocol.load_labware(
+                MIX_PLATE_TYPE, elution_plate_slot, label='elution plate')
+            output_offset = 0
 
         # Define reagents and liquid waste
         liquid_waste = reagent_container.wells_by_name()[LIQUID_WASTE_WELL]
@@ -135,95 +140,125 @@ def run(protocol: protocol_api.ProtocolContext):
             mix_vol = bead_volume / 2
         total_vol = bead_volume + sample_volume + DEAD_TOTAL_VOL
 
-        # Mix beads and PCR samples and incubate
-        for target, dest in zip(samples, mixing):
-            # Aspirate beads
-            pipette.pick_up_tip()
-            # pipette.mix(5, mix_vol, beads)
-            pipette.transfer(bead_volume, beads, dest, new_tip='never')
-            pipette.move_to(target.bottom())
-
-            for key in SLOW_HEAD_SPEEDS.keys():
-                protocol.max_speeds[key] = SLOW_HEAD_SPEEDS[key]
-            pipette.aspirate(sample_volume + DEAD_TOTAL_VOL, target.bottom())
-            pipette.move_to(dest.top())
-            for key in DEFAULT_HEAD_SPEEDS.keys():
-                protocol.max_speeds[key] = DEFAULT_HEAD_SPEEDS[key]
-            pipette.dispense(sample_volume + DEAD_TOTAL_VOL, dest)
-            pipette.mix(IMMOBILISE_MIX_REPS, mix_vol, dest)
-            pipette.touch_tip(dest)
-            pipette.blow_out()
-            pipette.drop_tip()
-
-        # Immobilise sample
-        protocol.delay(minutes=incubation_time)
-
-        # Transfer sample back to magdeck
-        for target in range(int(len(samples))):
-            pipette.transfer(total_vol, mixing[target], samples[target],
-                             blow_out=True)
-
-        # Engagae MagDeck and incubate
-        mag_mod.engage(height=MAGDECK_HEIGHT)
-        protocol.delay(minutes=settling_time)
-
-        # Remove supernatant from magnetic beads
-        for target in samples:
-            pipette.transfer(total_vol, target, liquid_waste, blow_out=True)
-
-        # Wash beads twice with 70% ethanol
-        air_vol = pipette.max_volume * AIR_VOL_COEFF
-        for cycle in range(2):
+        for batch, (first_sample, batch_samples) in enumerate(batches):
+            if batch > 0:
+                protocol.pause('Replace the tip racks, refill the ethanol '
+                               'and elution buffer and empty the liquid '
+                               'waste, then resume.')
+                pipette.reset_tipracks()
+            col_num = batch_samples // 8 + (1 if batch_samples % 8 > 0 else 0)
+
+            if multi:
+                offset = first_sample // 8
+                samples = [col for col in mag_plate.rows()[0][
+                    offset:offset+col_num]]
+                mixing = [col for col in mix_plate.rows()[0][
+                    offset:offset+col_num]]
+                output = [col for col in output_plate.rows()[0][
+                    offset+output_offset:offset+output_offset+col_num]]
+            else:
+                start = first_sample
+                stop = start + batch_samples
+                samples = mag_plate.wells()[start:stop]
+                mixing = mix_plate.wells()[start:stop]
+                start = first_sample + output_offset*8
+                stop = start + batch_samples
+                output = output_plate.wells()[start:stop]
+
+            # Mix beads and PCR samples and incubate
+            for target, dest in zip(samples, mixing):
+                # Aspirate beads
+                pipette.pick_up_tip()
+                # pipette.mix(5, mix_vol, beads)
+                pipette.transfer(bead_volume, beads, dest, new_tip='never')
+                pipette.move_to(target.bottom())
+
+                for key in SLOW_HEAD_SPEEDS.keys():
+                    protocol.max_speeds[key] = SLOW_HEAD_SPEEDS[key]
+                pipette.aspirate(sample_volume + DEAD_TOTAL_VOL,
+                                 target.bottom())
+                pipette.move_to(dest.top())
+                for key in DEFAULT_HEAD_SPEEDS.keys():
+                    protocol.max_speeds[key] = DEFAULT_HEAD_SPEEDS[key]
+                pipette.dispense(sample_volume + DEAD_TOTAL_VOL, dest)
+                pipette.mix(IMMOBILISE_MIX_REPS, mix_vol, dest)
+                pipette.touch_tip(dest)
+                pipette.blow_out()
+                pipette.drop_tip()
+
+            # Immobilise sample
+            protocol.delay(minutes=incubation_time)
+
+            # Transfer sample back to magdeck
+            for target in range(int(len(samples))):
+                pipette.transfer(total_vol, mixing[target], samples[target],
+                                 blow_out=True)
+
+            # Engagae MagDeck and incubate
+            mag_mod.engage(height=MAGDECK_HEIGHT)
+            protocol.delay(minutes=settling_time)
+
+            # Remove supernatant from magnetic beads
             for target in samples:
-                pipette.transfer(ETHANOL_VOL, ethanol, target, air_gap=air_vol)
-            protocol.delay(minutes=WASH_TIME)
+                pipette.transfer(total_vol, target, liquid_waste,
+                                 blow_out=True)
+
+            # Wash beads twice with 70% ethanol
+            air_vol = pipette.max_volume * AIR_VOL_COEFF
+            for cycle in range(2):
+                for target in samples:
+                    pipette.transfer(ETHANOL_VOL, ethanol, target,
+                                     air_gap=air_vol)
+                protocol.delay(minutes=WASH_TIME)
+                for target in samples:
+                    pipette.transfer(ETHANOL_VOL + ETHANOL_DEAD_VOL, target,
+                                     liquid_waste, air_gap=air_vol)
+
+            # Dry at RT
+            protocol.delay(minutes=drying_time)
+
+            # Disengage MagDeck
+            mag_mod.disengage()
+
+            # Mix beads with elution buffer
+            if elution_buffer_volume / 2 > pipette.max_volume:
+                elution_mix_vol = pipette.max_volume
+            else:
+                elution_mix_vol = elution_buffer_volume / 2
             for target in samples:
-                pipette.transfer(ETHANOL_VOL + ETHANOL_DEAD_VOL, target,
-                                 liquid_waste, air_gap=air_vol)
+                pipette.transfer(elution_buffer_volume, elution_buffer, target,
+                                 mix_after=(ELUTION_MIX_REPS, elution_mix_vol))
 
-        # Dry at RT
-        protocol.delay(minutes=drying_time)
+            # Incubate at RT for "elution_time" minutes
+            protocol.delay(minutes=elution_time)
 
-        # Disengage MagDeck
-        mag_mod.disengage()
+            # Engagae MagDeck for 1 minute and remain engaged for DNA elution
+            mag_mod.engage(height=MAGDECK_HEIGHT)
+            protocol.delay(minutes=ELUTANT_SEP_TIME)
 
-        # Mix beads with elution buffer
-        if elution_buffer_volume / 2 > pipette.max_volume:
-            mix_vol = pipette.max_volume
-        else:
-            mix_vol = elution_buffer_volume / 2
-        for target in samples:
-            pipette.transfer(elution_buffer_volume, elution_buffer,
-                             target, mix_after=(ELUTION_MIX_REPS, mix_vol))
-
-        # Incubate at RT for "elution_time" minutes
-        protocol.delay(minutes=elution_time)
-
-        # Engagae MagDeck for 1 minute and remain engaged for DNA elution
-        mag_mod.engage(height=MAGDECK_HEIGHT)
-        protocol.delay(minutes=ELUTANT_SEP_TIME)
-
-        # Transfer clean PCR product to a new well
-        for target, dest in zip(samples, output):
-            pipette.pick_up_tip()
-            pipette.move_to(target.bottom())
-            for key in SLOW_HEAD_SPEEDS.keys():
-                protocol.max_speeds[key] = SLOW_HEAD_SPEEDS[key]
-            pipette.aspirate(elution_buffer_volume - ELUTION_DEAD_VOL,
-                             target.bottom())
-            pipette.move_to(dest.top())
-            for key in DEFAULT_HEAD_SPEEDS.keys():
-                protocol.max_speeds[key] = DEFAULT_HEAD_SPEEDS[key]
-            pipette.dispense(elution_buffer_volume - ELUTION_DEAD_VOL, dest)
-            pipette.touch_tip(dest)
-            pipette.drop_tip()
-
-        # Disengage MagDeck
-        mag_mod.disengage()
+            # Transfer clean PCR product to a new well
+            for target, dest in zip(samples, output):
+                pipette.pick_up_tip()
+                pipette.move_to(target.bottom())
+                for key in SLOW_HEAD_SPEEDS.keys():
+                    protocol.max_speeds[key] = SLOW_HEAD_SPEEDS[key]
+                pipette.aspirate(elution_buffer_volume - ELUTION_DEAD_VOL,
+                                 target.bottom())
+                pipette.move_to(dest.top())
+                for key in DEFAULT_HEAD_SPEEDS.keys():
+                    protocol.max_speeds[key] = DEFAULT_HEAD_SPEEDS[key]
+                pipette.dispense(elution_buffer_volume - ELUTION_DEAD_VOL,
+                                 dest)
+                pipette.touch_tip(dest)
+                pipette.drop_tip()
+
+            # Disengage MagDeck
+            mag_mod.disengage()
 
 
     magbead(sample_number=sample_number,
             ethanol_well=ethanol_well, elution_buffer_well='A1',
             p300_mount=p300_mount, p300_type=p300_type,
             well_plate_type=well_plate_type, reagent_plate_type=reagent_plate_type,
-            bead_container_type=bead_container_type, multi=multi)
+            bead_container_type=bead_container_type, multi=multi,
+            **purification_plan)
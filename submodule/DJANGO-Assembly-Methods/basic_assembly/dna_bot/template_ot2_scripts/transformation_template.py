@@ -26,7 +26,18 @@ def run(protocol: protocol_api.ProtocolContext):
             wells) if wells.index(well) == i]
         return transformation_wells
 
-    def tiprack_slots(spotting_tuples, max_spot_vol=5):
+    def column_wells(wells):
+        """Returns the row A well of each unique column of wells, where
+        the 8-channel p10 is positioned to reach the whole column.
+
+        Args:
+        wells (list of str): wells, e.g. ['A1', 'B1', 'A2'].
+
+        """
+        tops = ['A' + well[1:] for well in wells]
+        return [well for i, well in enumerate(tops) if tops.index(well) == i]
+
+    def tiprack_slots(spotting_tuples, max_spot_vol=5, multi=False):
         """Calculates p10 and p300 tiprack slots required.
 
         Args:
@@ -34,6 +45,8 @@ def run(protocol: protocol_api.ProtocolContext):
             in the form: ((source wells), (target wells), (spotting volumes)). 
             Each unique transformation well is resuspended once prior to spotting.
         max_spot_vol (float): Maximum volume that is spotted per spot reaction.
+        multi (bool): True if the p10 is an 8-channel pipette, picking up
+            a column of tips per column of wells.
 
         """
         # Reactions' number
@@ -46,7 +59,15 @@ def run(protocol: protocol_api.ProtocolContext):
             spotting_reactions = spotting_reactions + int(np.sum(spots))
 
         # p10 tiprack slots
-        p10_tips = transformation_reactions + spotting_reactions
+        if multi:
+            transformation_columns = len(column_wells(
+                generate_transformation_wells(spotting_tuples)))
+            spotting_columns = sum(
+                int(np.ceil(max(spotting_tuple[2]) / max_spot_vol))
+                for spotting_tuple in spotting_tuples)
+            p10_tips = (transformation_columns + spotting_columns) * 8
+        else:
+            p10_tips = transformation_reactions + spotting_reactions
         p10_tiprack_slots = p10_tips // 96 + 1 if p10_tips % 96 > 0 \
             else p10_tips / 96
 
@@ -75,14 +96,15 @@ def run(protocol: protocol_api.ProtocolContext):
         protocol.pause()
         protocol.comment('Load competent cells, uncap and resume run')
 
+        # Transfer final assemblies, by columns with the 8-channel p10
+        if multi:
+            transformation_wells = column_wells(transformation_wells)
         assembly_plate_transformation_wells = [
             assembly_plate.wells_by_name()[well]
             for well in transformation_wells]
         transformation_plate_transformation_wells = [
             transformation_plate.wells_by_name()[well]
             for well in transformation_wells]
-
-        # Transfer final assemblies
         p10_pipette.transfer(ASSEMBLY_VOL,
                              assembly_plate_transformation_wells,
                              transformation_plate_transformation_wells,
@@ -216,9 +238,11 @@ def run(protocol: protocol_api.ProtocolContext):
                 protocol.max_speeds[key] = DEFAULT_HEAD_SPEED[key]
             p10_pipette.move_to(target.top(SAFE_HEIGHT))
 
-            # Dispose of dead volume and tip
-            p10_pipette.dispense(dead_vol, spotting_waste)
-            p10_pipette.blow_out()
+            # Dispose of dead volume and tip, the 8-channel p10 dropping
+            # the dead volume with its tips
+            if not multi:
+                p10_pipette.dispense(dead_vol, spotting_waste)
+                p10_pipette.blow_out()
             p10_pipette.drop_tip()
 
         def spot_tuple(spotting_tuple):
@@ -248,16 +272,46 @@ def run(protocol: protocol_api.ProtocolContext):
                             vol)
                         spot_vols[index] = spot_vols[index] - vol
 
+        def spot_column(spotting_tuple):
+            """Spots all reactions defined by the spotting tuple, a column
+               of wells, in passes of the 8-channel p10 at the largest
+               spotting volume of the column. The spare rows of a partial
+               column hold competent cells without DNA and are spotted as
+               blanks. Requires the function spot.
+
+                Args:
+                spotting_tuple (tuple): Spotting reactions given in the form:
+                (source wells), (target wells), (spotting volumes).
+
+            """
+            source_well = column_wells(spotting_tuple[0])[0]
+            target_well = column_wells(spotting_tuple[1])[0]
+            spot_vol = max(spotting_tuple[2])
+            blanks = [row + target_well[1:] for row in 'ABCDEFGH'
+                      if row + target_well[1:] not in spotting_tuple[1]]
+            if blanks:
+                protocol.comment('Agar wells {} are blanks: competent cells '
+                                 'without DNA.'.format(', '.join(blanks)))
+            while spot_vol > 0:
+                vol = min(spot_vol, max_spot_vol)
+                spot(transformation_plate.wells_by_name()[source_well],
+                     agar_plate.wells_by_name()[target_well], vol)
+                spot_vol = spot_vol - vol
+
         # Constants
         TRANSFORMATION_MIX_SETTINGS = [4, 50]
 
-        # Spot transformation reactions
+        # Spot transformation reactions, mixing each column once
+        mixed_cols = []
         for spotting_tuple in spotting_tuples:
             source_wells_cols = [source_well[1:]
                                  for source_well in spotting_tuple[0]]
             unique_cols = [int(col)-1 for i, col in enumerate(
                 source_wells_cols) if source_wells_cols.index(col) == i]
             for col in unique_cols:
+                if col in mixed_cols:
+                    continue
+                mixed_cols.append(col)
                 transformation_plate_mix_well = transformation_plate.rows(
                 )[0][col]
                 p300_pipette.pick_up_tip()
@@ -265,7 +319,10 @@ def run(protocol: protocol_api.ProtocolContext):
                                  TRANSFORMATION_MIX_SETTINGS[1],
                                  transformation_plate_mix_well)
                 p300_pipette.drop_tip()
-            spot_tuple(spotting_tuple)
+            if multi:
+                spot_column(spotting_tuple)
+            else:
+                spot_tuple(spotting_tuple)
 
     # Run protocol
 
@@ -291,6 +348,8 @@ def run(protocol: protocol_api.ProtocolContext):
     TUBE_RACK_TYPE = tube_rack_type
     TUBE_RACK_SLOT = '11'
     SPOTTING_WASTE_WELL = 'A1'
+    # An 8-channel p10 transfers and spots whole columns
+    multi = p10_multi_mount is not None
 
     # load in agar plate through opentrons app
     # Using opentrons_simulate have -L followed by custom labware path
@@ -299,7 +358,7 @@ def run(protocol: protocol_api.ProtocolContext):
     AGAR_PLATE_SLOT = '1'
 
     # Tiprack slots
-    p10_p300_tiprack_slots = tiprack_slots(spotting_tuples)
+    p10_p300_tiprack_slots = tiprack_slots(spotting_tuples, multi=multi)
     p10_slots = CANDIDATE_P10_SLOTS[
         :p10_p300_tiprack_slots[0]]
     p300_slots = CANDIDATE_P300_SLOTS[
@@ -310,8 +369,12 @@ def run(protocol: protocol_api.ProtocolContext):
                     for slot in p10_slots]
     p300_tipracks = [protocol.load_labware(P300_TIPRACK_TYPE, slot)
                      for slot in p300_slots]
-    p10_pipette = protocol.load_instrument(p10_type, P10_MOUNT,
-                                           tip_racks=p10_tipracks)
+    if multi:
+        p10_pipette = protocol.load_instrument('p10_multi', p10_multi_mount,
+                                               tip_racks=p10_tipracks)
+    else:
+        p10_pipette = protocol.load_instrument(p10_type, P10_MOUNT,
+                                               tip_racks=p10_tipracks)
     p300_pipette = protocol.load_instrument(p300_type, P300_MOUNT,
                                             tip_racks=p300_tipracks)
 
@@ -326,7 +389,8 @@ def run(protocol: protocol_api.ProtocolContext):
 
     # Register agar_plate for calibration
     p10_pipette.transfer(1, agar_plate.wells_by_name()[
-        'A1'], agar_plate.wells_by_name()['H12'], trash=False)
+        'A1'], agar_plate.wells_by_name()['A12' if multi else 'H12'],
+        trash=False)
 
     # Run functions
     transformation_setup(generate_transformation_wells(spotting_tuples))
@@ -6,6 +6,9 @@ import os
 TEST_DIR = "/home/runner/work/DJANGO-Assembly-Methods/DJANGO-Assembly-Methods/basic_assembly/tests/"
 sys.path.append("/home/runner/work/DJANGO-Assembly-Methods/DJANGO-Assembly-Methods/basic_assembly/dna_bot/")
 import dnabot_app
+from sbol_parser_api.assembly_plan import (
+    AssemblyPlan, PlanConstruct, PlanPart, PlanPlate)
+from sbol_parser_api.protocol_validation import ERROR, WARNING
 
 
 class DNABotAppTestCase(unittest.TestCase):
@@ -40,6 +43,15 @@ class DNABotAppTestCase(unittest.TestCase):
                         constructs[i][col].to_list(),
                         self.constructs_lists[i][col].to_list())
 
+    def test_generate_constructs_list_from_plan(self):
+        plan = AssemblyPlan('basic', constructs=[PlanConstruct(
+            'A1', self.constructs_csv_lists[1][1:])])
+        constructs = dnabot_app.generate_constructs_list_from_plan(plan)
+        self.assertEqual(len(constructs), len(self.constructs_lists))
+        for col in constructs[0].columns:
+            self.assertListEqual(constructs[0][col].to_list(),
+                                 self.constructs_lists[0][col].to_list())
+
     def test_generate_clips_df(self):
         clips = dnabot_app.generate_clips_df(self.constructs_lists)
         for col in clips.columns:
@@ -57,6 +69,15 @@ class DNABotAppTestCase(unittest.TestCase):
                 self.assertListEqual(part[col].to_list(),
                                      self.parts_df_1[col].to_list())
 
+    def test_generate_sources_dict_from_plan(self):
+        plan = AssemblyPlan('basic', plates=[PlanPlate('part_linker_1', [
+            PlanPart(*part) for part in self.parts_csv_lists[1:]])])
+        source_dict, part = dnabot_app.generate_sources_dict_from_plan(plan)
+        self.assertDictEqual(source_dict, self.sources_dict)
+        for col in part.columns:
+            self.assertListEqual(part[col].to_list(),
+                                 self.parts_df_1[col].to_list())
+
     def test_fill_parts_df(self):
         part = dnabot_app.fill_parts_df(self.clips_df_1, self.parts_df_1)
         for col in part.columns:
@@ -90,7 +111,237 @@ class DNABotAppTestCase(unittest.TestCase):
         spotting_tuples = dnabot_app.generate_spotting_tuples(
             self.constructs_lists, SPOTTING_VOLS_DICT)
         self.assertListEqual(spotting_tuples, self.spotting_tuples)
+        # 10 constructs, the ninth with more parts, spotted by column
+        constructs_list = [pd.DataFrame(data={'parts': ['p'] * number})
+                           for number in [5] * 8 + [6, 5]]
+        vols_dict = {5: 5, 6: 10}
+        spotting_tuples = dnabot_app.generate_spotting_tuples(
+            constructs_list, vols_dict)
+        self.assertListEqual(
+            [spotting_tuple[0] for spotting_tuple in spotting_tuples],
+            [tuple(row + '1' for row in 'ABCDEFGH'), ('A2', 'B2')])
+        self.assertTupleEqual(spotting_tuples[1][2], (10, 5))
+        spotting_tuples = dnabot_app.generate_spotting_tuples(
+            constructs_list, vols_dict, multi=True)
+        self.assertTupleEqual(spotting_tuples[0][2], (5,) * 8)
+        self.assertTupleEqual(spotting_tuples[1][2], (10, 10))
+        # The 8-channel p10 spots the spare rows of column 2 as blanks
+        self.assertListEqual(
+            dnabot_app.get_spotting_blanks(
+                [well for wells, _, _ in spotting_tuples for well in wells]),
+            [row + '2' for row in 'CDEFGH'])
+
+    def test_plan_clip_transfers(self):
+        clips_dict = {key: value * 2 for key, value in self.clips_dict.items()}
+        commands = dnabot_app.plan_clip_transfers(clips_dict)
+        tips = [step for step in commands if step['command'] == 'pick_up_tip']
+        # master mix, water, 5 shared multi-dispenses, 2 DNA per clip well
+        self.assertEqual(len(tips), 2 + 5 + 2 * 10)
+        mixed = [step['well'] for step in commands if step['command'] == 'mix']
+        self.assertListEqual(
+            mixed, [dnabot_app.final_well(i + 1) for i in range(10)])
+        # A tip never goes back to a DNA source after dispensing into a clip
+        # well, nor goes on to another well after touching DNA
+        dna_wells = set()
+        for step in commands:
+            if step['command'] == 'pick_up_tip':
+                tip_wells, dna = [], False
+            elif step['command'] == 'aspirate' and step.get('slow'):
+                self.assertListEqual(tip_wells, [])
+                dna = True
+            elif step['command'] == 'dispense' and \
+                    step.get('position') != 'top':
+                self.assertFalse(set(tip_wells) & dna_wells)
+                tip_wells.append(step['well'])
+            elif step['command'] == 'drop_tip' and tip_wells and dna:
+                dna_wells.update(tip_wells)
+
+    def test_group_by_volume(self):
+        groups = dnabot_app.group_by_volume(
+            [('A1', 4), ('B1', 4), ('C1', 4), ('D1', 10)], 10)
+        self.assertListEqual(
+            groups, [[('A1', 4), ('B1', 4)], [('C1', 4)], [('D1', 10)]])
+
+    def test_optimise_column_layout(self):
+        # 8 promoters x 2 CDSs, 2 final assembly columns
+        constructs_list = [pd.DataFrame.from_dict({
+            'prefixes': ['LMS-P', 'LMP-P', 'L1-P', 'L2-P'],
+            'parts': ['dummyBackbone', pro, 'RBS', cds],
+            'suffixes': ['LMP-S', 'L1-S', 'L2-S', 'LMS-S']})
+            for cds in ['CDS1', 'CDS2'] for pro in
+            ['Pro%d' % i for i in range(8)]]
+        constructs, clips_df, assignments, multi_transfers = \
+            dnabot_app.optimise_column_layout(constructs_list)
+        self.assertEqual(len(constructs), len(constructs_list))
+        self.assertLessEqual(clips_df['number'].sum(), dnabot_app.MAX_CLIPS)
+        # the promoter column serves both final assembly columns without
+        # extra CLIP wells, a backbone column would need 6 more
+        self.assertEqual(len(multi_transfers), 2)
+        self.assertListEqual([dest for _, dest in multi_transfers],
+                             ['A1', 'A2'])
+        clip_by_mag_well = {}
+        for _, row in clips_df.iterrows():
+            for mag_well in row['mag_well']:
+                clip_by_mag_well[mag_well] = (
+                    row['prefixes'], row['parts'], row['suffixes'])
+        for construct, mag_wells in zip(constructs, assignments):
+            self.assertListEqual(
+                [clip_by_mag_well[well] for well in mag_wells],
+                list(construct[['prefixes', 'parts', 'suffixes']].itertuples(
+                    index=False, name=None)))
+        names = sorted({name for construct in constructs_list
+                        for column in construct.columns
+                        for name in construct[column]})
+        final_assembly_dict, _, _ = dnabot_app.generate_final_assembly_dict(
+            constructs, clips_df, pd.DataFrame(data={'name': names}),
+            assignments)
+        single_transfers = dnabot_app.get_single_transfers(
+            final_assembly_dict, multi_transfers)
+        self.assertEqual(
+            sum(len(values) for values in single_transfers.values()),
+            16 * 4 - 2 * dnabot_app.ROWS_PER_COLUMN)
+        self.assertEqual(dnabot_app.calculate_final_assembly_tipracks(
+            final_assembly_dict, multi_transfers), 1)
+
+    def test_plan_clip_transfers_multi(self):
+        clips_dict = {key: value * 8 for key, value in self.clips_dict.items()}
+        commands = dnabot_app.plan_clip_transfers(clips_dict, multi=True)
+        multi = [step for step in commands if step.get('pipette') == 'multi']
+        # master mix in 2 dispenses and water of the 5 full columns by the
+        # 8-channel
+        self.assertEqual(len([step for step in multi
+                              if step['command'] == 'dispense']), 3 * 5)
+        self.assertTrue(all(step['well'][0] == 'A' for step in multi
+                            if 'well' in step))
+        self.assertFalse(any(
+            step['labware'] == 'tube_rack' for step in commands
+            if 'labware' in step))
+
+    def test_validate_plan(self):
+        commands = dnabot_app.plan_clip_transfers(self.clips_dict)
+        diagnostics = dnabot_app.validate_plan(
+            self.clips_df, self.parts_df, self.clips_dict, commands,
+            self.final_assembly_dict, self.final_assembly_tipracks, [],
+            'right', 'left')
+        self.assertListEqual(diagnostics, [])
+        # 100 samples do not fit in the clip plate
+        clips_df = self.clips_df.assign(number=[20, 20, 20, 20, 20])
+        diagnostics = dnabot_app.validate_plan(
+            clips_df, self.parts_df, self.clips_dict, commands,
+            self.final_assembly_dict, self.final_assembly_tipracks, [],
+            'right', 'right')
+        self.assertListEqual(
+            [(diagnostic.stage, diagnostic.code)
+             for diagnostic in diagnostics],
+            [('purification', 'samples'), ('purification', 'batches'),
+             ('purification', 'elution-plate'), ('transformation', 'mount')])
+        # The 8-channel p10 spots the empty rows of column 1 as blanks
+        diagnostics = dnabot_app.validate_plan(
+            self.clips_df, self.parts_df, self.clips_dict, commands,
+            self.final_assembly_dict, self.final_assembly_tipracks, [],
+            'right', 'left', p10_multi_mount='left')
+        blank_spots = [diagnostic for diagnostic in diagnostics
+                       if diagnostic.code == 'blank-spots']
+        self.assertListEqual(
+            [(diagnostic.stage, diagnostic.severity)
+             for diagnostic in blank_spots], [('transformation', WARNING)])
+        self.assertIn('B1', blank_spots[0].message)
+
+    def test_validate_plan_purification(self):
+        commands = dnabot_app.plan_clip_transfers(self.clips_dict)
+        # Tips of the 8-channel p300 are counted per column of samples and
+        # the liquid waste takes 6 columns, so up to 48 samples are purified
+        # in one batch into the clip plate
+        for sample_number, codes in [
+                (30, []), (48, []), (49, ['batches', 'elution-plate']),
+                (96, ['batches', 'elution-plate']),
+                (97, ['samples', 'batches', 'elution-plate'])]:
+            numbers = [sample_number // 5] * 5
+            numbers[0] += sample_number % 5
+            diagnostics = dnabot_app.validate_plan(
+                self.clips_df.assign(number=numbers), self.parts_df,
+                self.clips_dict, commands, self.final_assembly_dict,
+                self.final_assembly_tipracks, [], 'right', 'left')
+            self.assertListEqual(
+                [(diagnostic.code, diagnostic.severity)
+                 for diagnostic in diagnostics
+                 if diagnostic.stage == 'purification'],
+                [(code, ERROR if code == 'samples' else WARNING)
+                 for code in codes])
+
+    def test_validate_plan_deck_slots(self):
+        commands = dnabot_app.plan_clip_transfers(self.clips_dict)
+        # An elution plate on the mix plate and a source plate on the clip
+        # plate
+        clips_df = self.clips_df.assign(number=[12, 12, 12, 12, 12])
+        purification_plan = dnabot_app.plan_purification(
+            60, slots=['3', '6', '9', '2', '5', '10', '4'])
+        parts_df = self.parts_df.assign(plate='1')
+        diagnostics = dnabot_app.validate_plan(
+            clips_df, parts_df, self.clips_dict, commands,
+            self.final_assembly_dict, self.final_assembly_tipracks, [],
+            'right', 'left', purification_plan=purification_plan)
+        deck_slots = [diagnostic for diagnostic in diagnostics
+                      if diagnostic.code == 'deck-slot']
+        self.assertListEqual(
+            [(diagnostic.stage, diagnostic.severity)
+             for diagnostic in deck_slots],
+            [('clip', ERROR), ('purification', ERROR)])
+        self.assertIn('clip plate', deck_slots[0].message)
+        self.assertIn('elution plate', deck_slots[1].message)
+
+    def test_validate_plan_reservoir(self):
+        commands = dnabot_app.plan_clip_transfers(self.clips_dict)
+        # 64 samples in one batch overflow the liquid waste well
+        clips_df = self.clips_df.assign(number=[16, 12, 12, 12, 12])
+        purification_plan = dict(dnabot_app.plan_purification(64),
+                                 batches=[[0, 64]])
+        diagnostics = dnabot_app.validate_plan(
+            clips_df, self.parts_df, self.clips_dict, commands,
+            self.final_assembly_dict, self.final_assembly_tipracks, [],
+            'right', 'left', purification_plan=purification_plan)
+        well_volumes = [diagnostic for diagnostic in diagnostics
+                        if diagnostic.code == 'well-volume']
+        self.assertListEqual(
+            [(diagnostic.stage, diagnostic.severity)
+             for diagnostic in well_volumes], [('purification', ERROR)])
+        self.assertIn('liquid waste', well_volumes[0].message)
+
+    def test_plan_purification(self):
+        self.assertDictEqual(dnabot_app.plan_purification(16), {
+            'batches': [[0, 16]], 'tiprack_slots': ['3', '6'],
+            'elution_plate_slot': None})
+        # 96 samples need 108 columns of tips, over the 6 free slots
+        plan = dnabot_app.plan_purification(96)
+        self.assertListEqual(plan['batches'], [[0, 48], [48, 48]])
+        self.assertListEqual(plan['tiprack_slots'],
+                             ['3', '6', '9', '2', '5'])
+        self.assertEqual(plan['elution_plate_slot'], '11')
+        # 64 samples fit the tips but not the liquid waste of one batch
+        plan = dnabot_app.plan_purification(64)
+        self.assertListEqual(plan['batches'], [[0, 32], [32, 32]])
+        self.assertListEqual(plan['tiprack_slots'], ['3', '6', '9'])
+        plan = dnabot_app.plan_purification(90, multi=False)
+        self.assertListEqual(plan['batches'], [[0, 48], [48, 42]])
+        self.assertEqual(len(plan['tiprack_slots']), 5)
+        self.assertEqual(dnabot_app.mag_well(1, 48), 'A7')
+        self.assertEqual(dnabot_app.mag_well(1, 49), 'A1')
 
+    def test_get_basic_jobs(self):
+        paths = [os.path.join('job', script_name) for _, script_name, _, _
+                 in dnabot_app.BASIC_STAGES]
+        jobs = dnabot_app.get_basic_jobs(
+            {'a': paths, 'b': paths}, run_times={paths[0]: 600})
+        self.assertListEqual([job.name for job in jobs], ['a', 'b'])
+        self.assertListEqual(
+            [stage.name for stage in jobs[0].stages],
+            ['clip', 'thermocycle', 'purification', 'assembly',
+             'transformation'])
+        self.assertEqual(jobs[0].stages[0].duration, 600)
+        self.assertEqual(jobs[0].stages[2].duration,
+                         dnabot_app.BASIC_STAGES[2][3])
+        with self.assertRaises(ValueError):
+            dnabot_app.get_basic_jobs({'a': paths[1:]})
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,9 +1,15 @@
 import os
 import csv
-import json
 import math
 import pandas as pd
 from typing import List, Dict, Tuple
+from sbol_parser_api.assembly_plan import AssemblyPlan
+from sbol_parser_api.plan_encoding import get_plan_header
+from sbol_parser_api.protocol_validation import (
+    Diagnostic, check_mounts, check_tip_racks, check_transfer_volumes,
+    check_well_volumes, count_tip_racks, get_well_volumes, raise_for_errors)
+from sbol_parser_api.transfer_scheduling import (
+    group_dispenses, schedule_transfer_dict)
 
 # labware dictionary - filled in by front end
 labware_dict = {'p10_mount': 'left', 'p300_mount': 'right',
@@ -30,17 +36,34 @@ DIGEST_TO_CONS_VOL = 2
 DNA_TRANS_VOL = 1
 CELL_TRANS_VOL = 50
 COMPETENT_WELL_MAX_VOL = 200
+P10_MIN_VOL = 1
+P10_MAX_VOL = 10
+PLATE_WELL_MAX_VOL = 200
+# Tip racks of the p10 in the assembly template
+ASSEMBLY_TIPRACK_SLOTS = 1
+# Extra volume aspirated for each multi-dispense of a reagent and blown out
+DISPOSAL_VOL = 1
+
+# Deck slots of the assembly template, the thermocycler holding the digests
+# and then the constructs in slot 7
+SOURCE_PLATE_SLOT = 2
+DIGEST_PLATE_SLOT = 1
+CONSTRUCT_PLATE_SLOT = 7
+THERMOCYCLER_SLOT = 7
+TUBE_RACK_SLOT = 4
+TIPRACK_LOCATION = (3, 'A1')
 
 
 def biobricks(
-    output_folder: str, construct_path: List[str],
-    part_path: List[str], thermocycle: bool = True,
+    output_folder: str, construct_path: List[str] = None,
+    part_path: List[str] = None, thermocycle: bool = True,
     p10_mount: str = 'right', p300_mount: str = 'left',
     p10_type: str = 'p10_single', p300_type: str = 'p300_single',
     well_plate: str = 'biorad_96_wellplate_200ul_pcr',
     tube_rack: str = 'opentrons_24_tuberack_nest_1.5ml_snapcap',
     soc_plate: str = 'usascientific_96_wellplate_2.4ml_deep',
-    transformation_plate: str = 'corning_96_wellplate_360ul_flat'
+    transformation_plate: str = 'corning_96_wellplate_360ul_flat',
+    plan: AssemblyPlan = None, diagnostics: List[Diagnostic] = None
 ) -> List[str]:
     '''
         Main function, creates scripts and metainformation
@@ -54,6 +77,11 @@ def biobricks(
             thermocyle: True or False, indicating whether the user has
             and would like to use the Opentrons Thermocycler
             see labware_dict for rest of arguments
+            plan: assembly plan from the SBOL parser, used instead of the
+            construct and part csvs if given
+            diagnostics: if given, extended with the diagnostics of
+            validate_assembly_dicts; the scripts are only written if there
+            are no errors
         Returns:
             List of output paths
             If there is an exception, the list of output paths will contain
@@ -88,8 +116,12 @@ def biobricks(
                                                 'bbtransformationtemplate.py')
     try:
         # Creates constructs, parts, reagents, and digest dataframes
-        constructs, dest_well_list = get_constructs(construct_path)
-        parts = get_parts(part_path, constructs)
+        if plan is None:
+            constructs, dest_well_list = get_constructs(construct_path)
+            parts = get_parts(part_path, constructs)
+        else:
+            constructs, dest_well_list = get_constructs_from_plan(plan)
+            parts = get_parts_from_plan(plan, constructs)
         reagents, reagents_well_list, mm_df = get_reagents_wells(
             constructs, parts)
         digest_loc, parts_df = get_digests(
@@ -100,6 +132,22 @@ def biobricks(
             digest_to_construct, reagent_to_construct, \
             reagents_dict = create_assembly_dicts(constructs, parts,
                                                   digest_loc, reagents)
+        source_to_digest, reagent_to_digest, digest_to_construct, \
+            reagent_to_construct = schedule_assembly_dicts(
+                source_to_digest, reagent_to_digest, digest_to_construct,
+                reagent_to_construct, reagents_dict, thermocycle)
+        reagent_to_digest = consolidate_reagent_transfers(
+            reagent_to_digest, reagents)
+        reagent_to_construct = consolidate_reagent_transfers(
+            reagent_to_construct, reagents)
+
+        # Checks the assembly before writing any scripts
+        plan_diagnostics = validate_assembly_dicts(
+            source_to_digest, reagent_to_digest, digest_to_construct,
+            reagent_to_construct, reagents, p10_mount, p300_mount)
+        if diagnostics is not None:
+            diagnostics.extend(plan_diagnostics)
+        raise_for_errors(plan_diagnostics)
 
         # Creates and saves assembly protocol
         assembly_path = create_assembly_protocol(
@@ -146,7 +194,7 @@ def biobricks(
         # Handles error and writes to file
         output_paths = []
         error_path = os.path.join(full_output_path, 'BioBricks_error.txt')
-        with open(error_path) as f:
+        with open(error_path, 'w') as f:
             f.write(
                 "Failed to generate BioBricks scripts: {}\n".format(str(e)))
         output_paths.append(error_path)
@@ -182,6 +230,27 @@ def get_constructs(
     return merged_constructs_list, dest_well_list
 
 
+def get_constructs_from_plan(
+    plan: AssemblyPlan
+) -> Tuple[pd.DataFrame, List[str]]:
+    '''
+        Returns construct dataframe from the constructs of an assembly plan
+        Args: plan = assembly plan produced by the SBOL parser
+        Returns:
+            merged_constructs_list: dataframe of constructs
+            dest_well_list: list of wells in construct plate that are used
+    '''
+    constructs_list = []
+    dest_well_list = []
+    for construct in plan.constructs:
+        construct_dict = process_construct(
+            [construct.name, construct.well, *construct.components])
+        constructs_list.append(pd.DataFrame.from_dict(construct_dict))
+        dest_well_list.append(construct_dict['well'][0])
+    merged_constructs_list = pd.concat(constructs_list, ignore_index=True)
+    return merged_constructs_list, dest_well_list
+
+
 def process_construct(
     construct_entry: List
 ) -> Dict[str, List[str]]:
@@ -231,6 +300,33 @@ def get_parts(
     return merged_parts_list
 
 
+def get_parts_from_plan(
+    plan: AssemblyPlan,
+    constructs_list: pd.DataFrame
+) -> pd.DataFrame:
+    '''
+        Returns a dataframe of parts from the part plates of an assembly plan.
+        Uses constructs_list to record the number of times the part is used
+        in the constructs and the roles it plays.
+        Args:
+            plan: assembly plan produced by the SBOL parser
+            constructs_list: dataframe of constructs
+        Returns:
+            merged_parts_list: dataframe of parts
+    '''
+    parts_list = []
+    source_plate_pos = ['2', '5']
+    for plate_pos, plate in zip(source_plate_pos, plan.plates):
+        for part in plate.parts:
+            part_entry = [part.name, part.well]
+            if part.concentration is not None:
+                part_entry.append(part.concentration)
+            parts_list.append(
+                process_part(part_entry, constructs_list, plate_pos))
+    merged_parts_list = pd.concat(parts_list, ignore_index=True)
+    return merged_parts_list
+
+
 def process_part(
     part: List,
     constructs_list: pd.DataFrame,
@@ -635,6 +731,133 @@ def create_assembly_dicts(
         digest_to_construct, reagent_to_construct, reagents_dict
 
 
+def schedule_assembly_dicts(
+    source_to_digest: Dict[str, List[Tuple[str, int]]],
+    reagent_to_digest: Dict[str, List[Tuple[str, int]]],
+    digest_to_construct: Dict[str, List[Tuple[str, int]]],
+    reagent_to_construct: Dict[str, List[Tuple[str, int]]],
+    reagents_dict: Dict[str, str], thermocycle: bool
+) -> Tuple[Dict, Dict, Dict, Dict]:
+    '''
+        Reorders the transfers of the assembly dictionaries to shorten the
+        travel of the pipette across the deck. Water goes into the digests
+        before the master mixes.
+        Args:
+            source_to_digest, reagent_to_digest, digest_to_construct,
+            reagent_to_construct, reagents_dict: as returned by
+            create_assembly_dicts
+            thermocycle: True or False, True = digests and constructs are
+            made in the thermocycler
+        Returns:
+            source_to_digest, reagent_to_digest, digest_to_construct and
+            reagent_to_construct reordered
+    '''
+    digest_slot = THERMOCYCLER_SLOT if thermocycle else DIGEST_PLATE_SLOT
+    water_well = reagents_dict['water']
+    source_to_digest = schedule_transfer_dict(
+        source_to_digest, SOURCE_PLATE_SLOT, digest_slot, TIPRACK_LOCATION)
+    reagent_to_digest = schedule_transfer_dict(
+        reagent_to_digest, TUBE_RACK_SLOT, digest_slot, TIPRACK_LOCATION,
+        after={well: [water_well] for well in reagent_to_digest
+               if well != water_well})
+    digest_to_construct = schedule_transfer_dict(
+        digest_to_construct, digest_slot, CONSTRUCT_PLATE_SLOT,
+        TIPRACK_LOCATION)
+    reagent_to_construct = schedule_transfer_dict(
+        reagent_to_construct, TUBE_RACK_SLOT, CONSTRUCT_PLATE_SLOT,
+        TIPRACK_LOCATION)
+    return source_to_digest, reagent_to_digest, digest_to_construct, \
+        reagent_to_construct
+
+
+def consolidate_reagent_transfers(
+    reagent_transfers: Dict[str, List[Tuple[str, int]]],
+    reagents: pd.DataFrame, max_vol: float = P10_MAX_VOL,
+    disposal_vol: float = DISPOSAL_VOL
+) -> Dict[str, List[List[Tuple[str, int]]]]:
+    '''
+        Groups the transfers of each reagent into multi-dispenses, each
+        aspirated once with the disposal volume and distributed across its
+        wells. The disposal volumes are added to the total volumes of the
+        reagents.
+        Args:
+            reagent_transfers: dictionary with key = reagent well,
+            value = list of tuples in format (well, volume to transfer), as
+            reagent_to_digest or reagent_to_construct
+            reagents: dataframe of reagents, updated in place
+            max_vol: maximum volume of the pipette
+            disposal_vol: extra volume aspirated for each multi-dispense
+        Returns:
+            dictionary with key = reagent well, value = list of groups of
+            tuples, a group of one being a single transfer
+    '''
+    consolidated = {}
+    for reagent_well, transfers in reagent_transfers.items():
+        groups = group_dispenses(transfers, max_vol, disposal_vol)
+        consolidated[reagent_well] = [list(group) for group in groups]
+        no_multi = sum(len(group) > 1 for group in groups)
+        reagents.loc[reagents['well'] == reagent_well, 'total_vol'] += \
+            disposal_vol*no_multi
+    return consolidated
+
+
+def validate_assembly_dicts(
+    source_to_digest: Dict[str, List[Tuple[str, int]]],
+    reagent_to_digest: Dict[str, List[List[Tuple[str, int]]]],
+    digest_to_construct: Dict[str, List[Tuple[str, int]]],
+    reagent_to_construct: Dict[str, List[List[Tuple[str, int]]]],
+    reagents: pd.DataFrame, p10_mount: str, p300_mount: str
+) -> List[Diagnostic]:
+    '''
+        Checks the assembly dictionaries against the volumes of the wells
+        and pipette and the tips of the assembly template, before the
+        scripts are written.
+        Args:
+            source_to_digest, digest_to_construct: as returned by
+            create_assembly_dicts
+            reagent_to_digest, reagent_to_construct: as returned by
+            consolidate_reagent_transfers
+            reagents: dataframe of reagents
+            p10_mount, p300_mount: pipette mounts
+        Returns:
+            list of diagnostics, empty if the assembly can run
+    '''
+    # a tip per reagent into the digests, part and digest, one for the
+    # water into the constructs and one per group of T4 buffer or ligase
+    water_well = reagents[reagents['name'] == 'water']['well'].values[0]
+    tips = len(reagent_to_digest) + len(source_to_digest) + \
+        len(digest_to_construct) + sum(
+            1 if well == water_well else len(groups)
+            for well, groups in reagent_to_construct.items())
+    reagent_to_digest = {well: [value for group in groups for value in group]
+                         for well, groups in reagent_to_digest.items()}
+    reagent_to_construct = {
+        well: [value for group in groups for value in group]
+        for well, groups in reagent_to_construct.items()}
+    diagnostics = []
+    for description, transfers in [
+            ('parts', source_to_digest), ('reagents', reagent_to_digest),
+            ('digests', digest_to_construct),
+            ('reagents', reagent_to_construct)]:
+        diagnostics += check_transfer_volumes(
+            [value[1] for values in transfers.values() for value in values],
+            P10_MIN_VOL, description, 'assembly')
+    diagnostics += check_well_volumes(
+        get_well_volumes(source_to_digest, reagent_to_digest),
+        PLATE_WELL_MAX_VOL, 'Digest', 'assembly')
+    diagnostics += check_well_volumes(
+        get_well_volumes(digest_to_construct, reagent_to_construct),
+        PLATE_WELL_MAX_VOL, 'Construct', 'assembly')
+    diagnostics += check_well_volumes(
+        dict(zip(reagents['well'], reagents['total_vol'])),
+        REAGENTS_TUBE_MAX_VOL, 'Reagent', 'assembly')
+    diagnostics += check_tip_racks(
+        count_tip_racks(tips), ASSEMBLY_TIPRACK_SLOTS, 'assembly')
+    diagnostics += check_mounts({'p10': p10_mount, 'p300': p300_mount},
+                                'transformation')
+    return diagnostics
+
+
 def create_tranformation_dicts(
     constructs: pd.DataFrame, water_well: str = 'A1',
     controls_per_cons: bool = False
@@ -751,9 +974,9 @@ def create_tranformation_dicts(
 def create_assembly_protocol(
     template_path: str, output_path: str,
     source_to_digest: Dict[str, List[Tuple[str, int]]],
-    reagent_to_digest: Dict[str, List[Tuple[str, int]]],
+    reagent_to_digest: Dict[str, List[List[Tuple[str, int]]]],
     digest_to_construct: Dict[str, List[Tuple[str, int]]],
-    reagent_to_construct: Dict[str, List[Tuple[str, int]]],
+    reagent_to_construct: Dict[str, List[List[Tuple[str, int]]]],
     reagents_dict: Dict[str, str],
     p10_mount: str, p10_type: str, well_plate_type: str,
     tube_rack_type: str, thermocycle: bool
@@ -769,9 +992,10 @@ def create_assembly_protocol(
             source (part) well to transfer from, the 0th element of each tuple
             gives well to transfer to (digest well in this case), with the 1st
             element of the tuple giving the volume to transfer.
-            reagent_to_digest: dictionary of same form as source_to_digest
-            (Dict[str, List[Tuple(str, int)]]), instructing transfers from
-            reagent wells to digest wells
+            reagent_to_digest: dictionary of form
+            Dict[str, List[List[Tuple(str, int)]]], instructing transfers from
+            reagent wells to digest wells, grouped into multi-dispenses by
+            consolidate_reagent_transfers
             digest_to_storage: dictionary of same form as source_to_digest
             (Dict[str, List[Tuple(str, int)]]), instructing transfers from
             digest wells to storage wells (wells where digest not used in
@@ -779,9 +1003,9 @@ def create_assembly_protocol(
             digest_to_construct: dictionary of same form as source_to_digest
             (Dict[str, List[Tuple(str, int)]]), instructing transfers from
             digest wells to construct wells
-            reagent_to_construct: dictionary of same form as source_to_digest
-            (Dict[str, List[Tuple(str, int)]]), instructing transfers from
-            reagent wells to construct wells
+            reagent_to_construct: dictionary of same form as reagent_to_digest
+            (Dict[str, List[List[Tuple(str, int)]]]), instructing transfers
+            from reagent wells to construct wells
             p10_mount: "left" or "right", the Opentrons pipette mount options
             p10_type: the name of the p10 pipette, e.g. "p10_single"
             well_plate_type: the name of the well plate type used as the source
@@ -798,21 +1022,18 @@ def create_assembly_protocol(
     assembly_path = os.path.join(output_path, 'bb_assembly_protocol.py')
     with open(assembly_path, "w+") as protocol_file:
         # Paste in plate maps at top of file.
-        protocol_file.write('source_to_digest = ' +
-                            json.dumps(source_to_digest) + '\n\n')
-        protocol_file.write('reagent_to_digest = '
-                            + json.dumps(reagent_to_digest) + '\n\n')
-        protocol_file.write('reagents_dict = '
-                            + json.dumps(reagents_dict) + '\n\n')
-        protocol_file.write('digest_to_construct = '
-                            + json.dumps(digest_to_construct) + '\n\n')
-        protocol_file.write('reagent_to_construct = '
-                            + json.dumps(reagent_to_construct) + '\n\n')
+        protocol_file.write(get_plan_header({
+            'source_to_digest': source_to_digest,
+            'reagent_to_digest': reagent_to_digest,
+            'reagents_dict': reagents_dict,
+            'digest_to_construct': digest_to_construct,
+            'reagent_to_construct': reagent_to_construct}))
         protocol_file.write('p10_mount = "' + p10_mount + '"\n\n')
         protocol_file.write('p10_type = "' + p10_type + '"\n\n')
         protocol_file.write('well_plate_type = "' + well_plate_type + '"\n\n')
         protocol_file.write('tube_rack_type = "' + tube_rack_type + '"\n\n')
         protocol_file.write('thermocycle = ' + str(thermocycle) + '\n\n')
+        protocol_file.write('disposal_vol = ' + str(DISPOSAL_VOL) + '\n\n')
 
         # Paste the rest of the protocol.
         protocol_file.write(template_string)
@@ -868,14 +1089,11 @@ def create_transformation_protocol(
     transform_path = os.path.join(output_path, 'bb_transformation_protocol.py')
     with open(transform_path, "w+") as protocol_file:
         # Paste in plate maps at top of file.
-        protocol_file.write('competent_source_to_dest = ' +
-                            json.dumps(competent_source_to_dest) + '\n\n')
-        protocol_file.write('control_source_to_dest = '
-                            + json.dumps(control_source_to_dest) + '\n\n')
-        protocol_file.write('assembly_source_to_dest = '
-                            + json.dumps(assembly_source_to_dest) + '\n\n')
-        protocol_file.write('water_to_dest = '
-                            + json.dumps(water_source_to_dest) + '\n\n')
+        protocol_file.write(get_plan_header({
+            'competent_source_to_dest': competent_source_to_dest,
+            'control_source_to_dest': control_source_to_dest,
+            'assembly_source_to_dest': assembly_source_to_dest,
+            'water_to_dest': water_source_to_dest}))
         protocol_file.write('p10_mount = "' + p10_mount + '"\n\n')
         protocol_file.write('p300_mount = "' + p300_mount + '"\n\n')
         protocol_file.write('p10_type = "' + p10_type + '"\n\n')
@@ -10,6 +10,9 @@ metadata = {'apiLevel': '2.2',
     Input to bbassemble:
         source_to_digest = dictionary of keys as source wells, values = list
         of tuples of destination wells and volumes to be transferred
+        reagent_to_digest = dictionary of keys as reagent wells, values = list
+        of groups of tuples of digest wells and volumes, each group
+        distributed from one aspiration with disposal_vol
         digest_to_storage = dictionary of keys as digest destination wells,
         values = list of tuples of reagent wells and volumes
         digest_to_construct: keys = digest destination wells, values =
@@ -35,7 +38,8 @@ def run(protocol: protocol_api.ProtocolContext):
                    well_plate_type='biorad_96_wellplate_200ul_pcr',
                    tube_rack_type='opentrons_24_tuberack_nest_1.5ml_snapcap',
                    thermocycle=False, use_p300=False,
-                   transfer_t4_manually=False, water_trough=False):
+                   transfer_t4_manually=False, water_trough=False,
+                   disposal_vol=1):
         # Define constants
         CANDIDATE_TIPRACK_SLOT = '3'
         TIPRACK_TYPE = 'opentrons_96_tiprack_10ul'
@@ -72,6 +76,17 @@ def run(protocol: protocol_api.ProtocolContext):
             digest_plate = protocol.load_labware(DESTINATION_PLATE_TYPE, '1')
             dest_plate = protocol.load_labware(DESTINATION_PLATE_TYPE, '7')
 
+        def dispense_reagent(group, reagent_plate_well, dest_wells):
+            # distributes a group of reagent transfers from one aspiration
+            vols = [entry[1] for entry in group]
+            if len(group) > 1:
+                pipette.distribute(vols, reagent_plate_well, dest_wells,
+                                   disposal_volume=disposal_vol,
+                                   blow_out=True, new_tip='never')
+            else:
+                pipette.transfer(vols[0], reagent_plate_well, dest_wells[0],
+                                 new_tip='never')
+
         '''
             Digestion procedure:
         '''
@@ -94,7 +109,8 @@ def run(protocol: protocol_api.ProtocolContext):
                         reagent_well]
             else:
                 reagent_plate_well = tube_rack.wells_by_name()[reagent_well]
-            val = reagent_to_digest[reagent_well]
+            groups = reagent_to_digest[reagent_well]
+            val = [entry for group in groups for entry in group]
             vols = [entry[1] for entry in val]
 
             if use_p300 and all(vol >= 30 for vol in vols):
@@ -107,11 +123,10 @@ def run(protocol: protocol_api.ProtocolContext):
                 p300_pipette.drop_tip()
             else:
                 pipette.pick_up_tip()
-                for i in range(len(val)):
-                    dest_well = digest_plate.wells_by_name()[val[i][0]]
-                    vol = val[i][1]
-                    pipette.transfer(vol, reagent_plate_well, dest_well,
-                                     new_tip='never')
+                for group in groups:
+                    dest_wells = [digest_plate.wells_by_name()[entry[0]]
+                                  for entry in group]
+                    dispense_reagent(group, reagent_plate_well, dest_wells)
                 pipette.drop_tip()
 
         digest_wells = []
@@ -182,22 +197,19 @@ def run(protocol: protocol_api.ProtocolContext):
         '''
         # Transfer water
         water_well_name = reagents_dict['water']
-        val = reagent_to_construct[water_well_name]
         if water_trough:
             reagent_plate_well = water_well
         else:
             reagent_plate_well = tube_rack.wells_by_name()[water_well_name]
         if thermocycle:
-            construct_wells = [digest_plate.wells_by_name()[val[i][0]] for i in
-                               range(len(val))]
+            construct_plate = digest_plate
         else:
-            construct_wells = [dest_plate.wells_by_name()[val[i][0]] for i in
-                               range(len(val))]
+            construct_plate = dest_plate
         pipette.pick_up_tip()
-        for i in range(len(val)):
-            vol = val[i][1]
-            pipette.transfer(vol, reagent_plate_well, construct_wells[i],
-                             new_tip='never')
+        for group in reagent_to_construct[water_well_name]:
+            construct_wells = [construct_plate.wells_by_name()[entry[0]]
+                               for entry in group]
+            dispense_reagent(group, reagent_plate_well, construct_wells)
         pipette.drop_tip()
         if transfer_t4_manually:
             protocol.pause()
@@ -210,26 +222,35 @@ def run(protocol: protocol_api.ProtocolContext):
             T4_list = ['T4Ligase10X', 'T4Ligase']
             for T4_entry in T4_list:
                 well = reagents_dict[T4_entry]
-                val = reagent_to_construct[well]
                 if water_trough:
                     reagent_plate_well = reagents_plate.wells_by_name()[well]
                 else:
                     reagent_plate_well = tube_rack.wells_by_name()[well]
-                for i in range(len(val)):
-                    if thermocycle:
-                        construct_well = digest_plate.wells_by_name()[val[i][0]]
-                    else:
-                        construct_well = dest_plate.wells_by_name()[val[i][0]]
-                    vol = val[i][1]
+                for group in reagent_to_construct[well]:
+                    construct_wells = [
+                        construct_plate.wells_by_name()[entry[0]]
+                        for entry in group]
                     pipette.pick_up_tip()
-                    pipette.move_to(reagent_plate_well.bottom())
-                    protocol.max_speeds['Z'] = 10
-                    pipette.aspirate(vol, reagent_plate_well.bottom())
-                    pipette.move_to(construct_well.top())
-                    protocol.max_speeds['Z'] = None
-                    pipette.dispense(vol, construct_well)
-                    pipette.touch_tip(construct_well)
-                    pipette.blow_out()
+                    if len(group) > 1:
+                        # one aspiration of T4 for the whole group
+                        protocol.max_speeds['Z'] = 10
+                        pipette.distribute(
+                            [entry[1] for entry in group],
+                            reagent_plate_well.bottom(), construct_wells,
+                            disposal_volume=disposal_vol, touch_tip=True,
+                            blow_out=True, new_tip='never')
+                        protocol.max_speeds['Z'] = None
+                    else:
+                        construct_well = construct_wells[0]
+                        vol = group[0][1]
+                        pipette.move_to(reagent_plate_well.bottom())
+                        protocol.max_speeds['Z'] = 10
+                        pipette.aspirate(vol, reagent_plate_well.bottom())
+                        pipette.move_to(construct_well.top())
+                        protocol.max_speeds['Z'] = None
+                        pipette.dispense(vol, construct_well)
+                        pipette.touch_tip(construct_well)
+                        pipette.blow_out()
                     pipette.drop_tip()
 
         for digest_well in digest_to_construct.keys():
@@ -294,4 +315,5 @@ def run(protocol: protocol_api.ProtocolContext):
     bbassemble(source_to_digest, digest_to_construct, reagent_to_digest,
                reagent_to_construct, reagents_dict, p10_mount=p10_mount,
                p10_type=p10_type, well_plate_type=well_plate_type,
-               tube_rack_type=tube_rack_type, thermocycle=thermocycle)
\ No newline at end of file
+               tube_rack_type=tube_rack_type, thermocycle=thermocycle,
+               disposal_vol=disposal_vol)
\ No newline at end of file
@@ -10,6 +10,8 @@ sys.path.append("/home/runner/work/DJANGO-Assembly-Methods/DJANGO-Assembly-Metho
 sys.path.append("C:/Users/gabri/Documents/Uni/iGEM/DJANGO-Assembly-Methods/biobricks_assembly/biobricks10")
 import bbinput
 from . import side_effect_functions
+from sbol_parser_api.assembly_plan import (
+    AssemblyPlan, PlanConstruct, PlanPart, PlanPlate)
 
 
 class BioBricksInputTestCase(unittest.TestCase):
@@ -324,6 +326,16 @@ class BioBricksInputTestCase(unittest.TestCase):
                 self.assertListEqual(cons_df[col].to_list(),
                                      self.constructs_df[col].to_list())
 
+    def test_get_constructs_from_plan(self):
+        plan = AssemblyPlan('bio_bricks', constructs=[
+            PlanConstruct(row[1], row[2:], name=row[0])
+            for row in self.constructs_list[1:]])
+        cons_df, dest_wells = bbinput.get_constructs_from_plan(plan)
+        self.assertListEqual(dest_wells, self.construct_wells)
+        for col in ['name', 'well', 'upstream', 'downstream', 'plasmid']:
+            self.assertListEqual(cons_df[col].to_list(),
+                                 self.constructs_df[col].to_list())
+
     def test_count_part_occurrences(self):
         for index, part in enumerate(self.parts_list):
             if index != 0:
@@ -354,6 +366,15 @@ class BioBricksInputTestCase(unittest.TestCase):
                 self.assertListEqual(df[col].to_list(),
                                      self.parts_df[col].to_list())
 
+    def test_get_parts_from_plan(self):
+        plan = AssemblyPlan('bio_bricks', plates=[PlanPlate('parts_1', [
+            PlanPart(part[0], part[1], *map(float, part[2:]))
+            for part in self.parts_list[1:]])])
+        df = bbinput.get_parts_from_plan(plan, self.constructs_df)
+        for col in df.columns:
+            self.assertListEqual(df[col].to_list(),
+                                 self.parts_df[col].to_list())
+
     def test_next_well(self):
         self.assertEqual(bbinput.next_well([]), 'A1')
         self.assertEqual(bbinput.next_well(['B2', 'A3']), 'A1')
@@ -391,6 +412,54 @@ class BioBricksInputTestCase(unittest.TestCase):
         self.assertDictEqual(dict4, self.reagent_to_construct)
         self.assertDictEqual(dict5, self.reagents_dict)
 
+    def test_schedule_assembly_dicts(self):
+        dicts = bbinput.schedule_assembly_dicts(
+            self.source_to_digest, self.reagent_to_digest,
+            self.digest_to_construct, self.reagent_to_construct,
+            self.reagents_dict, thermocycle=False)
+        self.assertEqual(list(dicts[1])[0], self.reagents_dict['water'])
+        for scheduled, transfers in zip(dicts, [
+                self.source_to_digest, self.reagent_to_digest,
+                self.digest_to_construct, self.reagent_to_construct]):
+            self.assertCountEqual(scheduled, transfers)
+            for well, values in transfers.items():
+                self.assertCountEqual(scheduled[well], values)
+
+    def test_consolidate_reagent_transfers(self):
+        reagents = self.reagents_df.copy()
+        consolidated = bbinput.consolidate_reagent_transfers(
+            self.reagent_to_construct, reagents)
+        self.assertListEqual(consolidated['A1'], [
+            [('A1', 11)], [('A2', 11)], [('A3', 11)]])
+        self.assertListEqual(consolidated['A5'], [
+            [('A1', 2), ('A2', 2), ('A3', 2)]])
+        self.assertListEqual(consolidated['A6'], [
+            [('A1', 1), ('A2', 1), ('A3', 1)]])
+        # the disposal volume of each multi-dispense
+        self.assertListEqual(reagents['total_vol'].to_list(),
+                             [285, 28, 35, 21, 7, 4])
+
+    def test_validate_assembly_dicts(self):
+        reagents = self.reagents_df.copy()
+        reagent_to_digest = bbinput.consolidate_reagent_transfers(
+            self.reagent_to_digest, reagents)
+        reagent_to_construct = bbinput.consolidate_reagent_transfers(
+            self.reagent_to_construct, reagents)
+        diagnostics = bbinput.validate_assembly_dicts(
+            self.source_to_digest, reagent_to_digest,
+            self.digest_to_construct, reagent_to_construct, reagents,
+            'right', 'left')
+        self.assertListEqual(diagnostics, [])
+        # a 0.5 uL part transfer and both pipettes on one mount
+        source_to_digest = {well: [(digest, 0.5) for digest, _ in values]
+                            for well, values in self.source_to_digest.items()}
+        diagnostics = bbinput.validate_assembly_dicts(
+            source_to_digest, reagent_to_digest, self.digest_to_construct,
+            reagent_to_construct, reagents, 'left', 'left')
+        self.assertListEqual(
+            [diagnostic.code for diagnostic in diagnostics],
+            ['transfer-volume', 'mount'])
+
     def test_create_tranformation_dicts(self):
         dict1, dict2, dict3, dict4, df = bbinput.create_tranformation_dicts(
             self.constructs_df)
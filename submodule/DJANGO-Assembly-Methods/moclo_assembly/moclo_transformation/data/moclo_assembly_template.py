@@ -8,9 +8,20 @@ metadata = {'apiLevel': '2.2',
 
 def run(protocol: protocol_api.ProtocolContext):
 
+    def get_mm_well(mm_well_name, master_mix_dicts, reaction_plate,
+                    reagents_plate):
+        # master mixes shared between reaction plates are on reagents plate
+        for mm_dict in master_mix_dicts:
+            if mm_dict['well'] == mm_well_name:
+                if mm_dict['plate'] == 'reagents_plate':
+                    return reagents_plate.wells_by_name()[mm_well_name]
+                break
+        return reaction_plate.wells_by_name()[mm_well_name]
+
     def create_master_mix(reagent_to_mm_dict, master_mix_dicts, pipette,
                           reaction_plate, reagents_plate, trough):
 
+        made_mm_wells = []
         for key, value in reagent_to_mm_dict.items():
             pipette.pick_up_tip()
             for index, mm_dest in enumerate(value):
@@ -23,14 +34,18 @@ def run(protocol: protocol_api.ProtocolContext):
                             source = trough.wells()[0]
                         else:
                             source = trough.wells_by_name()[key]
-                dest = reaction_plate.wells_by_name()[mm_dest[1]]
+                dest = get_mm_well(mm_dest[1], master_mix_dicts,
+                                   reaction_plate, reagents_plate)
+                if mm_dest[1] not in made_mm_wells:
+                    made_mm_wells.append(mm_dest[1])
                 vol = float(mm_dest[2])
                 pipette.transfer(vol, source, dest, new_tip='never')
             pipette.blow_out()
             pipette.drop_tip()
 
-        for mm_dict in master_mix_dicts:
-            mm_well = reaction_plate.wells_by_name()[mm_dict['well']]
+        for mm_well_name in made_mm_wells:
+            mm_well = get_mm_well(mm_well_name, master_mix_dicts,
+                                  reaction_plate, reagents_plate)
             pipette.pick_up_tip()
             pipette.mix(2, 10, mm_well)
             pipette.blow_out()
@@ -138,6 +153,17 @@ def run(protocol: protocol_api.ProtocolContext):
         protocol.comment("--------------------------------------------")
         create_master_mix(reagent_to_mm, master_mix_dicts, p10_single,
                           reaction_plate, reagents_plate, trough)
+        # master mixes made by an earlier reaction plate are mixed before use
+        for mm_dict in master_mix_dicts:
+            if mm_dict['well'] not in [mm_dest[1] for value in
+                                       reagent_to_mm.values()
+                                       for mm_dest in value]:
+                p10_single.pick_up_tip()
+                p10_single.mix(2, 10, get_mm_well(
+                    mm_dict['well'], master_mix_dicts, reaction_plate,
+                    reagents_plate))
+                p10_single.blow_out()
+                p10_single.drop_tip()
 
         for no_parts, no_assemblies in no_assemblies_dict.items():
             n_part_mm_dicts = [mm_dict for mm_dict in master_mix_dicts
@@ -150,7 +176,8 @@ def run(protocol: protocol_api.ProtocolContext):
             for i, entries in enumerate(n_part_mm_dicts):
                 mm_vol_per_assembly = entries['vol_per_assembly']
                 p10_single.pick_up_tip()
-                mm_well = reaction_plate.wells_by_name()[entries['well']]
+                mm_well = get_mm_well(entries['well'], master_mix_dicts,
+                                      reaction_plate, reagents_plate)
                 no_assemblies_mm = entries['no_assemblies']
                 if i == len(entries) - 1:
                     dest_wells = wells_open_assembly
@@ -162,21 +189,25 @@ def run(protocol: protocol_api.ProtocolContext):
                 dest_wells_plate = [reaction_plate.wells()[well].bottom(0.3)
                                     for well in dest_wells]
 
-                p10_single.transfer(mm_vol_per_assembly, mm_well,
-                                    dest_wells_plate, blow_out=True,
-                                    new_tip='never')
+                # each aspiration is distributed across as many wells as
+                # the p10 holds with the disposal volume
+                per_aspiration = entries['dispenses_per_aspiration']
+                for start in range(0, len(dest_wells_plate), per_aspiration):
+                    batch = dest_wells_plate[start:start + per_aspiration]
+                    if len(batch) > 1:
+                        p10_single.distribute(mm_vol_per_assembly, mm_well,
+                                              batch,
+                                              disposal_volume=disposal_vol,
+                                              blow_out=True, new_tip='never')
+                    else:
+                        p10_single.transfer(mm_vol_per_assembly, mm_well,
+                                            batch, blow_out=True,
+                                            new_tip='never')
                 p10_single.drop_tip()
 
-        # gives dictionary with keys = parts,
-        # values = names of combinations that parts are in
-        combinations_by_part = {}
-        for i in combinations_to_make:
-            name = i["name"]
-            for j in i["parts"]:
-                if j in combinations_by_part.keys():
-                    combinations_by_part[j].append(name)
-                else:
-                    combinations_by_part[j] = [name]
+        # combinations_by_part gives dictionary with keys = parts,
+        # values = names of combinations that parts are in, ordered to
+        # shorten the travel between the wells dispensed into
 
         # This section of the code combines and mix the DNA parts according to
         # the combination list
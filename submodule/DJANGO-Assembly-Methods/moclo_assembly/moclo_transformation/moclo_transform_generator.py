@@ -1,8 +1,16 @@
 import os
 import csv
-import json
 import pandas as pd
+from collections import Counter
 from typing import List, Dict, Tuple
+from sbol_parser_api.assembly_plan import AssemblyPlan
+from sbol_parser_api.plan_encoding import get_plan_header
+from sbol_parser_api.protocol_validation import (
+    Diagnostic, check_deck_slots, check_mounts, check_tip_racks,
+    check_transfer_volumes, check_well_volumes, count_tip_racks,
+    raise_for_errors)
+from sbol_parser_api.transfer_scheduling import (
+    TransferGroup, get_dispenses_per_aspiration, schedule_transfers)
 
 # labware dictionary - filled in by front end
 labware_dict = {'p10_mount': 'right', 'p300_mount': 'left',
@@ -12,16 +20,48 @@ labware_dict = {'p10_mount': 'right', 'p300_mount': 'left',
                 'reagent_plate': 'biorad_96_wellplate_200ul_pcr',
                 'agar_plate': 'thermofisher_96_wellplate_180ul'}
 
+# maximum number of constructs on one reaction plate
+MAX_SINGLE_COMBINATIONS = 88
+MAX_TRIPLICATE_COMBINATIONS = 24
+WELLS_PER_PLATE = 96
+# maximum volume (uL) held in a master mix or reagent well
+MAX_WELL_VOL = 180
+# assembly volumes (uL)
+TOT_VOL_PER_ASSEMBLY = 20
+BUFFER_VOL_PER_ASSEMBLY = 2
+LIGASE_VOL_PER_ASSEMBLY = 0.5
+ENZYME_VOL_PER_ASSEMBLY = 1
+PART_VOL = 2
+# reaction wells a part is dispensed into per aspiration of the p10
+PART_DISPENSES_PER_ASPIRATION = 5
+P10_MIN_VOL = 1
+P10_MAX_VOL = 10
+# extra master mix aspirated for each multi-dispense and blown out
+DISPOSAL_VOL = 1
+
+# Deck slots of the assembly template
+DNA_PLATE_SLOT = 1
+THERMOCYCLER_SLOT = 7
+TEMPDECK_SLOT = 10
+TROUGH_SLOT = 5
+REAGENT_PLATE_SLOT = 4
+P10_TIPRACK_SLOTS = [3, 6]
+# wells of the trough the tip is washed in between aspirations of a part
+WASH_WELLS = ['A2', 'A3']
+TIPRACK_LOCATION = (3, 'A1')
+
 
 def moclo_function(
-    output_folder: str, construct_path: List[str], part_path: List[str],
+    output_folder: str, construct_path: List[str] = None,
+    part_path: List[str] = None,
     thermocycle: bool = True, p10_mount: str = 'right',
     p300_mount: str = 'left', p10_type: str = 'p10_single',
     p300_type: str = 'p300_multi',
     well_plate: str = 'biorad_96_wellplate_200ul_pcr',
     trough: str = 'usascientific_12_reservoir_22ml',
     reagent_plate: str = 'biorad_96_wellplate_200ul_pcr',
-    agar_plate: str = 'thermofisher_96_wellplate_180ul'
+    agar_plate: str = 'thermofisher_96_wellplate_180ul',
+    plan: AssemblyPlan = None, diagnostics: List[Diagnostic] = None
 ) -> List[str]:
     '''
         Main function, creates scripts and metainformation
@@ -35,13 +75,18 @@ def moclo_function(
             thermocyle: True or False, indicating whether the user has
             and would like to use the Opentrons Thermocycler
             see labware_dict for rest of arguments
+            plan: assembly plan from the SBOL parser, used instead of the
+            construct and part csvs if given
+            diagnostics: if given, the problems found by validate_batches
+            are appended to it
         Returns:
             List of output paths
             If there is an exception, the list of output paths will contain
             only one element = the error path
             Otherwise the list of output paths will contain:
-            OT-2 script paths (assembly, transformation),
-            metainformation (assembly, transformation, agar plate)
+            OT-2 script paths (assembly, transformation) for each reaction
+            plate batch, metainformation (assembly, transformation, agar
+            plate)
     '''
 
     output_paths = []
@@ -93,38 +138,63 @@ def moclo_function(
         multi = False
 
     try:
-        # Load in CSV files as a dict containing lists of lists.
-        # Loop through all part_path's and merge dicts
-        dna_plate_map_dict = {}
-        if type(part_path) == list:
-            for path in part_path:
-                dna_plate_map_dict_local = generate_plate_maps(path)
-                dna_plate_map_dict.update(dna_plate_map_dict_local)
+        if plan is not None:
+            # Take plate maps and constructs straight from the plan
+            dna_plate_map_dict = generate_plate_maps_from_plan(plan)
+            combinations_to_make = generate_combinations_from_plan(plan)
         else:
-            dna_plate_map_dict = generate_plate_maps(part_path)
-
-        combinations_to_make = []
-        combinations_to_make = generate_combinations(construct_path)
+            # Load in CSV files as a dict containing lists of lists.
+            # Loop through all part_path's and merge dicts
+            dna_plate_map_dict = {}
+            if type(part_path) == list:
+                for path in part_path:
+                    dna_plate_map_dict_local = generate_plate_maps(path)
+                    dna_plate_map_dict.update(dna_plate_map_dict_local)
+            else:
+                dna_plate_map_dict = generate_plate_maps(part_path)
+
+            combinations_to_make = []
+            combinations_to_make = generate_combinations(construct_path)
+
+        # Split constructs into reaction plate batches
+        batches = plan_reaction_batches(
+            combinations_to_make, combinations_limit)
+        for batch in batches:
+            check_number_of_combinations(combinations_limit, batch)
+
+        parts, comb, mm, reagents = create_metainformation_dfs(
+            dna_plate_map_dict, combinations_to_make, batches=batches)
+        batch_mm_dicts = []
+        for batch_index in range(len(batches)):
+            if len(batches) > 1:
+                # create master mix dictionary for this batch only
+                batch_mm_dicts.append(get_batch_mm_dicts(
+                    mm, reagents, comb, batch_index))
+            else:
+                # create master mix dictionary to use in assembly protocol
+                batch_mm_dicts.append(get_mm_dicts(mm, reagents))
 
-        check_number_of_combinations(combinations_limit, combinations_to_make)
+        # Check the plan before writing anything
+        plan_diagnostics = validate_batches(
+            dna_plate_map_dict, batches, batch_mm_dicts, reagents,
+            thermocycle, p10_mount, p300_mount)
+        if diagnostics is not None:
+            diagnostics.extend(plan_diagnostics)
+        raise_for_errors(plan_diagnostics)
 
         # Generate and save output plate maps.
         triplicate, agar_path = generate_and_save_output_plate_maps(
             combinations_to_make, combinations_limit,
-            config['output_folder_path'])
+            config['output_folder_path'], batches=batches)
 
         # Define assembly metainformation path
         assembly_metainformation_path = os.path.join(
             config['output_folder_path'], 'assembly_metainformation.csv')
 
-        # Create and save assembly metainformation
-        parts, comb, mm, reagents = create_metainformation(
-            assembly_metainformation_path,
-            dna_plate_map_dict, combinations_to_make, labware_dict,
-            thermocycle, triplicate)
-
-        # create master mix dictionary to use in assembly protocol
-        reagent_to_mm_dict, mm_dict = get_mm_dicts(mm, reagents)
+        # Save assembly metainformation
+        save_metainformation(
+            assembly_metainformation_path, labware_dict, thermocycle,
+            triplicate, parts, comb, mm, reagents)
 
         transform_metainformation_path = os.path.join(
             config['output_folder_path'], 'transform_metainformation.csv')
@@ -132,18 +202,26 @@ def moclo_function(
             transform_metainformation_path,
             labware_dict, triplicate, multi)
 
-        # Create a protocol file and hard code the plate maps into it.
-        assembly_path, transform_path = create_protocol(
-            dna_plate_map_dict, combinations_to_make, reagent_to_mm_dict,
-            mm_dict, config['assembly_template_path'],
-            config['transform_template_path'], config['output_folder_path'],
-            thermocycle, triplicate, multi, p10Mount=p10_mount,
-            p300Mount=p300_mount, p10_type=p10_type, p300_type=p300_type,
-            reaction_plate_type=well_plate, reagent_plate_type=reagent_plate,
-            trough_type=trough, agar_plate_type=agar_plate)
-
-        output_paths.append(assembly_path)
-        output_paths.append(transform_path)
+        for batch_index, batch in enumerate(batches):
+            reagent_to_mm_dict, mm_dict = batch_mm_dicts[batch_index]
+            if len(batches) > 1:
+                protocol_suffix = '_' + str(batch_index + 1)
+            else:
+                protocol_suffix = ''
+
+            # Create a protocol file and hard code the plate maps into it.
+            assembly_path, transform_path = create_protocol(
+                dna_plate_map_dict, batch, reagent_to_mm_dict,
+                mm_dict, config['assembly_template_path'],
+                config['transform_template_path'],
+                config['output_folder_path'], thermocycle, triplicate, multi,
+                p10Mount=p10_mount, p300Mount=p300_mount, p10_type=p10_type,
+                p300_type=p300_type, reaction_plate_type=well_plate,
+                reagent_plate_type=reagent_plate, trough_type=trough,
+                agar_plate_type=agar_plate, protocol_suffix=protocol_suffix)
+
+            output_paths.append(assembly_path)
+            output_paths.append(transform_path)
         output_paths.append(assembly_metainformation_path)
         output_paths.append(transform_metainformation_path)
         output_paths.append(agar_path)
@@ -206,12 +284,43 @@ def generate_combinations(
     return combinations_to_make
 
 
+def generate_plate_maps_from_plan(
+    plan: AssemblyPlan
+) -> Dict[str, List[List]]:
+    '''
+        Generates dictionaries for the part plates of an assembly plan
+        Args: plan = assembly plan produced by the SBOL parser
+        Returns: dictionary of plate maps with key = name of part plate,
+        value = list of rows (= list of lists)
+    '''
+    plate_maps = {}
+    for plate in plan.plates:
+        # Rows are kept as generate_plate_maps() reads them from a csv
+        plate_maps[plate.name] = [
+            row for row in plate.get_platemap() if row[0]]
+    return plate_maps
+
+
+def generate_combinations_from_plan(
+    plan: AssemblyPlan
+) -> List[Dict]:
+    '''
+        Generates a list of dictionaries of constructs to be made
+        Args: plan = assembly plan produced by the SBOL parser
+        Returns: List of construct dictionaries with keys "name" and "parts"
+    '''
+    return [{"name": construct.name, "parts": list(construct.components)}
+            for construct in plan.constructs if construct.name]
+
+
 def check_number_of_combinations(
     combinations_limit: str,
     combinations_to_make: List[Dict]
 ):
     '''
-        Ensures that the number of constructs does not exceed the maximum
+        Ensures that the number of constructs on one reaction plate does not
+        exceed the maximum. Larger runs are split into several reaction
+        plates by plan_reaction_batches.
         Args:
             combinations_limit: "single" or "triplicate" - if "single" can do
             max 88 constructs, if "triplicate" does every construct 3 times -
@@ -221,18 +330,115 @@ def check_number_of_combinations(
     '''
     number_of_combinations = len(combinations_to_make)
     if combinations_limit == 'single':
-        if number_of_combinations > 88:
+        if number_of_combinations > MAX_SINGLE_COMBINATIONS:
             raise ValueError('Too many combinations ({0}) requested.'
                              'Max for single combinations is '
                              ' 88.'.format(number_of_combinations))
     elif combinations_limit == 'triplicate':
-        if number_of_combinations > 24:
+        if number_of_combinations > MAX_TRIPLICATE_COMBINATIONS:
             raise ValueError('Too many combinations ({0}) requested.'
                              'Max for triplicate combinations is '
                              '24.'.format(number_of_combinations))
     else:
         raise ValueError('Combinations limit must be single of triplicate')
 
+
+def plan_reaction_batches(
+    combinations_to_make: List[Dict],
+    combinations_limit: str
+) -> List[List[Dict]]:
+    '''
+        Splits the constructs into reaction plate batches, each run with its
+        own assembly and transformation protocol.
+        A run that fits on one reaction plate (constructs plus the master
+        mix wells it needs) is kept as a single batch with master mixes on
+        the reaction plate. Otherwise master mixes are made on the reagents
+        plate, shared by consecutive batches, so the reaction plates only
+        hold constructs: they are filled in order up to the batch size. A run
+        within the batch size whose master mixes do not fit is split in two.
+        Args:
+            combinations_to_make: list of construct dictionaries
+            combinations_limit: "single" or "triplicate"
+        Returns: list of batches, each a list of construct dictionaries
+        Raises: ValueError if combinations_limit is not "single" or
+        "triplicate"
+    '''
+    if combinations_limit == 'single':
+        batch_size = MAX_SINGLE_COMBINATIONS
+    elif combinations_limit == 'triplicate':
+        batch_size = MAX_TRIPLICATE_COMBINATIONS
+    else:
+        raise ValueError('Combinations limit must be single of triplicate')
+    no_combinations = len(combinations_to_make)
+    if no_combinations <= batch_size and no_combinations + \
+            count_mm_wells(combinations_to_make) <= WELLS_PER_PLATE:
+        return [list(combinations_to_make)]
+    if no_combinations <= batch_size:
+        batch_size = -(-no_combinations // 2)
+    return [list(combinations_to_make[start:start + batch_size])
+            for start in range(0, no_combinations, batch_size)]
+
+
+def get_max_mm_assemblies(
+    mm_vol_per_assembly: float
+) -> int:
+    '''
+        Returns the number of assemblies one master mix well can supply,
+        accounting for dead volume.
+        Args: mm_vol_per_assembly = master mix volume per assembly (uL)
+        Returns: maximum number of assemblies per master mix well
+    '''
+    max_assemblies = MAX_WELL_VOL // mm_vol_per_assembly
+    if max_assemblies % 2 == 0:
+        max_assemblies -= 2
+    else:
+        max_assemblies -= 3
+    while count_mm_volumes(max_assemblies, mm_vol_per_assembly) * \
+            mm_vol_per_assembly > MAX_WELL_VOL:
+        max_assemblies -= 2
+    return max_assemblies
+
+
+def count_mm_volumes(
+    no_assemblies: int, mm_vol_per_assembly: float
+) -> int:
+    '''
+        Returns the number of assembly volumes of master mix to make,
+        accounting for dead volume and the disposal volume of each
+        multi-dispense into the assembly wells.
+        Args: no_assemblies = number of assemblies using the master mix,
+        mm_vol_per_assembly = master mix volume per assembly (uL)
+        Returns: number of assembly volumes
+    '''
+    if no_assemblies % 2 == 0:
+        no = no_assemblies + 2
+    else:
+        no = no_assemblies + 3
+    per_aspiration = get_dispenses_per_aspiration(
+        mm_vol_per_assembly, P10_MAX_VOL, DISPOSAL_VOL)
+    if per_aspiration > 1:
+        no_dispenses = -(-no_assemblies // per_aspiration)
+        no += int(-(-no_dispenses*DISPOSAL_VOL // mm_vol_per_assembly))
+    return no
+
+
+def count_mm_wells(
+    combinations_to_make: List[Dict]
+) -> int:
+    '''
+        Counts the master mix wells needed for a list of constructs.
+        Args: combinations_to_make = list of construct dictionaries
+        Returns: number of master mix wells create_mm_df will use
+    '''
+    part_counts = Counter(len(combination['parts'])
+                          for combination in combinations_to_make)
+    no_wells = 0
+    for no_parts, no_assemblies in part_counts.items():
+        max_assemblies = get_max_mm_assemblies(
+            TOT_VOL_PER_ASSEMBLY - no_parts*PART_VOL)
+        no_wells += -(-no_assemblies // max_assemblies)
+    return no_wells
+
 ###############################################################################
 # Functions for creating output files
 ###############################################################################
@@ -241,26 +447,58 @@ def check_number_of_combinations(
 def generate_and_save_output_plate_maps(
     combinations_to_make: List[Dict],
     combinations_limit: str,
-    output_folder_path: str
+    output_folder_path: str,
+    batches: List[List[Dict]] = None
 ) -> Tuple[str, str]:
     '''
         Saves the mapping of the agar plate for use in transformation.
+        If the constructs are split over more than one reaction plate, the
+        maps of all agar plates are saved in the same csv, each under an
+        "Agar plate n" heading.
         Args:
             combinations_to_make = list of construct dictionaries
             combinations_limit = "single" or "triplicate"
             output_folder_path = where to save mapping
+            batches = reaction plate batches from plan_reaction_batches,
+            planned here if not given
         Returns:
             triplicate: whether 'single' (triplicate = False) or 'triplicate'
             (triplicate = True) is selected
             output_filename: the absolute path to the agar plate csv
     '''
+    if batches is None:
+        batches = plan_reaction_batches(combinations_to_make,
+                                        combinations_limit)
+    triplicate = combinations_limit == 'triplicate'
+
+    output_filename = os.path.join(output_folder_path, "Agar_plate.csv")
+    with open(output_filename, 'w+', newline='') as f:
+        writer = csv.writer(f)
+        for batch_index, batch in enumerate(batches):
+            if len(batches) > 1:
+                writer.writerow(['Agar plate ' + str(batch_index + 1)])
+            for row in get_output_plate_map(batch, triplicate):
+                writer.writerow(row)
+            if len(batches) > 1:
+                writer.writerow('')
+    return triplicate, output_filename
+
+
+def get_output_plate_map(
+    combinations_to_make: List[Dict],
+    triplicate: bool
+) -> List[List[str]]:
+    '''
+        Returns the agar plate map for the constructs of one reaction plate.
+        Args:
+            combinations_to_make = list of construct dictionaries
+            triplicate = whether each construct is plated three times
+        Returns: list of rows of construct names
+    '''
     # Split combinations_to_make into 8x6 plate maps.
     output_plate_map_flipped = []
     for i, combo in enumerate(combinations_to_make):
         name = combo['name']
-        # if i % 32 == 0:
-        #   # new plate
-        #   output_plate_maps_flipped.append([[name]])
         if i % 8 == 0:
             # new column
             output_plate_map_flipped.append([name])
@@ -276,12 +514,10 @@ def generate_and_save_output_plate_maps(
             else:
                 output_plate_map[j].append(element)
 
-    triplicate = False
     # creating an output plate three copies of each column
-    if combinations_limit == 'triplicate':
+    if triplicate:
         combinedRow = []
         splitRows = []
-        triplicate = True
 
         for j in range(0, len(output_plate_map)):  # 8
             # Tripling each item in the plate
@@ -302,18 +538,14 @@ def generate_and_save_output_plate_maps(
 
         output_plate_map = splitRows
 
-    output_filename = os.path.join(output_folder_path, "Agar_plate.csv")
-    with open(output_filename, 'w+', newline='') as f:
-        writer = csv.writer(f)
-        for row in output_plate_map:
-            writer.writerow(row)
-    return triplicate, output_filename
+    return output_plate_map
 
 
 def create_metainformation(
     output_path: str, dna_plate_map_dict: Dict[str, List[List]],
     combinations_to_make: List[Dict],
-    labware_dict: Dict[str, str], thermocycle: bool, triplicate: str
+    labware_dict: Dict[str, str], thermocycle: bool, triplicate: str,
+    batches: List[List[Dict]] = None
 ) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
     '''
         Returns detailed metainformation and saves in a csv.
@@ -328,6 +560,10 @@ def create_metainformation(
             thermocyle: whether the thermocycler module is used
             triplicate: whether 'single' (triplicate = False) or 'triplicate'
             (triplicate = True) is selected
+            batches: reaction plate batches from plan_reaction_batches; if
+            there is more than one, constructs are given a batch number and
+            master mixes are made on the reagents plate and shared between
+            batches
         Returns:
             parts_df: dataframe of parts
             combinations_df: dataframe of constructs
@@ -339,47 +575,74 @@ def create_metainformation(
             go into master mixes
     '''
 
+    parts_df, combinations_df, mm_df, reagents_df = \
+        create_metainformation_dfs(dna_plate_map_dict, combinations_to_make,
+                                   batches=batches)
+    save_metainformation(output_path, labware_dict, thermocycle, triplicate,
+                         parts_df, combinations_df, mm_df, reagents_df)
+    return parts_df, combinations_df, mm_df, reagents_df
+
+
+def create_metainformation_dfs(
+    dna_plate_map_dict: Dict[str, List[List]],
+    combinations_to_make: List[Dict],
+    batches: List[List[Dict]] = None
+) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    '''
+        Creates the metainformation dataframes, see create_metainformation.
+        Args:
+            dna_plate_map_dict: the dictionary of parts
+            combinations_to_make: the list of dictionaries of
+            constructs
+            batches: reaction plate batches from plan_reaction_batches
+        Returns:
+            parts_df, combinations_df, mm_df and reagents_df
+    '''
+
     # Create parts dataframe
     parts_df = create_parts_df(dna_plate_map_dict)
 
     # Creates combinations dataframe
-    combination_df_list = []
-    for comb_index, combination_dict in enumerate(combinations_to_make):
-        combination_df_dict = {}
-        name = combination_dict['name']
-        combination_df_dict['name'] = [name]
-        combination_df_dict['parts'] = [combination_dict['parts']]
-        combination_df_dict['well'] = [index_to_well_name(comb_index)]
-        combination_df_dict['no_parts'] = [len(combination_dict['parts'])]
-        combination_df_dict['plate'] = ['reaction_plate']
-        combination_df_list.append(pd.DataFrame.from_dict(combination_df_dict))
-        for part in combination_dict['parts']:
-            part_indices = parts_df[parts_df['name'] == part].index.values
-            for part_index in part_indices:
-                if parts_df.at[part_index, 'combinations'] == '0':
-                    parts_df.at[part_index, 'combinations'] = [
-                        combination_dict['name']]
-                else:
-                    parts_df.at[part_index, 'combinations'].append(
-                        combination_dict['name'])
-    if combination_df_list:
-        combinations_df = pd.concat(combination_df_list, ignore_index=True)
+    shared_mm = batches is not None and len(batches) > 1
+    if shared_mm:
+        batch_numbers = [batch_index for batch_index, batch
+                         in enumerate(batches) for combination in batch]
+        combinations_df = create_combinations_df(
+            [combination for batch in batches for combination in batch],
+            batch_numbers=batch_numbers)
+    else:
+        combinations_df = create_combinations_df(combinations_to_make)
+
+    # Fill in which combinations each part is used in
+    parts_df = add_part_combinations(parts_df, combinations_df)
+
+    if shared_mm:
+        # Master mixes fill the reagents plate from A1, reagents from H12
+        mm_df = create_mm_df(
+            combinations_df,
+            avail_mm_wells=[index_to_well_name(no)
+                            for no in range(WELLS_PER_PLATE)],
+            plate='reagents_plate')
+        reagents_df = create_shared_reagents_df(mm_df)
     else:
-        combination_df_dict['name'] = None
-        combination_df_dict['parts'] = None
-        combination_df_dict['well'] = None
-        combination_df_dict['no_parts'] = None
-        combination_df_dict['plate'] = None
-        combinations_df = pd.DataFrame(
-            combination_df_dict, index=len(combination_df_dict))
+        # Creates master mix dataframe
+        mm_df = create_mm_df(combinations_df)
 
-    # Creates master mix dataframe
-    mm_df = create_mm_df(combinations_df)
+        # Creates reagents dataframe
+        reagents_df = create_reagents_df(mm_df)
+
+    return parts_df, combinations_df, mm_df, reagents_df
 
-    # Creates reagents dataframe
-    reagents_df = create_reagents_df(mm_df)
 
-    # saves as csv, adding extra info on run and labware
+def save_metainformation(
+    output_path: str, labware_dict: Dict[str, str], thermocycle: bool,
+    triplicate: str, parts_df: pd.DataFrame, combinations_df: pd.DataFrame,
+    mm_df: pd.DataFrame, reagents_df: pd.DataFrame
+):
+    '''
+        Saves the metainformation dataframes in a csv, adding extra info on
+        the run and labware, see create_metainformation.
+    '''
     with open(output_path, 'w', newline='') as csvfile:
         csvwriter = csv.writer(csvfile)
         if triplicate:
@@ -419,61 +682,131 @@ def create_metainformation(
             value.to_csv(csvfile, index=False)
             csvwriter.writerow('')
 
-    return parts_df, combinations_df, mm_df, reagents_df
-
 
 def create_parts_df(
     dna_plate_map_dict: Dict[str, List[List]]
 ) -> pd.DataFrame:
     '''
         Returns a dataframe of parts and delegates wells.
-        Takes in the dictionary of parts.
+        Takes in the dictionary of parts; parts from every plate are kept.
         Args:
             dna_plate_map_dict: dictionary with keys = plate names, values =
             list of rows = list of list of parts
         Returns:
             parts_df: dataframe of parts with dummy '0' for combinations col
     '''
-    letter_dict = {'0': 'A', '1': 'B', '2': 'C', '3': 'D', '4': 'E', '5': 'F',
-                   '6': 'G', '7': 'H'}
-    for plate, plate_wells in dna_plate_map_dict.items():
-        part_df_list = []
-        for row_index, row in enumerate(plate_wells):
-            row_letter = letter_dict[str(row_index)]
-            for col_index, part in enumerate(row):
-                if len(part) > 0:
-                    part_dict = {}
-                    well_name = row_letter + str(col_index + 1)
-                    part_dict['name'] = [part]
-                    part_dict['well'] = [well_name]
-                    part_dict['plate'] = [plate]
-                    part_df_list.append(pd.DataFrame.from_dict(part_dict))
-    parts_df = pd.concat(part_df_list, ignore_index=True)
+    letters = ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H']
+    part_records = [
+        (part, letters[row_index] + str(col_index + 1), plate)
+        for plate, plate_wells in dna_plate_map_dict.items()
+        for row_index, row in enumerate(plate_wells)
+        for col_index, part in enumerate(row)
+        if len(part) > 0]
+    parts_df = pd.DataFrame.from_records(
+        part_records, columns=['name', 'well', 'plate'])
 
     # Empty column to be filled after combinations df is generated
     parts_df['combinations'] = pd.Series(['0'] * len(parts_df.index),
-                                         index=parts_df.index)
+                                         index=parts_df.index, dtype=object)
+    return parts_df
+
+
+def create_combinations_df(
+    combinations_to_make: List[Dict],
+    batch_numbers: List[int] = None
+) -> pd.DataFrame:
+    '''
+        Creates a dataframe of constructs and delegates reaction plate
+        wells in the order the constructs are listed.
+        Args:
+            combinations_to_make = list of construct dictionaries
+            batch_numbers = reaction plate batch of each construct (constructs
+            of one batch listed together); wells restart at A1 for each batch
+            and a batch col is added
+        Returns: dataframe of constructs with columns name, parts, well,
+        no_parts and plate (and batch)
+    '''
+    names = [combination['name'] for combination in combinations_to_make]
+    parts = [combination['parts'] for combination in combinations_to_make]
+    if batch_numbers is None:
+        well_indices = range(len(names))
+    else:
+        batch_starts = {}
+        for index, batch_number in enumerate(batch_numbers):
+            batch_starts.setdefault(batch_number, index)
+        well_indices = [index - batch_starts[batch_number]
+                        for index, batch_number in enumerate(batch_numbers)]
+    combinations_df = pd.DataFrame({
+        'name': pd.Series(names, dtype=object),
+        'parts': pd.Series(parts, dtype=object),
+        'well': pd.Series([index_to_well_name(index)
+                           for index in well_indices], dtype=object),
+        'no_parts': pd.Series([len(part_list) for part_list in parts],
+                              dtype='int64'),
+        'plate': pd.Series(['reaction_plate'] * len(names), dtype=object)})
+    if batch_numbers is not None:
+        combinations_df['batch'] = pd.Series(batch_numbers, dtype='int64')
+    return combinations_df
+
+
+def add_part_combinations(
+    parts_df: pd.DataFrame, combinations_df: pd.DataFrame
+) -> pd.DataFrame:
+    '''
+        Fills the combinations column of the parts dataframe with the names
+        of the constructs each part is used in.
+        Constructs are exploded into (construct, part) rows and joined
+        against the parts dataframe once, so the cost is linear in the
+        total number of parts used rather than constructs x parts.
+        Args:
+            parts_df: dataframe of parts, from create_parts_df
+            combinations_df: dataframe of constructs, from
+            create_combinations_df
+        Returns:
+            parts_df: with combinations col = list of construct names, or
+            '0' if the part is not used
+    '''
+    if combinations_df.empty or parts_df.empty:
+        return parts_df
+    construct_parts = combinations_df[['name', 'parts']].explode(
+        'parts').dropna(subset=['parts']).rename(
+            columns={'name': 'combination', 'parts': 'name'})
+    # left keys (constructs) keep their order so each part lists its
+    # constructs in the order they are made
+    part_uses = construct_parts.merge(
+        parts_df[['name']].reset_index(), on='name', how='inner')
+    combinations_by_part = part_uses.groupby(
+        'index', sort=False)['combination'].agg(list)
+    parts_df['combinations'] = [
+        combinations_by_part.get(index, '0') for index in parts_df.index]
     return parts_df
 
 
 def create_mm_df(
-    combinations_df: pd.DataFrame
+    combinations_df: pd.DataFrame,
+    avail_mm_wells: List[str] = None,
+    plate: str = 'reaction_plate'
 ) -> pd.DataFrame:
     '''
         Creates a master mix dataframe and delegates wells.
         Different master mixes must be created depending on
         the number of parts per construct.
-        Args: combinations_df = dataframe of constructs
+        Args:
+            combinations_df = dataframe of constructs
+            avail_mm_wells = wells free for master mixes, in order of use;
+            defaults to the reaction plate wells after the constructs,
+            counting down from H12
+            plate = plate the master mixes are made on
         Returns: dataframe of master mixes with wells and volumes
         of different reagents required
+        Raises: ValueError if there are not enough free wells
     '''
-    TOT_VOL_PER_ASSEMBLY = 20
-    BUFFER_VOL_PER_ASSEMBLY = 2
-    LIGASE_VOL_PER_ASSEMBLY = 0.5
-    ENZYME_VOL_PER_ASSEMBLY = 1
-    PART_VOL = 2
-    avail_mm_wells_no = list(range(95, len(combinations_df)-2, -1))
-    avail_mm_wells = [index_to_well_name(no) for no in avail_mm_wells_no]
+    if avail_mm_wells is None:
+        avail_mm_wells_no = list(range(WELLS_PER_PLATE - 1,
+                                       len(combinations_df) - 1, -1))
+        avail_mm_wells = [index_to_well_name(no) for no in avail_mm_wells_no]
+    else:
+        avail_mm_wells = list(avail_mm_wells)
     mm_df_list = []
 
     # minimum of 2 parts per construct; max of 8
@@ -485,21 +818,20 @@ def create_mm_df(
         if len(combinations) > 0:
             # create a new dictionary and fill
             mm_dict = {}
-            well = avail_mm_wells.pop(0)
+            well = pop_mm_well(avail_mm_wells)
             mm_dict['well'] = [well]
             mm_dict['no_parts'] = [i]
             parts_per_assembly = i
             mm_vol_per_assembly = TOT_VOL_PER_ASSEMBLY - \
                 parts_per_assembly*PART_VOL
             mm_dict['vol_per_assembly'] = [mm_vol_per_assembly]
+            mm_dict['dispenses_per_aspiration'] = [
+                get_dispenses_per_aspiration(
+                    mm_vol_per_assembly, P10_MAX_VOL, DISPOSAL_VOL)]
             # number of assemblies is limited and dead vol is
             # accounted for
-            max_assemblies = 180 // mm_vol_per_assembly
+            max_assemblies = get_max_mm_assemblies(mm_vol_per_assembly)
             mm_combinations = []
-            if max_assemblies % 2 == 0:
-                max_assemblies = max_assemblies - 2
-            else:
-                max_assemblies = max_assemblies - 3
             tot_assemblies = len(combinations)
             no_assemblies = 0
             for comb_index, comb_row in enumerate(combinations):
@@ -509,10 +841,8 @@ def create_mm_df(
                     if comb_index == tot_assemblies-1:
                         # no more assemblies for no of parts
                         # save the dictionary after filling
-                        if no_assemblies % 2 == 0:
-                            no = no_assemblies + 2
-                        else:
-                            no = no_assemblies + 3
+                        no = count_mm_volumes(no_assemblies,
+                                              mm_vol_per_assembly)
                         mm_dict['combinations'] = [mm_combinations]
                         mm_dict['no_assemblies'] = [no_assemblies]
                         mm_dict['buffer_vol'] = [BUFFER_VOL_PER_ASSEMBLY*no]
@@ -522,12 +852,13 @@ def create_mm_df(
                             mm_dict['buffer_vol'][0] - \
                             mm_dict['ligase_vol'][0] - mm_dict['enzyme_vol'][0]
                         mm_dict['water_vol'] = [water_vol]
-                        mm_dict['plate'] = ['reaction_plate']
+                        mm_dict['plate'] = [plate]
                         mm_df_list.append(pd.DataFrame.from_dict(mm_dict))
                 else:
                     # run out of space for assemblies in mm well
                     # save mm_dict before creating new one
-                    no = max_assemblies + 2
+                    no = count_mm_volumes(no_assemblies,
+                                          mm_vol_per_assembly)
                     mm_dict['combinations'] = [mm_combinations]
                     mm_dict['no_assemblies'] = [no_assemblies]
                     mm_dict['buffer_vol'] = [BUFFER_VOL_PER_ASSEMBLY*no]
@@ -537,14 +868,17 @@ def create_mm_df(
                         mm_dict['buffer_vol'][0] - \
                         mm_dict['ligase_vol'][0] - mm_dict['enzyme_vol'][0]
                     mm_dict['water_vol'] = [water_vol]
-                    mm_dict['plate'] = ['reaction_plate']
+                    mm_dict['plate'] = [plate]
                     mm_df_list.append(pd.DataFrame.from_dict(mm_dict))
                     mm_dict = {}
-                    well = avail_mm_wells.pop(0)
+                    well = pop_mm_well(avail_mm_wells)
                     mm_dict['well'] = [well]
                     mm_combinations = [comb_row['name']]
                     mm_dict['no_parts'] = [i]
                     mm_dict['vol_per_assembly'] = [mm_vol_per_assembly]
+                    mm_dict['dispenses_per_aspiration'] = [
+                        get_dispenses_per_aspiration(
+                            mm_vol_per_assembly, P10_MAX_VOL, DISPOSAL_VOL)]
                     no_assemblies = 1
     # turn into dataframe
     if mm_df_list:
@@ -554,6 +888,7 @@ def create_mm_df(
         mm_dict['well'] = None
         mm_dict['no_parts'] = None
         mm_dict['vol_per_assembly'] = None
+        mm_dict['dispenses_per_aspiration'] = None
         mm_dict['combinations'] = None
         mm_dict['no_assemblies'] = None
         mm_dict['buffer_vol'] = None
@@ -565,6 +900,20 @@ def create_mm_df(
     return mm_df
 
 
+def pop_mm_well(
+    avail_mm_wells: List[str]
+) -> str:
+    '''
+        Takes the next free master mix well.
+        Args: avail_mm_wells = list of free wells, modified in place
+        Returns: well name
+        Raises: ValueError if no wells are left
+    '''
+    if not avail_mm_wells:
+        raise ValueError('Not enough free wells for master mixes.')
+    return avail_mm_wells.pop(0)
+
+
 def create_reagents_df(
     mm_df: pd.DataFrame
 ) -> pd.DataFrame:
@@ -673,6 +1022,82 @@ def create_reagents_df(
     return reagents_df
 
 
+def create_shared_reagents_df(
+    mm_df: pd.DataFrame
+) -> pd.DataFrame:
+    '''
+        Creates a dataframe of reagents for master mixes held on the
+        reagents plate and shared between reaction plate batches.
+        Each of ligase, restriction enzyme and buffer is split over as many
+        wells as needed to keep every well under MAX_WELL_VOL, filling the
+        reagents plate from H12 backwards. A well supplying a single master
+        mix has its dead volume cut to fit. Water is held in the trough.
+        Args: master mix dataframe, wells on the reagents plate from A1
+        Returns: dataframe of reagents used in master mix + water
+        Raises: ValueError if master mixes and reagents do not fit on the
+        reagents plate
+    '''
+    water_vol = 15000
+    reagent_cols = [('ligase', 'ligase_vol'),
+                    ('restriction_enzyme', 'enzyme_vol'),
+                    ('buffer', 'buffer_vol')]
+    reagent_rows = []
+    for name, vol_col in reagent_cols:
+        groups = []
+        group_wells = []
+        group_vol = 0
+        for mm_well, vol in zip(mm_df['well'], mm_df[vol_col]):
+            if group_wells and get_reagent_well_vol(
+                    group_vol + vol, len(group_wells) + 1) > MAX_WELL_VOL:
+                groups.append((group_wells, group_vol))
+                group_wells = []
+                group_vol = 0
+            group_wells.append(mm_well)
+            group_vol += vol
+        groups.append((group_wells, group_vol))
+        for group_index, (group_wells, group_vol) in enumerate(groups):
+            if len(groups) > 1:
+                reagent_name = name + '-' + str(group_index + 1)
+            else:
+                reagent_name = name
+            reagent_rows.append({
+                'name': reagent_name,
+                'well': index_to_well_name(
+                    WELLS_PER_PLATE - 1 - len(reagent_rows)),
+                'plate': 'reagents_plate',
+                'volume': min(get_reagent_well_vol(
+                    group_vol, len(group_wells)), MAX_WELL_VOL),
+                'mm_wells': group_wells})
+
+    if len(reagent_rows) + len(mm_df) > WELLS_PER_PLATE:
+        raise ValueError('Too many master mixes ({0}) and reagent wells ({1}) '
+                         'for the reagents plate.'.format(
+                             len(mm_df), len(reagent_rows)))
+
+    reagent_rows.append({'name': 'water', 'well': 'A1', 'plate': 'trough',
+                         'volume': water_vol,
+                         'mm_wells': list(mm_df['well'])})
+    reagents_df = pd.DataFrame(
+        reagent_rows, columns=['name', 'well', 'plate', 'volume', 'mm_wells'])
+    return reagents_df
+
+
+def get_reagent_well_vol(
+    vol: float, no_mm_wells: int
+) -> float:
+    '''
+        Adds dead volume to a reagent volume and rounds up to the nearest 10.
+        Args:
+            vol = total volume transferred out of the reagent well
+            no_mm_wells = number of master mix wells supplied
+        Returns: volume to load into the reagent well
+    '''
+    tot_vol = vol + 2*(vol // no_mm_wells)
+    if tot_vol % 10 > 0:
+        tot_vol = 10*((tot_vol // 10) + 1)
+    return tot_vol
+
+
 def get_mm_dicts(
     mm_df: pd.DataFrame, reagents_df: pd.DataFrame
 ) -> Tuple[Dict[str, List[Tuple[str, str, str]]], Dict]:
@@ -720,6 +1145,121 @@ def get_mm_dicts(
     return reagent_to_mm_dict, mm_dict_list
 
 
+def get_batch_mm_dicts(
+    mm_df: pd.DataFrame, reagents_df: pd.DataFrame,
+    combinations_df: pd.DataFrame, batch_number: int
+) -> Tuple[Dict[str, List[Tuple[str, str, str]]], Dict]:
+    '''
+        Master mix dictionaries for the assembly script of one reaction plate
+        batch when master mixes are shared between batches.
+        A master mix is made by the first batch that uses it; later batches
+        only transfer from it.
+        Args:
+            mm_df = dataframe of shared master mixes
+            reagents_df = dataframe of reagents, from create_shared_reagents_df
+            combinations_df = dataframe of constructs with batch col
+            batch_number = index of the batch
+        Returns:
+            reagent_to_mm_dict: as get_mm_dicts, only for master mixes made
+            in this batch
+            mm_dict_list: master mixes used by this batch, with combinations
+            and no_assemblies restricted to this batch
+    '''
+    batch_by_combination = dict(zip(combinations_df['name'],
+                                    combinations_df['batch']))
+    mm_dict_list = []
+    made_mm_wells = []
+    for index, row in mm_df.iterrows():
+        mm_batches = [batch_by_combination[name]
+                      for name in row['combinations']]
+        if batch_number not in mm_batches:
+            continue
+        if min(mm_batches) == batch_number:
+            made_mm_wells.append(row['well'])
+        mm_dict = row.to_dict()
+        mm_dict['combinations'] = [
+            name for name, mm_batch in zip(row['combinations'], mm_batches)
+            if mm_batch == batch_number]
+        mm_dict['no_assemblies'] = len(mm_dict['combinations'])
+        mm_dict_list.append(mm_dict)
+    reagent_to_mm_dict, _ = get_mm_dicts(
+        mm_df[mm_df['well'].isin(made_mm_wells)].reset_index(drop=True),
+        reagents_df)
+    reagent_to_mm_dict = {reagent_well: transfers for reagent_well, transfers
+                          in reagent_to_mm_dict.items() if transfers}
+    return reagent_to_mm_dict, mm_dict_list
+
+
+def validate_batches(
+    dna_plate_map_dict: Dict[str, List[List]],
+    batches: List[List[Dict]],
+    batch_mm_dicts: List[Tuple[Dict[str, List[Tuple[str, str, str]]],
+                               List[Dict]]],
+    reagents_df: pd.DataFrame, thermocycle: bool,
+    p10_mount: str, p300_mount: str
+) -> List[Diagnostic]:
+    '''
+        Checks the plan of every reaction plate batch before its scripts are
+        written: deck slots, tips, reagent and master mix well volumes,
+        transfer volumes and pipette mounts.
+        Args:
+            dna_plate_map_dict: the dictionary of parts
+            batches: reaction plate batches from plan_reaction_batches
+            batch_mm_dicts: reagent_to_mm_dict and mm_dict_list of each
+            batch, from get_mm_dicts or get_batch_mm_dicts
+            reagents_df: dataframe of reagents
+            thermocyle: whether the thermocycler module is used
+            p10_mount, p300_mount: "left" or "right"
+        Returns: list of diagnostics, see protocol_validation
+    '''
+    diagnostics = []
+    # Every DNA plate is loaded in the same slot by the assembly script
+    labware = {'DNA plate ' + plate_name: DNA_PLATE_SLOT
+               for plate_name in dna_plate_map_dict}
+    labware['reagents plate'] = REAGENT_PLATE_SLOT
+    labware['trough'] = TROUGH_SLOT
+    for index, slot in enumerate(P10_TIPRACK_SLOTS):
+        labware['tip rack ' + str(index + 1)] = slot
+    if thermocycle:
+        labware['thermocycler'] = THERMOCYCLER_SLOT
+    else:
+        labware['tempdeck'] = TEMPDECK_SLOT
+    diagnostics += check_deck_slots(labware, 'assembly')
+
+    plate_reagents = reagents_df[reagents_df['plate'] == 'reagents_plate']
+    diagnostics += check_well_volumes(
+        dict(zip(plate_reagents['well'], plate_reagents['volume'])),
+        MAX_WELL_VOL, 'Reagents plate', 'assembly')
+
+    for batch_index, batch in enumerate(batches):
+        stage = 'assembly'
+        if len(batches) > 1:
+            stage += ' ' + str(batch_index + 1)
+        reagent_to_mm_dict, mm_dicts = batch_mm_dicts[batch_index]
+        mm_volumes = {}
+        reagent_volumes = []
+        for transfers in reagent_to_mm_dict.values():
+            for _, mm_well, vol in transfers:
+                mm_volumes[mm_well] = mm_volumes.get(mm_well, 0) + float(vol)
+                reagent_volumes.append(float(vol))
+        diagnostics += check_well_volumes(
+            mm_volumes, MAX_WELL_VOL, 'Master mix', stage)
+        diagnostics += check_transfer_volumes(
+            reagent_volumes, P10_MIN_VOL, 'master mix reagents', stage)
+
+        # A tip per reagent, two per master mix (mixing and transferring it)
+        # and one per part
+        parts = {part for combination in batch
+                 for part in combination['parts']}
+        tips = len(reagent_to_mm_dict) + 2 * len(mm_dicts) + len(parts)
+        diagnostics += check_tip_racks(
+            count_tip_racks(tips), len(P10_TIPRACK_SLOTS), stage)
+
+    diagnostics += check_mounts(
+        {'p10': p10_mount, 'p300': p300_mount}, 'transformation')
+    return diagnostics
+
+
 def index_to_well_name(
     no: int
 ) -> str:
@@ -791,6 +1331,49 @@ def create_transform_metainformation(
         csvwriter.writerow('')
 
 
+def get_combinations_by_part(
+    dna_plate_map_dict: Dict[str, List],
+    combinations_to_make: List[Dict],
+    thermocycle: bool
+) -> Dict[str, List[str]]:
+    '''
+        Orders the reaction wells each part is transferred into in the
+        assembly protocol, to shorten the travel of the pipette between the
+        reaction wells it dispenses into per aspiration.
+        Args:
+            dna_plate_map_dict: the dictionary of parts
+            combinations_to_make: the list of dictionaries of constructs on
+            the reaction plate, construct i going to reaction well i
+            thermocycle: whether the reaction plate is in the thermocycler
+            or on the temperature module
+        Returns:
+            dictionary with key = part, value = names of the constructs the
+            part is transferred into, in order
+    '''
+    reaction_slot = THERMOCYCLER_SLOT if thermocycle else TEMPDECK_SLOT
+    wells_by_part = {}
+    for i, combination in enumerate(combinations_to_make):
+        for part in combination['parts']:
+            wells_by_part.setdefault(part, []).append(
+                (reaction_slot, index_to_well_name(i)))
+    groups = []
+    for part, wells in wells_by_part.items():
+        # the assembly protocol takes a part from its first well
+        source = next(
+            index_to_well_name(8 * j + i)
+            for plate_map in dna_plate_map_dict.values()
+            for i, row in enumerate(plate_map)
+            for j, dna_name in enumerate(row) if dna_name == part)
+        groups.append(TransferGroup(
+            name=part, source=(DNA_PLATE_SLOT, source), destinations=wells,
+            per_aspiration=PART_DISPENSES_PER_ASPIRATION,
+            between=[(TROUGH_SLOT, well) for well in WASH_WELLS]))
+    names = {(reaction_slot, index_to_well_name(i)): combination['name']
+             for i, combination in enumerate(combinations_to_make)}
+    return {group.name: [names[well] for well in group.destinations]
+            for group in schedule_transfers(groups, TIPRACK_LOCATION)}
+
+
 def create_protocol(
     dna_plate_map_dict: Dict[str, List],
     combinations_to_make: List[Dict],
@@ -799,7 +1382,7 @@ def create_protocol(
     output_folder_path: str, thermocycle: bool, triplicate: str, multi: bool,
     p10Mount: str, p300Mount: str, p10_type: str, p300_type: str,
     reaction_plate_type: str, reagent_plate_type: str, trough_type: str,
-    agar_plate_type: str
+    agar_plate_type: str, protocol_suffix: str = ''
 ) -> Tuple[str, str]:
     '''
         Generates the assembly and transformation protocols used by opentrons.
@@ -835,24 +1418,27 @@ def create_protocol(
             reagent plate (for master mix and non-water reagents)
             trough_type: the name of the trough type used for water and soc
             agar_plate_type: the name of the agar plate type used
+            protocol_suffix: added to the protocol file names, e.g. '_2' for
+            the second reaction plate batch
     '''
 
     # Get the contents of colony_pick_template.py, which contains the body of
     # the protocol.
     with open(assembly_template_path) as assembly_template_file:
         assembly_template_string = assembly_template_file.read()
-    assembly_path = output_folder_path + '/' + 'moclo_assembly_protocol.py'
+    assembly_path = output_folder_path + '/' + 'moclo_assembly_protocol' + \
+        protocol_suffix + '.py'
     with open(assembly_path, "w+") as assembly_file:
         # Paste in plate maps at top of file.
-        assembly_file.write('dna_plate_map_dict = ' +
-                            json.dumps(dna_plate_map_dict) + '\n\n')
-        assembly_file.write('combinations_to_make = '
-                            + json.dumps(combinations_to_make) + '\n\n')
-        assembly_file.write('reagent_to_mm = '
-                            + json.dumps(reagent_to_mm_dict) + '\n\n')
-        assembly_file.write('master_mix_dicts = '
-                            + json.dumps(mm_dict) + '\n\n')
+        assembly_file.write(get_plan_header({
+            'dna_plate_map_dict': dna_plate_map_dict,
+            'combinations_to_make': combinations_to_make,
+            'combinations_by_part': get_combinations_by_part(
+                dna_plate_map_dict, combinations_to_make, thermocycle),
+            'reagent_to_mm': reagent_to_mm_dict,
+            'master_mix_dicts': mm_dict}))
         assembly_file.write('thermocycle = ' + str(thermocycle) + '\n\n')
+        assembly_file.write('disposal_vol = ' + str(DISPOSAL_VOL) + '\n\n')
         assembly_file.write('pipetteMount10 = "' + p10Mount + '"\n\n')
         assembly_file.write('p10_type = "' + p10_type + '"\n\n')
         assembly_file.write(
@@ -867,11 +1453,12 @@ def create_protocol(
 
     with open(transform_template_path) as transform_template_file:
         transform_template_string = transform_template_file.read()
-    transform_path = output_folder_path + '/' + 'transform_moclo_protocol.py'
+    transform_path = output_folder_path + '/' + 'transform_moclo_protocol' + \
+        protocol_suffix + '.py'
     with open(transform_path, "w+") as transform_file:
         # Paste in plate maps at top of file.
-        transform_file.write('combinations_to_make = '
-                             + json.dumps(combinations_to_make) + '\n\n')
+        transform_file.write(get_plan_header(
+            {'combinations_to_make': combinations_to_make}))
         transform_file.write('multi = ' + str(multi) + '\n\n')
         transform_file.write('triplicate = ' + str(triplicate) + '\n\n')
         transform_file.write('pipetteMount10 = "' + p10Mount + '"\n\n')
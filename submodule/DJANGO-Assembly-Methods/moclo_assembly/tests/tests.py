@@ -2,10 +2,13 @@ import unittest
 from unittest.mock import patch
 import sys
 import os
+import tempfile
 import pandas as pd
 # sys.path.append("C:/Users/gabri/Documents/Uni/iGEM/OT2-MoClo-Transformation-Ecoli-master/moclo_transformation/final_version")
 sys.path.append("/home/runner/work/DJANGO-Assembly-Methods/DJANGO-Assembly-Methods/moclo_assembly/moclo_transformation/")
 import moclo_transform_generator
+from sbol_parser_api.assembly_plan import (
+    AssemblyPlan, PlanConstruct, PlanPart, PlanPlate)
 
 # TEST_DIR = "C:/Users/gabri/Documents/Uni/iGEM/OT2-MoClo-Transformation-Ecoli-master/moclo_transformation/final_version/tests"
 TEST_DIR = "/home/runner/work/DJANGO-Assembly-Methods/DJANGO-Assembly-Methods/moclo_assembly/tests/"
@@ -34,6 +37,24 @@ class MoCloInputTestCase(unittest.TestCase):
             comb_source)
         self.assertListEqual(comb_dicts, self.combinations_to_make)
 
+    def test_generate_from_plan(self):
+        parts = [PlanPart(name, chr(ord('A') + row) + str(column + 1))
+                 for row, names in enumerate(
+                     self.dna_plate_map_dict['input-dna-map'])
+                 for column, name in enumerate(names) if name]
+        plan = AssemblyPlan('moclo', constructs=[
+            PlanConstruct('', combination['parts'], name=combination['name'])
+            for combination in self.combinations_to_make],
+            plates=[PlanPlate('input-dna-map', parts)])
+        dna_dict = moclo_transform_generator.generate_plate_maps_from_plan(
+            plan)
+        self.assertListEqual(
+            [row[:10] for row in dna_dict['input-dna-map']],
+            self.dna_plate_map_dict['input-dna-map'])
+        comb_dicts = \
+            moclo_transform_generator.generate_combinations_from_plan(plan)
+        self.assertListEqual(comb_dicts, self.combinations_to_make)
+
     def test_check_number_of_combinations(self):
         with self.assertRaises(ValueError):
             moclo_transform_generator.check_number_of_combinations(
@@ -49,6 +70,175 @@ class MoCloInputTestCase(unittest.TestCase):
             moclo_transform_generator.check_number_of_combinations(
                 'triplicate', self.combinations_to_make)
 
+    def test_create_parts_df(self):
+        dna_plate_map_dict = {'plate1': [['p1', 'p2'], ['p3', '']],
+                              'plate2': [['p4']]}
+        parts_df = moclo_transform_generator.create_parts_df(
+            dna_plate_map_dict)
+        self.assertListEqual(parts_df['name'].to_list(),
+                             ['p1', 'p2', 'p3', 'p4'])
+        self.assertListEqual(parts_df['well'].to_list(),
+                             ['A1', 'A2', 'B1', 'A1'])
+        self.assertListEqual(parts_df['plate'].to_list(),
+                             ['plate1', 'plate1', 'plate1', 'plate2'])
+        self.assertListEqual(parts_df['combinations'].to_list(),
+                             ['0', '0', '0', '0'])
+
+    def test_add_part_combinations(self):
+        parts_df = moclo_transform_generator.create_parts_df(
+            self.dna_plate_map_dict)
+        combinations_df = moclo_transform_generator.create_combinations_df(
+            self.combinations_to_make)
+        parts_df = moclo_transform_generator.add_part_combinations(
+            parts_df, combinations_df)
+        for index, row in parts_df.iterrows():
+            expected = [combination['name'] for combination
+                        in self.combinations_to_make
+                        if row['name'] in combination['parts']]
+            if expected:
+                self.assertListEqual(row['combinations'], expected)
+            else:
+                self.assertEqual(row['combinations'], '0')
+        self.assertListEqual(combinations_df['well'].to_list()[:9],
+                             ['A1', 'B1', 'C1', 'D1', 'E1', 'F1', 'G1', 'H1',
+                              'A2'])
+
+    def test_plan_reaction_batches(self):
+        batches = moclo_transform_generator.plan_reaction_batches(
+            self.combinations_to_make, 'single')
+        self.assertEqual(len(batches), 1)
+        comb2 = self.combinations_to_make + self.combinations_to_make
+        batches = moclo_transform_generator.plan_reaction_batches(
+            comb2, 'single')
+        self.assertListEqual([len(batch) for batch in batches], [88, 56])
+        batches = moclo_transform_generator.plan_reaction_batches(
+            self.combinations_to_make, 'triplicate')
+        self.assertListEqual([len(batch) for batch in batches], [24, 24, 24])
+        with self.assertRaises(ValueError):
+            moclo_transform_generator.plan_reaction_batches(
+                self.combinations_to_make, 'afjkdl')
+
+    def test_plan_reaction_batches_mm_wells(self):
+        # 88 constructs fit the batch size but not with their 10 master
+        # mix wells
+        combinations = []
+        for no_parts, number in [(2, 56), (5, 20), (8, 12)]:
+            combinations += [
+                {'name': combination['name'] + '-' + str(copy),
+                 'parts': combination['parts']} for copy in range(3)
+                for combination in self.combinations_to_make
+                if len(combination['parts']) == no_parts][:number]
+        self.assertEqual(len(combinations), 88)
+        self.assertEqual(
+            moclo_transform_generator.count_mm_wells(combinations), 10)
+        batches = moclo_transform_generator.plan_reaction_batches(
+            combinations, 'single')
+        self.assertListEqual([len(batch) for batch in batches], [44, 44])
+        # master mixes of several batches go on the reagents plate, so the
+        # reaction plates are filled up to the batch size
+        batches = moclo_transform_generator.plan_reaction_batches(
+            combinations + combinations, 'single')
+        self.assertListEqual([len(batch) for batch in batches], [88, 88])
+        parts = [PlanPart(name, chr(ord('A') + row) + str(column + 1))
+                 for row, names in enumerate(
+                     self.dna_plate_map_dict['input-dna-map'])
+                 for column, name in enumerate(names) if name]
+        plan = AssemblyPlan('moclo', constructs=[
+            PlanConstruct('', combination['parts'], name=combination['name'])
+            for combination in combinations],
+            plates=[PlanPlate('input-dna-map', parts)])
+        with tempfile.TemporaryDirectory() as output_folder:
+            output_paths = moclo_transform_generator.moclo_function(
+                output_folder, plan=plan)
+        self.assertNotIn('MoClo_error.txt',
+                         [os.path.basename(path) for path in output_paths])
+        self.assertEqual(len(output_paths), 2*len(batches) + 3)
+
+    def test_get_batch_mm_dicts(self):
+        comb2 = [{'name': combination['name'] + '-' + str(copy),
+                  'parts': combination['parts']} for copy in range(2)
+                 for combination in self.combinations_to_make]
+        batches = moclo_transform_generator.plan_reaction_batches(
+            comb2, 'single')
+        batch_numbers = [batch_index for batch_index, batch
+                         in enumerate(batches) for combination in batch]
+        combinations_df = moclo_transform_generator.create_combinations_df(
+            comb2, batch_numbers=batch_numbers)
+        self.assertEqual(combinations_df.at[88, 'well'], 'A1')
+        mm_df = moclo_transform_generator.create_mm_df(
+            combinations_df, avail_mm_wells=['A1', 'B1', 'C1', 'D1', 'E1',
+                                             'F1', 'G1', 'H1', 'A2', 'B2',
+                                             'C2', 'D2'],
+            plate='reagents_plate')
+        reagents_df = moclo_transform_generator.create_shared_reagents_df(
+            mm_df)
+        plate_reagents_df = reagents_df[
+            reagents_df['plate'] == 'reagents_plate']
+        self.assertTrue((plate_reagents_df['volume'] <= 180).all())
+        made_mm_wells = []
+        for batch_index, batch in enumerate(batches):
+            reagent_to_mm, mm_dicts = \
+                moclo_transform_generator.get_batch_mm_dicts(
+                    mm_df, reagents_df, combinations_df, batch_index)
+            self.assertEqual(sum(mm_dict['no_assemblies']
+                                 for mm_dict in mm_dicts), len(batch))
+            for transfers in reagent_to_mm.values():
+                for transfer in transfers:
+                    made_mm_wells.append(transfer[1])
+        # each master mix is made once, by the first batch using it
+        self.assertSetEqual(set(made_mm_wells), set(mm_df['well']))
+        self.assertEqual(len(made_mm_wells),
+                         sum(len(wells) for wells in reagents_df['mm_wells']))
+
+    def test_get_max_mm_assemblies(self):
+        for no_parts in range(2, 9):
+            vol = 20 - 2*no_parts
+            max_assemblies = \
+                moclo_transform_generator.get_max_mm_assemblies(vol)
+            self.assertLessEqual(
+                moclo_transform_generator.count_mm_volumes(
+                    max_assemblies, vol)*vol, 180)
+        # 4 uL is distributed 2 wells per aspiration, with 1 uL disposed
+        self.assertEqual(moclo_transform_generator.count_mm_volumes(24, 4),
+                         26 + 3)
+        self.assertEqual(moclo_transform_generator.count_mm_volumes(8, 16),
+                         10)
+
+    def test_validate_batches(self):
+        batches = moclo_transform_generator.plan_reaction_batches(
+            self.combinations_to_make, 'single')
+        parts_df, combinations_df, mm_df, reagents_df = \
+            moclo_transform_generator.create_metainformation_dfs(
+                self.dna_plate_map_dict, self.combinations_to_make,
+                batches=batches)
+        batch_mm_dicts = [moclo_transform_generator.get_mm_dicts(
+            mm_df, reagents_df)]
+        diagnostics = moclo_transform_generator.validate_batches(
+            self.dna_plate_map_dict, batches, batch_mm_dicts, reagents_df,
+            True, 'right', 'left')
+        self.assertListEqual(diagnostics, [])
+        # every DNA plate is loaded in slot 1, and the tempdeck in slot 10
+        # is covered by the thermocycler
+        dna_plate_map_dict = dict(self.dna_plate_map_dict)
+        dna_plate_map_dict['second_plate'] = []
+        diagnostics = moclo_transform_generator.validate_batches(
+            dna_plate_map_dict, batches, batch_mm_dicts, reagents_df,
+            False, 'right', 'left')
+        self.assertEqual(len(diagnostics), 1)
+        self.assertEqual(diagnostics[0].code, 'deck-slot')
+
+    def test_get_combinations_by_part(self):
+        combinations_by_part = \
+            moclo_transform_generator.get_combinations_by_part(
+                self.dna_plate_map_dict, self.combinations_to_make, True)
+        expected = {}
+        for combination in self.combinations_to_make:
+            for part in combination['parts']:
+                expected.setdefault(part, []).append(combination['name'])
+        self.assertListEqual(list(combinations_by_part), list(expected))
+        for part, names in expected.items():
+            self.assertCountEqual(combinations_by_part[part], names)
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
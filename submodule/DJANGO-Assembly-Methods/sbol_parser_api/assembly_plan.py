@@ -0,0 +1,157 @@
+import csv
+import os
+from dataclasses import dataclass, field
+from typing import List, Dict, Optional
+
+PART_CSV_HEADER = ["Part/linker", "Well", "Part concentration (ng/uL)"]
+BIO_BRICKS_CONSTRUCT_CSV_HEADER = [
+    "Construct", "Well", "upstream", "downstream", "plasmid"]
+ROW_NAMES = "ABCDEFGH"
+
+
+@dataclass
+class PlanConstruct:
+    """A construct to be assembled, as placed on the construct plate.
+    Attributes:
+        well (str): Well of the construct plate holding the construct.
+        components (List[str]): Display IDs of the parts/linkers making up
+            the construct, in the order expected by the assembly method.
+        name (str): Display ID of the construct. (default: '')
+    """
+    well: str
+    components: List[str]
+    name: str = ''
+
+
+@dataclass
+class PlanPart:
+    """A part or linker held in one well of a part plate.
+    Attributes:
+        name (str): Display ID of the part/linker.
+        well (str): Well of the part plate holding the part/linker.
+        concentration (float): Concentration in ng/uL, None if not given.
+            (default: None)
+    """
+    name: str
+    well: str
+    concentration: Optional[float] = None
+
+
+@dataclass
+class PlanPlate:
+    """A part plate holding the parts/linkers needed for a construct plate.
+    Attributes:
+        name (str): Name of the plate, also used as the CSV file name.
+        parts (List[PlanPart]): Parts/linkers on the plate.
+        num_rows (int): Number of rows of the plate. (default: 8)
+        num_columns (int): Number of columns of the plate. (default: 12)
+    """
+    name: str
+    parts: List[PlanPart] = field(default_factory=list)
+    num_rows: int = 8
+    num_columns: int = 12
+
+    def get_platemap(self) -> List[List[str]]:
+        """Get a map of the plate with the name of the part/linker held in
+        each well, or an empty string for empty wells.
+        Returns:
+            List[List[str]]: One list of well contents per plate row.
+        """
+        platemap = [[''] * self.num_columns for _ in range(self.num_rows)]
+        for part in self.parts:
+            row = ROW_NAMES.index(part.well[0])
+            column = int(part.well[1:]) - 1
+            platemap[row][column] = part.name
+        return platemap
+
+
+@dataclass
+class AssemblyPlan:
+    """Constructs and part plates of one assembly run, passed in memory from
+    the SBOL parser to the assembly script generators.
+    Attributes:
+        assembly (str): Assembly type ("basic", "moclo" or "bio_bricks").
+        constructs (List[PlanConstruct]): Constructs to be assembled.
+        plates (List[PlanPlate]): Part plates used in the assembly.
+    """
+    assembly: str
+    constructs: List[PlanConstruct] = field(default_factory=list)
+    plates: List[PlanPlate] = field(default_factory=list)
+
+    def get_construct_rows(self) -> List[List[str]]:
+        """Get the constructs as rows of the construct CSV of the assembly
+        type, including the header if the CSV has one.
+        Returns:
+            List[List[str]]: Rows of the construct CSV.
+        """
+        if self.assembly == "basic":
+            rows = [[c.well, *c.components] for c in self.constructs]
+            num_pairs = max(
+                [len(c.components) // 2 for c in self.constructs] + [0])
+            header = ["Well"]
+            for i in range(1, num_pairs + 1):
+                header.extend(["Linker %d" % i, "Part %d" % i])
+            rows.insert(0, header)
+        elif self.assembly == "moclo":
+            rows = [[c.name, *c.components] for c in self.constructs]
+        elif self.assembly == "bio_bricks":
+            rows = [[c.name, c.well, *c.components] for c in self.constructs]
+            rows.insert(0, BIO_BRICKS_CONSTRUCT_CSV_HEADER)
+        else:
+            raise ValueError("Invalid assembly type: %s" % self.assembly)
+        row_len = max(len(row) for row in rows)
+        return [row + [''] * (row_len - len(row)) for row in rows]
+
+    def get_part_rows(self, plate: PlanPlate) -> List[List[str]]:
+        """Get the parts/linkers of a plate as rows of the part CSV of the
+        assembly type: a plate map for MoClo, otherwise a list of parts with
+        their well and concentration.
+        Args:
+            plate (PlanPlate): Part plate of the plan.
+        Returns:
+            List[List[str]]: Rows of the part CSV.
+        """
+        if self.assembly == "moclo":
+            return plate.get_platemap()
+        rows = [PART_CSV_HEADER]
+        for part in plate.parts:
+            conc = '' if part.concentration is None else part.concentration
+            rows.append([part.name, part.well, conc])
+        return rows
+
+    def write_csv(
+        self,
+        outdir: str,
+        suffix: str = ''
+    ) -> Dict[str, List[str]]:
+        """Write the construct and part CSVs of the plan, e.g. to keep them
+        alongside the generated scripts or to feed a generator by path.
+        Args:
+            outdir (str): Directory the CSVs are written to.
+            suffix (str): Appended to the CSV file names, e.g. to tell the
+                runs of a multi-run job apart. (default: '')
+        Returns:
+            Dict[str, List[str]]: Dictionary containing lists of paths to
+                csvs generated ('construct_path' and 'part_path').
+        """
+        construct_path = os.path.join(outdir, "construct" + suffix + ".csv")
+        write_rows(construct_path, self.get_construct_rows())
+        part_paths = []
+        for plate in self.plates:
+            part_path = os.path.join(outdir, plate.name + suffix + ".csv")
+            write_rows(part_path, self.get_part_rows(plate))
+            part_paths.append(part_path)
+        return {'construct_path': [construct_path], 'part_path': part_paths}
+
+
+def write_rows(
+    path: str,
+    rows: List[List[str]]
+):
+    """Write a list of rows to a CSV file.
+    Args:
+        path (str): Path of the CSV file.
+        rows (List[List[str]]): Rows to write.
+    """
+    with open(path, 'w', newline='') as csvfile:
+        csv.writer(csvfile).writerows(rows)
@@ -0,0 +1,204 @@
+import inspect
+import json
+import numbers
+import timeit
+from typing import Any, Dict, List, Mapping
+
+# Version of the encoding, checked by the decoder pasted into each script
+PLAN_FORMAT_VERSION = 1
+# Global holding the decoded plan in a script
+PLAN_VARIABLE = '_plan'
+
+
+def encode_plan(plan: Mapping[str, Any]) -> str:
+    """Encode the transfer plan of a script compactly, for decode_plan.
+
+    Lists are stored column-oriented: lists of strings as indices into one
+    table of interned strings (mostly well names), lists of dictionaries
+    with the same keys and lists of tuples of the same length as one list
+    per key or position. Lists of dictionaries with different keys, e.g.
+    pipetting commands, are stored column-oriented per set of keys. The
+    decoded plan equals the plan after a round trip through JSON, e.g.
+    tuples become lists.
+    Args:
+        plan (Mapping[str, Any]): Value of each global of the script, by
+            name. Values are JSON types, tuples and numbers such as numpy
+            integers.
+    Returns:
+        str: JSON payload.
+    Raises:
+        ValueError: If a dictionary has a key that is not a string or a
+            value is not of a JSON type.
+    """
+    strings: List[str] = []
+    index: Dict[str, int] = {}
+    encoded = {name: _encode_value(value, strings, index)
+               for name, value in plan.items()}
+    return json.dumps({'version': PLAN_FORMAT_VERSION, 'strings': strings,
+                       'plan': encoded}, separators=(',', ':'))
+
+
+def _intern(string: str, strings: List[str], index: Dict[str, int]) -> int:
+    """Get the index of a string in the string table, adding it if new."""
+    if string not in index:
+        index[string] = len(strings)
+        strings.append(string)
+    return index[string]
+
+
+def _encode_value(value: Any, strings: List[str], index: Dict[str, int]):
+    """Encode a value, see encode_plan."""
+    if isinstance(value, dict):
+        for key in value:
+            if not isinstance(key, str):
+                raise ValueError('Plan keys must be strings: %r' % (key,))
+        return {'k': [_intern(key, strings, index) for key in value],
+                'v': _encode_list(list(value.values()), strings, index)}
+    if isinstance(value, (list, tuple)):
+        return _encode_list(value, strings, index)
+    if value is None or isinstance(value, (str, bool)):
+        return value
+    if isinstance(value, numbers.Integral):
+        return int(value)
+    if isinstance(value, numbers.Real):
+        return float(value)
+    raise ValueError('Cannot encode %r in a plan' % (value,))
+
+
+def _encode_list(values, strings: List[str], index: Dict[str, int]):
+    """Encode a list, column-oriented where its items allow it."""
+    if not values:
+        return []
+    if all(isinstance(value, str) for value in values):
+        return {'s': [_intern(value, strings, index) for value in values]}
+    if all(isinstance(value, dict) for value in values):
+        keys = list(values[0])
+        if keys and all(list(value) == keys for value in values):
+            return {'r': [_intern(key, strings, index) for key in keys],
+                    'c': [_encode_list([value[key] for value in values],
+                                       strings, index) for key in keys]}
+        # One list of records per set of keys, and the set of each item
+        groups: Dict[tuple, List[dict]] = {}
+        for value in values:
+            groups.setdefault(tuple(value), []).append(value)
+        if len(groups) > 1:
+            group_index = {keys: i for i, keys in enumerate(groups)}
+            return {'g': [group_index[tuple(value)] for value in values],
+                    'x': [_encode_list(group, strings, index)
+                          for group in groups.values()]}
+    if all(isinstance(value, (list, tuple)) for value in values):
+        length = len(values[0])
+        if length and all(len(value) == length for value in values):
+            return {'t': [_encode_list([value[position] for value in values],
+                                       strings, index)
+                          for position in range(length)]}
+    return [_encode_value(value, strings, index) for value in values]
+
+
+def _decode_value(value, strings: list):
+    """Decode a value of a plan encoded by encode_plan."""
+    if isinstance(value, list):
+        return [_decode_value(item, strings) for item in value]
+    if not isinstance(value, dict):
+        return value
+    if 's' in value:
+        return [strings[i] for i in value['s']]
+    if 'k' in value:
+        return dict(zip([strings[i] for i in value['k']],
+                        _decode_value(value['v'], strings)))
+    if 'r' in value:
+        keys = [strings[i] for i in value['r']]
+        columns = [_decode_value(column, strings) for column in value['c']]
+        return [dict(zip(keys, row)) for row in zip(*columns)]
+    if 'g' in value:
+        groups = [iter(_decode_value(group, strings))
+                  for group in value['x']]
+        return [next(groups[i]) for i in value['g']]
+    columns = [_decode_value(column, strings) for column in value['t']]
+    return [list(row) for row in zip(*columns)]
+
+
+def decode_plan(payload: str) -> dict:
+    """Decode a plan encoded by encode_plan.
+    Args:
+        payload (str): JSON payload.
+    Returns:
+        dict: Value of each global of the script, by name.
+    Raises:
+        ValueError: If the payload is of another version of the encoding.
+    """
+    data = json.loads(payload)
+    if data['version'] != PLAN_FORMAT_VERSION:
+        raise ValueError('Unsupported plan format version: %s'
+                         % data['version'])
+    return {name: _decode_value(value, data['strings'])
+            for name, value in data['plan'].items()}
+
+
+def get_plan_header(plan: Mapping[str, Any]) -> str:
+    """Get the top of a script defining its plan as globals, decoded from a
+    compact payload when the script starts.
+    Args:
+        plan (Mapping[str, Any]): Value of each global, see encode_plan.
+    Returns:
+        str: Python source of the decoder, the payload and the globals.
+    """
+    lines = [
+        'import json',
+        '',
+        'PLAN_FORMAT_VERSION = %d' % PLAN_FORMAT_VERSION,
+        '',
+        '',
+        _get_code_source(_decode_value),
+        '',
+        _get_code_source(decode_plan),
+        '',
+        '%s = decode_plan(%r)' % (PLAN_VARIABLE, encode_plan(plan))]
+    lines += ['%s = %s[%r]' % (name, PLAN_VARIABLE, name) for name in plan]
+    return '\n'.join(lines) + '\n\n'
+
+
+def _get_code_source(function) -> str:
+    """Get the source of a function without its docstring, to paste it
+    into scripts."""
+    head, _, tail = inspect.getsource(function).split('"""', 2)
+    return head.rstrip() + tail[tail.index('\n'):]
+
+
+def get_json_header(plan: Mapping[str, Any]) -> str:
+    """Get the top of a script defining its plan as globals inlined as
+    JSON, the encoding used before get_plan_header.
+    Args:
+        plan (Mapping[str, Any]): Value of each global.
+    Returns:
+        str: Python source of the globals.
+    """
+    return ''.join('%s = %s\n\n' % (name, json.dumps(value))
+                   for name, value in plan.items())
+
+
+def benchmark_plan_encoding(
+    plan: Mapping[str, Any],
+    number: int = 20
+) -> Dict[str, float]:
+    """Compare the size and parse time of a plan header from
+    get_plan_header with one inlined as JSON. Parse time is the time to
+    compile and run the header, as done when a protocol is uploaded.
+    Args:
+        plan (Mapping[str, Any]): Value of each global of a script.
+        number (int): Number of parses to average over. (default: 20)
+    Returns:
+        Dict[str, float]: 'json_size' and 'compact_size' in bytes,
+            'json_parse_time' and 'compact_parse_time' in seconds.
+    """
+    results = {}
+    for name, header in [('json', get_json_header(plan)),
+                         ('compact', get_plan_header(plan))]:
+        def parse():
+            # JSON literals of the inlined header
+            exec(compile(header, '<plan>', 'exec'),
+                 {'true': True, 'false': False, 'null': None})
+        results[name + '_size'] = len(header.encode('utf-8'))
+        results[name + '_parse_time'] = timeit.timeit(
+            parse, number=number) / number
+    return results
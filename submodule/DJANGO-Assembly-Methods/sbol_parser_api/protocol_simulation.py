@@ -0,0 +1,452 @@
+import csv
+import math
+import os
+import re
+from dataclasses import dataclass, field, fields
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+# Deck slots in rows of three, front to back
+DECK_COLUMNS = 3
+# Deck slot pitch in mm, left to right and front to back
+SLOT_WIDTH = 132.5
+SLOT_DEPTH = 90.5
+# Position of well A1 from the front left corner of a slot, and the pitch of
+# the wells, in mm, as on an SBS 96 well plate
+A1_OFFSET = (14.4, 74.2)
+WELL_SPACING = 9.0
+COMMAND_LOG_HEADER = ["level", "kind", "duration (s)", "text"]
+
+# Command kinds by the start of the text the Opentrons simulator logs
+COMMAND_KINDS = [
+    ("Picking up tip", "pick_up_tip"),
+    ("Dropping tip", "drop_tip"),
+    ("Returning tip", "drop_tip"),
+    ("Aspirating", "aspirate"),
+    ("Dispensing", "dispense"),
+    ("Mixing", "mix"),
+    ("Blowing out", "blow_out"),
+    ("Touching tip", "touch_tip"),
+    ("Air gap", "air_gap"),
+    ("Transferring", "transfer"),
+    ("Distributing", "transfer"),
+    ("Consolidating", "transfer"),
+    ("Delaying", "delay"),
+    ("Pausing", "pause"),
+    ("Homing", "home"),
+    ("Waiting for Temperature Module", "temperature_wait"),
+    ("Setting Thermocycler well block temperature", "thermocycler_hold"),
+    ("Thermocycler starting", "thermocycler_profile"),
+    ("Engaging", "module"),
+    ("Disengaging", "module"),
+    ("Setting", "module"),
+    ("Opening", "module"),
+    ("Closing", "module"),
+    ("Deactivating", "module"),
+]
+# Commands made up of the commands logged under them, which carry the time
+COMPOSITE_KINDS = {"transfer", "mix"}
+
+LOCATION_RE = re.compile(r"(?:from|into|at) ([A-P]\d{1,2}) of (.+?) on (\d+)")
+VOLUME_RE = re.compile(r"([\d.]+) uL", re.IGNORECASE)
+FLOW_RATE_RE = re.compile(r"at ([\d.]+) uL/sec")
+DELAY_RE = re.compile(r"([\d.]+) minutes? and ([\d.]+) seconds?")
+HOLD_RE = re.compile(r"hold time of ([\d.]+) seconds")
+REPETITIONS_RE = re.compile(r"starting (\d+) repetitions")
+STEP_HOLD_RE = re.compile(r"'hold_time_(seconds|minutes)': ([\d.]+)")
+
+
+@dataclass
+class TimingModel:
+    """Durations used to estimate the run time of a protocol from the
+    commands logged by the Opentrons simulator, in seconds.
+    Attributes:
+        move (float): Moving the pipette to another well. (default: 1.0)
+        move_per_slot (float): Extra time per deck slot travelled, counted
+            along rows and columns of the deck. (default: 1.0)
+        pick_up_tip (float): Picking up a tip. (default: 4.0)
+        drop_tip (float): Dropping or returning a tip. (default: 4.0)
+        aspirate (float): Aspirating, on top of volume / flow rate.
+            (default: 1.0)
+        dispense (float): Dispensing, on top of volume / flow rate.
+            (default: 1.0)
+        flow_rate (float): Flow rate in uL/s when the log does not give one.
+            (default: 5.0)
+        mix (float): Setting up a mix, on top of its aspirates and
+            dispenses. (default: 0.0)
+        blow_out (float): Blowing out. (default: 1.0)
+        touch_tip (float): Touching the tip to the sides of a well.
+            (default: 2.0)
+        air_gap (float): Aspirating an air gap. (default: 1.0)
+        module (float): A module command, e.g. engaging the magnets or
+            opening the thermocycler lid. (default: 5.0)
+        temperature_wait (float): Waiting for a temperature module to reach
+            its temperature. (default: 300.0)
+        home (float): Homing. (default: 10.0)
+        other (float): Any other command. (default: 0.0)
+    """
+    move: float = 1.0
+    move_per_slot: float = 1.0
+    pick_up_tip: float = 4.0
+    drop_tip: float = 4.0
+    aspirate: float = 1.0
+    dispense: float = 1.0
+    flow_rate: float = 5.0
+    mix: float = 0.0
+    blow_out: float = 1.0
+    touch_tip: float = 2.0
+    air_gap: float = 1.0
+    module: float = 5.0
+    temperature_wait: float = 300.0
+    home: float = 10.0
+    other: float = 0.0
+
+    @classmethod
+    def from_dict(cls, values: Mapping[str, Optional[float]]
+                  ) -> 'TimingModel':
+        """Create a timing model from a dictionary, e.g. the GraphQL input,
+        keeping the defaults for missing or None values.
+        Args:
+            values (Mapping[str, Optional[float]]): Durations by attribute.
+        Returns:
+            TimingModel: Timing model.
+        Raises:
+            ValueError: If a key is not an attribute of the timing model.
+        """
+        names = {f.name for f in fields(cls)}
+        for name in values:
+            if name not in names:
+                raise ValueError("Invalid timing: %s" % name)
+        return cls(**{name: float(value) for name, value in values.items()
+                      if value is not None})
+
+
+@dataclass
+class SimulatedCommand:
+    """A command logged by the Opentrons simulator.
+    Attributes:
+        level (int): Nesting level, e.g. 1 for the aspirates of a transfer.
+        kind (str): Kind of command, see COMMAND_KINDS.
+        text (str): Text logged for the command.
+        duration (float): Estimated duration in seconds, 0 for commands
+            whose time is carried by the commands nested in them.
+    """
+    level: int
+    kind: str
+    text: str
+    duration: float = 0.0
+
+
+@dataclass
+class SimulationReport:
+    """Command log, tip/volume ledger and run time estimate of a protocol.
+    Attributes:
+        script (str): Path of the protocol.
+        commands (List[SimulatedCommand]): Commands in the order run.
+        tips (Dict[str, int]): Tips picked up by each pipette.
+        tipracks (Dict[str, int]): Tips taken from each tip rack.
+        aspirated (Dict[str, float]): Volume aspirated by each pipette in
+            uL.
+        dispensed (Dict[str, float]): Volume dispensed by each pipette in
+            uL.
+        volumes (Dict[str, float]): Net volume added to (positive) or taken
+            from (negative) each well in uL.
+        distance (Dict[str, float]): Distance travelled by each pipette
+            between the wells it was moved to, in mm, see get_distance.
+        pauses (int): Number of pauses waiting for the user, whose time is
+            not included in the run time.
+        error (Optional[str]): Error raised by the simulation, None if it
+            completed. (default: None)
+    """
+    script: str
+    commands: List[SimulatedCommand] = field(default_factory=list)
+    tips: Dict[str, int] = field(default_factory=dict)
+    tipracks: Dict[str, int] = field(default_factory=dict)
+    aspirated: Dict[str, float] = field(default_factory=dict)
+    dispensed: Dict[str, float] = field(default_factory=dict)
+    volumes: Dict[str, float] = field(default_factory=dict)
+    distance: Dict[str, float] = field(default_factory=dict)
+    pauses: int = 0
+    error: Optional[str] = None
+
+    @property
+    def run_time(self) -> float:
+        """Estimated run time in seconds."""
+        return sum(command.duration for command in self.commands)
+
+    @property
+    def tips_used(self) -> int:
+        """Number of tips picked up by all pipettes."""
+        return sum(self.tips.values())
+
+    @property
+    def distance_travelled(self) -> float:
+        """Distance travelled by all pipettes in mm."""
+        return sum(self.distance.values())
+
+
+def get_command_kind(text: str) -> str:
+    """Get the kind of a command from the text logged for it.
+    Args:
+        text (str): Text logged by the Opentrons simulator.
+    Returns:
+        str: Kind of command, 'other' if the text is not recognised.
+    """
+    for start, kind in COMMAND_KINDS:
+        if text.startswith(start):
+            return kind
+    return "other"
+
+
+def parse_location(text: str) -> Optional[Tuple[str, str, int]]:
+    """Get the well, labware and deck slot a command is run at.
+    Args:
+        text (str): Text logged by the Opentrons simulator.
+    Returns:
+        Optional[Tuple[str, str, int]]: Well, labware and slot, None if the
+            text does not name a well.
+    """
+    match = LOCATION_RE.search(text)
+    if match is None:
+        return None
+    return match.group(1), match.group(2), int(match.group(3))
+
+
+def get_slot_distance(slot_1: int, slot_2: int) -> int:
+    """Get the number of deck slots between two slots, along rows and
+    columns of the deck.
+    Args:
+        slot_1 (int): First deck slot (1-12).
+        slot_2 (int): Second deck slot (1-12).
+    Returns:
+        int: Distance in slots.
+    """
+    row_1, column_1 = divmod(slot_1 - 1, DECK_COLUMNS)
+    row_2, column_2 = divmod(slot_2 - 1, DECK_COLUMNS)
+    return abs(row_1 - row_2) + abs(column_1 - column_2)
+
+
+def get_well_position(slot: int, well: str) -> Tuple[float, float]:
+    """Get the position of a well on the deck, taking every labware to
+    have wells on the pitch of a 96 well plate.
+    Args:
+        slot (int): Deck slot (1-12).
+        well (str): Well name, e.g. 'A1'.
+    Returns:
+        Tuple[float, float]: Distance from the front left corner of the
+            deck to the right and to the back, in mm.
+    """
+    row, column = divmod(slot - 1, DECK_COLUMNS)
+    return (column * SLOT_WIDTH + A1_OFFSET[0] +
+            (int(well[1:]) - 1) * WELL_SPACING,
+            row * SLOT_DEPTH + A1_OFFSET[1] -
+            (ord(well[0].upper()) - ord('A')) * WELL_SPACING)
+
+
+def get_distance(
+    location_1: Tuple[int, str],
+    location_2: Tuple[int, str]
+) -> float:
+    """Get the straight line distance between two wells on the deck.
+    Args:
+        location_1 (Tuple[int, str]): Deck slot and well name.
+        location_2 (Tuple[int, str]): Deck slot and well name.
+    Returns:
+        float: Distance in mm.
+    """
+    x_1, y_1 = get_well_position(*location_1)
+    x_2, y_2 = get_well_position(*location_2)
+    return math.hypot(x_1 - x_2, y_1 - y_2)
+
+
+def get_thermocycler_time(text: str) -> float:
+    """Get the hold time of a thermocycler command in seconds.
+    Args:
+        text (str): Text logged for a thermocycler hold or profile.
+    Returns:
+        float: Hold time of the command, summed over the steps and
+            repetitions of a profile.
+    """
+    match = HOLD_RE.search(text)
+    if match is not None:
+        return float(match.group(1))
+    repetitions = REPETITIONS_RE.search(text)
+    cycle = sum(float(value) * (60 if unit == "minutes" else 1)
+                for unit, value in STEP_HOLD_RE.findall(text))
+    return cycle * (int(repetitions.group(1)) if repetitions else 1)
+
+
+def parse_runlog(
+    runlog: Sequence[Mapping[str, Any]],
+    script: str = '',
+    timing_model: TimingModel = None
+) -> SimulationReport:
+    """Build the command log, tip/volume ledger and run time estimate of a
+    protocol from the run log of the Opentrons simulator.
+    Args:
+        runlog (Sequence[Mapping[str, Any]]): Run log returned by
+            opentrons.simulate.simulate, with the nesting 'level' and the
+            'payload' of each command.
+        script (str): Path of the protocol. (default: '')
+        timing_model (TimingModel): Durations of the commands.
+            (default: TimingModel())
+    Returns:
+        SimulationReport: Report of the protocol.
+    """
+    timing = TimingModel() if timing_model is None else timing_model
+    report = SimulationReport(script=script)
+    last_location = {}
+    for entry in runlog:
+        payload = entry['payload']
+        text = payload.get('text', '')
+        kind = get_command_kind(text)
+        instrument = str(payload.get('instrument', ''))
+        location = parse_location(text)
+        duration = 0.0
+        if location is not None and kind not in COMPOSITE_KINDS:
+            previous = last_location.get(instrument)
+            if previous is None:
+                duration += timing.move
+            elif previous != location:
+                duration += timing.move + timing.move_per_slot * \
+                    get_slot_distance(previous[2], location[2])
+                report.distance[instrument] = report.distance.get(
+                    instrument, 0) + get_distance(
+                        (previous[2], previous[0]),
+                        (location[2], location[0]))
+            last_location[instrument] = location
+        if kind in ("aspirate", "dispense"):
+            volume = float(VOLUME_RE.search(text).group(1))
+            flow_rate = FLOW_RATE_RE.search(text)
+            flow_rate = (float(flow_rate.group(1)) if flow_rate
+                         else timing.flow_rate)
+            duration += getattr(timing, kind)
+            if flow_rate > 0:
+                duration += volume / flow_rate
+            ledger = report.aspirated if kind == "aspirate" \
+                else report.dispensed
+            ledger[instrument] = ledger.get(instrument, 0) + volume
+            if location is not None:
+                well = "%s of %s on %d" % location
+                change = -volume if kind == "aspirate" else volume
+                report.volumes[well] = report.volumes.get(well, 0) + change
+        elif kind == "pick_up_tip":
+            duration += timing.pick_up_tip
+            report.tips[instrument] = report.tips.get(instrument, 0) + 1
+            if location is not None:
+                rack = "%s on %d" % location[1:]
+                report.tipracks[rack] = report.tipracks.get(rack, 0) + 1
+        elif kind == "delay":
+            match = DELAY_RE.search(text)
+            if match is not None:
+                duration += 60 * float(match.group(1)) + \
+                    float(match.group(2))
+        elif kind in ("thermocycler_hold", "thermocycler_profile"):
+            duration += timing.module + get_thermocycler_time(text)
+        elif kind == "pause":
+            report.pauses += 1
+        elif kind != "transfer":
+            duration += getattr(timing, kind)
+        report.commands.append(SimulatedCommand(
+            level=entry.get('level', 0), kind=kind, text=text,
+            duration=duration))
+    return report
+
+
+def simulate_script(
+    script: str,
+    timing_model: TimingModel = None,
+    custom_labware_paths: List[str] = None
+) -> SimulationReport:
+    """Run a generated OT-2 script through the Opentrons simulator.
+    Args:
+        script (str): Path of the OT-2 script.
+        timing_model (TimingModel): Durations of the commands.
+            (default: TimingModel())
+        custom_labware_paths (List[str]): Directories of custom labware
+            definitions used by the script. (default: None)
+    Returns:
+        SimulationReport: Report of the script, with the error and no
+            commands if the simulation failed, e.g. running out of tips, or
+            if the Opentrons package cannot be imported.
+    """
+    try:
+        from opentrons.simulate import simulate
+        with open(script) as protocol_file:
+            runlog, _ = simulate(
+                protocol_file, file_name=os.path.basename(script),
+                custom_labware_paths=custom_labware_paths)
+    except Exception as e:
+        return SimulationReport(script=script, error=str(e))
+    return parse_runlog(runlog, script, timing_model)
+
+
+def write_command_log(
+    report: SimulationReport,
+    path: str
+):
+    """Write the command log and ledger of a simulated script to a CSV file.
+    Args:
+        report (SimulationReport): Report of the script.
+        path (str): Path of the CSV file.
+    """
+    with open(path, 'w', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(COMMAND_LOG_HEADER)
+        for command in report.commands:
+            writer.writerow([command.level, command.kind,
+                             round(command.duration, 2), command.text])
+        writer.writerow([])
+        writer.writerow(["run time (s)", round(report.run_time, 2)])
+        writer.writerow(["distance (mm)",
+                         round(report.distance_travelled, 1)])
+        writer.writerow(["pauses", report.pauses])
+        if report.error is not None:
+            writer.writerow(["error", report.error])
+        for name, ledger in [("tips", report.tips),
+                             ("tip rack", report.tipracks),
+                             ("aspirated (uL)", report.aspirated),
+                             ("dispensed (uL)", report.dispensed),
+                             ("distance (mm)", report.distance),
+                             ("well volume (uL)", report.volumes)]:
+            for key, value in ledger.items():
+                writer.writerow([name, key, value])
+
+
+def simulate_outputs(
+    output_paths: List[str],
+    timing_model: TimingModel = None,
+    custom_labware_paths: List[str] = None
+) -> List[SimulationReport]:
+    """Simulate the OT-2 scripts among the outputs of a generator, writing
+    the command log of each next to it as <script name>_simulation.csv.
+    Args:
+        output_paths (List[str]): Paths returned by dnabot, biobricks or
+            moclo_function.
+        timing_model (TimingModel): Durations of the commands.
+            (default: TimingModel())
+        custom_labware_paths (List[str]): Directories of custom labware
+            definitions used by the scripts. (default: None)
+    Returns:
+        List[SimulationReport]: Report of each script, in the order of the
+            outputs.
+    """
+    reports = []
+    for path in output_paths:
+        if not path.endswith('.py'):
+            continue
+        report = simulate_script(path, timing_model, custom_labware_paths)
+        write_command_log(report, get_command_log_path(path))
+        reports.append(report)
+    return reports
+
+
+def get_command_log_path(script: str) -> str:
+    """Get the path of the command log of a simulated script.
+    Args:
+        script (str): Path of the OT-2 script.
+    Returns:
+        str: Path of the command log CSV.
+    """
+    root = script[:-len('.ot2.py')] if script.endswith('.ot2.py') \
+        else os.path.splitext(script)[0]
+    return root + '_simulation.csv'
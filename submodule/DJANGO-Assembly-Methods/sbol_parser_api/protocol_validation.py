@@ -0,0 +1,241 @@
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Mapping, Sequence, Tuple
+
+# Severities of a diagnostic: errors stop the scripts being written,
+# warnings are reported with them
+ERROR = 'error'
+WARNING = 'warning'
+# Deck slots labware can be loaded in, slot 12 holding the fixed trash
+DECK_SLOTS = [str(slot) for slot in range(1, 12)]
+# Slots covered by the thermocycler module, loaded in slot 7
+THERMOCYCLER_SLOTS = ['7', '8', '10', '11']
+TIPS_PER_RACK = 96
+# Columns of tips in a rack, picked up one at a time by an 8-channel pipette
+COLUMNS_PER_RACK = 12
+MOUNTS = ['left', 'right']
+
+
+@dataclass
+class Diagnostic:
+    """Problem found in a transfer plan before its scripts are written.
+    Attributes:
+        severity (str): ERROR or WARNING.
+        code (str): Kind of problem, e.g. 'tip-racks'.
+        message (str): Description for the user.
+        stage (str): Script or stage the problem is in, e.g. 'clip'.
+            (default: None)
+    """
+    severity: str
+    code: str
+    message: str
+    stage: str = None
+
+
+class PlanValidationError(ValueError):
+    """Raised when a transfer plan fails its pre-flight checks.
+    Attributes:
+        diagnostics (List[Diagnostic]): Every problem found, errors and
+            warnings.
+    """
+
+    def __init__(self, diagnostics: Sequence[Diagnostic]):
+        self.diagnostics = list(diagnostics)
+        super().__init__(' '.join(
+            '%s: %s' % (diagnostic.stage, diagnostic.message)
+            if diagnostic.stage else diagnostic.message
+            for diagnostic in get_errors(diagnostics)))
+
+
+def get_errors(diagnostics: Iterable[Diagnostic]) -> List[Diagnostic]:
+    """Get the diagnostics that are errors."""
+    return [diagnostic for diagnostic in diagnostics
+            if diagnostic.severity == ERROR]
+
+
+def raise_for_errors(diagnostics: Sequence[Diagnostic]):
+    """Raise a PlanValidationError if any diagnostic is an error.
+    Args:
+        diagnostics (Sequence[Diagnostic]): Diagnostics of a plan.
+    Raises:
+        PlanValidationError: If any diagnostic is an error.
+    """
+    if get_errors(diagnostics):
+        raise PlanValidationError(diagnostics)
+
+
+def check_count(
+    count: int,
+    maximum: int,
+    code: str,
+    description: str,
+    stage: str = None
+) -> List[Diagnostic]:
+    """Check a number of items, e.g. reactions, against a maximum.
+    Args:
+        count (int): Number of items.
+        maximum (int): Maximum number of items.
+        code (str): Code of the diagnostic.
+        description (str): Plural name of the items, e.g. 'CLIP reactions'.
+        stage (str): Stage of the diagnostic. (default: None)
+    Returns:
+        List[Diagnostic]: An error if the count exceeds the maximum.
+    """
+    if count > maximum:
+        return [Diagnostic(ERROR, code, 'Number of %s (%d) exceeds %d.' % (
+            description, count, maximum), stage)]
+    return []
+
+
+def count_tip_racks(tips: int, tips_per_rack: int = TIPS_PER_RACK) -> int:
+    """Get the number of tip racks a number of tip pick ups needs."""
+    return -(-tips // tips_per_rack)
+
+
+def check_tip_racks(
+    tip_racks: int,
+    slots: int,
+    stage: str = None
+) -> List[Diagnostic]:
+    """Check the tip racks of a script fit in the slots it loads them in.
+    Args:
+        tip_racks (int): Number of tip racks needed.
+        slots (int): Number of slots for tip racks.
+        stage (str): Stage of the diagnostic. (default: None)
+    Returns:
+        List[Diagnostic]: An error if the tip racks do not fit, when the
+            script would run out of tips.
+    """
+    if tip_racks > slots:
+        return [Diagnostic(
+            ERROR, 'tip-racks',
+            '%d tip racks are needed but only %d slots are available.' % (
+                tip_racks, slots), stage)]
+    return []
+
+
+def check_deck_slots(
+    labware: Mapping[str, str],
+    stage: str = None
+) -> List[Diagnostic]:
+    """Check labware is loaded in deck slots that exist, one per slot.
+    Args:
+        labware (Mapping[str, str]): Deck slot of each labware, by name. The
+            thermocycler covers THERMOCYCLER_SLOTS.
+        stage (str): Stage of the diagnostic. (default: None)
+    Returns:
+        List[Diagnostic]: An error for every slot that does not exist or
+            holds more than one labware.
+    """
+    diagnostics = []
+    occupants: Dict[str, List[str]] = {}
+    for name, slot in labware.items():
+        slot = str(slot)
+        if slot not in DECK_SLOTS:
+            diagnostics.append(Diagnostic(
+                ERROR, 'deck-slot',
+                '%s is in slot %s, which is not on the deck.' % (name, slot),
+                stage))
+            continue
+        if name == 'thermocycler':
+            slots = THERMOCYCLER_SLOTS
+        else:
+            slots = [slot]
+        for covered in slots:
+            occupants.setdefault(covered, []).append(name)
+    for slot in DECK_SLOTS:
+        if len(occupants.get(slot, [])) > 1:
+            diagnostics.append(Diagnostic(
+                ERROR, 'deck-slot', 'Slot %s is used by %s.' % (
+                    slot, ' and '.join(occupants[slot])), stage))
+    return diagnostics
+
+
+def check_mounts(
+    pipettes: Mapping[str, str],
+    stage: str = None
+) -> List[Diagnostic]:
+    """Check pipettes used in one script are on different, valid mounts.
+    Args:
+        pipettes (Mapping[str, str]): Mount of each pipette, by name.
+        stage (str): Stage of the diagnostic. (default: None)
+    Returns:
+        List[Diagnostic]: An error for every invalid or shared mount.
+    """
+    diagnostics = []
+    for mount in set(pipettes.values()):
+        names = [name for name, other in pipettes.items() if other == mount]
+        if mount not in MOUNTS:
+            diagnostics.append(Diagnostic(
+                ERROR, 'mount', 'Invalid mount for %s: %s.' % (
+                    ' and '.join(names), mount), stage))
+        elif len(names) > 1:
+            diagnostics.append(Diagnostic(
+                ERROR, 'mount', '%s are both on the %s mount.' % (
+                    ' and '.join(names), mount), stage))
+    return diagnostics
+
+
+def get_well_volumes(
+    *transfers: Mapping[str, Sequence[Tuple]]
+) -> Dict[str, float]:
+    """Get the total volume dispensed into each well by transfer
+    dictionaries of the generators into the same plate.
+    Args:
+        *transfers (Mapping[str, Sequence[Tuple]]): Source well as key,
+            tuples of destination well and volume as value.
+    Returns:
+        Dict[str, float]: Volume in uL by destination well.
+    """
+    volumes: Dict[str, float] = {}
+    for transfer_dict in transfers:
+        for values in transfer_dict.values():
+            for value in values:
+                volumes[value[0]] = volumes.get(value[0], 0) + \
+                    float(value[1])
+    return volumes
+
+
+def check_well_volumes(
+    volumes: Mapping[str, float],
+    max_volume: float,
+    labware: str,
+    stage: str = None
+) -> List[Diagnostic]:
+    """Check wells are not filled over their capacity.
+    Args:
+        volumes (Mapping[str, float]): Volume in uL by well.
+        max_volume (float): Capacity of a well in uL.
+        labware (str): Name of the labware, for the messages.
+        stage (str): Stage of the diagnostic. (default: None)
+    Returns:
+        List[Diagnostic]: An error for every overfilled well.
+    """
+    return [
+        Diagnostic(
+            ERROR, 'well-volume', '%s well %s holds %g uL, over its %g uL.'
+            % (labware, well, volume, max_volume), stage)
+        for well, volume in volumes.items() if volume > max_volume]
+
+
+def check_transfer_volumes(
+    volumes: Iterable[float],
+    min_volume: float,
+    description: str,
+    stage: str = None
+) -> List[Diagnostic]:
+    """Check transfers are not below the minimum volume of the pipette.
+    Args:
+        volumes (Iterable[float]): Volumes of the transfers in uL.
+        min_volume (float): Minimum volume of the pipette in uL.
+        description (str): What is transferred, for the messages.
+        stage (str): Stage of the diagnostic. (default: None)
+    Returns:
+        List[Diagnostic]: An error for each distinct volume that is too
+            small.
+    """
+    return [
+        Diagnostic(
+            ERROR, 'transfer-volume',
+            'Transfer of %g uL of %s is below the %g uL minimum.'
+            % (volume, description, min_volume), stage)
+        for volume in sorted(set(volumes)) if volume < min_volume]
@@ -0,0 +1,234 @@
+import csv
+import json
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Mapping, Sequence, Tuple
+
+# Kinds of equipment a stage runs on
+ROBOT = 'robot'
+THERMOCYCLER = 'thermocycler'
+# Kinds of equipment mounted on another kind: unit i is on unit i of the
+# other kind, e.g. the thermocycler module of an OT-2 cannot move between
+# robots
+MOUNTS = {THERMOCYCLER: ROBOT}
+SCHEDULE_HEADER = ['job', 'stage', 'resources', 'start (s)', 'end (s)',
+                   'duration (s)']
+
+
+@dataclass
+class RunStage:
+    """Stage of a job, e.g. one OT-2 script.
+    Attributes:
+        name (str): Name of the stage, e.g. 'clip'.
+        duration (float): Estimated duration in seconds.
+        resources (Tuple[str, ...]): Kinds of equipment it holds while it
+            runs, e.g. (ROBOT, THERMOCYCLER) for a thermocycler module on
+            the deck of an OT-2. (default: (ROBOT,))
+    """
+    name: str
+    duration: float
+    resources: Tuple[str, ...] = (ROBOT,)
+
+
+@dataclass
+class RunJob:
+    """Job whose stages run one after the other, e.g. one BASIC assembly.
+    Attributes:
+        name (str): Name of the job.
+        stages (List[RunStage]): Stages, in the order they must run.
+        release (float): Time the job can start from, in seconds.
+            (default: 0.0)
+    """
+    name: str
+    stages: List[RunStage] = field(default_factory=list)
+    release: float = 0.0
+
+
+@dataclass
+class ScheduledStage:
+    """Stage of a job placed on pieces of equipment.
+    Attributes:
+        job (str): Name of the job.
+        stage (str): Name of the stage.
+        resources (Tuple[str, ...]): Units of equipment it holds, e.g.
+            ('robot 2', 'thermocycler 1').
+        start (float): Start time in seconds.
+        end (float): End time in seconds.
+    """
+    job: str
+    stage: str
+    resources: Tuple[str, ...]
+    start: float
+    end: float
+
+    @property
+    def duration(self) -> float:
+        """Duration in seconds."""
+        return self.end - self.start
+
+
+def schedule_runs(
+    jobs: Sequence[RunJob],
+    resources: Mapping[str, int],
+    mounts: Mapping[str, str] = MOUNTS
+) -> List[ScheduledStage]:
+    """Schedule the stages of jobs on shared equipment, interleaving the
+    stages of different jobs to keep the equipment busy.
+
+    Stages are placed one at a time: the next stage of every job is
+    considered and the one that can start earliest is placed, on the units
+    of each kind of equipment it holds that free up first. A stage holding
+    a mounted unit and the kind it is mounted on, e.g. a thermocycler and
+    a robot, holds the unit it is mounted on. Ties go to the job with the
+    most work left, which shortens the total time.
+    Args:
+        jobs (Sequence[RunJob]): Jobs to run.
+        resources (Mapping[str, int]): Number of units of each kind of
+            equipment, e.g. {ROBOT: 2, THERMOCYCLER: 1}.
+        mounts (Mapping[str, str]): Kind each mounted kind of equipment is
+            on, unit i on unit i. (default: MOUNTS)
+    Returns:
+        List[ScheduledStage]: Stages in the order they start.
+    Raises:
+        ValueError: If a stage needs more units of a kind of equipment
+            than there are, there are more mounted units than units to
+            mount them on, or job names are not unique.
+    """
+    if len({job.name for job in jobs}) != len(jobs):
+        raise ValueError('Job names must be unique')
+    for kind, host in mounts.items():
+        if resources.get(kind, 0) > resources.get(host, 0):
+            raise ValueError('More %ss than %ss to mount them on' % (
+                kind, host))
+    for job in jobs:
+        for stage in job.stages:
+            for kind, number in Counter(stage.resources).items():
+                if resources.get(kind, 0) < number:
+                    raise ValueError('No %s for stage %s of job %s' % (
+                        kind, stage.name, job.name))
+    free = {kind: [0.0] * number for kind, number in resources.items()}
+    next_stage = {job.name: 0 for job in jobs}
+    ready = {job.name: job.release for job in jobs}
+    schedule = []
+    while True:
+        best = None
+        for order, job in enumerate(jobs):
+            index = next_stage[job.name]
+            if index == len(job.stages):
+                continue
+            stage = job.stages[index]
+            units = _get_first_free_units(free, stage.resources, mounts)
+            start = max([ready[job.name]] +
+                        [free[kind][unit] for kind, unit in units])
+            remaining = sum(other.duration for other in job.stages[index:])
+            key = (start, -remaining, order)
+            if best is None or key < best[0]:
+                best = (key, job, stage, units, start)
+        if best is None:
+            break
+        _, job, stage, units, start = best
+        end = start + stage.duration
+        for kind, unit in units:
+            free[kind][unit] = end
+        ready[job.name] = end
+        next_stage[job.name] += 1
+        schedule.append(ScheduledStage(
+            job=job.name, stage=stage.name,
+            resources=tuple('%s %d' % (kind, unit + 1)
+                            for kind, unit in units),
+            start=start, end=end))
+    return sorted(schedule, key=lambda scheduled: scheduled.start)
+
+
+def _get_first_free_units(
+    free: Mapping[str, List[float]],
+    kinds: Sequence[str],
+    mounts: Mapping[str, str]
+) -> List[Tuple[str, int]]:
+    """Get the units of equipment that free up first for a stage. A
+    mounted unit is taken together with the unit it is mounted on, if the
+    stage holds that kind as well.
+    Args:
+        free (Mapping[str, List[float]]): Time each unit frees up, by kind.
+        kinds (Sequence[str]): Kinds of equipment the stage holds, once per
+            unit.
+        mounts (Mapping[str, str]): Kind each mounted kind is on.
+    Returns:
+        List[Tuple[str, int]]: Kind and index of each unit, by kind in
+            the order of `kinds`.
+    """
+    counts = Counter(kinds)
+    chosen: Dict[str, List[int]] = {kind: [] for kind in counts}
+    for kind, number in counts.items():
+        host = mounts.get(kind)
+        if host not in counts:
+            continue
+        order = sorted(range(len(free[kind])),
+                       key=lambda i: max(free[kind][i], free[host][i]))
+        for unit in order[:number]:
+            chosen[kind].append(unit)
+            chosen[host].append(unit)
+    for kind, number in counts.items():
+        order = sorted((i for i in range(len(free[kind]))
+                        if i not in chosen[kind]),
+                       key=lambda i: free[kind][i])
+        chosen[kind] += order[:max(number - len(chosen[kind]), 0)]
+    return [(kind, unit) for kind in dict.fromkeys(kinds)
+            for unit in chosen[kind]]
+
+
+def get_makespan(schedule: Sequence[ScheduledStage]) -> float:
+    """Get the time from the start until the last stage ends, in seconds."""
+    return max((scheduled.end for scheduled in schedule), default=0.0)
+
+
+def get_utilisation(schedule: Sequence[ScheduledStage]) -> Dict[str, float]:
+    """Get the fraction of the makespan each unit of equipment is busy.
+    Args:
+        schedule (Sequence[ScheduledStage]): Schedule from schedule_runs.
+    Returns:
+        Dict[str, float]: Utilisation by unit, e.g. 'robot 1', of the units
+            used.
+    """
+    makespan = get_makespan(schedule)
+    busy: Dict[str, float] = {}
+    for scheduled in schedule:
+        for resource in scheduled.resources:
+            busy[resource] = busy.get(resource, 0.0) + scheduled.duration
+    return {resource: time / makespan if makespan else 0.0
+            for resource, time in sorted(busy.items())}
+
+
+def write_schedule_csv(schedule: Sequence[ScheduledStage], path: str):
+    """Write a schedule as a Gantt table, one row per stage.
+    Args:
+        schedule (Sequence[ScheduledStage]): Schedule from schedule_runs.
+        path (str): Path of the CSV file.
+    """
+    with open(path, 'w', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(SCHEDULE_HEADER)
+        for scheduled in schedule:
+            writer.writerow([scheduled.job, scheduled.stage,
+                             ' + '.join(scheduled.resources),
+                             round(scheduled.start, 1),
+                             round(scheduled.end, 1),
+                             round(scheduled.duration, 1)])
+        writer.writerow([])
+        writer.writerow(['makespan (s)', round(get_makespan(schedule), 1)])
+        for resource, utilisation in get_utilisation(schedule).items():
+            writer.writerow(['utilisation', resource,
+                             round(utilisation, 3)])
+
+
+def write_schedule_json(schedule: Sequence[ScheduledStage], path: str):
+    """Write a schedule as JSON, with the stages, makespan and utilisation.
+    Args:
+        schedule (Sequence[ScheduledStage]): Schedule from schedule_runs.
+        path (str): Path of the JSON file.
+    """
+    with open(path, 'w') as jsonfile:
+        json.dump({'stages': [asdict(scheduled) for scheduled in schedule],
+                   'makespan': get_makespan(schedule),
+                   'utilisation': get_utilisation(schedule)},
+                  jsonfile, indent=2)
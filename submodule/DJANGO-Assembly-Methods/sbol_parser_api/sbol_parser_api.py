@@ -5,14 +5,18 @@ import warnings
 import pandas as pd
 import numpy as np
 import os
-from typing import List, Dict, Tuple, Union
+from typing import List, Dict, Set, Tuple, Union
 from rdflib import URIRef
 from sbol2 import *
 from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from random import sample
 from plateo.exporters import plate_to_platemap_spreadsheet
+from sbol_parser_api.assembly_plan import (
+    AssemblyPlan, PlanConstruct, PlanPart, PlanPlate)
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PLASMID_VECTOR = "http://identifiers.org/so/SO:0000755"
 
 
 class ParserSBOL:
@@ -28,6 +32,7 @@ class ParserSBOL:
         self.construct_csv_paths = []
         self.part_csv_paths = []
         self.assembly_types = ["basic", "moclo", "bio_bricks"]
+        self.primary_structures = {}
 
     def generate_csv(
             self,
@@ -35,7 +40,8 @@ class ParserSBOL:
             part_info: Dict[str, Dict[str, Union[str, int, float]]] = None,
             repeat: bool = False,
             max_construct_wells: int = 96,
-            num_runs: int = 1
+            num_runs: int = 1,
+            processes: int = 1
     ) -> Dict[str, List[str]]:
         """Create construct and parts/linkers CSVs for DNABot input
         Args:
@@ -49,13 +55,66 @@ class ParserSBOL:
             max_construct_wells (int): Number of wells to be filled in the
                 constructs plate. (default: 96)
             num_runs (int): Number of runs (i.e. construct plates) to be
-                created. (default: 1)
+                created. CSVs of each run are suffixed with the run number
+                if more than one run is created. (default: 1)
+            processes (int): Number of worker processes the runs are
+                planned in. (default: 1)
         Returns:
             Dict[str,List[str]]: Dictionary containing lists of paths to csvs
                 generated.
         Raises:
             ValueError: If `assembly` is invalid.
         """
+        plans = self.generate_plan(
+            assembly,
+            part_info,
+            repeat,
+            max_construct_wells,
+            num_runs,
+            processes
+        )
+        for index, plan in enumerate(plans):
+            suffix = '_' + str(index + 1) if len(plans) > 1 else ''
+            filepaths = plan.write_csv(self.outdir, suffix)
+            self.construct_csv_paths.extend(filepaths['construct_path'])
+            self.part_csv_paths.extend(filepaths['part_path'])
+        filepaths = {}
+        filepaths['construct_path'] = self.construct_csv_paths
+        filepaths['part_path'] = self.part_csv_paths
+        return filepaths
+
+    def generate_plan(
+            self,
+            assembly: str,
+            part_info: Dict[str, Dict[str, Union[str, int, float]]] = None,
+            repeat: bool = False,
+            max_construct_wells: int = 96,
+            num_runs: int = 1,
+            processes: int = 1
+    ) -> List[AssemblyPlan]:
+        """Create in-memory assembly plans that can be passed directly to
+        the assembly script generators.
+        Args:
+            assembly(str): Assembly type.
+            part_info (Dict[str, Dict[str, Union[str, int, float]]]):
+                Dictionary of information regarding parts to be assembled.
+                Structure:
+                {<display ID>: {'concentration':..., 'plate':..., 'well':...}}
+            repeat (bool): If False, removes constructs that contain repeated
+                components. (default: False)
+            max_construct_wells (int): Number of wells to be filled in the
+                constructs plate. (default: 96)
+            num_runs (int): Number of runs (i.e. construct plates) to be
+                created. (default: 1)
+            processes (int): Number of worker processes the construct
+                plates are planned in. Part plates are derived once per
+                distinct set of parts and shared by the plans using them.
+                (default: 1)
+        Returns:
+            List[AssemblyPlan]: One assembly plan per construct plate.
+        Raises:
+            ValueError: If `assembly` is invalid.
+        """
         if assembly not in self.assembly_types:
             raise ValueError("Invalid assembly type: %s" % assembly)
         num_samples = max_construct_wells * num_runs
@@ -82,19 +141,43 @@ class ParserSBOL:
             plateo.containers.Plate96,
             max_construct_wells
         )
+        # Derive part plates once per distinct set of parts
+        plan_plates = {}
+        part_keys = []
         for plate in construct_plates:
-            # Create construct CSV
-            self.get_construct_csv_from_plate(plate, assembly)
-            # Write parts/linkers csv
-            self.get_part_linker_csv_from_plate(
-                plate,
-                assembly,
-                part_info
-            )
-        filepaths = {}
-        filepaths['construct_path'] = self.construct_csv_paths
-        filepaths['part_path'] = self.part_csv_paths
-        return filepaths
+            part_list = self.get_part_list(plate)
+            part_key = tuple(part.identity for part in part_list)
+            if part_key not in plan_plates:
+                plan_plates[part_key] = self.get_plan_plates(
+                    part_list, assembly, part_info)
+            part_keys.append(part_key)
+        descriptors = [
+            self.get_plate_descriptor(plate) for plate in construct_plates]
+        if processes > 1 and len(descriptors) > 1:
+            with ProcessPoolExecutor(
+                max_workers=min(processes, len(descriptors)),
+                initializer=_init_plan_worker,
+                initargs=(self.doc.writeString(),
+                          self.linker_file.writeString())
+            ) as executor:
+                all_plan_constructs = list(executor.map(
+                    _get_plan_constructs_from_descriptor,
+                    descriptors,
+                    [assembly] * len(descriptors)
+                ))
+        else:
+            all_plan_constructs = [
+                self.get_plan_constructs(
+                    self.get_constructs_from_descriptor(descriptor),
+                    assembly)
+                for descriptor in descriptors]
+        return [
+            AssemblyPlan(
+                assembly=assembly,
+                constructs=plan_constructs,
+                plates=plan_plates[part_key])
+            for plan_constructs, part_key
+            in zip(all_plan_constructs, part_keys)]
 
     def get_root_compdefs(
             self,
@@ -658,7 +741,7 @@ class ParserSBOL:
                 within the component definition including all
                 nested components.
         """
-        d = deque(construct.getPrimaryStructure())
+        d = deque(self.get_primary_structure(construct))
         all_comps = []
         while(d):
             comp = d.popleft()
@@ -796,6 +879,23 @@ class ParserSBOL:
         parts.sort(key=lambda x: x.displayId)
         return parts
 
+    def get_primary_structure(
+        self,
+        construct: ComponentDefinition
+    ) -> List[ComponentDefinition]:
+        """Get the primary structure of a component definition, computing it
+        only once per component definition.
+        Args:
+            construct (ComponentDefinition): Component definition.
+        Returns:
+            List[ComponentDefinition]: Copy of the primary structure, safe
+                to reorder.
+        """
+        if construct.identity not in self.primary_structures:
+            self.primary_structures[construct.identity] = \
+                construct.getPrimaryStructure()
+        return list(self.primary_structures[construct.identity])
+
     # TODO: Remove? Not used in code
     def get_comp_dict(
         self,
@@ -988,78 +1088,68 @@ class ParserSBOL:
         Returns:
             pd.DataFrame: Dataframe of constructs.
         """
+        constructs = {
+            wellname: well.data['construct']
+            for wellname, well in construct_plate.wells.items()
+            if 'construct' in well.data.keys()
+        }
+        return self.get_construct_df(constructs, assembly)
 
-        def _get_linker_names():
-            """Open standard linker document and extract all displayIds
-            of linkers.
-            """
-            # Get list of linkers from linkerfile
-            linkers = self.get_root_compdefs(self.linker_file)
-            linkers = [linker.displayId for linker in linkers]
-            return linkers
-
-        def _is_linker(
-            comp: ComponentDefinition,
-            linkers: List[str]
-        ):
-            """Compare each part displayId to available linkers.
-            Args:
-                comp (ComponentDefinition): Component definition to check
-                linkers List[str]: List of linker display IDs
-            """
-            if comp.displayId in linkers:
-                return True
-            return False
+    def get_construct_df(
+        self,
+        constructs: Dict[str, ComponentDefinition],
+        assembly: str
+    ) -> pd.DataFrame:
+        """Get dataframe of constructs with one row per construct well.
+        Primary structures are computed once per construct and linkers are
+        looked up in a set, so large numbers of constructs can be tabulated.
+        Args:
+            constructs (Dict[str, ComponentDefinition]): Constructs keyed by
+                the wellname they are placed in.
+            assembly (str): Type of assembly.
+        Returns:
+            pd.DataFrame: Dataframe of constructs.
+        """
 
         def _is_linkers_order_correct(
             construct: ComponentDefinition,
+            pri_struct: List[ComponentDefinition],
+            linkers: Set[str]
         ) -> bool:
             """Check input construct components has the
             order of -linker-part-linker...
             Args:
                 construct (ComponentDefinition): Constructs to check.
+                pri_struct (List[ComponentDefinition]): Primary structure
+                    of the construct.
+                linkers (Set[str]): Display IDs of all linkers.
             Returns:
                 bool: True if linker order is correct.
             Raises:
                 ValueError: If construct does not contain sufficient parts
                     and linkers or order does not alternate
             """
-
-            linkers = _get_linker_names()
-
             # Check if even number of parts
             if np.mod(len(construct.components), 2) != 0:
                 raise ValueError(
                     "Construct contains insufficient number"
                     "of parts or linkers"
                 )
-
-            pri_struct = construct.getPrimaryStructure()
-
-            is_first_comp_linker = False
-            is_prev_comp_linker = False
-            for i, comp in enumerate(pri_struct):
-                is_curr_comp_linker = _is_linker(comp, linkers)
-                # initialise
-                if i == 0:
-                    is_first_comp_linker = is_curr_comp_linker
-                    is_prev_comp_linker = is_curr_comp_linker
-                    continue
-                if is_prev_comp_linker == is_curr_comp_linker:
-                    raise ValueError("Order of components is not alternating")
-                is_prev_comp_linker = is_curr_comp_linker
-            if is_first_comp_linker:
-                return True
-            else:
-                return False
+            is_linker = [comp.displayId in linkers for comp in pri_struct]
+            # Linkers and parts must alternate
+            if any(prev == curr
+                   for prev, curr in zip(is_linker, is_linker[1:])):
+                raise ValueError("Order of components is not alternating")
+            return bool(is_linker) and is_linker[0]
 
         def _validate_bio_bricks_construct(
-            construct: ComponentDefinition
+            pri_struct: List[ComponentDefinition]
         ) -> bool:
             """Check that biobricks construct has the structure
             plasmid-prefix-suffix.
             Args:
-                construct (ComponentDefinition): Construct to check.
+                pri_struct (List[ComponentDefinition]): Primary structure
+                    of the construct to check.
             Returns:
                 bool: True if construct structure is correct.
             Raises:
@@ -1067,50 +1157,23 @@ class ParserSBOL:
                     construct does not contain plasmid vector, or
                     backbone is between parts.
             """
-            pri_struct = construct.getPrimaryStructure()
             # Check that there are only 3 parts in the construct
             if len(pri_struct) != 3:
                 raise ValueError(
                     "There can only be 3 components in each construct"
                 )
             # Check that construct contains a backbone
-            contains_plasmid = False
-            plasmid_vector = "http://identifiers.org/so/SO:0000755"
-            for cd in pri_struct:
-                if plasmid_vector in cd.roles:
-                    contains_plasmid = True
-            if not contains_plasmid:
+            if not any(PLASMID_VECTOR in cd.roles for cd in pri_struct):
                 raise ValueError(
                     "Construct must contain plasmid vector"
                 )
             # Check that backbone is not between parts
-            mid_comp = pri_struct[1]
-            if plasmid_vector in mid_comp.roles:
+            if PLASMID_VECTOR in pri_struct[1].roles:
                 raise ValueError(
                     "Backbone should not be between parts"
                 )
             return True
 
-        def _get_min_basic_parts(
-            all_constructs: List[ComponentDefinition]
-        ) -> int:
-            """Get the minimum number of Part/Linker pairs required to perform
-            BASIC assembly for all constructs.
-            Args:
-                all_constructs (list): List of all constructs as component
-                    definitions.
-            Returns:
-                int: Number of Part/Linker paris for BASIC assembly.
-            """
-            min_val = 0
-            num_parts = 0
-            for cd in all_constructs:
-                components = cd.components
-                num_parts = len(components) // 2
-                if min_val < num_parts:
-                    min_val = num_parts
-            return min_val
-
         def _get_construct_csv_header(
             min_basic_parts: int
         ) -> List[str]:
@@ -1127,105 +1190,57 @@ class ParserSBOL:
                 header.extend(["Linker %d" % i, "Part %d" % i])
             return header
 
-        def _get_comp_dict_from_plate(
-            construct_plate: plateo.Plate,
-            assembly: str
-        ) -> Dict[str, List[ComponentDefinition]]:
-            """Get a dictionary of wells containing components comprising
-            the final constructs (as component definitions). Structure of
-            dictionary depends on assembly type.
-            Args:
-                construct_plate (plateo.Plate): Plateo plate
-                    containing constructs.
-                assembly (str): Type of assembly.
-            Returns:
-                dict: Dictionary of wells containing components.
-            """
-            # TODO: Perform checks on all constructs instead of sampled?
-            comp_dict = {}
-            for wellname, well in construct_plate.wells.items():
-                for key, value in well.data.items():
+        # TODO: Perform checks on all constructs instead of sampled?
+        linkers = set()
+        if assembly == "basic":
+            linkers = {linker.displayId for linker
+                       in self.get_root_compdefs(self.linker_file)}
+        rows = []
+        for wellname, construct in constructs.items():
+            pri_struct = self.get_primary_structure(construct)
+            if assembly == "basic":
+                # Check part-linker order
+                if not _is_linkers_order_correct(
+                        construct, pri_struct, linkers):
                     # Move linker at last position to front of the list
-                    pri_struct = value.getPrimaryStructure()
-                    if assembly == "basic":
-                        # Check part-linker order
-                        if not _is_linkers_order_correct(value):
-                            # Shift linker to front
-                            pri_struct.insert(0, pri_struct.pop())
-                        comp_dict[wellname] = pri_struct
-                    elif assembly == "moclo":
-                        comp_dict[wellname] = {
-                            'construct': value,
-                            'parts': pri_struct
-                        }
-                    elif assembly == "bio_bricks":
-                        # TODO: Confirm whether construct name is needed
-                        # Check if valid biobrick construct
-                        if _validate_bio_bricks_construct(value):
-                            # Check if first component is a plasmid vector:
-                            plasmid_vector = "http://identifiers.org/so/SO:0000755"
-                            if plasmid_vector in pri_struct[0].roles:
-                                # Shift backbone to last component
-                                pri_struct.insert(2, pri_struct.pop(0))
-                            comp_dict[wellname] = {
-                                'construct': value,
-                                'parts': pri_struct
-                            }
-            return comp_dict
-
-        def _get_list_from_comp_dict(
-            comp_dict: Dict[str, ComponentDefinition],
-            assembly: str
-        ) -> List[str]:
-            """Get a concatenated list of wellname and components (as display ID)
-            comprising the final construct from the dictionary of wells
-            containing constructs.
-            Args:
-                comp_dict: Dictionary of wells containing constructs.
-                assembly (str): Type of assembly.
-            Returns:
-                List[str]: List of wellnames and components (as display ID).
-            """
-            comp_list = []
-            for k, v in comp_dict.items():
-                if assembly == "bio_bricks":
-                    comp_list.append([
-                        v['construct'].displayId,
-                        k,
-                        *(x.displayId for x in v['parts'])
-                    ])
-                elif assembly == "basic":
-                    comp_list.append([k, *(x.displayId for x in v)])
-                elif assembly == "moclo":
-                    comp_list.append([
-                        k,
-                        v['construct'].displayId,
-                        *(x.displayId for x in v['parts'])
+                    pri_struct.insert(0, pri_struct.pop())
+                rows.append([wellname, *(x.displayId for x in pri_struct)])
+            elif assembly == "moclo":
+                rows.append([
+                    wellname,
+                    construct.displayId,
+                    *(x.displayId for x in pri_struct)
+                ])
+            elif assembly == "bio_bricks":
+                # TODO: Confirm whether construct name is needed
+                # Check if valid biobrick construct
+                if _validate_bio_bricks_construct(pri_struct):
+                    # Check if first component is a plasmid vector:
+                    if PLASMID_VECTOR in pri_struct[0].roles:
+                        # Shift backbone to last component
+                        pri_struct.insert(2, pri_struct.pop(0))
+                    rows.append([
+                        construct.displayId,
+                        wellname,
+                        *(x.displayId for x in pri_struct)
                     ])
-            return comp_list
-
-        all_comps = \
-            self.get_all_content_from_plate(construct_plate, 'construct')
-        comp_dict = \
-            _get_comp_dict_from_plate(construct_plate, assembly)
-        comp_list = \
-            _get_list_from_comp_dict(comp_dict, assembly)
-        # Create sparse array from list
-        sparr = pd.arrays.SparseArray(comp_list)
         if assembly == "basic":
-            min_basic_parts = \
-                _get_min_basic_parts(all_comps)
+            # Minimum number of Part/Linker pairs for all constructs
+            min_basic_parts = max(
+                [len(cd.components) // 2 for cd in constructs.values()]
+                + [0])
             header = _get_construct_csv_header(min_basic_parts)
-            # Create df from sparr
-            df = pd.DataFrame(data=sparr, columns=header)
-        elif assembly == "moclo":
-            df = pd.DataFrame(data=sparr)
-            df = df.iloc[:, 1:]
         elif assembly == "bio_bricks":
             header = ["Construct", "Well", "upstream", "downstream", "plasmid"]
-            # Create df from sparr
-            df = pd.DataFrame(data=sparr, columns=header)
-        return df
+        else:
+            header = None
+        # Pad rows of constructs with fewer components with NaN
+        num_columns = len(header) if header else \
+            max([len(row) for row in rows] + [0])
+        table = np.full((len(rows), num_columns), np.nan, dtype=np.object_)
+        for index, row in enumerate(rows):
+            table[index, :len(row)] = row
+        return pd.DataFrame(data=table, columns=header)
 
     def get_construct_csv_from_plate(
         self,
@@ -1250,6 +1265,8 @@ class ParserSBOL:
             self.construct_csv_paths.append(filepath)
         elif assembly == "moclo":
             filepath = os.path.join(self.outdir, "construct.csv")
+            # Wells are assigned by the MoClo generator: drop well column
+            construct_df = construct_df.iloc[:, 1:]
             construct_df.to_csv(
                 filepath,
                 index=False,
@@ -1273,15 +1290,16 @@ class ParserSBOL:
 
         def _is_linker(
             part: ComponentDefinition,
+            linkers: Set[str]
         ) -> bool:
             """Check whether a part is a linker.
             Args:
                 part (ComponentDefinition): Part to check.
+                linkers (Set[str]): Identities of all linkers.
             Returns:
                 bool: True if part is a linker. False otherwise.
             """
-            linkers = self.get_root_compdefs(self.linker_file)
-            if part.identity in [linker.identity for linker in linkers]:
+            if part.identity in linkers:
                 return True
             else:
                 return False
@@ -1302,9 +1320,11 @@ class ParserSBOL:
                     self.doc.getComponentDefinition(component.definition))
             return linkersp
 
+        linkers = {linker.identity for linker
+                   in self.get_root_compdefs(self.linker_file)}
         new_part_list = []
         for part in part_list:
-            if _is_linker(part):
+            if _is_linker(part, linkers):
                 new_part_list.extend(_get_linker_sp(part))
             else:
                 new_part_list.append(part)
@@ -1380,36 +1400,18 @@ class ParserSBOL:
         df = pd.DataFrame(data=sparr, columns=header)
         return df
 
-    def get_part_linker_csv_from_plate(
+    def get_part_list(
         self,
-        construct_plate: plateo.Plate,
-        assembly: str,
-        part_info: Dict[str, Dict[str, Union[str, int, float]]] = None
-    ):
-        """Get part/linker CSV from plate.
+        construct_plate: plateo.Plate
+    ) -> List[ComponentDefinition]:
+        """Get the sorted list of parts and linker prefixes/suffixes needed to
+        assemble the constructs of a construct plate.
         Args:
             construct_plate (plateo.Plate): Construct plates from which
                 parts and linkers are derived.
-            assembly (str): Type of assembly.
-            part_info (Dict[str, Dict[str, Union[str, int, float]]]):
-                Dictionary of parts and associated information.
+        Returns:
+            List[ComponentDefinition]: Sorted parts and linkers.
         """
-        def _get_part_name(well: plateo.Well) -> str:
-            """Gets name of part contained in well. Used to generate platemap
-            from plateo plates.
-            Args:
-                well (plate.Well): Plateo Well object.
-            Returns:
-                str: DisplayId of part.
-            """
-            if "part" in well.data.keys():
-                cd = well.data["part"]
-                name = cd.displayId
-            else:
-                name = ""
-            return name
-
-        # TODO: Determine plate class?
         # Obtain all constructs from plate
         all_constructs = \
             self.get_all_content_from_plate(construct_plate, 'construct')
@@ -1418,7 +1420,40 @@ class ParserSBOL:
         # Change linker to linker-s and linker-p
         part_list = self.convert_linker_to_sp(part_list)
         # Sort list of parts and linkers
-        self.get_sorted_parts(part_list)
+        return self.get_sorted_parts(part_list)
+
+    def get_part_plates(
+        self,
+        construct_plate: plateo.Plate,
+        part_info: Dict[str, Dict[str, Union[str, int, float]]] = None
+    ) -> List[plateo.Plate]:
+        """Get plates of the parts and linkers needed to assemble the
+        constructs of a construct plate.
+        Args:
+            construct_plate (plateo.Plate): Construct plates from which
+                parts and linkers are derived.
+            part_info (Dict[str, Dict[str, Union[str, int, float]]]):
+                Dictionary of parts and associated information.
+        Returns:
+            List[plateo.Plate]: Plates containing parts and linkers.
+        """
+        return self.fill_part_plates(
+            self.get_part_list(construct_plate), part_info)
+
+    def fill_part_plates(
+        self,
+        part_list: List[ComponentDefinition],
+        part_info: Dict[str, Dict[str, Union[str, int, float]]] = None
+    ) -> List[plateo.Plate]:
+        """Fill plates with a sorted list of parts and linkers.
+        Args:
+            part_list (List[ComponentDefinition]): Sorted parts and linkers.
+            part_info (Dict[str, Dict[str, Union[str, int, float]]]):
+                Dictionary of parts and associated information.
+        Returns:
+            List[plateo.Plate]: Plates containing parts and linkers.
+        """
+        # TODO: Determine plate class?
         # Determine number of plates if dict is None
         if part_info is None:
             num_plates = len(part_list) // 96 + (len(part_list) % 96 > 0)
@@ -1428,7 +1463,7 @@ class ParserSBOL:
             plates = list(dict.fromkeys(plates))
             num_plates = len(plates)
         # Add parts and linkers to plate
-        part_plates = self.fill_plates(
+        return self.fill_plates(
             part_list,
             "part",
             num_plates,
@@ -1436,6 +1471,37 @@ class ParserSBOL:
             96,
             part_info
         )
+
+    def get_part_linker_csv_from_plate(
+        self,
+        construct_plate: plateo.Plate,
+        assembly: str,
+        part_info: Dict[str, Dict[str, Union[str, int, float]]] = None
+    ):
+        """Get part/linker CSV from plate.
+        Args:
+            construct_plate (plateo.Plate): Construct plates from which
+                parts and linkers are derived.
+            assembly (str): Type of assembly.
+            part_info (Dict[str, Dict[str, Union[str, int, float]]]):
+                Dictionary of parts and associated information.
+        """
+        def _get_part_name(well: plateo.Well) -> str:
+            """Gets name of part contained in well. Used to generate platemap
+            from plateo plates.
+            Args:
+                well (plate.Well): Plateo Well object.
+            Returns:
+                str: DisplayId of part.
+            """
+            if "part" in well.data.keys():
+                cd = well.data["part"]
+                name = cd.displayId
+            else:
+                name = ""
+            return name
+
+        part_plates = self.get_part_plates(construct_plate, part_info)
         for plate in part_plates:
             if assembly == "basic":
                 # Create df
@@ -1477,3 +1543,172 @@ class ParserSBOL:
                     index=False
                 )
                 self.part_csv_paths.append(filepath)
+
+    def get_plan_from_plate(
+        self,
+        construct_plate: plateo.Plate,
+        assembly: str,
+        part_info: Dict[str, Dict[str, Union[str, int, float]]] = None
+    ) -> AssemblyPlan:
+        """Get the assembly plan of a construct plate, i.e. its constructs
+        and the plates of parts and linkers needed to assemble them.
+        Args:
+            construct_plate (plateo.Plate): Plateo plate containing constructs.
+            assembly (str): Type of assembly.
+            part_info (Dict[str, Dict[str, Union[str, int, float]]]):
+                Dictionary of parts and associated information.
+        Returns:
+            AssemblyPlan: Plan to be passed to the assembly script generators.
+        """
+        constructs = {
+            wellname: well.data['construct']
+            for wellname, well in construct_plate.wells.items()
+            if 'construct' in well.data.keys()
+        }
+        return AssemblyPlan(
+            assembly=assembly,
+            constructs=self.get_plan_constructs(constructs, assembly),
+            plates=self.get_plan_plates(
+                self.get_part_list(construct_plate), assembly, part_info)
+        )
+
+    def get_plan_constructs(
+        self,
+        constructs: Dict[str, ComponentDefinition],
+        assembly: str
+    ) -> List[PlanConstruct]:
+        """Get the constructs of an assembly plan.
+        Args:
+            constructs (Dict[str, ComponentDefinition]): Constructs keyed by
+                the well of the construct plate holding them.
+            assembly (str): Type of assembly.
+        Returns:
+            List[PlanConstruct]: Constructs of the assembly plan.
+        """
+        construct_df = self.get_construct_df(constructs, assembly)
+        plan_constructs = []
+        for row in construct_df.itertuples(index=False):
+            # Drop padding of constructs with fewer components
+            values = [x for x in row if isinstance(x, str) and x]
+            if assembly == "basic":
+                plan_constructs.append(PlanConstruct(
+                    well=values[0], components=values[1:]))
+            elif assembly == "moclo":
+                plan_constructs.append(PlanConstruct(
+                    well=values[0], components=values[2:], name=values[1]))
+            elif assembly == "bio_bricks":
+                plan_constructs.append(PlanConstruct(
+                    well=values[1], components=values[2:], name=values[0]))
+        return plan_constructs
+
+    def get_plan_plates(
+        self,
+        part_list: List[ComponentDefinition],
+        assembly: str,
+        part_info: Dict[str, Dict[str, Union[str, int, float]]] = None
+    ) -> List[PlanPlate]:
+        """Get the part plates of an assembly plan.
+        Args:
+            part_list (List[ComponentDefinition]): Sorted parts and linkers
+                needed for the constructs of the plan.
+            assembly (str): Type of assembly.
+            part_info (Dict[str, Dict[str, Union[str, int, float]]]):
+                Dictionary of parts and associated information.
+        Returns:
+            List[PlanPlate]: Part plates of the assembly plan.
+        """
+        plate_prefix = "part_linker_" if assembly == "basic" else "parts_"
+        part_plates = self.fill_part_plates(part_list, part_info)
+        plates = []
+        for index, plate in enumerate(part_plates):
+            parts = []
+            for wellname, well in plate.wells.items():
+                if "part" in well.data.keys():
+                    conc = well.data.get("concentration")
+                    if conc in ('', None) or conc == 0:
+                        conc = None
+                    parts.append(PlanPart(
+                        name=well.data["part"].displayId,
+                        well=wellname,
+                        concentration=None if conc is None else float(conc)
+                    ))
+            plates.append(PlanPlate(
+                name=plate_prefix + str(index + 1),
+                parts=parts,
+                num_rows=plate.num_rows,
+                num_columns=plate.num_columns
+            ))
+        return plates
+
+    def get_plate_descriptor(
+        self,
+        construct_plate: plateo.Plate
+    ) -> Dict[str, str]:
+        """Get a picklable descriptor of a construct plate, to plan the
+        plate in a worker process.
+        Args:
+            construct_plate (plateo.Plate): Plateo plate containing constructs.
+        Returns:
+            Dict[str, str]: Identities of the constructs keyed by the well
+                holding them.
+        """
+        return {
+            wellname: well.data['construct'].identity
+            for wellname, well in construct_plate.wells.items()
+            if 'construct' in well.data.keys()
+        }
+
+    def get_constructs_from_descriptor(
+        self,
+        descriptor: Dict[str, str]
+    ) -> Dict[str, ComponentDefinition]:
+        """Get the constructs of a construct plate descriptor.
+        Args:
+            descriptor (Dict[str, str]): Identities of the constructs keyed by
+                the well holding them.
+        Returns:
+            Dict[str, ComponentDefinition]: Constructs keyed by the well
+                holding them.
+        """
+        return {
+            wellname: self.doc.getComponentDefinition(identity)
+            for wellname, identity in descriptor.items()
+        }
+
+
+# Parser of the worker process, see ParserSBOL.generate_plan
+_worker_parser = None
+
+
+def _init_plan_worker(
+    document: str,
+    linker_file: str
+):
+    """Initialise a worker process planning construct plates.
+    Args:
+        document (str): Serialised SBOL document holding the constructs,
+            including the ones enumerated from combinatorial derivations.
+        linker_file (str): Serialised SBOL document of the linkers.
+    """
+    global _worker_parser
+    sbol_document = Document()
+    sbol_document.readString(document)
+    linker_document = Document()
+    linker_document.readString(linker_file)
+    _worker_parser = ParserSBOL(sbol_document, linker_file=linker_document)
+
+
+def _get_plan_constructs_from_descriptor(
+    descriptor: Dict[str, str],
+    assembly: str
+) -> List[PlanConstruct]:
+    """Get the constructs of an assembly plan in a worker process.
+    Args:
+        descriptor (Dict[str, str]): Identities of the constructs keyed by
+            the well holding them.
+        assembly (str): Type of assembly.
+    Returns:
+        List[PlanConstruct]: Constructs of the assembly plan.
+    """
+    return _worker_parser.get_plan_constructs(
+        _worker_parser.get_constructs_from_descriptor(descriptor), assembly)
@@ -1,6 +1,31 @@
+import csv
+import json
+import math
+import os
+import random
+import tempfile
+from unittest import mock
 import sbol2
 from django.test import TestCase
 from sbol_parser_api.sbol_parser_api import ParserSBOL
+from sbol_parser_api.assembly_plan import (
+    AssemblyPlan, PlanConstruct, PlanPart, PlanPlate)
+from sbol_parser_api.protocol_validation import (
+    ERROR, Diagnostic, PlanValidationError, check_count, check_deck_slots,
+    check_mounts, check_transfer_volumes, check_well_volumes,
+    count_tip_racks, get_well_volumes, raise_for_errors)
+from sbol_parser_api.plan_encoding import (
+    benchmark_plan_encoding, decode_plan, encode_plan, get_plan_header)
+from sbol_parser_api.run_scheduling import (
+    ROBOT, THERMOCYCLER, RunJob, RunStage, get_makespan, get_utilisation,
+    schedule_runs, write_schedule_csv, write_schedule_json)
+from sbol_parser_api.protocol_simulation import (
+    TimingModel, get_distance, get_slot_distance, get_thermocycler_time,
+    parse_runlog, simulate_script, write_command_log)
+from sbol_parser_api.transfer_scheduling import (
+    TransferGroup, get_dispenses_per_aspiration, get_group_length,
+    group_dispenses, order_destinations, schedule_transfer_dict,
+    schedule_transfers)
 import numpy as np
 
 
@@ -64,4 +89,431 @@ class TestSbolParserApi(TestCase):
             assert type(key) == str, "Keys in dictionary of components not 'str' type displayId"
             assert constructs_dict[key] == list, "Values in dictionary of components not list"
 
-    
+    def test_get_construct_df(self):
+        parser = ParserSBOL(sbol2.Document(
+            "./examples/sbol/validation/moclo/moclo_validation.xml"))
+        constructs = parser.filter_constructs(parser.get_constructs())
+        wells = ['A%d' % (i + 1) for i in range(len(constructs))]
+        df = parser.get_construct_df(dict(zip(wells, constructs)), 'moclo')
+        self.assertListEqual(df[0].to_list(), wells)
+        self.assertListEqual(
+            df[1].to_list(), [cd.displayId for cd in constructs])
+        for index, cd in enumerate(constructs):
+            components = df.iloc[index, 2:].dropna().to_list()
+            self.assertListEqual(components, [
+                x.displayId for x in parser.get_primary_structure(cd)])
+
+    def test_generate_plan_processes(self):
+        plans = []
+        for processes in [1, 2]:
+            parser = ParserSBOL(sbol2.Document(
+                "./examples/sbol/validation/moclo/moclo_validation.xml"))
+            random.seed(0)
+            plans.append(parser.generate_plan(
+                'moclo', max_construct_wells=4, num_runs=3,
+                processes=processes))
+        self.assertEqual(len(plans[0]), 3)
+        self.assertListEqual(plans[0], plans[1])
+
+    def test_generate_plan_shares_part_plates(self):
+        parser = ParserSBOL(sbol2.Document(
+            "./examples/sbol/validation/moclo/moclo_validation.xml"))
+        constructs = parser.filter_constructs(parser.get_constructs())
+        # Same constructs on both plates, so same part plates
+        parser.get_constructs = lambda: constructs + constructs
+        parser.filter_constructs = lambda x: x
+        with mock.patch('sbol_parser_api.sbol_parser_api.sample',
+                        lambda population, k: population[:k]):
+            plans = parser.generate_plan(
+                'moclo', max_construct_wells=len(constructs), num_runs=2)
+        self.assertIs(plans[0].plates, plans[1].plates)
+        # Different parts on each plate, so each run has its own part plates
+        # holding only the parts of its constructs
+        with mock.patch('sbol_parser_api.sbol_parser_api.sample',
+                        lambda population, k: population[:k]):
+            plans = parser.generate_plan(
+                'moclo', max_construct_wells=1, num_runs=2)
+        self.assertIsNot(plans[0].plates, plans[1].plates)
+        for plan in plans:
+            part_names = {
+                part.name for plate in plan.plates for part in plate.parts}
+            self.assertSetEqual(part_names, set(plan.constructs[0].components))
+
+
+class TestAssemblyPlan(TestCase):
+
+    def setUp(self):
+        self.plan = AssemblyPlan(
+            'basic',
+            constructs=[
+                PlanConstruct('A1', ['LMS', 'Backbone', 'LMP', 'Pro']),
+                PlanConstruct('A2', ['LMS', 'Backbone'])],
+            plates=[PlanPlate('part_linker_1', [
+                PlanPart('Backbone', 'A1', 200.0),
+                PlanPart('LMS-P', 'B1')])])
+
+    def test_get_construct_rows(self):
+        self.assertListEqual(self.plan.get_construct_rows(), [
+            ['Well', 'Linker 1', 'Part 1', 'Linker 2', 'Part 2'],
+            ['A1', 'LMS', 'Backbone', 'LMP', 'Pro'],
+            ['A2', 'LMS', 'Backbone', '', '']])
+
+    def test_get_platemap(self):
+        platemap = self.plan.plates[0].get_platemap()
+        self.assertEqual(len(platemap), 8)
+        self.assertEqual(platemap[0][0], 'Backbone')
+        self.assertEqual(platemap[1][0], 'LMS-P')
+        self.assertEqual(platemap[0][1], '')
+
+    def test_write_csv(self):
+        with tempfile.TemporaryDirectory() as outdir:
+            paths = self.plan.write_csv(outdir)
+            self.assertListEqual(paths['part_path'], [
+                os.path.join(outdir, 'part_linker_1.csv')])
+            with open(paths['part_path'][0], newline='') as csvfile:
+                rows = list(csv.reader(csvfile))
+            paths = self.plan.write_csv(outdir, '_2')
+            self.assertListEqual(paths['construct_path'], [
+                os.path.join(outdir, 'construct_2.csv')])
+        self.assertListEqual(rows, [
+            ['Part/linker', 'Well', 'Part concentration (ng/uL)'],
+            ['Backbone', 'A1', '200.0'],
+            ['LMS-P', 'B1', '']])
+
+
+class TestProtocolSimulation(TestCase):
+
+    def setUp(self):
+        p10 = 'P10 Single-Channel GEN1 on right mount'
+        self.runlog = [
+            {'level': 0, 'payload': {
+                'text': 'Transferring 5.0 from A1 of Plate on 2 to B1 of '
+                        'Plate on 1'}},
+            {'level': 1, 'payload': {
+                'instrument': p10,
+                'text': 'Picking up tip from A1 of Tip Rack on 3'}},
+            {'level': 1, 'payload': {
+                'instrument': p10,
+                'text': 'Aspirating 5.0 uL from A1 of Plate on 2 at 5.0 '
+                        'uL/sec'}},
+            {'level': 1, 'payload': {
+                'instrument': p10,
+                'text': 'Dispensing 5.0 uL into B1 of Plate on 1 at 10.0 '
+                        'uL/sec'}},
+            {'level': 1, 'payload': {
+                'instrument': p10,
+                'text': 'Dropping tip into A1 of Opentrons Fixed Trash on '
+                        '12'}},
+            {'level': 0, 'payload': {
+                'text': 'Delaying for 2 minutes and 30.0 seconds'}},
+            {'level': 0, 'payload': {'text': 'Pausing robot operation'}},
+        ]
+
+    def test_parse_runlog(self):
+        report = parse_runlog(self.runlog, 'clip.ot2.py', TimingModel(
+            move=1, move_per_slot=1, pick_up_tip=4, drop_tip=4,
+            aspirate=1, dispense=1))
+        self.assertListEqual(
+            [command.kind for command in report.commands],
+            ['transfer', 'pick_up_tip', 'aspirate', 'dispense', 'drop_tip',
+             'delay', 'pause'])
+        self.assertListEqual(
+            [command.duration for command in report.commands],
+            [0, 5, 4, 3.5, 10, 150, 0])
+        self.assertEqual(report.run_time, 172.5)
+        self.assertEqual(report.tips_used, 1)
+        self.assertDictEqual(report.tipracks, {'Tip Rack on 3': 1})
+        self.assertDictEqual(report.volumes, {
+            'A1 of Plate on 2': -5.0, 'B1 of Plate on 1': 5.0})
+        self.assertEqual(report.pauses, 1)
+        self.assertAlmostEqual(report.distance_travelled, sum(
+            get_distance(*move) for move in [
+                ((3, 'A1'), (2, 'A1')), ((2, 'A1'), (1, 'B1')),
+                ((1, 'B1'), (12, 'A1'))]))
+
+    def test_get_slot_distance(self):
+        self.assertEqual(get_slot_distance(1, 1), 0)
+        self.assertEqual(get_slot_distance(1, 12), 5)
+        self.assertEqual(get_slot_distance(3, 4), 3)
+
+    def test_get_distance(self):
+        self.assertEqual(get_distance((1, 'A1'), (1, 'A1')), 0)
+        self.assertEqual(get_distance((1, 'A1'), (1, 'B1')), 9)
+        self.assertEqual(get_distance((1, 'A1'), (2, 'A1')), 132.5)
+        self.assertAlmostEqual(get_distance((1, 'H12'), (4, 'A1')),
+                               math.hypot(99, 90.5 + 63))
+
+    def test_get_thermocycler_time(self):
+        self.assertEqual(get_thermocycler_time(
+            'Setting Thermocycler well block temperature to 37.0 with a '
+            'hold time of 300 seconds'), 300)
+        self.assertEqual(get_thermocycler_time(
+            "Thermocycler starting 2 repetitions of cycle composed of the "
+            "following steps: [{'temperature': 42, 'hold_time_minutes': 1}, "
+            "{'temperature': 16, 'hold_time_seconds': 30}]"), 180)
+
+    def test_timing_model_from_dict(self):
+        timing = TimingModel.from_dict({'move': 2, 'mix': None})
+        self.assertEqual(timing.move, 2)
+        self.assertEqual(timing.mix, TimingModel().mix)
+        with self.assertRaises(ValueError):
+            TimingModel.from_dict({'teleport': 1})
+
+    def test_write_command_log(self):
+        report = parse_runlog(self.runlog)
+        with tempfile.TemporaryDirectory() as outdir:
+            path = os.path.join(outdir, 'clip_simulation.csv')
+            write_command_log(report, path)
+            with open(path, newline='') as csvfile:
+                rows = list(csv.reader(csvfile))
+        self.assertListEqual(
+            rows[0], ['level', 'kind', 'duration (s)', 'text'])
+        self.assertIn(['tips', 'P10 Single-Channel GEN1 on right mount',
+                       '1'], rows)
+
+    def test_simulate_script_without_opentrons(self):
+        with tempfile.TemporaryDirectory() as outdir:
+            path = os.path.join(outdir, 'clip.ot2.py')
+            with open(path, 'w') as script:
+                script.write('metadata = {}\n')
+            with mock.patch.dict('sys.modules', {
+                    'opentrons': None, 'opentrons.simulate': None}):
+                report = simulate_script(path)
+        self.assertEqual(report.script, path)
+        self.assertIn('opentrons', report.error)
+        self.assertListEqual(report.commands, [])
+
+
+class TestTransferScheduling(TestCase):
+
+    def setUp(self):
+        # a column of 16 wells visited in a zig-zag, 4 per aspiration
+        self.group = TransferGroup(
+            'part', (1, 'A1'), [(7, well) for well in [
+                'A1', 'H2', 'B1', 'G2', 'C1', 'F2', 'D1', 'E2', 'E1', 'D2',
+                'F1', 'C2', 'G1', 'B2', 'H1', 'A2']],
+            per_aspiration=4, between=[(5, 'A2')])
+
+    def test_path(self):
+        self.assertListEqual(self.group.path()[:7], [
+            (1, 'A1'), (7, 'A1'), (7, 'H2'), (7, 'B1'), (7, 'G2'),
+            (5, 'A2'), (1, 'A1')])
+
+    def test_order_destinations(self):
+        ordered = order_destinations(self.group, (3, 'A1'), (12, 'A1'))
+        self.assertCountEqual(ordered.destinations, self.group.destinations)
+        self.assertLess(
+            get_group_length(ordered, (3, 'A1'), (12, 'A1')),
+            get_group_length(self.group, (3, 'A1'), (12, 'A1')))
+        # going back to the source for each well, the one nearest the
+        # trash is last
+        group = TransferGroup('water', (4, 'A1'), [
+            (7, 'H12'), (7, 'A1'), (7, 'A12')])
+        self.assertListEqual(
+            order_destinations(group, (3, 'A1'), (12, 'A1')).destinations,
+            [(7, 'H12'), (7, 'A1'), (7, 'A12')])
+        self.assertListEqual(
+            order_destinations(group, (3, 'A1'), (10, 'A1')).destinations,
+            [(7, 'H12'), (7, 'A12'), (7, 'A1')])
+
+    def test_schedule_transfers(self):
+        groups = [TransferGroup('mm', (4, 'A2'), [(1, 'A1')], after=['water']),
+                  TransferGroup('water', (4, 'A1'), [(1, 'A1')])]
+        self.assertListEqual(
+            [group.name for group in schedule_transfers(groups, (3, 'A1'))],
+            ['water', 'mm'])
+        groups = [TransferGroup('far', (11, 'A1'), [(1, 'A1')]),
+                  TransferGroup('near', (3, 'A1'), [(1, 'A1')])]
+        self.assertListEqual(
+            [group.name for group in schedule_transfers(
+                groups, (2, 'A1'), new_tip=False)], ['near', 'far'])
+        with self.assertRaises(ValueError):
+            schedule_transfers(
+                [TransferGroup('mm', (4, 'A2'), [], after=['water'])],
+                (3, 'A1'))
+
+    def test_schedule_transfer_dict(self):
+        transfers = {'A2': [('H12', 5), ('A1', 6), ('A12', 7)],
+                     'A1': [('B1', 1)]}
+        scheduled = schedule_transfer_dict(
+            transfers, 4, 7, (3, 'A1'), after={'A2': ['A1']})
+        self.assertListEqual(list(scheduled), ['A1', 'A2'])
+        self.assertCountEqual(scheduled['A2'], transfers['A2'])
+
+    def test_group_dispenses(self):
+        self.assertEqual(get_dispenses_per_aspiration(2, 10, 1), 4)
+        self.assertEqual(get_dispenses_per_aspiration(7, 10, 1), 1)
+        transfers = [('A1', 2), ('A2', 2), ('A3', 2), ('A4', 2), ('A5', 2),
+                     ('A6', 11), ('A7', 1)]
+        self.assertListEqual(group_dispenses(transfers, 10, 1), [
+            [('A1', 2), ('A2', 2), ('A3', 2), ('A4', 2)], [('A5', 2)],
+            [('A6', 11)], [('A7', 1)]])
+
+
+class TestProtocolValidation(TestCase):
+
+    def test_check_count(self):
+        self.assertListEqual(check_count(48, 48, 'samples', 'samples'), [])
+        diagnostic, = check_count(49, 48, 'samples', 'samples', 'purification')
+        self.assertEqual(diagnostic.severity, ERROR)
+        self.assertEqual(diagnostic.stage, 'purification')
+        self.assertEqual(count_tip_racks(96), 1)
+        self.assertEqual(count_tip_racks(97), 2)
+
+    def test_check_deck_slots(self):
+        self.assertListEqual(check_deck_slots(
+            {'thermocycler': 7, 'tip rack': 3, 'trough': '5'}), [])
+        # the thermocycler covers slot 10 as well as slot 7
+        diagnostic, = check_deck_slots({'thermocycler': 7, 'tempdeck': 10})
+        self.assertEqual(diagnostic.code, 'deck-slot')
+        self.assertIn('Slot 10', diagnostic.message)
+        self.assertEqual(len(check_deck_slots({'plate': 12})), 1)
+
+    def test_check_mounts(self):
+        self.assertListEqual(check_mounts({'p10': 'left', 'p300': 'right'}),
+                             [])
+        self.assertEqual(len(check_mounts(
+            {'p10': 'left', 'p10_multi': 'left', 'p300': 'centre'})), 2)
+
+    def test_check_volumes(self):
+        volumes = get_well_volumes({'A1': [('B1', 5), ('B2', '2.5')]},
+                                   {'A2': [('B1', 196)]})
+        self.assertDictEqual(volumes, {'B1': 201, 'B2': 2.5})
+        diagnostic, = check_well_volumes(volumes, 200, 'Digest')
+        self.assertEqual(diagnostic.code, 'well-volume')
+        self.assertEqual(len(check_transfer_volumes(
+            [0.5, 0.5, 0.8, 1, 2], 1, 'water')), 2)
+
+    def test_raise_for_errors(self):
+        raise_for_errors([Diagnostic('warning', 'tip-racks', 'Few tips.')])
+        with self.assertRaises(ValueError) as context:
+            raise_for_errors([
+                Diagnostic(ERROR, 'mount', 'Same mount.', 'clip'),
+                Diagnostic('warning', 'tip-racks', 'Few tips.')])
+        self.assertIsInstance(context.exception, PlanValidationError)
+        self.assertEqual(str(context.exception), 'clip: Same mount.')
+        self.assertEqual(len(context.exception.diagnostics), 2)
+
+
+class TestPlanEncoding(TestCase):
+
+    def setUp(self):
+        wells = [row + str(column) for column in range(1, 13)
+                 for row in 'ABCDEFGH']
+        # a full plate of transfers, steps with different keys and tuples
+        self.plan = {
+            'source_to_digest': {well: [(wells[-i - 1], 2), (well, 1.5)]
+                                 for i, well in enumerate(wells)},
+            'commands': [step for well in wells for step in [
+                {'command': 'pick_up_tip'},
+                {'command': 'aspirate', 'well': 'A1', 'vol': 2.0},
+                {'command': 'dispense', 'well': well, 'vol': 2.0},
+                {'command': 'mix', 'well': well, 'vol': None},
+                {'command': 'drop_tip'}]],
+            'spotting_tuples': [(('A1', 'B1'), ('A1',), (5, 5))],
+            'empty': [],
+            'mixed': ['A1', 2, True, {}]}
+
+    def test_round_trip(self):
+        decoded = decode_plan(encode_plan(self.plan))
+        self.assertDictEqual(decoded, json.loads(json.dumps(self.plan)))
+        namespace = {}
+        exec(get_plan_header(self.plan), namespace)
+        for name, value in self.plan.items():
+            self.assertEqual(namespace[name], json.loads(json.dumps(value)))
+
+    def test_encode_plan(self):
+        payload = json.loads(encode_plan(self.plan))
+        # every well name is stored once
+        self.assertEqual(len(payload['strings']),
+                         len(set(payload['strings'])))
+        self.assertIn('t', payload['plan']['source_to_digest']['v'])
+        with self.assertRaises(ValueError):
+            encode_plan({'plan': {1: 'A1'}})
+        payload['version'] += 1
+        with self.assertRaises(ValueError):
+            decode_plan(json.dumps(payload))
+
+    def test_benchmark_plan_encoding(self):
+        results = benchmark_plan_encoding(self.plan, number=1)
+        self.assertLess(results['compact_size'], results['json_size'])
+        self.assertGreater(results['compact_parse_time'], 0)
+
+
+class TestRunScheduling(TestCase):
+
+    def setUp(self):
+        self.jobs = [RunJob(name, [
+            RunStage('clip', 10), RunStage('thermocycle', 30, (THERMOCYCLER,)),
+            RunStage('purification', 20)]) for name in ['a', 'b']]
+
+    def test_schedule_runs(self):
+        schedule = schedule_runs(self.jobs, {ROBOT: 1, THERMOCYCLER: 1})
+        # the clip of b runs while a is thermocycled
+        self.assertListEqual(
+            [(scheduled.job, scheduled.stage, scheduled.start)
+             for scheduled in schedule],
+            [('a', 'clip', 0), ('b', 'clip', 10), ('a', 'thermocycle', 10),
+             ('b', 'thermocycle', 40), ('a', 'purification', 40),
+             ('b', 'purification', 70)])
+        self.assertEqual(get_makespan(schedule), 90)
+        self.assertAlmostEqual(get_utilisation(schedule)['robot 1'], 60 / 90)
+        schedule = schedule_runs(self.jobs, {ROBOT: 2, THERMOCYCLER: 2})
+        self.assertEqual(get_makespan(schedule), 60)
+        with self.assertRaises(ValueError):
+            schedule_runs(self.jobs, {ROBOT: 1})
+        with self.assertRaises(ValueError):
+            schedule_runs(self.jobs * 2, {ROBOT: 1, THERMOCYCLER: 1})
+
+    def test_schedule_runs_several_resources(self):
+        # a thermocycler module holds the robot it is on as well
+        jobs = [RunJob(name, [
+            RunStage('clip', 10),
+            RunStage('thermocycle', 30, (ROBOT, THERMOCYCLER)),
+            RunStage('purification', 20)]) for name in 'abcd']
+        schedule = schedule_runs(jobs, {ROBOT: 2, THERMOCYCLER: 1})
+        self.assertEqual(len(schedule), 12)
+        thermocycling = [scheduled for scheduled in schedule
+                         if scheduled.stage == 'thermocycle']
+        # the module is mounted on robot 1, so it never moves to robot 2
+        for scheduled in thermocycling:
+            self.assertTupleEqual(scheduled.resources,
+                                  ('robot 1', 'thermocycler 1'))
+        # no robot runs two stages at once
+        for robot in ['robot 1', 'robot 2']:
+            stages = [scheduled for scheduled in schedule
+                      if robot in scheduled.resources]
+            for previous, scheduled in zip(stages, stages[1:]):
+                self.assertLessEqual(previous.end, scheduled.start)
+        self.assertEqual(get_makespan(schedule), 160)
+        self.assertAlmostEqual(
+            get_utilisation(schedule)['thermocycler 1'], 120 / 160)
+        with self.assertRaises(ValueError):
+            schedule_runs(jobs, {ROBOT: 2})
+        with self.assertRaises(ValueError):
+            schedule_runs(jobs, {ROBOT: 1, THERMOCYCLER: 2})
+        # with a module on each robot, either robot thermocycles
+        schedule = schedule_runs(jobs, {ROBOT: 2, THERMOCYCLER: 2})
+        self.assertSetEqual(
+            {scheduled.resources for scheduled in schedule
+             if scheduled.stage == 'thermocycle'},
+            {('robot 1', 'thermocycler 1'), ('robot 2', 'thermocycler 2')})
+
+    def test_write_schedule(self):
+        schedule = schedule_runs(self.jobs, {ROBOT: 1, THERMOCYCLER: 1})
+        with tempfile.TemporaryDirectory() as folder:
+            csv_path = os.path.join(folder, 'schedule.csv')
+            json_path = os.path.join(folder, 'schedule.json')
+            write_schedule_csv(schedule, csv_path)
+            write_schedule_json(schedule, json_path)
+            with open(csv_path, newline='') as csvfile:
+                rows = list(csv.reader(csvfile))
+            with open(json_path) as jsonfile:
+                data = json.load(jsonfile)
+        self.assertListEqual(rows[1], ['a', 'clip', 'robot 1', '0.0', '10.0',
+                                       '10.0'])
+        self.assertListEqual(rows[3][:3],
+                             ['a', 'thermocycle', 'thermocycler 1'])
+        self.assertListEqual(rows[8], ['makespan (s)', '90.0'])
+        self.assertEqual(len(data['stages']), 6)
+        self.assertEqual(data['makespan'], 90)
@@ -0,0 +1,274 @@
+from dataclasses import dataclass, field, replace
+from functools import lru_cache
+from typing import Dict, List, Mapping, Sequence, Tuple
+
+from sbol_parser_api.protocol_simulation import get_distance
+
+# Deck slot and well name of a well on the deck
+Location = Tuple[int, str]
+# Where tips are dropped, the Opentrons fixed trash
+TRASH = (12, 'A1')
+# Maximum number of 2-opt passes over the destinations of a group
+MAX_TWO_OPT_PASSES = 5
+
+# get_distance, memoised for the 2-opt passes
+_distance = lru_cache(maxsize=None)(get_distance)
+
+
+@dataclass
+class TransferGroup:
+    """Transfers from one source made with one tip, e.g. a reagent to
+    every well it goes in.
+    Attributes:
+        name (str): Name of the group, e.g. its source well.
+        source (Location): Well aspirated from.
+        destinations (List[Location]): Wells dispensed into, in order.
+        per_aspiration (int): Destinations dispensed into per aspiration,
+            1 if the pipette goes back to the source for each.
+            (default: 1)
+        between (List[Location]): Wells visited between aspirations, e.g.
+            to wash the tip. (default: [])
+        after (List[str]): Names of the groups that must be transferred
+            first. (default: [])
+    """
+    name: str
+    source: Location
+    destinations: List[Location]
+    per_aspiration: int = 1
+    between: List[Location] = field(default_factory=list)
+    after: List[str] = field(default_factory=list)
+
+    def path(self) -> List[Location]:
+        """Get the wells the pipette moves to, in order."""
+        path = []
+        for start in range(0, len(self.destinations), self.per_aspiration):
+            if start > 0:
+                path.extend(self.between)
+            path.append(self.source)
+            path.extend(self.destinations[start:start + self.per_aspiration])
+        return path
+
+
+def get_path_length(path: Sequence[Location]) -> float:
+    """Get the distance travelled along a path of wells.
+    Args:
+        path (Sequence[Location]): Wells in the order moved to.
+    Returns:
+        float: Distance in mm, see get_distance.
+    """
+    return sum(_distance(path[i], path[i + 1])
+               for i in range(len(path) - 1))
+
+
+def get_group_length(
+    group: TransferGroup,
+    start: Location = None,
+    end: Location = None
+) -> float:
+    """Get the distance travelled by the transfers of a group.
+    Args:
+        group (TransferGroup): Transfers.
+        start (Location): Where the pipette comes from, e.g. the tip rack.
+            (default: None, from the source)
+        end (Location): Where the pipette goes after, e.g. the trash.
+            (default: None, nowhere)
+    Returns:
+        float: Distance in mm.
+    """
+    path = group.path()
+    if start is not None:
+        path.insert(0, start)
+    if end is not None:
+        path.append(end)
+    return get_path_length(path)
+
+
+def order_destinations(
+    group: TransferGroup,
+    start: Location = None,
+    end: Location = None
+) -> TransferGroup:
+    """Reorder the destinations of a group to shorten its travel.
+
+    If the pipette goes back to the source for every destination, only the
+    last destination, before `end`, changes the travel. Otherwise the
+    destinations are ordered by nearest neighbour from the source of each
+    aspiration, improved with 2-opt.
+    Args:
+        group (TransferGroup): Transfers.
+        start (Location): Where the pipette comes from. (default: None)
+        end (Location): Where the pipette goes after. (default: None)
+    Returns:
+        TransferGroup: The group with its destinations reordered.
+    """
+    if group.per_aspiration == 1:
+        destinations = list(group.destinations)
+        if end is not None and destinations:
+            last = min(destinations, key=lambda location: (
+                _distance(location, end) -
+                _distance(group.source, location)))
+            destinations.remove(last)
+            destinations.append(last)
+        return replace(group, destinations=destinations)
+    remaining = list(group.destinations)
+    destinations = []
+    position = group.source
+    while remaining:
+        if destinations and len(destinations) % group.per_aspiration == 0:
+            position = group.source
+        position = min(remaining,
+                       key=lambda location: _distance(position, location))
+        remaining.remove(position)
+        destinations.append(position)
+    best = replace(group, destinations=destinations)
+    length = get_group_length(best, start, end)
+    for _ in range(MAX_TWO_OPT_PASSES):
+        improved = False
+        for i in range(len(destinations) - 1):
+            for j in range(i + 1, len(destinations)):
+                trial = replace(best, destinations=(
+                    best.destinations[:i] +
+                    best.destinations[i:j + 1][::-1] +
+                    best.destinations[j + 1:]))
+                trial_length = get_group_length(trial, start, end)
+                if trial_length < length - 1e-9:
+                    best, length, improved = trial, trial_length, True
+        if not improved:
+            break
+    return best
+
+
+def schedule_transfers(
+    groups: Sequence[TransferGroup],
+    start: Location,
+    end: Location = TRASH,
+    new_tip: bool = True
+) -> List[TransferGroup]:
+    """Order transfer groups and their destinations to shorten the travel
+    of the pipette, keeping every group after the groups it depends on.
+
+    Groups using a new tip each go from the tip rack to the trash, so their
+    order does not change the travel and is kept. Otherwise the next group
+    is the ready one with the source nearest to where the last one ended.
+    Args:
+        groups (Sequence[TransferGroup]): Transfer groups, in their order.
+        start (Location): Where the pipette starts, e.g. the tip rack.
+        end (Location): Where tips are dropped. (default: TRASH)
+        new_tip (bool): If True, every group uses a new tip, otherwise
+            one tip does all of them. (default: True)
+    Returns:
+        List[TransferGroup]: Groups in the order to transfer them, with
+            their destinations reordered.
+    Raises:
+        ValueError: If the groups depend on each other in a cycle or on a
+            group that is not given.
+    """
+    remaining = list(groups)
+    done = set()
+    scheduled = []
+    position = start
+    while remaining:
+        ready = [group for group in remaining
+                 if all(name in done for name in group.after)]
+        if not ready:
+            raise ValueError("Unresolvable transfer dependencies: %s" % [
+                group.name for group in remaining])
+        if new_tip:
+            group = order_destinations(ready[0], start, end)
+        else:
+            group = min(ready, key=lambda group: _distance(
+                position, group.source))
+            group = order_destinations(group, position)
+            position = group.path()[-1]
+        remaining = [other for other in remaining if other.name != group.name]
+        done.add(group.name)
+        scheduled.append(group)
+    return scheduled
+
+
+def schedule_transfer_dict(
+    transfers: Mapping[str, List[Tuple]],
+    source_slot: int,
+    destination_slot: int,
+    tip_rack: Location,
+    after: Mapping[str, List[str]] = None,
+    new_tip: bool = True
+) -> Dict[str, List[Tuple]]:
+    """Reorder a transfer dictionary of the generators, with key = source
+    well and value = list of tuples of destination well and volume, see
+    schedule_transfers.
+    Args:
+        transfers (Mapping[str, List[Tuple]]): Transfers of one source per
+            key, each made with one tip.
+        source_slot (int): Deck slot of the source wells.
+        destination_slot (int): Deck slot of the destination wells.
+        tip_rack (Location): Tip rack the tips are picked up from.
+        after (Mapping[str, List[str]]): Source wells that must be
+            transferred before each source well. (default: None)
+        new_tip (bool): See schedule_transfers. (default: True)
+    Returns:
+        Dict[str, List[Tuple]]: The transfers, reordered.
+    """
+    after = {} if after is None else after
+    groups = [TransferGroup(
+        name=source, source=(source_slot, source),
+        destinations=[(destination_slot, value[0]) for value in values],
+        after=list(after.get(source, [])))
+        for source, values in transfers.items()]
+    scheduled = {}
+    for group in schedule_transfers(groups, tip_rack, new_tip=new_tip):
+        values = list(transfers[group.name])
+        scheduled[group.name] = []
+        for _, well in group.destinations:
+            value = next(value for value in values if value[0] == well)
+            values.remove(value)
+            scheduled[group.name].append(value)
+    return scheduled
+
+
+def get_dispenses_per_aspiration(
+    volume: float,
+    max_volume: float,
+    disposal_volume: float
+) -> int:
+    """Get the number of dispenses of a volume one aspiration can make when
+    distributing, with the disposal volume aspirated on top.
+    Args:
+        volume (float): Volume of each dispense in uL.
+        max_volume (float): Maximum volume of the pipette in uL.
+        disposal_volume (float): Extra volume aspirated for each
+            multi-dispense and blown out after it, in uL.
+    Returns:
+        int: Number of dispenses, 1 if fewer than two fit, when the volume
+            is transferred without a disposal volume.
+    """
+    return max(1, int((max_volume - disposal_volume) // volume))
+
+
+def group_dispenses(
+    transfers: Sequence[Tuple],
+    max_volume: float,
+    disposal_volume: float
+) -> List[List[Tuple]]:
+    """Group consecutive transfers from one source into multi-dispenses,
+    each aspirated at once with the disposal volume.
+    Args:
+        transfers (Sequence[Tuple]): Tuples of destination well and volume,
+            in order.
+        max_volume (float): Maximum volume of the pipette in uL.
+        disposal_volume (float): Extra volume aspirated for each
+            multi-dispense and blown out after it, in uL.
+    Returns:
+        List[List[Tuple]]: Groups of transfers in order. A group of one is
+            a plain transfer, which may take several aspirations.
+    """
+    groups = []
+    volume = None
+    for transfer in transfers:
+        if groups and volume + transfer[1] + disposal_volume <= max_volume:
+            groups[-1].append(transfer)
+            volume += transfer[1]
+        else:
+            groups.append([transfer])
+            volume = transfer[1]
+    return groups
@@ -0,0 +1,52 @@
+#Importable gene circuit models of the CCh_* scripts, e.g.
+#
+#    from circuit_models import Repressilator
+#    solution = Repressilator(n1=3).solve()
+#    Protein1 = solution['Protein1']
+
+from circuit_models.continuation import continue_equilibrium, stability_map
+from circuit_models.fitting import fit, fit_plate
+from circuit_models.model import CircuitModel, Solution
+from circuit_models.models import (
+    AutoActivation,
+    AutoInhibition,
+    BasicGeneExpression,
+    Binding,
+    Repressilator,
+)
+from circuit_models.sensitivity import sensitivities, sobol_indices
+from circuit_models.steady_state import dose_response, steady_state
+from circuit_models.stochastic import gillespie, system_size
+from circuit_models.sweep import parameter_grid, sweep
+
+#Models by the name of their CCh_* script
+MODELS = {
+    "BasicGeneExpression": BasicGeneExpression,
+    "Auto-activation": AutoActivation,
+    "Auto-Inhibition": AutoInhibition,
+    "Binding": Binding,
+    "Repressilator": Repressilator,
+}
+
+__all__ = [
+    "AutoActivation",
+    "AutoInhibition",
+    "BasicGeneExpression",
+    "Binding",
+    "CircuitModel",
+    "MODELS",
+    "Repressilator",
+    "Solution",
+    "continue_equilibrium",
+    "dose_response",
+    "fit",
+    "fit_plate",
+    "gillespie",
+    "parameter_grid",
+    "sensitivities",
+    "sobol_indices",
+    "stability_map",
+    "steady_state",
+    "sweep",
+    "system_size",
+]
@@ -0,0 +1,206 @@
+#Benchmarks of the circuit models, run with
+#
+#    python -m circuit_models.benchmarks
+
+import time
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+from circuit_models import MODELS, Repressilator
+from circuit_models.compiled import BACKENDS, get_functions
+from circuit_models.model import CircuitModel
+
+#Solver configurations compared against odeint with finite differences, as
+#used by the CCh_* scripts
+SOLVERS = {
+    "odeint (finite differences)": dict(method="odeint", jac=False),
+    "odeint": dict(method="odeint"),
+    "LSODA": dict(method="LSODA"),
+    "BDF": dict(method="BDF"),
+    "Radau": dict(method="Radau"),
+}
+
+
+def best_time(function: Callable[[], object], repeat: int = 3) -> float:
+    """Get the best wall time of several calls of a function.
+    Args:
+        function (Callable[[], object]): Function to time.
+        repeat (int): Number of calls. (default: 3)
+    Returns:
+        float: Best wall time in seconds.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def count_rhs_calls(
+    model: CircuitModel,
+    function: Callable[[], object]
+) -> int:
+    """Count the evaluations of the right-hand side of a model during a
+    call of a function.
+    Args:
+        model (CircuitModel): Model whose rhs is counted.
+        function (Callable[[], object]): Function to call.
+    Returns:
+        int: Number of rhs evaluations.
+    """
+    calls = [0]
+    rhs = model.rhs
+
+    def _counting_rhs(*args, **kwargs):
+        calls[0] += 1
+        return rhs(*args, **kwargs)
+
+    model.rhs = _counting_rhs
+    try:
+        function()
+    finally:
+        del model.rhs
+    return calls[0]
+
+
+def get_scenarios() -> Dict[str, Tuple[CircuitModel, np.ndarray]]:
+    """Get the benchmark scenarios: the default time course of every model,
+    the same over a 10 times longer horizon, where LSODA switches to its
+    stiff method for most models, and a repressilator with steep Hill
+    terms.
+    Returns:
+        Dict[str, Tuple[CircuitModel, np.ndarray]]: Model and time points
+            of each scenario, by name.
+    """
+    scenarios = {}
+    for name, cls in MODELS.items():
+        model = cls()
+        scenarios[name] = (model, model.time_points())
+        scenarios[name + " x10"] = (
+            model, model.time_points(t_end=model.t_end * 10))
+    steep = Repressilator(**{
+        name % i: value
+        for i in (1, 2, 3)
+        for name, value in [("n%d", 4), ("Kd%d", 1e-12)]})
+    scenarios["Repressilator steep x10"] = (
+        steep, steep.time_points(t_end=steep.t_end * 10))
+    return scenarios
+
+
+def benchmark_solvers(
+    scenarios: Dict[str, Tuple[CircuitModel, np.ndarray]] = None,
+    repeat: int = 3
+) -> List[Dict[str, object]]:
+    """Time each solver configuration on each scenario, relative to odeint
+    with finite differences, and compare its time course with that of
+    odeint.
+    Args:
+        scenarios (Dict[str, Tuple[CircuitModel, np.ndarray]]): Model and
+            time points of each scenario, by name.
+            (default: get_scenarios())
+        repeat (int): Number of runs per configuration. (default: 3)
+    Returns:
+        List[Dict[str, object]]: One row per scenario and solver with the
+            'scenario', 'solver', 'seconds', 'speedup', 'rhs_calls' and
+            'max_error', the largest difference from the odeint time
+            course relative to its largest concentration.
+    """
+    if scenarios is None:
+        scenarios = get_scenarios()
+    rows = []
+    for name, (model, t) in scenarios.items():
+        baseline = None
+        reference = model.solve(t, method="odeint").y
+        for solver, kwargs in SOLVERS.items():
+            seconds = best_time(lambda: model.solve(t, **kwargs), repeat)
+            baseline = seconds if baseline is None else baseline
+            y = model.solve(t, **kwargs).y
+            rows.append({
+                "scenario": name,
+                "solver": solver,
+                "seconds": seconds,
+                "speedup": baseline / seconds,
+                "rhs_calls": count_rhs_calls(
+                    model, lambda: model.solve(t, **kwargs)),
+                "max_error": float(
+                    np.abs(y - reference).max() / np.abs(reference).max()),
+            })
+    return rows
+
+
+def benchmark_rhs(
+    models: Dict[str, CircuitModel] = None,
+    num_calls: int = 10000,
+    repeat: int = 3
+) -> List[Dict[str, object]]:
+    """Measure the right-hand side evaluations per second of each backend
+    for a single system, as called by the solvers, relative to the
+    vectorised NumPy rhs.
+    Args:
+        models (Dict[str, CircuitModel]): Models by name.
+            (default: every model with its default parameters)
+        num_calls (int): Number of evaluations per run. (default: 10000)
+        repeat (int): Number of runs per backend. (default: 3)
+    Returns:
+        List[Dict[str, object]]: One row per model and backend with the
+            'model', 'backend', 'evaluations_per_second' and 'speedup'.
+    """
+    if models is None:
+        models = {name: cls() for name, cls in MODELS.items()}
+    rows = []
+    for name, model in models.items():
+        y = model.initial_conditions()
+        baseline = None
+        for backend in reversed(BACKENDS):
+            rhs, _ = get_functions(model, model.parameters, backend)
+            # Compile outside the timing
+            rhs(0.0, y)
+
+            def _evaluate():
+                for _ in range(num_calls):
+                    rhs(0.0, y)
+
+            rate = num_calls / best_time(_evaluate, repeat)
+            baseline = rate if baseline is None else baseline
+            rows.append({
+                "model": name,
+                "backend": backend,
+                "evaluations_per_second": rate,
+                "speedup": rate / baseline,
+            })
+    return rows
+
+
+def print_rows(rows: List[Dict[str, object]], columns: List[str]):
+    """Print benchmark rows as a table.
+    Args:
+        rows (List[Dict[str, object]]): Rows to print.
+        columns (List[str]): Keys of the rows to print, in order.
+    """
+    table = [columns] + [
+        ["%.4g" % row[c] if isinstance(row[c], float) else str(row[c])
+         for c in columns]
+        for row in rows]
+    widths = [max(len(line[i]) for line in table) for i in range(len(columns))]
+    for line in table:
+        print("  ".join(value.ljust(width)
+                        for value, width in zip(line, widths)))
+
+
+def main():
+    print("Solvers with analytic Jacobians vs odeint with finite differences")
+    print_rows(
+        benchmark_solvers(),
+        ["scenario", "solver", "seconds", "speedup", "rhs_calls",
+         "max_error"])
+    print()
+    print("Right-hand side evaluations per second by backend")
+    print_rows(
+        benchmark_rhs(),
+        ["model", "backend", "evaluations_per_second", "speedup"])
+
+
+if __name__ == "__main__":
+    main()
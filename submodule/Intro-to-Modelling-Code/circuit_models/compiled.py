@@ -0,0 +1,196 @@
+#Compiled right-hand sides of the circuit models. The reaction rates and
+#Jacobian of a model are traced into straight-line Python source, which is
+#compiled with Numba if it is installed, e.g.
+#
+#    model.solve(backend="numba")
+
+from typing import Callable, Dict, Mapping, Tuple
+
+import numpy as np
+
+from circuit_models.model import ArrayLike, CircuitModel
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+#Backends of compile_model: Numba-compiled generated source, the generated
+#source as plain Python, and the vectorised NumPy methods of the model
+BACKENDS = ("numba", "python", "numpy")
+
+#Compiled functions by model class and backend
+_compiled: Dict[Tuple[type, str], Tuple[Callable, Callable]] = {}
+
+
+class _Expression:
+    """Traced arithmetic expression, recording its Python source."""
+
+    def __init__(self, source: str):
+        self.source = source
+
+    def _binary(self, operator, other, reverse=False):
+        left, right = _source(self), _source(other)
+        if reverse:
+            left, right = right, left
+        return _Expression("(%s %s %s)" % (left, operator, right))
+
+    def __add__(self, other):
+        return self._binary("+", other)
+
+    def __radd__(self, other):
+        return self._binary("+", other, reverse=True)
+
+    def __sub__(self, other):
+        return self._binary("-", other)
+
+    def __rsub__(self, other):
+        return self._binary("-", other, reverse=True)
+
+    def __mul__(self, other):
+        return self._binary("*", other)
+
+    def __rmul__(self, other):
+        return self._binary("*", other, reverse=True)
+
+    def __truediv__(self, other):
+        return self._binary("/", other)
+
+    def __rtruediv__(self, other):
+        return self._binary("/", other, reverse=True)
+
+    def __pow__(self, other):
+        return self._binary("**", other)
+
+    def __rpow__(self, other):
+        return self._binary("**", other, reverse=True)
+
+    def __neg__(self):
+        return _Expression("(-%s)" % self.source)
+
+    def __pos__(self):
+        return self
+
+
+def _source(value) -> str:
+    """Get the source of a traced expression or a constant."""
+    if isinstance(value, _Expression):
+        return value.source
+    return repr(float(value))
+
+
+def generate_source(model: CircuitModel) -> str:
+    """Generate Python source of the right-hand side and Jacobian of a model
+    for a single system, by tracing `_propensities` and `_jacobian`.
+
+    The source defines rhs(t, y, p) and jacobian(t, y, p), where `p` is an
+    array of the parameters in the order of `model.parameter_names`.
+    Args:
+        model (CircuitModel): Model.
+    Returns:
+        str: Python source, using `np` for NumPy.
+    Raises:
+        ValueError: If the rates or Jacobian use operations other than
+            arithmetic and powers.
+    """
+    y = [_Expression("y[%d]" % i) for i in range(model.num_states)]
+    p = {name: _Expression("p[%d]" % k)
+         for k, name in enumerate(model.parameter_names)}
+    try:
+        rates = model._propensities(_Expression("t"), y, p)
+        jacobian = model._jacobian(_Expression("t"), y, p)
+    except TypeError as error:
+        raise ValueError("Cannot generate source for %s: %s"
+                         % (type(model).__name__, error))
+    lines = ["def rhs(t, y, p):"]
+    for r, rate in enumerate(rates):
+        lines.append("    r%d = %s" % (r, _source(rate)))
+    lines.append("    dydt = np.zeros(%d)" % model.num_states)
+    for i in range(model.num_states):
+        terms = ["%d * r%d" % (change[i], r)
+                 for r, change in enumerate(model.stoichiometry) if change[i]]
+        if terms:
+            lines.append("    dydt[%d] = %s" % (i, " + ".join(terms)))
+    lines.append("    return dydt")
+    lines.append("")
+    lines.append("def jacobian(t, y, p):")
+    lines.append("    jac = np.zeros((%d, %d))"
+                 % (model.num_states, model.num_states))
+    for (i, j), value in jacobian.items():
+        lines.append("    jac[%d, %d] = %s" % (i, j, _source(value)))
+    lines.append("    return jac")
+    return "\n".join(lines) + "\n"
+
+
+def compile_model(
+    model: CircuitModel,
+    backend: str = "numba"
+) -> Tuple[Callable, Callable]:
+    """Compile the right-hand side and Jacobian of a model for a single
+    system. Compiled functions are cached per model class.
+    Args:
+        model (CircuitModel): Model.
+        backend (str): "numba", "python" or "numpy", see BACKENDS. "numba"
+            falls back to "numpy" if Numba is not installed.
+            (default: "numba")
+    Returns:
+        Tuple[Callable, Callable]: rhs(t, y, p) and jacobian(t, y, p), where
+            `p` is an array of the parameters in the order of
+            `model.parameter_names`.
+    Raises:
+        ValueError: If `backend` is invalid.
+    """
+    if backend not in BACKENDS:
+        raise ValueError("Invalid backend: %s" % backend)
+    if backend == "numba" and numba is None:
+        backend = "numpy"
+    if backend == "numpy":
+        names = model.parameter_names
+
+        def _rhs(t, y, p):
+            return model.rhs(t, y, dict(zip(names, p)))
+
+        def _jacobian(t, y, p):
+            return model.jacobian(t, y, dict(zip(names, p)))
+
+        return _rhs, _jacobian
+    key = (type(model), backend)
+    if key not in _compiled:
+        namespace = {"np": np}
+        exec(compile(
+            generate_source(model),
+            "<%s %s>" % (type(model).__name__, backend), "exec"), namespace)
+        functions = namespace["rhs"], namespace["jacobian"]
+        if backend == "numba":
+            functions = tuple(numba.njit(function) for function in functions)
+        _compiled[key] = functions
+    return _compiled[key]
+
+
+def get_functions(
+    model: CircuitModel,
+    parameters: Mapping[str, ArrayLike],
+    backend: str
+) -> Tuple[Callable, Callable]:
+    """Get the compiled right-hand side and Jacobian of a model with its
+    parameters bound, for scipy's solvers.
+    Args:
+        model (CircuitModel): Model.
+        parameters (Mapping[str, ArrayLike]): Value of every parameter.
+        backend (str): Backend, see compile_model.
+    Returns:
+        Tuple[Callable, Callable]: rhs(t, y) and jacobian(t, y).
+    Raises:
+        ValueError: If `backend` is invalid or a parameter is not a scalar.
+    """
+    if backend not in BACKENDS:
+        raise ValueError("Invalid backend: %s" % backend)
+    if backend == "numpy" or backend == "numba" and numba is None:
+        return (lambda t, y: model.rhs(t, y, parameters),
+                lambda t, y: model.jacobian(t, y, parameters))
+    p = np.array([parameters[name] for name in model.parameter_names],
+                 dtype=float)
+    if p.ndim != 1:
+        raise ValueError("Compiled backends need scalar parameters")
+    rhs, jacobian = compile_model(model, backend)
+    return lambda t, y: rhs(t, y, p), lambda t, y: jacobian(t, y, p)
@@ -0,0 +1,420 @@
+#Numerical continuation of the steady states of the circuit models: tracks
+#equilibria along a parameter, detects Hopf and fold points from the
+#eigenvalues of the analytic Jacobian and measures the oscillations beyond
+#Hopf points, e.g. where the repressilator starts to oscillate.
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from circuit_models.events import extremum
+from circuit_models.model import ArrayLike, CircuitModel
+from circuit_models.steady_state import (
+    _newton, _SteadyStateProblem, get_eigenvalues, steady_state)
+
+#Parameter, or parameters varied together such as ("n1", "n2", "n3")
+ParameterName = Union[str, Sequence[str]]
+
+#Relative size of the imaginary part of an eigenvalue treated as real
+REAL_EIGENVALUE_TOLERANCE = 1e-8
+#Largest distance of a continued steady state from its prediction, relative
+#to the previous step, before the branch is considered lost
+MAX_JUMP = 10
+
+
+@dataclass
+class Bifurcation:
+    """Bifurcation point of a branch of steady states.
+    Attributes:
+        kind (str): "hopf", where oscillations start or stop, or "fold",
+            where two steady states meet.
+        value (float): Parameter value of the bifurcation.
+        y (np.ndarray): Steady state at the bifurcation, shape (states,).
+        period (float): Period of the oscillations starting at a Hopf point,
+            2 pi over the imaginary part of the critical eigenvalues. NaN
+            for folds.
+    """
+    kind: str
+    value: float
+    y: np.ndarray
+    period: float = np.nan
+
+
+@dataclass
+class Branch:
+    """Steady states of a model along a parameter.
+    Attributes:
+        name (ParameterName): Continued parameter(s).
+        values (np.ndarray): Parameter values, shape (K,).
+        y (np.ndarray): Steady states, shape (K, states). NaN where the
+            continuation lost the branch.
+        eigenvalues (np.ndarray): Eigenvalues of the Jacobian by decreasing
+            real part, shape (K, rank).
+        stable (np.ndarray): Whether each steady state is stable, shape (K,).
+        period (np.ndarray): Period of the oscillations where the steady
+            state is unstable, shape (K,). NaN elsewhere or if not measured.
+        amplitude (np.ndarray): Peak to trough amplitude of each state in
+            those oscillations, shape (K, states).
+        bifurcations (List[Bifurcation]): Bifurcation points on the branch.
+        state_names (Tuple[str, ...]): Names of the states (columns of y).
+    """
+    name: ParameterName
+    values: np.ndarray
+    y: np.ndarray
+    eigenvalues: np.ndarray
+    stable: np.ndarray
+    period: np.ndarray
+    amplitude: np.ndarray
+    bifurcations: List[Bifurcation] = field(default_factory=list)
+    state_names: Tuple[str, ...] = ()
+
+    def __getitem__(self, state: str) -> np.ndarray:
+        """Get the steady states of a state by name."""
+        return self.y[..., self.state_names.index(state)]
+
+
+@dataclass
+class StabilityMap:
+    """Stability of the steady states of a model over a 2-D parameter grid.
+    Attributes:
+        x_name (ParameterName): Parameter(s) along the first axis.
+        x_values (np.ndarray): Values along the first axis, shape (X,).
+        y_name (ParameterName): Parameter(s) along the second axis.
+        y_values (np.ndarray): Values along the second axis, shape (Y,).
+        growth_rate (np.ndarray): Largest real part of the eigenvalues,
+            shape (X, Y). Positive where the steady state is unstable.
+        frequency (np.ndarray): Imaginary part of that eigenvalue, shape
+            (X, Y).
+        converged (np.ndarray): Whether the steady state was found, shape
+            (X, Y).
+    """
+    x_name: ParameterName
+    x_values: np.ndarray
+    y_name: ParameterName
+    y_values: np.ndarray
+    growth_rate: np.ndarray
+    frequency: np.ndarray
+    converged: np.ndarray
+
+    @property
+    def stable(self) -> np.ndarray:
+        """Whether the steady state is stable, shape (X, Y)."""
+        return self.converged & (self.growth_rate < 0)
+
+    @property
+    def oscillating(self) -> np.ndarray:
+        """Whether the steady state is unstable with complex leading
+        eigenvalues, i.e. past a Hopf point, shape (X, Y).
+        """
+        return self.converged & (self.growth_rate > 0) & (self.frequency > 0)
+
+
+def _names(name: ParameterName) -> Tuple[str, ...]:
+    """Get the parameters of a parameter name or group of names."""
+    return (name,) if isinstance(name, str) else tuple(name)
+
+
+def _with_values(
+    model: CircuitModel,
+    parameters: Mapping[str, ArrayLike],
+    name: ParameterName,
+    value: ArrayLike
+) -> Dict[str, ArrayLike]:
+    """Get the parameters of a model with a parameter (group) set.
+    Raises:
+        ValueError: If a parameter is not a parameter of the model.
+    """
+    params = dict(parameters or {})
+    for parameter in _names(name):
+        params[parameter] = value
+    return model.get_parameters(params)
+
+
+def oscillation(
+    model: CircuitModel,
+    parameters: Mapping[str, ArrayLike] = None,
+    y0: ArrayLike = None,
+    state: str = None,
+    t_end: float = None,
+    **solver_kwargs
+) -> Tuple[float, np.ndarray]:
+    """Measure the sustained oscillations of a model by integration,
+    locating the peaks and troughs of a state in the second half of the
+    time course.
+    Args:
+        model (CircuitModel): Model.
+        parameters (Mapping[str, ArrayLike]): Parameter values to use
+            instead of the model's. (default: None)
+        y0 (ArrayLike): Initial values. (default: initial conditions of the
+            model)
+        state (str): State whose peaks are located. (default: the last
+            state)
+        t_end (float): Length of the time course. (default: 10 times the
+            model's final time)
+        **solver_kwargs: Passed on to CircuitModel.solve.
+    Returns:
+        Tuple[float, np.ndarray]: Period, and the peak to trough amplitude
+            of each state over the last period, shape (states,). NaN if
+            there are fewer than three peaks or they are still decaying.
+    """
+    state = model.state_names[-1] if state is None else state
+    t_end = model.t_end * 10 if t_end is None else t_end
+    solver_kwargs.setdefault("rtol", 1e-8)
+    solver_kwargs.setdefault("atol", 1e-14)
+    solution = model.solve(
+        t=[0.0, t_end], y0=y0, parameters=parameters, output="dense",
+        events={"max": extremum(model, state, "max")}, **solver_kwargs)
+    peaks = solution.t_events["max"]
+    peaks = peaks[peaks > t_end / 2]
+    nan = (np.nan, np.full(model.num_states, np.nan))
+    if len(peaks) < 3:
+        return nan
+    heights = solution.y_events["max"][-len(peaks):,
+                                       model.state_names.index(state)]
+    if abs(heights[-1] - heights[-2]) > 1e-3 * abs(heights[-1]):
+        return nan
+    period = float(np.mean(np.diff(peaks[-3:])))
+    cycle = solution(np.linspace(peaks[-2], peaks[-1], 200))
+    return period, cycle.max(axis=0) - cycle.min(axis=0)
+
+
+def _correct(
+    problem: _SteadyStateProblem,
+    model: CircuitModel,
+    parameters: Mapping[str, ArrayLike],
+    name: ParameterName,
+    value: float,
+    guess: np.ndarray,
+    step: float,
+    max_iter: int
+) -> Optional[np.ndarray]:
+    """Find the steady state at a parameter value by Newton's method from a
+    predicted one.
+    Returns:
+        Optional[np.ndarray]: Steady state, or None if Newton's method did
+            not converge or jumped to another branch, i.e. moved further
+            from the prediction than MAX_JUMP times the previous step.
+    """
+    params = _with_values(model, parameters, name, value)
+    point, converged = _newton(
+        problem, guess[None], params, problem.y0[:1], max_iter)
+    if not converged[0]:
+        return None
+    if np.linalg.norm(point[0] - guess) > MAX_JUMP * step:
+        return None
+    return point[0]
+
+
+def _locate_fold(
+    problem: _SteadyStateProblem,
+    model: CircuitModel,
+    parameters: Mapping[str, ArrayLike],
+    name: ParameterName,
+    values: Tuple[float, float],
+    y: np.ndarray,
+    step: float,
+    max_iter: int,
+    tolerance: float = 1e-6
+) -> Bifurcation:
+    """Locate the end of a branch between the last parameter value with a
+    steady state on it and the first without, by bisection. `step` is the
+    last step along the branch.
+    """
+    (a, b), y_a = values, y
+    while abs(b - a) > tolerance * max(abs(a), 1e-30):
+        value = (a + b) / 2
+        point = _correct(
+            problem, model, parameters, name, value, y_a, step, max_iter)
+        if point is None:
+            b = value
+        else:
+            a, y_a = value, point
+    return Bifurcation("fold", a, y_a)
+
+
+def _locate(
+    problem: _SteadyStateProblem,
+    model: CircuitModel,
+    parameters: Mapping[str, ArrayLike],
+    name: ParameterName,
+    values: Tuple[float, float],
+    y: Tuple[np.ndarray, np.ndarray],
+    critical: Tuple[float, float],
+    max_iter: int,
+    tolerance: float = 1e-6
+) -> Tuple[float, np.ndarray, np.ndarray]:
+    """Locate the parameter value where the critical eigenvalue's real part
+    crosses zero between two points of a branch, by the secant method.
+    Returns:
+        Tuple[float, np.ndarray, np.ndarray]: Parameter value, steady state
+            and eigenvalues at the crossing.
+    """
+    (a, b), (ya, yb), (fa, fb) = values, y, critical
+    value, y_value = a, ya
+    eigenvalues = None
+    for _ in range(30):
+        value = b - fb * (b - a) / (fb - fa) if fb != fa else (a + b) / 2
+        weight = (value - a) / (b - a) if b != a else 0.5
+        guess = ya + weight * (yb - ya)
+        params = _with_values(model, parameters, name, value)
+        y_value, _ = _newton(
+            problem, guess[None], params, problem.y0[:1], max_iter)
+        y_value = y_value[0]
+        eigenvalues = get_eigenvalues(model, y_value, params)
+        f = eigenvalues[0].real
+        if abs(value - b) <= tolerance * max(abs(b), 1e-30):
+            break
+        a, ya, fa, b, yb, fb = b, yb, fb, value, y_value, f
+    return value, y_value, eigenvalues
+
+
+def continue_equilibrium(
+    model: CircuitModel,
+    name: ParameterName,
+    values: ArrayLike,
+    parameters: Mapping[str, ArrayLike] = None,
+    y0: ArrayLike = None,
+    measure_oscillations: bool = True,
+    max_iter: int = 50,
+    **solver_kwargs
+) -> Branch:
+    """Track a steady state along a parameter by natural continuation: each
+    point is found by Newton's method from a secant prediction of the
+    previous two.
+
+    Hopf points are where a complex pair of eigenvalues, and folds where a
+    real eigenvalue, cross the imaginary axis. Both are located by the
+    secant method. Natural continuation cannot turn around a fold, so the
+    branch ends there.
+    Args:
+        model (CircuitModel): Model.
+        name (ParameterName): Parameter to continue along, or parameters
+            set together, e.g. ("n1", "n2", "n3").
+        values (ArrayLike): Parameter values, in order.
+        parameters (Mapping[str, ArrayLike]): Other parameter values to use
+            instead of the model's. (default: None)
+        y0 (ArrayLike): Initial guess of the first steady state and
+            conserved quantities. (default: initial conditions of the model)
+        measure_oscillations (bool): If True, the oscillations at unstable
+            points are measured by integration. (default: True)
+        max_iter (int): Maximum Newton iterations per point. (default: 50)
+        **solver_kwargs: Passed on to oscillation.
+    Returns:
+        Branch: Steady states, stability, oscillations and bifurcations.
+    """
+    values = np.asarray(values, dtype=float)
+    y0 = model.initial_conditions(y0)
+    params = _with_values(model, parameters, name, values[0])
+    first = steady_state(model, params, y0, stable=False, max_iter=max_iter)
+    problem = _SteadyStateProblem(model, params, y0[None], 1e-8, 1e-20)
+    num_values = len(values)
+    y = np.full((num_values, model.num_states), np.nan)
+    rank = problem.changing.shape[1]
+    eigenvalues = np.full((num_values, rank), np.nan, dtype=complex)
+    bifurcations = []
+    guess = first.y[0]
+    for k, value in enumerate(values):
+        if k >= 2 and values[k - 1] != values[k - 2]:
+            # Secant predictor from the previous two points
+            slope = (y[k - 1] - y[k - 2]) / (values[k - 1] - values[k - 2])
+            guess = np.maximum(y[k - 1] + slope * (value - values[k - 1]), 0)
+        elif k == 1:
+            guess = y[0]
+        step = np.linalg.norm(y[k - 1] - y[k - 2]) if k >= 2 else np.inf
+        point = _correct(
+            problem, model, parameters, name, value, guess, step, max_iter)
+        if point is None:
+            # Lost the branch, at a fold if it was being followed
+            if k > 0:
+                bifurcations.append(_locate_fold(
+                    problem, model, parameters, name, (values[k - 1], value),
+                    y[k - 1], step, max_iter))
+            break
+        y[k] = point
+        params = _with_values(model, parameters, name, value)
+        eigenvalues[k] = get_eigenvalues(model, y[k], params)
+        if k == 0:
+            continue
+        before, after = eigenvalues[k - 1][0], eigenvalues[k][0]
+        if (before.real < 0) == (after.real < 0):
+            continue
+        value_b, y_b, eigenvalues_b = _locate(
+            problem, model, parameters, name, (values[k - 1], value),
+            (y[k - 1], y[k]), (before.real, after.real), max_iter)
+        frequency = abs(eigenvalues_b[0].imag)
+        if frequency > REAL_EIGENVALUE_TOLERANCE * abs(eigenvalues_b).max():
+            bifurcations.append(Bifurcation(
+                "hopf", value_b, y_b, 2 * np.pi / frequency))
+        else:
+            bifurcations.append(Bifurcation("fold", value_b, y_b))
+    stable = eigenvalues[:, 0].real < 0
+    period = np.full(num_values, np.nan)
+    amplitude = np.full((num_values, model.num_states), np.nan)
+    if measure_oscillations:
+        for k in np.flatnonzero(eigenvalues[:, 0].real > 0):
+            params = _with_values(model, parameters, name, values[k])
+            # Start next to the unstable steady state
+            start = y[k] * 1.01 + 1e-3 * np.abs(y[k]).max() * np.arange(
+                model.num_states) / model.num_states
+            period[k], amplitude[k] = oscillation(
+                model, params, start, **solver_kwargs)
+    return Branch(
+        name=name,
+        values=values,
+        y=y,
+        eigenvalues=eigenvalues,
+        stable=stable,
+        period=period,
+        amplitude=amplitude,
+        bifurcations=bifurcations,
+        state_names=model.state_names
+    )
+
+
+def stability_map(
+    model: CircuitModel,
+    x_name: ParameterName,
+    x_values: ArrayLike,
+    y_name: ParameterName,
+    y_values: ArrayLike,
+    parameters: Mapping[str, ArrayLike] = None,
+    y0: ArrayLike = None
+) -> StabilityMap:
+    """Map the stability of the steady state over a 2-D parameter grid,
+    solving every grid point at once. Where the steady state is unstable
+    with complex leading eigenvalues, e.g. the repressilator oscillates.
+    Args:
+        model (CircuitModel): Model.
+        x_name (ParameterName): Parameter(s) along the first axis.
+        x_values (ArrayLike): Values along the first axis.
+        y_name (ParameterName): Parameter(s) along the second axis.
+        y_values (ArrayLike): Values along the second axis.
+        parameters (Mapping[str, ArrayLike]): Other parameter values to use
+            instead of the model's. (default: None)
+        y0 (ArrayLike): Initial guess of the steady states and conserved
+            quantities. (default: initial conditions of the model)
+    Returns:
+        StabilityMap: Leading eigenvalue of the steady state at each point.
+    """
+    x_values = np.asarray(x_values, dtype=float)
+    y_values = np.asarray(y_values, dtype=float)
+    x_grid, y_grid = np.meshgrid(x_values, y_values, indexing='ij')
+    params = dict(parameters or {})
+    for parameter in _names(x_name):
+        params[parameter] = x_grid.ravel()
+    for parameter in _names(y_name):
+        params[parameter] = y_grid.ravel()
+    steady = steady_state(model, params, y0, stable=False)
+    leading = get_eigenvalues(model, steady.y, model.get_parameters(params))
+    leading = leading[:, 0]
+    shape = x_grid.shape
+    return StabilityMap(
+        x_name=x_name,
+        x_values=x_values,
+        y_name=y_name,
+        y_values=y_values,
+        growth_rate=leading.real.reshape(shape),
+        frequency=np.abs(leading.imag).reshape(shape),
+        converged=steady.converged.reshape(shape)
+    )
@@ -0,0 +1,70 @@
+#Events for CircuitModel.solve, e.g. to sample a time course only where a
+#protein crosses a threshold or peaks:
+#
+#    model = Repressilator()
+#    solution = model.solve(output="events",
+#                           events={"peak": extremum(model, "Protein1")})
+
+from typing import Callable
+
+from circuit_models.model import CircuitModel
+
+
+def threshold(
+    model: CircuitModel,
+    state: str,
+    value: float,
+    direction: int = 0,
+    terminal: bool = False
+) -> Callable:
+    """Event where a state crosses a value.
+    Args:
+        model (CircuitModel): Model the event is located in.
+        state (str): Name of the state.
+        value (float): Threshold concentration.
+        direction (int): 1 to locate upward crossings only, -1 for downward
+            crossings only, 0 for both. (default: 0)
+        terminal (bool): If True, integration stops at the first crossing.
+            (default: False)
+    Returns:
+        Callable: Event, called as event(t, y, parameters).
+    """
+    index = model.state_names.index(state)
+
+    def _event(t, y, parameters):
+        return y[index] - value
+
+    _event.direction = direction
+    _event.terminal = terminal
+    return _event
+
+
+def extremum(
+    model: CircuitModel,
+    state: str,
+    kind: str = "max",
+    terminal: bool = False
+) -> Callable:
+    """Event where a state peaks or dips, i.e. where its derivative changes
+    sign.
+    Args:
+        model (CircuitModel): Model the event is located in.
+        state (str): Name of the state.
+        kind (str): "max" for peaks, "min" for dips. (default: "max")
+        terminal (bool): If True, integration stops at the first extremum.
+            (default: False)
+    Returns:
+        Callable: Event, called as event(t, y, parameters).
+    Raises:
+        ValueError: If `kind` is invalid.
+    """
+    if kind not in ("max", "min"):
+        raise ValueError("Invalid extremum kind: %s" % kind)
+    index = model.state_names.index(state)
+
+    def _event(t, y, parameters):
+        return model.rhs(t, y, parameters)[index]
+
+    _event.direction = -1 if kind == "max" else 1
+    _event.terminal = terminal
+    return _event
@@ -0,0 +1,350 @@
+#Fitting the circuit models to time-course data, e.g. plate-reader
+#fluorescence, by multi-start least squares with the sensitivities of the
+#model as the Jacobian. The starts of all wells of a plate are fitted in a
+#process pool.
+
+import csv
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Mapping, Sequence, Tuple
+
+import numpy as np
+from scipy.optimize import least_squares
+from scipy.stats import qmc
+
+from circuit_models.model import ArrayLike, CircuitModel
+from circuit_models.sensitivity import sensitivities
+
+#Parameters of the measurement, value = scale * state + offset, that can be
+#fitted along with the model's
+OBSERVATION_PARAMETERS = ("scale", "offset")
+#Default fitting range: each parameter from its value divided by this factor
+#to its value multiplied by it
+FIT_RANGE = 100.0
+#Number of solutions kept per start for repeated parameter vectors
+CACHE_SIZE = 32
+
+
+@dataclass
+class TimeSeries:
+    """Measurements of one state of a model over time.
+    Attributes:
+        t (np.ndarray): Time points in seconds, shape (time points,).
+        values (np.ndarray): Measured values, shape (time points,).
+        state (str): Measured state. (default: None, the last state of the
+            model)
+    """
+    t: np.ndarray
+    values: np.ndarray
+    state: str = None
+
+
+@dataclass
+class StartResult:
+    """Result of one start of a fit.
+    Attributes:
+        x0 (np.ndarray): Starting point, in fitting coordinates.
+        x (np.ndarray): Optimum, in fitting coordinates.
+        cost (float): Half the sum of squared residuals at the optimum.
+        success (bool): Whether least squares converged.
+        num_solves (int): Number of model solves.
+        cache_hits (int): Number of model solves saved by the cache.
+        seconds (float): Wall time of the start.
+    """
+    x0: np.ndarray
+    x: np.ndarray
+    cost: float
+    success: bool
+    num_solves: int
+    cache_hits: int
+    seconds: float
+
+
+@dataclass
+class FitResult:
+    """Result of a multi-start fit.
+    Attributes:
+        parameters (Dict[str, float]): Fitted parameter values of the best
+            start.
+        cost (float): Half the sum of squared residuals of the best start.
+        success (bool): Whether the best start converged.
+        starts (List[StartResult]): Result of every start.
+        seconds (float): Total wall time of the starts.
+    """
+    parameters: Dict[str, float]
+    cost: float
+    success: bool
+    starts: List[StartResult] = field(default_factory=list)
+    seconds: float = 0.0
+
+    @property
+    def num_solves(self) -> int:
+        """Number of model solves over all starts."""
+        return sum(start.num_solves for start in self.starts)
+
+    @property
+    def cache_hits(self) -> int:
+        """Number of model solves saved by the cache over all starts."""
+        return sum(start.cache_hits for start in self.starts)
+
+
+def read_csv(filename: str) -> Dict[str, TimeSeries]:
+    """Read tidy time-course data, one measurement per row with the columns
+    'time' in seconds and 'value', and optionally 'well' and 'state'.
+    Args:
+        filename (str): Path of the CSV file.
+    Returns:
+        Dict[str, TimeSeries]: Time series by well, sorted by time. Without
+            a 'well' column, the only key is ''.
+    Raises:
+        ValueError: If a column is missing or a well measures several
+            states.
+    """
+    rows = {}
+    with open(filename, newline='') as file:
+        reader = csv.DictReader(file)
+        missing = {'time', 'value'} - set(reader.fieldnames or [])
+        if missing:
+            raise ValueError(
+                "Missing columns in %s: %s" % (filename, ", ".join(missing)))
+        for row in reader:
+            rows.setdefault(row.get('well', ''), []).append(row)
+    series = {}
+    for well, well_rows in rows.items():
+        states = {row.get('state') or None for row in well_rows}
+        if len(states) > 1:
+            raise ValueError("Several states measured in well %s" % well)
+        t = np.array([float(row['time']) for row in well_rows])
+        values = np.array([float(row['value']) for row in well_rows])
+        order = np.argsort(t, kind='stable')
+        series[well] = TimeSeries(t[order], values[order], states.pop())
+    return series
+
+
+class _Objective:
+    """Residuals of a model against a time series and their Jacobian, in
+    fitting coordinates: the logarithm of every parameter but the offset.
+
+    Residuals and Jacobian come from one solve of the sensitivity equations,
+    cached by parameter vector so least squares evaluating both, or
+    revisiting a point, does not solve again.
+    """
+
+    def __init__(self, model, series, names, y0, solver_kwargs):
+        self.model = model
+        self.series = series
+        self.names = tuple(names)
+        self.model_names = tuple(
+            name for name in names if name not in OBSERVATION_PARAMETERS)
+        self.log = np.array([name != "offset" for name in names])
+        self.y0 = y0
+        self.solver_kwargs = solver_kwargs
+        state = model.state_names[-1] if series.state is None else series.state
+        self.state_index = model.state_names.index(state)
+        # Integrate from 0 if the measurements start later
+        self.t = series.t if series.t[0] == 0 else np.concatenate(
+            [[0.0], series.t])
+        self.cache = OrderedDict()
+        self.num_solves = 0
+        self.cache_hits = 0
+
+    def to_parameters(self, x: np.ndarray) -> Dict[str, float]:
+        values = np.where(self.log, np.exp(x), x)
+        return dict(zip(self.names, values))
+
+    def to_x(self, parameters: Mapping[str, float]) -> np.ndarray:
+        values = np.array([parameters[name] for name in self.names])
+        return np.where(self.log, np.log(np.where(self.log, values, 1)),
+                        values)
+
+    def evaluate(self, x: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        key = x.tobytes()
+        if key in self.cache:
+            self.cache_hits += 1
+            self.cache.move_to_end(key)
+            return self.cache[key]
+        self.num_solves += 1
+        values = self.to_parameters(x)
+        scale = values.pop("scale", 1.0)
+        offset = values.pop("offset", 0.0)
+        result = sensitivities(
+            self.model, self.t, self.y0, values, self.model_names,
+            **self.solver_kwargs)
+        num_points = len(self.series.t)
+        y = result.y[-num_points:, self.state_index]
+        s = result.s[-num_points:, self.state_index]
+        residual = scale * y + offset - self.series.values
+        columns = {name: scale * s[:, k]
+                   for k, name in enumerate(self.model_names)}
+        columns["scale"] = y
+        columns["offset"] = np.ones(num_points)
+        jacobian = np.stack([columns[name] for name in self.names], axis=1)
+        # Chain rule for log coordinates
+        jacobian = jacobian * np.where(self.log, np.exp(x), 1.0)
+        self.cache[key] = residual, jacobian
+        if len(self.cache) > CACHE_SIZE:
+            self.cache.popitem(last=False)
+        return residual, jacobian
+
+    def residual(self, x: np.ndarray) -> np.ndarray:
+        return self.evaluate(x)[0]
+
+    def jacobian(self, x: np.ndarray) -> np.ndarray:
+        return self.evaluate(x)[1]
+
+
+def _fit_start(args) -> StartResult:
+    """Run one start of a fit, in a worker process."""
+    model, series, names, y0, solver_kwargs, x0, lower, upper, kwargs = args
+    start = time.perf_counter()
+    objective = _Objective(model, series, names, y0, solver_kwargs)
+    try:
+        result = least_squares(
+            objective.residual, x0, jac=objective.jacobian,
+            bounds=(lower, upper), **kwargs)
+        x, cost, success = result.x, float(result.cost), bool(result.success)
+    except ValueError:
+        # The model could not be solved, e.g. for extreme parameters
+        x, cost, success = x0, np.inf, False
+    return StartResult(
+        x0=x0,
+        x=x,
+        cost=cost,
+        success=success,
+        num_solves=objective.num_solves,
+        cache_hits=objective.cache_hits,
+        seconds=time.perf_counter() - start
+    )
+
+
+def get_default_fit_bounds(
+    model: CircuitModel,
+    names: Sequence[str]
+) -> Dict[str, Tuple[float, float]]:
+    """Get fitting bounds around the parameter values of a model, from each
+    value divided by FIT_RANGE to it multiplied by FIT_RANGE. The scale is
+    bounded to (1e-6, 1e12) and the offset is unbounded.
+    Args:
+        model (CircuitModel): Model.
+        names (Sequence[str]): Fitted parameters.
+    Returns:
+        Dict[str, Tuple[float, float]]: Bounds of each parameter.
+    """
+    bounds = {}
+    for name in names:
+        if name == "scale":
+            bounds[name] = (1e-6, 1e12)
+        elif name == "offset":
+            bounds[name] = (-np.inf, np.inf)
+        else:
+            value = model.parameters[name]
+            bounds[name] = (value / FIT_RANGE, value * FIT_RANGE)
+    return bounds
+
+
+def fit_plate(
+    model: CircuitModel,
+    data: Mapping[str, TimeSeries],
+    names: Sequence[str],
+    bounds: Mapping[str, Tuple[float, float]] = None,
+    num_starts: int = 8,
+    y0: ArrayLike = None,
+    seed: int = None,
+    processes: int = 1,
+    solver_kwargs: Mapping[str, object] = None,
+    **least_squares_kwargs
+) -> Dict[str, FitResult]:
+    """Fit a model to the time series of several wells, independently, by
+    multi-start least squares.
+
+    Parameters are fitted on a log scale, except the offset. Starts are
+    spread over the bounds by a scrambled Halton sequence, the first one at
+    the model's values. The starts of all wells are run in a process pool.
+    Args:
+        model (CircuitModel): Model, whose values are the first start.
+        data (Mapping[str, TimeSeries]): Time series by well, e.g. from
+            read_csv.
+        names (Sequence[str]): Fitted parameters of the model, and "scale"
+            and "offset" to fit the measurement as scale * state + offset.
+            The scale starts at 1 and the offset at 0.
+        bounds (Mapping[str, Tuple[float, float]]): Lower and upper bound of
+            each fitted parameter. (default: get_default_fit_bounds)
+        num_starts (int): Number of starts per well. (default: 8)
+        y0 (ArrayLike): Initial values. (default: initial conditions of the
+            model)
+        seed (int): Seed of the starting points. (default: None)
+        processes (int): Number of worker processes. (default: 1)
+        solver_kwargs (Mapping[str, object]): Passed on to odeint.
+            (default: None)
+        **least_squares_kwargs: Passed on to scipy.optimize.least_squares.
+    Returns:
+        Dict[str, FitResult]: Fit of each well.
+    Raises:
+        ValueError: If a name is not a parameter of the model, or a bound
+            or starting value is invalid.
+    """
+    names = tuple(names)
+    model.get_parameters({
+        name: 0.0 for name in names if name not in OBSERVATION_PARAMETERS})
+    bounds = dict(get_default_fit_bounds(model, names), **(bounds or {}))
+    objective = _Objective(
+        model, TimeSeries(np.zeros(1), np.zeros(1)), names, y0, {})
+    initial = dict(model.parameters, scale=1.0, offset=0.0)
+    with np.errstate(divide='ignore'):
+        lower = objective.to_x({name: bounds[name][0] for name in names})
+        upper = objective.to_x({name: bounds[name][1] for name in names})
+        x_initial = objective.to_x(initial)
+    if np.any(np.isnan(lower) | np.isnan(upper)) or np.any(lower >= upper):
+        raise ValueError("Invalid fitting bounds: %s" % bounds)
+    if np.any((x_initial < lower) | (x_initial > upper)):
+        raise ValueError("Model parameters outside the fitting bounds")
+    # Starts within the finite bounds, or around the model's values
+    low = np.where(np.isfinite(lower), lower, x_initial - 1)
+    high = np.where(np.isfinite(upper), upper, x_initial + 1)
+    u = qmc.Halton(d=len(names), scramble=True, seed=seed).random(
+        max(num_starts - 1, 1))
+    starts = np.concatenate([[x_initial], low + u * (high - low)])
+    starts = starts[:max(num_starts, 1)]
+    least_squares_kwargs.setdefault("x_scale", "jac")
+    tasks = [
+        (model, series, names, y0, dict(solver_kwargs or {}), x0, lower,
+         upper, least_squares_kwargs)
+        for series in data.values() for x0 in starts]
+    if processes > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(
+                max_workers=min(processes, len(tasks))) as executor:
+            results = list(executor.map(_fit_start, tasks))
+    else:
+        results = [_fit_start(task) for task in tasks]
+    fits = {}
+    for k, well in enumerate(data):
+        well_starts = results[k * len(starts):(k + 1) * len(starts)]
+        best = min(well_starts, key=lambda start: start.cost)
+        fits[well] = FitResult(
+            parameters=objective.to_parameters(best.x),
+            cost=best.cost,
+            success=best.success,
+            starts=well_starts,
+            seconds=sum(start.seconds for start in well_starts)
+        )
+    return fits
+
+
+def fit(
+    model: CircuitModel,
+    series: TimeSeries,
+    names: Sequence[str],
+    **kwargs
+) -> FitResult:
+    """Fit a model to one time series by multi-start least squares.
+    Args:
+        model (CircuitModel): Model, whose values are the first start.
+        series (TimeSeries): Measurements.
+        names (Sequence[str]): Fitted parameters, see fit_plate.
+        **kwargs: Passed on to fit_plate.
+    Returns:
+        FitResult: Fit of the time series.
+    """
+    return fit_plate(model, {'': series}, names, **kwargs)['']
@@ -0,0 +1,552 @@
+#Base class of the gene circuit models, following the structure of
+#CCh_Foundation.py: constants, ODEs, solving.
+
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from scipy.integrate import odeint, solve_ivp
+
+ArrayLike = Union[float, Sequence[float], np.ndarray]
+
+#Methods of scipy.integrate.solve_ivp that use the Jacobian
+IMPLICIT_METHODS = ("BDF", "Radau", "LSODA")
+#Default rtol and atol of odeint
+ODEINT_TOLERANCE = 1.49012e-8
+#Output modes of CircuitModel.solve
+OUTPUT_MODES = ("grid", "adaptive", "dense", "events")
+
+
+@dataclass
+class Solution:
+    """Time course of a model.
+    Attributes:
+        t (np.ndarray): Time points, shape (time points,).
+        y (np.ndarray): Concentrations, shape (time points, states).
+        state_names (Tuple[str, ...]): Names of the states (columns of y).
+        t_events (Dict[str, np.ndarray]): Times of each event, by event
+            name. (default: {})
+        y_events (Dict[str, np.ndarray]): States at each event, by event
+            name, shape (events, states). (default: {})
+        interpolant (Callable): Continuous solution of the solver, evaluated
+            by calling the Solution. (default: None)
+    """
+    t: np.ndarray
+    y: np.ndarray
+    state_names: Tuple[str, ...]
+    t_events: Dict[str, np.ndarray] = field(default_factory=dict)
+    y_events: Dict[str, np.ndarray] = field(default_factory=dict)
+    interpolant: Optional[Callable] = None
+
+    def __getitem__(self, state: str) -> np.ndarray:
+        """Get the time course of a state by name, e.g. solution['Protein'].
+        """
+        return self.y[..., self.state_names.index(state)]
+
+    def __call__(self, t: ArrayLike) -> np.ndarray:
+        """Evaluate the dense output of the solver at any time in the
+        integration interval, e.g. solution(np.linspace(0, 3600, 50)).
+        Args:
+            t (ArrayLike): Time or time points.
+        Returns:
+            np.ndarray: States, shape (states,) or (time points, states).
+        Raises:
+            ValueError: If the model was not solved with dense output.
+        """
+        if self.interpolant is None:
+            raise ValueError(
+                "Solution has no dense output, solve with output='dense'")
+        return np.asarray(self.interpolant(t)).T
+
+    def as_dict(self) -> Dict[str, np.ndarray]:
+        """Get the time course of every state, keyed by state name."""
+        return {name: self[name] for name in self.state_names}
+
+
+class CircuitModel:
+    """Parameterised ODE model of a gene circuit.
+
+    Subclasses set the class attributes below and implement
+    `_propensities`, the rate of each reaction, `_jacobian` and
+    `_parameter_derivatives`, used for sensitivity analysis. The
+    equivalent of `ODEs(variables, t)` in the CCh_* scripts, `_rhs`, is
+    derived from the reactions, which also drive the stochastic simulation.
+
+    Attributes:
+        state_names (Tuple[str, ...]): Names of the states, in the order of
+            the state vector.
+        reaction_names (Tuple[str, ...]): Names of the reactions.
+        stoichiometry (Tuple[Tuple[int, ...], ...]): Change of each state
+            (columns) by each reaction (rows).
+        default_parameters (Dict[str, float]): Parameters and their default
+            values.
+        default_initial_conditions (Tuple[float, ...]): Initial value of each
+            state.
+        t_end (float): Final time of the default time course, in seconds.
+        num_points (int): Number of time points of the default time course.
+    """
+    state_names: Tuple[str, ...] = ()
+    reaction_names: Tuple[str, ...] = ()
+    stoichiometry: Tuple[Tuple[int, ...], ...] = ()
+    default_parameters: Dict[str, float] = {}
+    default_initial_conditions: Tuple[float, ...] = ()
+    t_end: float = 36000
+    num_points: int = 100000
+
+    def __init__(self, **parameters: ArrayLike):
+        """Create a model, overriding default parameter values by keyword,
+        e.g. Repressilator(n1=3).
+        Raises:
+            ValueError: If a parameter is not a parameter of the model.
+        """
+        self.parameters = dict(self.default_parameters)
+        self.set_parameters(**parameters)
+
+    def __repr__(self) -> str:
+        params = ", ".join(
+            "%s=%r" % (name, value) for name, value in self.parameters.items())
+        return "%s(%s)" % (type(self).__name__, params)
+
+    @property
+    def parameter_names(self) -> Tuple[str, ...]:
+        """Names of the parameters of the model."""
+        return tuple(self.default_parameters)
+
+    @property
+    def num_states(self) -> int:
+        """Number of states of the model."""
+        return len(self.state_names)
+
+    @property
+    def num_reactions(self) -> int:
+        """Number of reactions of the model."""
+        return len(self.reaction_names)
+
+    def set_parameters(self, **parameters: ArrayLike):
+        """Set parameter values by keyword.
+        Raises:
+            ValueError: If a parameter is not a parameter of the model.
+        """
+        for name, value in parameters.items():
+            if name not in self.default_parameters:
+                raise ValueError("Invalid parameter for %s: %s"
+                                 % (type(self).__name__, name))
+            self.parameters[name] = value
+
+    def get_parameters(
+        self,
+        parameters: Mapping[str, ArrayLike] = None
+    ) -> Dict[str, ArrayLike]:
+        """Get the parameters of the model, overridden by `parameters`.
+        Args:
+            parameters (Mapping[str, ArrayLike]): Parameter values to use
+                instead of the model's. (default: None)
+        Returns:
+            Dict[str, ArrayLike]: Value of every parameter.
+        Raises:
+            ValueError: If a parameter is not a parameter of the model.
+        """
+        if not parameters:
+            return self.parameters
+        params = dict(self.parameters)
+        for name, value in parameters.items():
+            if name not in params:
+                raise ValueError("Invalid parameter for %s: %s"
+                                 % (type(self).__name__, name))
+            params[name] = value
+        return params
+
+    def time_points(self, t_end: float = None, num_points: int = None
+                    ) -> np.ndarray:
+        """Get evenly spaced time points from 0 to `t_end`, as in the
+        CCh_* scripts.
+        Args:
+            t_end (float): Final time. (default: `self.t_end`)
+            num_points (int): Number of time points.
+                (default: `self.num_points`)
+        Returns:
+            np.ndarray: Time points.
+        """
+        t_end = self.t_end if t_end is None else t_end
+        num_points = self.num_points if num_points is None else num_points
+        return np.linspace(0, t_end, num_points)
+
+    def initial_conditions(self, y0: ArrayLike = None) -> np.ndarray:
+        """Get the initial state vector.
+        Args:
+            y0 (ArrayLike): Initial values, shape (..., states).
+                (default: `self.default_initial_conditions`)
+        Returns:
+            np.ndarray: Initial values as floats.
+        Raises:
+            ValueError: If `y0` does not have one value per state.
+        """
+        y0 = self.default_initial_conditions if y0 is None else y0
+        y0 = np.asarray(y0, dtype=float)
+        if y0.shape[-1:] != (self.num_states,):
+            raise ValueError(
+                "Expected %d initial values (%s), got shape %s"
+                % (self.num_states, ", ".join(self.state_names), y0.shape))
+        return y0
+
+    def rhs(
+        self,
+        t: float,
+        y: ArrayLike,
+        parameters: Mapping[str, ArrayLike] = None
+    ) -> np.ndarray:
+        """Evaluate the right-hand side dy/dt of the model.
+
+        Vectorised: `y` may have any number of leading axes, e.g. shape
+        (N, states) for N systems, and parameter values may be arrays that
+        broadcast against `y[..., 0]`.
+        Args:
+            t (float): Time.
+            y (ArrayLike): States, shape (..., states).
+            parameters (Mapping[str, ArrayLike]): Parameter values to use
+                instead of the model's. (default: None)
+        Returns:
+            np.ndarray: Derivatives, with the broadcast shape of `y` and the
+                parameters.
+        """
+        y = np.asarray(y, dtype=float)
+        derivatives = self._rhs(
+            t, np.moveaxis(y, -1, 0), self.get_parameters(parameters))
+        return np.stack(np.broadcast_arrays(*derivatives), axis=-1)
+
+    def _rhs(
+        self,
+        t: float,
+        y: np.ndarray,
+        p: Mapping[str, ArrayLike]
+    ) -> Sequence[np.ndarray]:
+        """Derivatives of the states, the sum of the reaction rates weighted
+        by the stoichiometry.
+        Args:
+            t (float): Time.
+            y (np.ndarray): States, shape (states, ...), so that `y[0]` is
+                the first state of every system.
+            p (Mapping[str, ArrayLike]): Parameter values.
+        Returns:
+            Sequence[np.ndarray]: Derivative of each state, in the order of
+                `state_names`.
+        """
+        rates = self._propensities(t, y, p)
+        derivatives = []
+        for i in range(self.num_states):
+            derivative = 0.0
+            for rate, change in zip(rates, self.stoichiometry):
+                if change[i]:
+                    derivative = derivative + change[i] * rate
+            derivatives.append(derivative)
+        return derivatives
+
+    def propensities(
+        self,
+        t: float,
+        y: ArrayLike,
+        parameters: Mapping[str, ArrayLike] = None
+    ) -> np.ndarray:
+        """Evaluate the rate of each reaction, in concentration per second.
+
+        Vectorised like `rhs`.
+        Args:
+            t (float): Time.
+            y (ArrayLike): States, shape (..., states).
+            parameters (Mapping[str, ArrayLike]): Parameter values to use
+                instead of the model's. (default: None)
+        Returns:
+            np.ndarray: Reaction rates, shape (..., reactions).
+        """
+        y = np.asarray(y, dtype=float)
+        rates = self._propensities(
+            t, np.moveaxis(y, -1, 0), self.get_parameters(parameters))
+        return np.stack(np.broadcast_arrays(y[..., 0], *rates)[1:], axis=-1)
+
+    def _propensities(
+        self,
+        t: float,
+        y: np.ndarray,
+        p: Mapping[str, ArrayLike]
+    ) -> Sequence[np.ndarray]:
+        """Rates of the reactions.
+        Args:
+            t (float): Time.
+            y (np.ndarray): States, shape (states, ...).
+            p (Mapping[str, ArrayLike]): Parameter values.
+        Returns:
+            Sequence[np.ndarray]: Rate of each reaction, in the order of
+                `reaction_names`.
+        """
+        raise NotImplementedError
+
+    def jacobian(
+        self,
+        t: float,
+        y: ArrayLike,
+        parameters: Mapping[str, ArrayLike] = None
+    ) -> np.ndarray:
+        """Evaluate the analytic Jacobian d(dy/dt)/dy of the model.
+
+        Vectorised like `rhs`.
+        Args:
+            t (float): Time.
+            y (ArrayLike): States, shape (..., states).
+            parameters (Mapping[str, ArrayLike]): Parameter values to use
+                instead of the model's. (default: None)
+        Returns:
+            np.ndarray: Jacobian, shape (..., states, states), where
+                [..., i, j] is the derivative of dy_i/dt by y_j.
+        """
+        y = np.asarray(y, dtype=float)
+        entries = self._jacobian(
+            t, np.moveaxis(y, -1, 0), self.get_parameters(parameters))
+        values = np.broadcast_arrays(y[..., 0], *entries.values())
+        jac = np.zeros(values[0].shape + (self.num_states, self.num_states))
+        for (i, j), value in zip(entries, values[1:]):
+            jac[..., i, j] = value
+        return jac
+
+    def _jacobian(
+        self,
+        t: float,
+        y: np.ndarray,
+        p: Mapping[str, ArrayLike]
+    ) -> Dict[Tuple[int, int], ArrayLike]:
+        """Non-zero entries of the Jacobian.
+        Args:
+            t (float): Time.
+            y (np.ndarray): States, shape (states, ...).
+            p (Mapping[str, ArrayLike]): Parameter values.
+        Returns:
+            Dict[Tuple[int, int], ArrayLike]: Derivative of dy_i/dt by y_j,
+                keyed by (i, j). Entries left out are zero everywhere.
+        """
+        raise NotImplementedError
+
+    def parameter_jacobian(
+        self,
+        t: float,
+        y: ArrayLike,
+        parameters: Mapping[str, ArrayLike] = None,
+        names: Sequence[str] = None
+    ) -> np.ndarray:
+        """Evaluate the analytic derivatives d(dy/dt)/dp of the model by its
+        parameters.
+
+        Vectorised like `rhs`.
+        Args:
+            t (float): Time.
+            y (ArrayLike): States, shape (..., states).
+            parameters (Mapping[str, ArrayLike]): Parameter values to use
+                instead of the model's. (default: None)
+            names (Sequence[str]): Parameters to differentiate by.
+                (default: `self.parameter_names`)
+        Returns:
+            np.ndarray: Derivatives, shape (..., states, parameters), where
+                [..., i, k] is the derivative of dy_i/dt by parameter k.
+        Raises:
+            ValueError: If a name is not a parameter of the model.
+        """
+        names = self.parameter_names if names is None else tuple(names)
+        for name in names:
+            if name not in self.default_parameters:
+                raise ValueError("Invalid parameter for %s: %s"
+                                 % (type(self).__name__, name))
+        index = {name: k for k, name in enumerate(names)}
+        y = np.asarray(y, dtype=float)
+        entries = self._parameter_derivatives(
+            t, np.moveaxis(y, -1, 0), self.get_parameters(parameters))
+        entries = {key: value for key, value in entries.items()
+                   if key[1] in index}
+        values = np.broadcast_arrays(y[..., 0], *entries.values())
+        jac = np.zeros(values[0].shape + (self.num_states, len(names)))
+        for (reaction, name), value in zip(entries, values[1:]):
+            for i, change in enumerate(self.stoichiometry[reaction]):
+                if change:
+                    jac[..., i, index[name]] += change * value
+        return jac
+
+    def _parameter_derivatives(
+        self,
+        t: float,
+        y: np.ndarray,
+        p: Mapping[str, ArrayLike]
+    ) -> Dict[Tuple[int, str], ArrayLike]:
+        """Non-zero derivatives of the reaction rates by the parameters.
+        Args:
+            t (float): Time.
+            y (np.ndarray): States, shape (states, ...).
+            p (Mapping[str, ArrayLike]): Parameter values.
+        Returns:
+            Dict[Tuple[int, str], ArrayLike]: Derivative of the rate of
+                reaction r by parameter name, keyed by (r, name). Entries
+                left out are zero everywhere.
+        """
+        raise NotImplementedError
+
+    def jacobian_sparsity(self) -> np.ndarray:
+        """Get the sparsity pattern of the Jacobian.
+        Returns:
+            np.ndarray: Boolean array of shape (states, states), True where
+                the Jacobian can be non-zero.
+        """
+        entries = self._jacobian(
+            0.0, self.initial_conditions(), self.parameters)
+        sparsity = np.zeros((self.num_states, self.num_states), dtype=bool)
+        for i, j in entries:
+            sparsity[i, j] = True
+        return sparsity
+
+    def solve(
+        self,
+        t: ArrayLike = None,
+        y0: ArrayLike = None,
+        parameters: Mapping[str, ArrayLike] = None,
+        method: str = "odeint",
+        jac: bool = True,
+        output: str = "grid",
+        events: Mapping[str, Callable] = None,
+        backend: str = "numpy",
+        **solver_kwargs
+    ) -> Solution:
+        """Integrate the model, without plotting.
+
+        Output modes:
+            "grid": the states at the time points `t`, as in the CCh_*
+                scripts.
+            "adaptive": the states at the solver's own steps, so the number
+                of points follows the complexity of the solution.
+            "dense": as "adaptive", plus an interpolant evaluated on demand
+                by calling the solution, e.g. solution(t).
+            "events": only the states at the `events`.
+        Only "grid" without events can use odeint. Otherwise "odeint" uses
+        the same LSODA integrator through solve_ivp.
+        Args:
+            t (ArrayLike): Time points for "grid", otherwise only the first
+                and last are used. (default: `self.time_points()`, or 0 to
+                `self.t_end`)
+            y0 (ArrayLike): Initial values, one per state.
+                (default: `self.default_initial_conditions`)
+            parameters (Mapping[str, ArrayLike]): Parameter values to use
+                instead of the model's. (default: None)
+            method (str): "odeint", or a method of scipy.integrate.solve_ivp
+                such as "BDF", "Radau" or "LSODA" for stiff problems.
+                (default: "odeint")
+            jac (bool): If True, the solver uses the analytic Jacobian.
+                Otherwise it uses finite differences, grouped by the
+                Jacobian's sparsity pattern for BDF and Radau.
+                (default: True)
+            output (str): Output mode, see above. (default: "grid")
+            events (Mapping[str, Callable]): Events to locate, by name.
+                Each is called as event(t, y, parameters) and the event
+                happens where it crosses zero, see circuit_models.events.
+                (default: None)
+            backend (str): "numpy" for the vectorised `rhs` and `jacobian`,
+                or "numba" or "python" for code generated from the model,
+                see circuit_models.compiled. (default: "numpy")
+            **solver_kwargs: Passed on to the solver, e.g. rtol and atol.
+                solve_ivp methods default to odeint's rtol, and its atol
+                scaled by the smallest nonzero initial value.
+        Returns:
+            Solution: Time course of the model.
+        Raises:
+            ValueError: If `output` or `backend` is invalid, or the solver
+                fails.
+        """
+        if output not in OUTPUT_MODES:
+            raise ValueError("Invalid output mode: %s" % output)
+        if output == "events" and not events:
+            raise ValueError("Output mode 'events' requires events")
+        if t is not None:
+            t = np.asarray(t, dtype=float)
+        elif output == "grid":
+            t = self.time_points()
+        else:
+            t = np.array([0.0, self.t_end])
+        params = self.get_parameters(parameters)
+        y0 = self.initial_conditions(y0)
+        # Imported here, as circuit_models.compiled builds on this module
+        from circuit_models.compiled import get_functions
+        rhs, jacobian = get_functions(self, params, backend)
+        if method == "odeint":
+            if output == "grid" and not events:
+                if jac:
+                    solver_kwargs.setdefault(
+                        "Dfun", lambda y, t: jacobian(t, y))
+                y = odeint(
+                    lambda y, t: rhs(t, y),
+                    y0,
+                    t,
+                    **solver_kwargs
+                )
+                return Solution(t=t, y=y, state_names=self.state_names)
+            method = "LSODA"
+        if method in IMPLICIT_METHODS:
+            if jac:
+                solver_kwargs.setdefault("jac", jacobian)
+            elif method != "LSODA":
+                solver_kwargs.setdefault(
+                    "jac_sparsity", self.jacobian_sparsity())
+        #solve_ivp's default atol of 1e-6 is above the small concentrations
+        #of e.g. AutoActivation, so use odeint's tolerance relative to the
+        #smallest nonzero initial value
+        nonzero = np.abs(y0[y0 != 0])
+        solver_kwargs.setdefault("rtol", ODEINT_TOLERANCE)
+        solver_kwargs.setdefault(
+            "atol", ODEINT_TOLERANCE * (nonzero.min() if nonzero.size else 1))
+        events = dict(events or {})
+        result = solve_ivp(
+            rhs,
+            (t[0], t[-1]),
+            y0,
+            method=method,
+            t_eval=t if output == "grid" else None,
+            dense_output=output == "dense",
+            events=[_bind_event(event, params) for event in events.values()]
+            or None,
+            **solver_kwargs
+        )
+        if not result.success:
+            raise ValueError(
+                "%s failed to solve %s: %s"
+                % (method, type(self).__name__, result.message))
+        t_events = dict(zip(events, result.t_events or []))
+        y_events = {
+            name: y.reshape(-1, self.num_states)
+            for name, y in zip(events, result.y_events or [])}
+        if output == "events":
+            times = np.concatenate(list(t_events.values()))
+            states = np.concatenate(list(y_events.values()))
+            order = np.argsort(times, kind="stable")
+            return Solution(
+                t=times[order], y=states[order], state_names=self.state_names,
+                t_events=t_events, y_events=y_events)
+        return Solution(
+            t=result.t,
+            y=result.y.T,
+            state_names=self.state_names,
+            t_events=t_events,
+            y_events=y_events,
+            interpolant=result.sol
+        )
+
+
+def _bind_event(
+    event: Callable,
+    parameters: Mapping[str, ArrayLike]
+) -> Callable:
+    """Bind the parameters of a solve to an event for solve_ivp, keeping
+    its `terminal` and `direction` attributes.
+    Args:
+        event (Callable): Event, called as event(t, y, parameters).
+        parameters (Mapping[str, ArrayLike]): Parameter values.
+    Returns:
+        Callable: Event called as event(t, y).
+    """
+    def _event(t, y):
+        return event(t, y, parameters)
+
+    _event.terminal = getattr(event, "terminal", False)
+    _event.direction = getattr(event, "direction", 0)
+    return _event
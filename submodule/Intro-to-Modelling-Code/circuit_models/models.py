@@ -0,0 +1,350 @@
+#Gene circuit models of the CCh_* scripts, with the scripts' constants as
+#default parameters.
+
+from typing import Mapping
+
+import numpy as np
+from scipy.special import xlogy
+
+from circuit_models.model import ArrayLike, CircuitModel
+
+
+class BasicGeneExpression(CircuitModel):
+    """Constitutive transcription and translation (CCh_BasicGeneExpression.py).
+    Parameters:
+        ktx: M/s transcription constant
+        delta_mRNA: /s degradation constant of mRNA
+        ktl: /s translation constant
+        delta_Protein: /s degradation constant of Protein
+    """
+    state_names = ("mRNA", "Protein")
+    reaction_names = (
+        "transcription", "mRNA degradation",
+        "translation", "Protein degradation")
+    stoichiometry = ((1, 0), (-1, 0), (0, 1), (0, -1))
+    default_parameters = {
+        "ktx": 1e-3,
+        "delta_mRNA": 1e-3,
+        "ktl": 2e-3,
+        "delta_Protein": 1e-3,
+    }
+    default_initial_conditions = (0.0, 0.0)
+    t_end = 36000 / 4
+
+    def _propensities(self, t, y, p):
+        mRNA, Protein = y
+        return (
+            p["ktx"],
+            p["delta_mRNA"] * mRNA,
+            p["ktl"] * mRNA,
+            p["delta_Protein"] * Protein,
+        )
+
+    def _jacobian(self, t, y, p):
+        return {
+            (0, 0): -p["delta_mRNA"],
+            (1, 0): p["ktl"],
+            (1, 1): -p["delta_Protein"],
+        }
+
+    def _parameter_derivatives(self, t, y, p):
+        mRNA, Protein = y
+        return {
+            (0, "ktx"): 1.0,
+            (1, "delta_mRNA"): mRNA,
+            (2, "ktl"): mRNA,
+            (3, "delta_Protein"): Protein,
+        }
+
+
+class AutoActivation(CircuitModel):
+    """Protein activating its own transcription (CCh_Auto-activation.py).
+    Parameters:
+        ktx: M/s transcription constant
+        kd: M dissociation constant
+        delta_mRNA: /s degradation constant of mRNA
+        n: Hill coefficient
+        ktl: /s translation constant
+        delta_Protein: /s degradation constant of Protein
+    """
+    state_names = ("mRNA", "Protein")
+    reaction_names = (
+        "transcription", "mRNA degradation",
+        "translation", "Protein degradation")
+    stoichiometry = ((1, 0), (-1, 0), (0, 1), (0, -1))
+    default_parameters = {
+        "ktx": 1e-3,
+        "kd": 1e-8,
+        "delta_mRNA": 1e-3,
+        "n": 2,
+        "ktl": 5e-3,
+        "delta_Protein": 1e-3,
+    }
+    default_initial_conditions = (0.0, 1e-7)
+    t_end = 3600 * 2
+
+    def _propensities(self, t, y, p):
+        mRNA, Protein = y
+        activation = Protein**p["n"] / (p["kd"] + Protein**p["n"])
+        return (
+            p["ktx"] * activation,
+            p["delta_mRNA"] * mRNA,
+            p["ktl"] * mRNA,
+            p["delta_Protein"] * Protein,
+        )
+
+    def _jacobian(self, t, y, p):
+        mRNA, Protein = y
+        dactivation = (p["n"] * Protein**(p["n"] - 1) * p["kd"]
+                       / (p["kd"] + Protein**p["n"])**2)
+        return {
+            (0, 0): -p["delta_mRNA"],
+            (0, 1): p["ktx"] * dactivation,
+            (1, 0): p["ktl"],
+            (1, 1): -p["delta_Protein"],
+        }
+
+    def _parameter_derivatives(self, t, y, p):
+        mRNA, Protein = y
+        Protein_n = Protein**p["n"]
+        activation = Protein_n / (p["kd"] + Protein_n)
+        dactivation_dkd = -Protein_n / (p["kd"] + Protein_n)**2
+        dactivation_dn = (p["kd"] * xlogy(Protein_n, Protein)
+                          / (p["kd"] + Protein_n)**2)
+        return {
+            (0, "ktx"): activation,
+            (0, "kd"): p["ktx"] * dactivation_dkd,
+            (0, "n"): p["ktx"] * dactivation_dn,
+            (1, "delta_mRNA"): mRNA,
+            (2, "ktl"): mRNA,
+            (3, "delta_Protein"): Protein,
+        }
+
+
+class AutoInhibition(CircuitModel):
+    """Protein repressing its own transcription (CCh_Auto-Inhibition.py).
+    Parameters:
+        ktx: M/s transcription constant
+        kd: M dissociation constant
+        delta_mRNA: /s degradation constant of mRNA
+        n: Hill coefficient
+        ktl: /s translation constant
+        delta_Protein: /s degradation constant of Protein
+    """
+    state_names = ("mRNA", "Protein")
+    reaction_names = (
+        "transcription", "mRNA degradation",
+        "translation", "Protein degradation")
+    stoichiometry = ((1, 0), (-1, 0), (0, 1), (0, -1))
+    default_parameters = {
+        "ktx": 1e-3,
+        "kd": 1e-8,
+        "delta_mRNA": 1e-3,
+        "n": 1,
+        "ktl": 2e-3,
+        "delta_Protein": 1e-3,
+    }
+    default_initial_conditions = (0.0, 1e-4)
+    t_end = 3600 * 2
+
+    def _propensities(self, t, y, p):
+        mRNA, Protein = y
+        activation = Protein**p["n"] / (p["kd"] + Protein**p["n"])
+        return (
+            p["ktx"] * (1 - activation),
+            p["delta_mRNA"] * mRNA,
+            p["ktl"] * mRNA,
+            p["delta_Protein"] * Protein,
+        )
+
+    def _jacobian(self, t, y, p):
+        mRNA, Protein = y
+        dactivation = (p["n"] * Protein**(p["n"] - 1) * p["kd"]
+                       / (p["kd"] + Protein**p["n"])**2)
+        return {
+            (0, 0): -p["delta_mRNA"],
+            (0, 1): -p["ktx"] * dactivation,
+            (1, 0): p["ktl"],
+            (1, 1): -p["delta_Protein"],
+        }
+
+    def _parameter_derivatives(self, t, y, p):
+        mRNA, Protein = y
+        Protein_n = Protein**p["n"]
+        activation = Protein_n / (p["kd"] + Protein_n)
+        dactivation_dkd = -Protein_n / (p["kd"] + Protein_n)**2
+        dactivation_dn = (p["kd"] * xlogy(Protein_n, Protein)
+                          / (p["kd"] + Protein_n)**2)
+        return {
+            (0, "ktx"): 1 - activation,
+            (0, "kd"): -p["ktx"] * dactivation_dkd,
+            (0, "n"): -p["ktx"] * dactivation_dn,
+            (1, "delta_mRNA"): mRNA,
+            (2, "ktl"): mRNA,
+            (3, "delta_Protein"): Protein,
+        }
+
+
+class Binding(CircuitModel):
+    """Binding of a ligand B to A, forming the complex C (CCh_Binding.py).
+    Parameters:
+        ka: /s/M association rate constant
+        kd: /s dissociation rate constant
+        n: Hill coefficient
+    """
+    state_names = ("A", "B", "C")
+    reaction_names = ("binding", "unbinding")
+    stoichiometry = ((-1, -1, 1), (1, 1, -1))
+    default_parameters = {
+        "ka": 0.005,
+        "kd": 0.00001,
+        "n": 1,
+    }
+    default_initial_conditions = (1.0, 5.0, 0.0)
+    t_end = 100
+
+    def _propensities(self, t, y, p):
+        A, B, C = y
+        return p["ka"] * A * B**p["n"], p["kd"] * C
+
+    def _jacobian(self, t, y, p):
+        A, B, C = y
+        dDE = (p["ka"] * B**p["n"],
+               p["ka"] * A * p["n"] * B**(p["n"] - 1),
+               -p["kd"])
+        jac = {}
+        for j, value in enumerate(dDE):
+            jac[0, j] = -value
+            jac[1, j] = -value
+            jac[2, j] = value
+        return jac
+
+    def _parameter_derivatives(self, t, y, p):
+        A, B, C = y
+        B_n = B**p["n"]
+        return {
+            (0, "ka"): A * B_n,
+            (0, "n"): p["ka"] * A * xlogy(B_n, B),
+            (1, "kd"): C,
+        }
+
+    def hill_approximation(
+        self,
+        A_0: ArrayLike = None,
+        B_0: ArrayLike = None,
+        parameters: Mapping[str, ArrayLike] = None
+    ) -> np.ndarray:
+        """Hill equation approximation of the bound concentration at
+        equilibrium (`Hill` in CCh_Binding.py). The unbound concentration
+        (`Hill2`) is `A_0` minus this.
+        Args:
+            A_0 (ArrayLike): Initial A concentration.
+                (default: initial condition of the model)
+            B_0 (ArrayLike): Initial B concentration.
+                (default: initial condition of the model)
+            parameters (Mapping[str, ArrayLike]): Parameter values to use
+                instead of the model's. (default: None)
+        Returns:
+            np.ndarray: Bound concentration.
+        """
+        p = self.get_parameters(parameters)
+        A_0 = self.default_initial_conditions[0] if A_0 is None else A_0
+        B_0 = self.default_initial_conditions[1] if B_0 is None else B_0
+        Kd = p["kd"] / p["ka"]
+        B_n = np.asarray(B_0, dtype=float)**p["n"]
+        return A_0 * (B_n / (Kd + B_n))
+
+
+class Repressilator(CircuitModel):
+    """Three genes repressing each other in a ring (CCh_Repressilator.py).
+    Gene i is repressed by the protein of the previous gene.
+    Parameters (i = 1, 2, 3):
+        ai: M/s transcription constant
+        a0i: M/s leaky transcription constant
+        Kdi: dissociation constant
+        delta_mRNAi: /s degradation constant of mRNA
+        ni: Hill coefficient
+        ktli: /s translation constant
+        delta_Proteini: /s degradation constant of Protein
+    """
+    state_names = (
+        "mRNA1", "Protein1", "mRNA2", "Protein2", "mRNA3", "Protein3")
+    reaction_names = tuple(
+        name % i
+        for i in (1, 2, 3)
+        for name in ("transcription%d", "mRNA%d degradation",
+                     "translation%d", "Protein%d degradation"))
+    stoichiometry = tuple(
+        tuple(change if k == state else 0 for k in range(6))
+        for gene in range(3)
+        for state, change in [(2 * gene, 1), (2 * gene, -1),
+                              (2 * gene + 1, 1), (2 * gene + 1, -1)])
+    default_parameters = {
+        name % i: value
+        for i in (1, 2, 3)
+        for name, value in [
+            ("a%d", 1e-3),
+            ("a0%d", 1e-6),
+            ("Kd%d", 1e-6),
+            ("delta_mRNA%d", 1e-3),
+            ("n%d", 2),
+            ("ktl%d", 0.002),
+            ("delta_Protein%d", 1e-3),
+        ]
+    }
+    default_initial_conditions = (0.1, 0.2, 0.0, 0.0, 0.0, 0.0)
+    t_end = 36000
+
+    def _propensities(self, t, y, p):
+        rates = []
+        # Gene i with the index of its repressor, Protein3, Protein1, Protein2
+        for i, repressor_index in zip((1, 2, 3), (5, 1, 3)):
+            mRNA = y[2 * i - 2]
+            Protein = y[2 * i - 1]
+            repressor = y[repressor_index]
+            rates.extend([
+                p["a%d" % i] / (1 + repressor**p["n%d" % i] / p["Kd%d" % i])
+                + p["a0%d" % i],
+                p["delta_mRNA%d" % i] * mRNA,
+                p["ktl%d" % i] * mRNA,
+                p["delta_Protein%d" % i] * Protein,
+            ])
+        return rates
+
+    def _jacobian(self, t, y, p):
+        jac = {}
+        for i, repressor_index in zip((1, 2, 3), (5, 1, 3)):
+            repressor = y[repressor_index]
+            n = p["n%d" % i]
+            Kd = p["Kd%d" % i]
+            jac[2 * i - 2, 2 * i - 2] = -p["delta_mRNA%d" % i]
+            jac[2 * i - 2, repressor_index] = (
+                -p["a%d" % i] * n * repressor**(n - 1) / Kd
+                / (1 + repressor**n / Kd)**2)
+            jac[2 * i - 1, 2 * i - 2] = p["ktl%d" % i]
+            jac[2 * i - 1, 2 * i - 1] = -p["delta_Protein%d" % i]
+        return jac
+
+    def _parameter_derivatives(self, t, y, p):
+        derivatives = {}
+        for i, repressor_index in zip((1, 2, 3), (5, 1, 3)):
+            mRNA = y[2 * i - 2]
+            Protein = y[2 * i - 1]
+            repressor = y[repressor_index]
+            n = p["n%d" % i]
+            Kd = p["Kd%d" % i]
+            repressor_n = repressor**n
+            repression = 1 / (1 + repressor_n / Kd)
+            # Derivative of the transcription rate by repressor_n / Kd
+            drate = -p["a%d" % i] * repression**2
+            first = 4 * (i - 1)
+            derivatives.update({
+                (first, "a%d" % i): repression,
+                (first, "a0%d" % i): 1.0,
+                (first, "Kd%d" % i): -drate * repressor_n / Kd**2,
+                (first, "n%d" % i): drate * xlogy(repressor_n, repressor) / Kd,
+                (first + 1, "delta_mRNA%d" % i): mRNA,
+                (first + 2, "ktl%d" % i): mRNA,
+                (first + 3, "delta_Protein%d" % i): Protein,
+            })
+        return derivatives
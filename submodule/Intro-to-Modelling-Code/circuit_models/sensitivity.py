@@ -0,0 +1,309 @@
+#Sensitivity analysis of the circuit models: local sensitivities dy/dp from
+#the forward sensitivity equations, and global variance-based (Sobol)
+#indices from batched sampling over the sweep engine. Rank the parameters of
+#every model with
+#
+#    python -m circuit_models.sensitivity
+
+from dataclasses import dataclass
+from typing import Callable, List, Mapping, Sequence, Tuple
+
+import numpy as np
+from scipy.integrate import odeint
+from scipy.stats import qmc
+
+from circuit_models.model import ArrayLike, CircuitModel
+from circuit_models.sweep import sweep
+
+#Number of time points of the sensitivities by default
+SENSITIVITY_NUM_POINTS = 1000
+#Default Sobol sampling range: each parameter from its value divided by this
+#factor to its value multiplied by it
+SOBOL_RANGE = 2.0
+
+
+@dataclass
+class Sensitivities:
+    """Time course of a model and its sensitivities to its parameters.
+    Attributes:
+        t (np.ndarray): Time points, shape (time points,).
+        y (np.ndarray): Concentrations, shape (time points, states).
+        s (np.ndarray): Sensitivities dy/dp, shape (time points, states,
+            parameters).
+        parameters (np.ndarray): Values of the parameters, shape
+            (parameters,).
+        state_names (Tuple[str, ...]): Names of the states.
+        parameter_names (Tuple[str, ...]): Names of the parameters.
+    """
+    t: np.ndarray
+    y: np.ndarray
+    s: np.ndarray
+    parameters: np.ndarray
+    state_names: Tuple[str, ...]
+    parameter_names: Tuple[str, ...]
+
+    def __getitem__(self, key: Tuple[str, str]) -> np.ndarray:
+        """Get the sensitivity of a state to a parameter by name, e.g.
+        sensitivities['Protein', 'ktx'].
+        """
+        state, parameter = key
+        return self.s[:, self.state_names.index(state),
+                      self.parameter_names.index(parameter)]
+
+    def relative(self) -> np.ndarray:
+        """Get the relative sensitivities (p / y) dy/dp, the relative change
+        of each state per relative change of each parameter. NaN where a
+        state is zero.
+        Returns:
+            np.ndarray: Relative sensitivities, shape (time points, states,
+                parameters).
+        """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(
+                self.y[..., None] != 0,
+                self.s * self.parameters / self.y[..., None],
+                np.nan)
+
+
+@dataclass
+class SobolIndices:
+    """Variance-based sensitivity indices of outputs of a model.
+    Attributes:
+        parameter_names (Tuple[str, ...]): Names of the sampled parameters.
+        output_names (Tuple[str, ...]): Names of the outputs.
+        first_order (np.ndarray): Fraction of the variance of each output
+            due to each parameter alone, shape (parameters, outputs).
+        total_order (np.ndarray): Fraction of the variance of each output
+            due to each parameter including its interactions, shape
+            (parameters, outputs).
+    """
+    parameter_names: Tuple[str, ...]
+    output_names: Tuple[str, ...]
+    first_order: np.ndarray
+    total_order: np.ndarray
+
+    def ranking(self, output: str = None) -> List[Tuple[str, float, float]]:
+        """Rank the parameters by their total-order index for an output.
+        Args:
+            output (str): Name of the output. (default: the first output)
+        Returns:
+            List[Tuple[str, float, float]]: Name, first-order and total-order
+                index of each parameter, most influential first.
+        """
+        j = 0 if output is None else self.output_names.index(output)
+        order = np.argsort(-np.nan_to_num(self.total_order[:, j], nan=-1))
+        return [(self.parameter_names[k], self.first_order[k, j],
+                 self.total_order[k, j]) for k in order]
+
+
+def sensitivities(
+    model: CircuitModel,
+    t: ArrayLike = None,
+    y0: ArrayLike = None,
+    parameters: Mapping[str, ArrayLike] = None,
+    names: Sequence[str] = None,
+    jac: bool = True,
+    **odeint_kwargs
+) -> Sensitivities:
+    """Integrate a model together with its forward sensitivity equations
+    ds/dt = J s + df/dp, s = dy/dp, in one solve with the analytic
+    derivatives of the model.
+
+    The Jacobian of the combined system passed to odeint neglects the
+    dependence of J on y in the sensitivity equations, as in the
+    simultaneous corrector of CVODES.
+    Args:
+        model (CircuitModel): Model.
+        t (ArrayLike): Time points. (default: SENSITIVITY_NUM_POINTS evenly
+            spaced points up to the model's final time)
+        y0 (ArrayLike): Initial values, which do not depend on the
+            parameters. (default: initial conditions of the model)
+        parameters (Mapping[str, ArrayLike]): Parameter values to use
+            instead of the model's. (default: None)
+        names (Sequence[str]): Parameters to differentiate by.
+            (default: every parameter of the model)
+        jac (bool): If True, odeint uses the Jacobian of the combined
+            system, otherwise finite differences. (default: True)
+        **odeint_kwargs: Passed on to scipy.integrate.odeint.
+    Returns:
+        Sensitivities: Time course and sensitivities.
+    Raises:
+        ValueError: If a name is not a parameter of the model.
+    """
+    t = (model.time_points(num_points=SENSITIVITY_NUM_POINTS) if t is None
+         else np.asarray(t, dtype=float))
+    names = model.parameter_names if names is None else tuple(names)
+    params = model.get_parameters(parameters)
+    num_states, num_parameters = model.num_states, len(names)
+    z0 = np.concatenate([
+        model.initial_conditions(y0), np.zeros(num_states * num_parameters)])
+
+    def _rhs(z, t):
+        y = z[:num_states]
+        s = z[num_states:].reshape(num_states, num_parameters)
+        ds = (model.jacobian(t, y, params) @ s
+              + model.parameter_jacobian(t, y, params, names))
+        return np.concatenate([model.rhs(t, y, params), ds.ravel()])
+
+    def _jacobian(z, t):
+        jacobian = model.jacobian(t, z[:num_states], params)
+        return np.block([
+            [jacobian, np.zeros((num_states, num_states * num_parameters))],
+            [np.zeros((num_states * num_parameters, num_states)),
+             np.kron(jacobian, np.eye(num_parameters))]])
+
+    if jac:
+        odeint_kwargs.setdefault('Dfun', _jacobian)
+    z = odeint(_rhs, z0, t, **odeint_kwargs)
+    return Sensitivities(
+        t=t,
+        y=z[:, :num_states],
+        s=z[:, num_states:].reshape(len(t), num_states, num_parameters),
+        parameters=np.array([params[name] for name in names], dtype=float),
+        state_names=model.state_names,
+        parameter_names=names
+    )
+
+
+def get_default_bounds(
+    model: CircuitModel,
+    names: Sequence[str] = None
+) -> Mapping[str, Tuple[float, float]]:
+    """Get Sobol sampling bounds around the parameter values of a model,
+    from each value divided by SOBOL_RANGE to it multiplied by SOBOL_RANGE.
+    Args:
+        model (CircuitModel): Model.
+        names (Sequence[str]): Parameters to sample.
+            (default: every parameter of the model)
+    Returns:
+        Mapping[str, Tuple[float, float]]: Bounds of each parameter.
+    """
+    names = model.parameter_names if names is None else names
+    return {name: (model.parameters[name] / SOBOL_RANGE,
+                   model.parameters[name] * SOBOL_RANGE) for name in names}
+
+
+def time_means(model: CircuitModel
+               ) -> Mapping[str, Callable[[np.ndarray], np.ndarray]]:
+    """Get outputs averaging each state over the time course, the default
+    outputs of sobol_indices.
+    Args:
+        model (CircuitModel): Model.
+    Returns:
+        Mapping[str, Callable[[np.ndarray], np.ndarray]]: Output by state
+            name.
+    """
+    return {state: lambda y, i=i: y[:, :, i].mean(axis=1)
+            for i, state in enumerate(model.state_names)}
+
+
+def sobol_indices(
+    model: CircuitModel,
+    bounds: Mapping[str, Tuple[float, float]] = None,
+    num_samples: int = 1024,
+    outputs: Mapping[str, Callable[[np.ndarray], np.ndarray]] = None,
+    t: ArrayLike = None,
+    y0: ArrayLike = None,
+    log: bool = True,
+    seed: int = None,
+    chunk_size: int = 1000,
+    processes: int = 1,
+    **odeint_kwargs
+) -> SobolIndices:
+    """Estimate first and total-order Sobol indices of outputs of a model.
+
+    Two scrambled Sobol sample matrices A and B of the parameters and, for
+    each parameter, A with that column from B are integrated together with
+    sweep, N (parameters + 2) sets in all. First-order indices use the
+    estimator of Saltelli et al. (2010), total-order indices Jansen's.
+    Args:
+        model (CircuitModel): Model.
+        bounds (Mapping[str, Tuple[float, float]]): Lower and upper bound of
+            each sampled parameter. Other parameters keep the model's
+            values. (default: get_default_bounds(model))
+        num_samples (int): Number of samples N, rounded up to a power of 2.
+            (default: 1024)
+        outputs (Mapping[str, Callable[[np.ndarray], np.ndarray]]): Outputs
+            by name, each computed from time courses of shape (N, time
+            points, states) as an array of shape (N,).
+            (default: time_means(model))
+        t (ArrayLike): Time points. (default: those of sweep)
+        y0 (ArrayLike): Initial values. (default: initial conditions of the
+            model)
+        log (bool): If True, parameters are sampled uniformly on a log
+            scale, otherwise on a linear scale. (default: True)
+        seed (int): Seed of the scrambling. (default: None)
+        chunk_size (int): Passed on to sweep. (default: 1000)
+        processes (int): Passed on to sweep. (default: 1)
+        **odeint_kwargs: Passed on to scipy.integrate.odeint.
+    Returns:
+        SobolIndices: Indices of each parameter for each output.
+    Raises:
+        ValueError: If a bound is invalid, e.g. not positive with `log`.
+    """
+    bounds = get_default_bounds(model) if bounds is None else bounds
+    outputs = time_means(model) if outputs is None else outputs
+    names = tuple(bounds)
+    low, high = np.array([bounds[name] for name in names], dtype=float).T
+    if np.any(low > high) or (log and np.any(low <= 0)):
+        raise ValueError("Invalid Sobol bounds: %s" % dict(bounds))
+    num_parameters = len(names)
+    sampler = qmc.Sobol(d=2 * num_parameters, scramble=True, seed=seed)
+    u = sampler.random_base2(int(np.ceil(np.log2(max(num_samples, 2)))))
+    low, high = np.tile(low, 2), np.tile(high, 2)
+    if log:
+        samples = low * (high / low)**u
+    else:
+        samples = low + u * (high - low)
+    A, B = samples[:, :num_parameters], samples[:, num_parameters:]
+    AB = np.repeat(A[None], num_parameters, axis=0)
+    for k in range(num_parameters):
+        AB[k, :, k] = B[:, k]
+    sets = np.concatenate([A, B, AB.reshape(-1, num_parameters)])
+    result = sweep(
+        model, {name: sets[:, k] for k, name in enumerate(names)}, t, y0,
+        chunk_size=chunk_size, processes=processes, **odeint_kwargs)
+    values = np.stack(
+        [output(result['y']) for output in outputs.values()], axis=-1)
+    num_samples = len(A)
+    f_A = values[:num_samples]
+    f_B = values[num_samples:2 * num_samples]
+    f_AB = values[2 * num_samples:].reshape(
+        num_parameters, num_samples, len(outputs))
+    variance = np.var(np.concatenate([f_A, f_B]), axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        first_order = np.mean(f_B * (f_AB - f_A), axis=1) / variance
+        total_order = 0.5 * np.mean((f_A - f_AB)**2, axis=1) / variance
+    return SobolIndices(
+        parameter_names=names,
+        output_names=tuple(outputs),
+        first_order=first_order,
+        total_order=total_order
+    )
+
+
+def main():
+    from circuit_models import MODELS
+    from circuit_models.benchmarks import print_rows
+
+    for name, cls in MODELS.items():
+        model = cls()
+        output = model.state_names[-1]
+        local = sensitivities(model)
+        # Largest relative sensitivity of the output over the time course
+        relative = np.nanmax(np.abs(
+            local.relative()[:, model.state_names.index(output)]), axis=0)
+        indices = sobol_indices(model, num_samples=256, seed=0)
+        print("%s: sensitivity of %s" % (name, output))
+        print_rows(
+            [{"parameter": parameter,
+              "local": float(relative[local.parameter_names.index(parameter)]),
+              "first_order": float(first),
+              "total_order": float(total)}
+             for parameter, first, total in indices.ranking(output)],
+            ["parameter", "local", "first_order", "total_order"])
+        print()
+
+
+if __name__ == "__main__":
+    main()
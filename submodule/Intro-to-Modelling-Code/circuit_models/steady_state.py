@@ -0,0 +1,318 @@
+#Steady states of the circuit models by Newton's method with the analytic
+#Jacobian, falling back to pseudo-transient continuation, vectorised over
+#parameter values and initial conditions.
+
+from dataclasses import dataclass
+from typing import Mapping, Tuple
+
+import numpy as np
+
+from circuit_models.model import ArrayLike, CircuitModel
+
+#Maximum number of times a Newton step is halved
+MAX_HALVINGS = 20
+
+
+@dataclass
+class SteadyState:
+    """Steady states of a model for N parameter sets.
+    Attributes:
+        y (np.ndarray): Steady states, shape (N, states).
+        converged (np.ndarray): Whether the solver converged, shape (N,).
+        stable (np.ndarray): Whether the steady state is stable, shape (N,).
+        state_names (Tuple[str, ...]): Names of the states (columns of y).
+    """
+    y: np.ndarray
+    converged: np.ndarray
+    stable: np.ndarray
+    state_names: Tuple[str, ...]
+
+    def __getitem__(self, state: str) -> np.ndarray:
+        """Get the steady state of a state by name, e.g. steady['Protein'].
+        """
+        return self.y[..., self.state_names.index(state)]
+
+
+def get_conservation_basis(
+    model: CircuitModel
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Split the state space into the directions the reactions change and
+    the conserved directions, e.g. A + C and B + C in the binding model.
+    Args:
+        model (CircuitModel): Model.
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Orthonormal bases of the changing
+            directions, shape (states, rank), and of the conserved
+            directions, shape (states, states - rank).
+    """
+    u, s, _ = np.linalg.svd(np.asarray(model.stoichiometry, dtype=float).T)
+    rank = int((s > 1e-10 * s.max()).sum())
+    return u[:, :rank], u[:, rank:]
+
+
+def get_eigenvalues(
+    model: CircuitModel,
+    y: ArrayLike,
+    parameters: Mapping[str, ArrayLike] = None
+) -> np.ndarray:
+    """Get the eigenvalues of the Jacobian in the directions the reactions
+    change, leaving out the zero eigenvalues of conserved quantities.
+    Args:
+        model (CircuitModel): Model.
+        y (ArrayLike): States, shape (..., states).
+        parameters (Mapping[str, ArrayLike]): Parameter values to use
+            instead of the model's. (default: None)
+    Returns:
+        np.ndarray: Eigenvalues, shape (..., rank), by decreasing real part.
+    """
+    changing, _ = get_conservation_basis(model)
+    jac = model.jacobian(0.0, y, parameters)
+    reduced = np.einsum('sr,...sk,kq->...rq', changing, jac, changing)
+    with np.errstate(all='ignore'):
+        eigenvalues = np.linalg.eigvals(np.nan_to_num(reduced))
+    order = np.argsort(-eigenvalues.real, axis=-1, kind='stable')
+    return np.take_along_axis(eigenvalues, order, axis=-1)
+
+
+class _SteadyStateProblem:
+    """Root finding problem of the steady states of N systems: dy/dt = 0 in
+    the changing directions, with the conserved quantities of the initial
+    conditions fixed.
+    """
+
+    def __init__(self, model, params, y0, rtol, atol):
+        self.model = model
+        self.params = params
+        self.y0 = y0
+        self.rtol = rtol
+        self.atol = atol
+        self.changing, self.conserved = get_conservation_basis(model)
+        self.stoichiometry = np.asarray(model.stoichiometry, dtype=float)
+
+    def take(self, index):
+        """Get the parameters and initial conditions of some systems."""
+        params = {
+            name: value[index] if np.ndim(value) else value
+            for name, value in self.params.items()}
+        return params, self.y0[index]
+
+    def residual(self, y, params, y0):
+        """Residual and Jacobian of the root finding problem."""
+        f = self.model.rhs(0.0, y, params)
+        jac = self.model.jacobian(0.0, y, params)
+        residual = np.concatenate([
+            f @ self.changing, (y - y0) @ self.conserved], axis=-1)
+        jac = np.concatenate([
+            np.einsum('sr,nsk->nrk', self.changing, jac),
+            np.broadcast_to(self.conserved.T,
+                            (len(y),) + self.conserved.T.shape)
+        ], axis=1)
+        return f, residual, jac
+
+    def is_steady(self, y, f, params):
+        """Whether the net rate of change of every state is small relative
+        to the gross rates of the reactions changing it.
+        """
+        rates = self.model.propensities(0.0, y, params)
+        gross = np.abs(rates) @ np.abs(self.stoichiometry)
+        return np.all(np.abs(f) <= self.rtol * gross + self.atol, axis=-1)
+
+    def is_stable(self, y, params):
+        """Whether every eigenvalue of the Jacobian in the changing
+        directions has a negative real part.
+        """
+        return np.all(
+            get_eigenvalues(self.model, y, params).real < 0, axis=-1)
+
+
+def _solve(matrix: np.ndarray, rhs: np.ndarray) -> np.ndarray:
+    """Solve a stack of linear systems, by least squares if singular."""
+    try:
+        return np.linalg.solve(matrix, rhs[..., None])[..., 0]
+    except np.linalg.LinAlgError:
+        return np.einsum('nij,nj->ni', np.linalg.pinv(matrix), rhs)
+
+
+def _newton(problem, y, params, y0, max_iter):
+    """Damped Newton's method on the systems, returning the states and
+    whether each converged. Steps are halved until they reduce the residual,
+    and states are kept non-negative.
+    """
+    f, residual, jac = problem.residual(y, params, y0)
+    converged = problem.is_steady(y, f, params)
+    norm = np.linalg.norm(residual, axis=-1)
+    for _ in range(max_iter):
+        if converged.all():
+            break
+        with np.errstate(all='ignore'):
+            step = np.nan_to_num(_solve(jac, -residual))
+        step[converged] = 0.0
+        damping = np.ones(len(y))
+        for _ in range(MAX_HALVINGS):
+            new_y = np.maximum(y + damping[:, None] * step, 0.0)
+            new_f, new_residual, new_jac = problem.residual(
+                new_y, params, y0)
+            new_norm = np.linalg.norm(new_residual, axis=-1)
+            worse = ~(new_norm < norm) & ~converged
+            if not worse.any():
+                break
+            damping[worse] /= 2
+        y, f, residual, jac, norm = (
+            new_y, new_f, new_residual, new_jac, new_norm)
+        converged = problem.is_steady(y, f, params)
+    return y, converged
+
+
+def _max_growth_rate(problem, y, params):
+    """Largest positive real part of the eigenvalues of the Jacobian in the
+    changing directions, or 0 if there is none, and the Jacobian.
+    """
+    growth = get_eigenvalues(problem.model, y, params)[..., 0].real
+    jac = problem.model.jacobian(0.0, y, params)
+    return np.maximum(growth, 0.0), jac
+
+
+def _pseudo_transient(problem, y, params, y0, max_iter):
+    """Pseudo-transient continuation: implicit Euler steps of growing size,
+    following the dynamics towards a stable steady state. Steps stay shorter
+    than the local growth time, so that implicit Euler does not converge
+    onto an unstable steady state.
+    """
+    f, _, _ = problem.residual(y, params, y0)
+    norm = np.linalg.norm(f, axis=-1)
+    growth, jac = _max_growth_rate(problem, y, params)
+    with np.errstate(all='ignore'):
+        scale = np.abs(np.linalg.eigvals(np.nan_to_num(jac))).max(axis=-1)
+        dt_min = 1.0 / np.where(scale > 0, scale, 1.0)
+    dt = dt_min.copy()
+    identity = np.eye(problem.model.num_states)
+    converged = np.zeros(len(y), dtype=bool)
+    for _ in range(max_iter):
+        with np.errstate(all='ignore'):
+            dt = np.minimum(dt, np.where(growth > 0, 0.5 / growth, np.inf))
+            step = _solve(identity / dt[:, None, None] - jac, f)
+        step[converged] = 0.0
+        y = np.maximum(y + np.nan_to_num(step), 0.0)
+        f, _, _ = problem.residual(y, params, y0)
+        converged = problem.is_steady(y, f, params)
+        if converged.all():
+            break
+        # Switched evolution relaxation: grow the step as the residual falls
+        new_norm = np.linalg.norm(f, axis=-1)
+        with np.errstate(all='ignore'):
+            dt = np.clip(dt * norm / new_norm, dt_min, dt * 10)
+        dt = np.nan_to_num(dt, nan=1.0, posinf=1e30)
+        norm = new_norm
+        growth, jac = _max_growth_rate(problem, y, params)
+    return y, converged
+
+
+def steady_state(
+    model: CircuitModel,
+    parameters: Mapping[str, ArrayLike] = None,
+    y0: ArrayLike = None,
+    stable: bool = True,
+    rtol: float = 1e-8,
+    atol: float = 1e-20,
+    max_iter: int = 50,
+    max_ptc_iter: int = 1000
+) -> SteadyState:
+    """Find the steady states of a model for N parameter sets at once.
+
+    Newton's method with the analytic Jacobian runs from `y0`. Systems where
+    it fails, or lands on an unstable steady state when `stable` is True,
+    are retried by pseudo-transient continuation from `y0`, which follows
+    the dynamics towards the stable steady state reached from `y0`. If that
+    fails too, the Newton result is kept and flagged.
+
+    Conserved quantities, such as A + C in the binding model, are taken
+    from `y0`.
+    Args:
+        model (CircuitModel): Model.
+        parameters (Mapping[str, ArrayLike]): Parameter values to use
+            instead of the model's, arrays of shape (N,) or scalars.
+            (default: None)
+        y0 (ArrayLike): Initial guess and initial conditions, shape
+            (states,) or (N, states). (default: initial conditions of the
+            model)
+        stable (bool): If True, prefer stable steady states. (default: True)
+        rtol (float): Tolerance on the net rate of change of each state
+            relative to the gross rates of the reactions changing it.
+            (default: 1e-8)
+        atol (float): Absolute tolerance on the rates. (default: 1e-20)
+        max_iter (int): Maximum Newton iterations. (default: 50)
+        max_ptc_iter (int): Maximum pseudo-transient continuation steps.
+            (default: 1000)
+    Returns:
+        SteadyState: Steady states with convergence and stability flags.
+    """
+    params = {name: np.asarray(value, dtype=float)
+              for name, value in model.get_parameters(parameters).items()}
+    y0 = model.initial_conditions(y0)
+    num_systems = np.broadcast(
+        y0[..., 0], *[value for value in params.values() if np.ndim(value)]
+    ).size
+    y0 = np.broadcast_to(y0, (num_systems, model.num_states)).copy()
+    params = {
+        name: np.broadcast_to(value, (num_systems,)) if np.ndim(value)
+        else value
+        for name, value in params.items()}
+    problem = _SteadyStateProblem(model, params, y0, rtol, atol)
+    y, converged = _newton(problem, y0.copy(), params, y0, max_iter)
+    is_stable = problem.is_stable(y, params)
+    retry = ~converged | (~is_stable if stable else False)
+    if retry.any():
+        index = np.flatnonzero(retry)
+        retry_params, retry_y0 = problem.take(index)
+        ptc_y, ptc_converged = _pseudo_transient(
+            problem, retry_y0.copy(), retry_params, retry_y0, max_ptc_iter)
+        # Polish with Newton from where the continuation got to
+        ptc_y, ptc_converged = _newton(
+            problem, ptc_y, retry_params, retry_y0, max_iter)
+        ptc_stable = problem.is_stable(ptc_y, retry_params)
+        better = ptc_converged & (ptc_stable | ~converged[index])
+        y[index[better]] = ptc_y[better]
+        converged[index[better]] = True
+        is_stable[index[better]] = ptc_stable[better]
+    return SteadyState(
+        y=y, converged=converged, stable=is_stable,
+        state_names=model.state_names)
+
+
+def dose_response(
+    model: CircuitModel,
+    name: str,
+    values: ArrayLike,
+    parameters: Mapping[str, ArrayLike] = None,
+    y0: ArrayLike = None,
+    **kwargs
+) -> SteadyState:
+    """Get the steady states over a range of a parameter or of the initial
+    concentration of a state, e.g. the ligand B_0 of the binding model.
+    Args:
+        model (CircuitModel): Model.
+        name (str): Name of a parameter or state.
+        values (ArrayLike): Values of the parameter or initial concentration.
+        parameters (Mapping[str, ArrayLike]): Other parameter values to use
+            instead of the model's. (default: None)
+        y0 (ArrayLike): Initial conditions. (default: initial conditions of
+            the model)
+        **kwargs: Passed on to steady_state.
+    Returns:
+        SteadyState: One steady state per value.
+    Raises:
+        ValueError: If `name` is neither a parameter nor a state.
+    """
+    values = np.asarray(values, dtype=float)
+    if name in model.state_names:
+        y0 = np.repeat(
+            model.initial_conditions(y0)[None], len(values), axis=0)
+        y0[:, model.state_names.index(name)] = values
+        return steady_state(model, parameters, y0, **kwargs)
+    if name in model.default_parameters:
+        params = dict(parameters or {})
+        params[name] = values
+        return steady_state(model, params, y0, **kwargs)
+    raise ValueError(
+        "%s is neither a parameter nor a state of %s"
+        % (name, type(model).__name__))
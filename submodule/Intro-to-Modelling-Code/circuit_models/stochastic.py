@@ -0,0 +1,228 @@
+#Stochastic simulation of the circuit models with the Gillespie algorithm,
+#from the same reactions as the ODEs. Ensembles of trajectories are stepped
+#together with NumPy, optionally in chunks over a process pool.
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Mapping
+
+import numpy as np
+
+from circuit_models.model import ArrayLike, CircuitModel, Solution
+
+#Avogadro constant, /mol
+AVOGADRO = 6.02214076e23
+#Methods of gillespie
+SSA_METHODS = ("direct", "tau_leaping")
+
+
+def system_size(volume: float) -> float:
+    """Get the number of molecules per M of concentration in a volume,
+    e.g. system_size(1e-15) for an E. coli cell of about 1 fL.
+    Args:
+        volume (float): Volume in litres.
+    Returns:
+        float: Molecules per M.
+    """
+    return AVOGADRO * volume
+
+
+def _record(
+    out: np.ndarray,
+    t: np.ndarray,
+    next_index: np.ndarray,
+    active: np.ndarray,
+    x: np.ndarray,
+    t_next: np.ndarray
+):
+    """Record the current state of each active trajectory at every time
+    point it passes before its next reaction.
+    Args:
+        out (np.ndarray): Recorded states, shape (trajectories, time points,
+            states).
+        t (np.ndarray): Time points.
+        next_index (np.ndarray): Index of the next time point to record of
+            each trajectory.
+        active (np.ndarray): Indices of the active trajectories.
+        x (np.ndarray): Current states of the active trajectories.
+        t_next (np.ndarray): Time of the next reaction of the active
+            trajectories.
+    """
+    while True:
+        index = next_index[active]
+        passed = index < len(t)
+        passed[passed] = t[index[passed]] < t_next[passed]
+        if not passed.any():
+            return
+        out[active[passed], index[passed]] = x[passed]
+        next_index[active[passed]] += 1
+
+
+def _direct(
+    model: CircuitModel,
+    t: np.ndarray,
+    x0: np.ndarray,
+    params: Mapping[str, ArrayLike],
+    omega: float,
+    rng: np.random.Generator
+) -> np.ndarray:
+    """Simulate trajectories with Gillespie's direct method.
+    Args:
+        model (CircuitModel): Model to simulate.
+        t (np.ndarray): Time points to record.
+        x0 (np.ndarray): Initial molecule counts, shape (trajectories,
+            states).
+        params (Mapping[str, ArrayLike]): Parameter values.
+        omega (float): Molecules per unit of concentration.
+        rng (np.random.Generator): Random number generator.
+    Returns:
+        np.ndarray: Molecule counts, shape (trajectories, time points,
+            states).
+    """
+    stoichiometry = np.asarray(model.stoichiometry, dtype=float)
+    num_trajectories = len(x0)
+    x = x0.copy()
+    time = np.full(num_trajectories, t[0])
+    next_index = np.zeros(num_trajectories, dtype=int)
+    out = np.empty((num_trajectories, len(t), model.num_states))
+    active = np.arange(num_trajectories)
+    while len(active):
+        # Propensities in molecules per second
+        a = np.maximum(omega * model.propensities(
+            time[active], x[active] / omega, params), 0.0)
+        a_total = a.sum(axis=1)
+        with np.errstate(divide='ignore'):
+            dt = rng.exponential(1.0, len(active)) / a_total
+        t_next = time[active] + dt
+        _record(out, t, next_index, active, x[active], t_next)
+        reacting = np.isfinite(t_next)
+        threshold = rng.random(len(active)) * a_total
+        reaction = (np.cumsum(a, axis=1) < threshold[:, None]).sum(axis=1)
+        reaction = np.minimum(reaction, model.num_reactions - 1)
+        x[active[reacting]] += stoichiometry[reaction[reacting]]
+        time[active] = t_next
+        active = active[next_index[active] < len(t)]
+    return out
+
+
+def _tau_leaping(
+    model: CircuitModel,
+    t: np.ndarray,
+    x0: np.ndarray,
+    params: Mapping[str, ArrayLike],
+    omega: float,
+    rng: np.random.Generator,
+    tau: float
+) -> np.ndarray:
+    """Simulate trajectories with fixed-step tau-leaping: each reaction
+    fires a Poisson number of times per step. Counts driven below zero are
+    set to zero.
+    Args:
+        model (CircuitModel): Model to simulate.
+        t (np.ndarray): Time points to record.
+        x0 (np.ndarray): Initial molecule counts, shape (trajectories,
+            states).
+        params (Mapping[str, ArrayLike]): Parameter values.
+        omega (float): Molecules per unit of concentration.
+        rng (np.random.Generator): Random number generator.
+        tau (float): Leap size in seconds.
+    Returns:
+        np.ndarray: Molecule counts, shape (trajectories, time points,
+            states).
+    """
+    stoichiometry = np.asarray(model.stoichiometry, dtype=float)
+    x = x0.copy()
+    out = np.empty((len(x0), len(t), model.num_states))
+    time = t[0]
+    index = 0
+    while index < len(t):
+        while index < len(t) and t[index] < time + tau:
+            out[:, index] = x
+            index += 1
+        a = omega * model.propensities(time, x / omega, params)
+        firings = rng.poisson(np.maximum(a, 0.0) * tau)
+        x = np.maximum(x + firings @ stoichiometry, 0.0)
+        time += tau
+    return out
+
+
+def _simulate_chunk(args) -> np.ndarray:
+    """Simulate a chunk of trajectories, in a worker process."""
+    model, t, x0, params, omega, method, tau, seed = args
+    rng = np.random.default_rng(seed)
+    if method == "direct":
+        return _direct(model, t, x0, params, omega, rng)
+    return _tau_leaping(model, t, x0, params, omega, rng, tau)
+
+
+def gillespie(
+    model: CircuitModel,
+    omega: float,
+    t: ArrayLike = None,
+    num_trajectories: int = 1,
+    y0: ArrayLike = None,
+    parameters: Mapping[str, ArrayLike] = None,
+    method: str = "direct",
+    tau: float = None,
+    seed: int = None,
+    chunk_size: int = 1000,
+    processes: int = 1
+) -> Solution:
+    """Simulate an ensemble of stochastic trajectories of a model.
+
+    Propensities are the model's reaction rates scaled from concentrations
+    to molecule counts by `omega`. Trajectories are stepped together in
+    chunks of `chunk_size`.
+    Args:
+        model (CircuitModel): Model to simulate.
+        omega (float): Molecules per unit of concentration, e.g.
+            system_size(volume). The default parameters of the CCh_* scripts
+            reach concentrations of about 1 M, so an omega of 10 to 1000
+            gives the low copy numbers where noise matters.
+        t (ArrayLike): Time points to record. (default: 101 evenly spaced
+            points up to the model's final time)
+        num_trajectories (int): Number of trajectories. (default: 1)
+        y0 (ArrayLike): Initial concentrations, rounded to molecule counts.
+            (default: initial conditions of the model)
+        parameters (Mapping[str, ArrayLike]): Parameter values to use
+            instead of the model's. (default: None)
+        method (str): "direct" for the exact direct method, or
+            "tau_leaping" for the approximate, faster fixed-step method.
+            (default: "direct")
+        tau (float): Leap size in seconds for tau-leaping. (default: a
+            tenth of the spacing of the time points)
+        seed (int): Seed of the random number generators. (default: None)
+        chunk_size (int): Number of trajectories stepped together.
+            (default: 1000)
+        processes (int): Number of worker processes the chunks are
+            simulated in. (default: 1)
+    Returns:
+        Solution: Molecule counts, with `y` of shape (trajectories, time
+            points, states).
+    Raises:
+        ValueError: If `method` is invalid.
+    """
+    if method not in SSA_METHODS:
+        raise ValueError("Invalid SSA method: %s" % method)
+    t = (model.time_points(num_points=101) if t is None
+         else np.asarray(t, dtype=float))
+    if tau is None:
+        tau = (t[-1] - t[0]) / max(len(t) - 1, 1) / 10
+    params = model.get_parameters(parameters)
+    x0 = np.broadcast_to(
+        np.round(model.initial_conditions(y0) * omega),
+        (num_trajectories, model.num_states)).astype(float)
+    seeds = np.random.SeedSequence(seed).spawn(
+        -(-num_trajectories // chunk_size))
+    tasks = [
+        (model, t, x0[start:start + chunk_size], params, omega, method, tau,
+         chunk_seed)
+        for start, chunk_seed in zip(
+            range(0, num_trajectories, chunk_size), seeds)]
+    if processes > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(
+                max_workers=min(processes, len(tasks))) as executor:
+            chunks = list(executor.map(_simulate_chunk, tasks))
+    else:
+        chunks = [_simulate_chunk(task) for task in tasks]
+    return Solution(
+        t=t, y=np.concatenate(chunks), state_names=model.state_names)
@@ -0,0 +1,190 @@
+#Batched parameter sweeps: N parameter sets are stacked into one (N, states)
+#system and integrated together, optionally in chunks over a process pool.
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Mapping
+
+import numpy as np
+from scipy.integrate import odeint
+
+from circuit_models.model import ArrayLike, CircuitModel
+
+#Number of time points stored per parameter set by default
+SWEEP_NUM_POINTS = 100
+
+
+def parameter_grid(**axes: ArrayLike) -> Dict[str, np.ndarray]:
+    """Get every combination of the given parameter values, e.g.
+    parameter_grid(n1=[1, 2, 3], Kd1=np.logspace(-8, -5, 50)).
+    Args:
+        **axes (ArrayLike): Values of each swept parameter.
+    Returns:
+        Dict[str, np.ndarray]: Flat arrays of equal length, one per
+            parameter, the last parameter varying fastest.
+    """
+    grids = np.meshgrid(
+        *[np.asarray(values, dtype=float) for values in axes.values()],
+        indexing='ij')
+    return {name: grid.ravel() for name, grid in zip(axes, grids)}
+
+
+def get_sweep_dtype(
+    model: CircuitModel,
+    parameter_names,
+    num_points: int
+) -> np.dtype:
+    """Get the structured dtype of a sweep result: one field per swept
+    parameter and a 'y' field holding the time course of the states.
+    Args:
+        model (CircuitModel): Swept model.
+        parameter_names (Iterable[str]): Names of the swept parameters.
+        num_points (int): Number of time points.
+    Returns:
+        np.dtype: Structured dtype of one parameter set.
+    """
+    fields = [(name, np.float64) for name in parameter_names]
+    fields.append(('y', np.float64, (num_points, model.num_states)))
+    return np.dtype(fields)
+
+
+def solve_batch(
+    model: CircuitModel,
+    parameters: Mapping[str, np.ndarray],
+    t: np.ndarray,
+    y0: ArrayLike = None,
+    jac: bool = True,
+    **odeint_kwargs
+) -> np.ndarray:
+    """Integrate N parameter sets as one stacked system.
+
+    The parameter sets do not interact, so the Jacobian of the stacked
+    system is block diagonal and is passed to odeint as banded.
+    Args:
+        model (CircuitModel): Model to integrate.
+        parameters (Mapping[str, np.ndarray]): Swept parameters, arrays of
+            shape (N,).
+        t (np.ndarray): Time points.
+        y0 (ArrayLike): Initial values, shape (states,) or (N, states).
+            (default: initial conditions of the model)
+        jac (bool): If True, odeint uses the analytic Jacobian of the model,
+            otherwise banded finite differences. (default: True)
+        **odeint_kwargs: Passed on to scipy.integrate.odeint.
+    Returns:
+        np.ndarray: Time courses, shape (N, time points, states).
+    """
+    params = {name: np.asarray(value, dtype=float)
+              for name, value in parameters.items()}
+    num_sets = len(next(iter(params.values()))) if params else 1
+    num_states = model.num_states
+    y0 = np.broadcast_to(
+        model.initial_conditions(y0), (num_sets, num_states))
+    params = model.get_parameters(params)
+
+    def _rhs(y, t):
+        return model.rhs(t, y.reshape(num_sets, num_states), params).ravel()
+
+    def _banded_jacobian(y, t):
+        # Entry (a, b) of block k goes to row a - b + mu, column k*states + b
+        blocks = model.jacobian(t, y.reshape(num_sets, num_states), params)
+        band = np.zeros((2 * num_states - 1, num_sets * num_states))
+        for a in range(num_states):
+            for b in range(num_states):
+                band[a - b + num_states - 1, b::num_states] = blocks[:, a, b]
+        return band
+
+    odeint_kwargs.setdefault('ml', num_states - 1)
+    odeint_kwargs.setdefault('mu', num_states - 1)
+    if jac:
+        odeint_kwargs.setdefault('Dfun', _banded_jacobian)
+    y = odeint(_rhs, y0.ravel(), t, **odeint_kwargs)
+    return y.reshape(len(t), num_sets, num_states).swapaxes(0, 1)
+
+
+def _solve_chunk(args) -> np.ndarray:
+    """Unpack the arguments of solve_batch in a worker process."""
+    model, parameters, t, y0, jac, odeint_kwargs = args
+    return solve_batch(model, parameters, t, y0, jac, **odeint_kwargs)
+
+
+def sweep(
+    model: CircuitModel,
+    parameters: Mapping[str, ArrayLike],
+    t: ArrayLike = None,
+    y0: ArrayLike = None,
+    chunk_size: int = 1000,
+    processes: int = 1,
+    filename: str = None,
+    jac: bool = True,
+    **odeint_kwargs
+) -> np.ndarray:
+    """Integrate a model over many parameter sets.
+
+    Parameter sets are integrated together in chunks of `chunk_size`
+    stacked systems, so the cost per set falls with the chunk size until
+    the slowest set in a chunk dictates the step size.
+    Args:
+        model (CircuitModel): Model to sweep.
+        parameters (Mapping[str, ArrayLike]): Values of each swept
+            parameter, arrays of equal length N, e.g. from parameter_grid.
+            Parameters not swept keep the model's values.
+        t (ArrayLike): Time points. (default: SWEEP_NUM_POINTS evenly spaced
+            points up to the model's final time)
+        y0 (ArrayLike): Initial values, shape (states,) or (N, states).
+            (default: initial conditions of the model)
+        chunk_size (int): Number of parameter sets integrated together.
+            (default: 1000)
+        processes (int): Number of worker processes the chunks are
+            integrated in. (default: 1)
+        filename (str): If given, the result is a memory-mapped .npy file
+            at this path instead of an in-memory array. (default: None)
+        jac (bool): If True, odeint uses the analytic Jacobian of the model,
+            otherwise banded finite differences. (default: True)
+        **odeint_kwargs: Passed on to scipy.integrate.odeint.
+    Returns:
+        np.ndarray: Structured array of shape (N,) with the swept parameter
+            values and the time courses, 'y' of shape (time points, states).
+    Raises:
+        ValueError: If the parameter arrays differ in length or chunk_size
+            is not positive.
+    """
+    t = (model.time_points(num_points=SWEEP_NUM_POINTS) if t is None
+         else np.asarray(t, dtype=float))
+    params = {name: np.atleast_1d(np.asarray(value, dtype=float))
+              for name, value in parameters.items()}
+    model.get_parameters(params)
+    y0 = model.initial_conditions(y0)
+    lengths = {len(value) for value in params.values()}
+    if len(lengths) > 1:
+        raise ValueError("Swept parameters must have the same length")
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be positive")
+    num_sets = lengths.pop() if lengths else 1
+    dtype = get_sweep_dtype(model, params, len(t))
+    if filename is None:
+        result = np.empty(num_sets, dtype=dtype)
+    else:
+        result = np.lib.format.open_memmap(
+            filename, mode='w+', dtype=dtype, shape=(num_sets,))
+    for name, value in params.items():
+        result[name] = value
+    chunks = [slice(start, min(start + chunk_size, num_sets))
+              for start in range(0, num_sets, chunk_size)]
+    tasks = [
+        (model,
+         {name: value[chunk] for name, value in params.items()},
+         t,
+         y0[chunk] if y0.ndim > 1 else y0,
+         jac,
+         odeint_kwargs)
+        for chunk in chunks]
+    if processes > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(
+                max_workers=min(processes, len(tasks))) as executor:
+            for chunk, y in zip(chunks, executor.map(_solve_chunk, tasks)):
+                result['y'][chunk] = y
+    else:
+        for chunk, task in zip(chunks, tasks):
+            result['y'][chunk] = _solve_chunk(task)
+    if filename is not None:
+        result.flush()
+    return result
@@ -0,0 +1,57 @@
+import unittest
+
+import numpy as np
+
+from circuit_models import MODELS, compiled
+
+
+def random_states(model, number=20, seed=0):
+    """Get random positive states up to the scale of the model's time
+    course.
+    """
+    rng = np.random.default_rng(seed)
+    scale = np.abs(model.solve().y).max()
+    return scale * rng.uniform(0, 1.5, (number, len(model.state_names)))
+
+
+class TestCompiled(unittest.TestCase):
+
+    def check_backend(self, backend):
+        for name, cls in MODELS.items():
+            model = cls()
+            rhs, jacobian = compiled.get_functions(
+                model, model.parameters, backend)
+            with self.subTest(model=name, backend=backend):
+                for y in random_states(model):
+                    np.testing.assert_allclose(
+                        rhs(0.0, y), model.rhs(0.0, y), rtol=1e-12,
+                        atol=1e-300)
+                    np.testing.assert_allclose(
+                        jacobian(0.0, y), model.jacobian(0.0, y),
+                        rtol=1e-12, atol=1e-300)
+                t = model.time_points()
+                np.testing.assert_allclose(
+                    model.solve(t, backend=backend).y, model.solve(t).y,
+                    rtol=1e-6, atol=1e-12)
+
+    def test_python_matches_numpy(self):
+        self.check_backend("python")
+
+    @unittest.skipUnless(compiled.numba is not None, "numba not installed")
+    def test_numba_matches_numpy(self):
+        self.check_backend("numba")
+
+    def test_invalid_backend(self):
+        model = MODELS["BasicGeneExpression"]()
+        with self.assertRaises(ValueError):
+            compiled.get_functions(model, model.parameters, "fortran")
+
+    def test_vector_parameters(self):
+        model = MODELS["BasicGeneExpression"]()
+        parameters = dict(model.parameters, ktx=np.array([1e-3, 2e-3]))
+        with self.assertRaises(ValueError):
+            compiled.get_functions(model, parameters, "python")
+
+
+if __name__ == "__main__":
+    unittest.main()
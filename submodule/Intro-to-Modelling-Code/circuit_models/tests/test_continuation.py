@@ -0,0 +1,60 @@
+import unittest
+
+import numpy as np
+from scipy.optimize import brentq
+
+from circuit_models import Repressilator, continue_equilibrium, stability_map
+
+
+def repressilator_hopf(model):
+    """Get the Hill coefficient and period at the Hopf point of a
+    repressilator with three identical genes and equal degradation rates.
+    The loop gain ktl*|f'(p)| at the steady state p crosses 4*delta**2/3
+    there, with eigenvalues +-i*delta/sqrt(3).
+    """
+    p = model.parameters
+    a, a0, Kd = p["a1"], p["a01"], p["Kd1"]
+    ktl, delta = p["ktl1"], p["delta_mRNA1"]
+
+    def protein(n):
+        return brentq(
+            lambda x: x - ktl * (a / (1 + x**n / Kd) + a0) / delta**2, 0, 10)
+
+    def gain(n):
+        x = protein(n)
+        return ktl * a * n * x**(n - 1) / Kd / (1 + x**n / Kd)**2
+
+    n = brentq(lambda n: gain(n) - 4 * delta**2 / 3, 1, 3, xtol=1e-12)
+    return n, 2 * np.pi * np.sqrt(3) / delta
+
+
+class TestContinuation(unittest.TestCase):
+
+    def test_repressilator_hopf(self):
+        model = Repressilator()
+        n, period = repressilator_hopf(model)
+        branch = continue_equilibrium(
+            model, ("n1", "n2", "n3"), np.linspace(1, 3, 21),
+            measure_oscillations=False)
+        self.assertEqual(
+            [b.kind for b in branch.bifurcations], ["hopf"])
+        hopf = branch.bifurcations[0]
+        self.assertAlmostEqual(hopf.value, n, places=6)
+        self.assertAlmostEqual(hopf.period / period, 1, places=6)
+
+    def test_repressilator_stability_map(self):
+        n = np.linspace(1, 3, 11)
+        ktl = np.array([2e-3, 1e-2])
+        result = stability_map(
+            Repressilator(), ("n1", "n2", "n3"), n, ("ktl1", "ktl2", "ktl3"),
+            ktl)
+        self.assertTrue(result.converged.all())
+        for j, value in enumerate(ktl):
+            hopf, _ = repressilator_hopf(
+                Repressilator(ktl1=value, ktl2=value, ktl3=value))
+            np.testing.assert_array_equal(
+                result.oscillating[:, j], n > hopf)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from circuit_models import BasicGeneExpression, fit, fit_plate
+from circuit_models.fitting import TimeSeries, read_csv
+
+#Parameters of the synthetic data, away from the model's values
+TRUE_PARAMETERS = {"ktx": 3e-3, "delta_Protein": 2.5e-4}
+
+
+def synthetic_series(model, parameters, offset=0.0, noise=0.0, seed=0):
+    """Get the protein of a model over time, with Gaussian noise relative to
+    its maximum.
+    """
+    t = model.time_points(num_points=41)
+    protein = model.solve(t, parameters=parameters).y[:, -1] + offset
+    rng = np.random.default_rng(seed)
+    values = protein + noise * protein.max() * rng.standard_normal(len(t))
+    return TimeSeries(t, values)
+
+
+class TestFitting(unittest.TestCase):
+
+    def test_fit_recovers_parameters(self):
+        model = BasicGeneExpression()
+        series = synthetic_series(model, TRUE_PARAMETERS, offset=0.1)
+        result = fit(model, series, ("ktx", "delta_Protein", "offset"),
+                     num_starts=4, seed=0)
+        self.assertTrue(result.success)
+        self.assertLess(result.cost, 1e-12)
+        for name, value in TRUE_PARAMETERS.items():
+            self.assertAlmostEqual(result.parameters[name] / value, 1,
+                                   places=4)
+        self.assertAlmostEqual(result.parameters["offset"], 0.1, places=6)
+
+    def test_fit_noisy_data(self):
+        model = BasicGeneExpression()
+        series = synthetic_series(model, TRUE_PARAMETERS, noise=0.01)
+        result = fit(model, series, ("ktx", "delta_Protein"), num_starts=4,
+                     seed=0)
+        for name, value in TRUE_PARAMETERS.items():
+            self.assertAlmostEqual(result.parameters[name] / value, 1,
+                                   delta=0.05)
+
+    def test_fit_plate_wells(self):
+        model = BasicGeneExpression()
+        data = {
+            "A1": synthetic_series(model, {"ktx": 3e-3}),
+            "A2": synthetic_series(model, {"ktx": 5e-4}),
+        }
+        fits = fit_plate(model, data, ("ktx",), num_starts=2, seed=0)
+        self.assertEqual(list(fits), ["A1", "A2"])
+        self.assertAlmostEqual(fits["A1"].parameters["ktx"] / 3e-3, 1,
+                               places=4)
+        self.assertAlmostEqual(fits["A2"].parameters["ktx"] / 5e-4, 1,
+                               places=4)
+        self.assertEqual(len(fits["A1"].starts), 2)
+
+    def test_invalid_bounds(self):
+        model = BasicGeneExpression()
+        series = synthetic_series(model, {})
+        with self.assertRaises(ValueError):
+            fit(model, series, ("ktx",), bounds={"ktx": (1e-2, 1e-1)})
+        with self.assertRaises(ValueError):
+            fit(model, series, ("not a parameter",))
+
+    def test_read_csv(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "plate.csv")
+            with open(filename, "w") as file:
+                file.write("well,time,value\n"
+                           "A1,60,2\nA2,0,5\nA1,0,1\nA2,60,6\n")
+            data = read_csv(filename)
+        np.testing.assert_array_equal(data["A1"].t, [0, 60])
+        np.testing.assert_array_equal(data["A1"].values, [1, 2])
+        np.testing.assert_array_equal(data["A2"].values, [5, 6])
+        self.assertIsNone(data["A1"].state)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import ast
+import os
+import unittest
+
+import numpy as np
+from scipy.integrate import odeint
+
+from circuit_models import MODELS, AutoActivation
+
+#Folder of the CCh_* scripts
+SCRIPT_DIR = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+#Script of each model
+SCRIPTS = {
+    "BasicGeneExpression": "CCh_BasicGeneExpression.py",
+    "Auto-activation": "CCh_Auto-activation.py",
+    "Auto-Inhibition": "CCh_Auto-Inhibition.py",
+    "Binding": "CCh_Binding.py",
+    "Repressilator": "CCh_Repressilator.py",
+}
+
+
+def load_script_odes(filename):
+    """Load the ODEs function of a CCh_* script, with its constants, without
+    running the solve and plots that follow it.
+    """
+    with open(os.path.join(SCRIPT_DIR, filename)) as script:
+        body = ast.parse(script.read()).body
+    end = next(index for index, node in enumerate(body)
+               if isinstance(node, ast.FunctionDef) and node.name == "ODEs")
+    module = ast.Module(
+        body=[node for node in body[:end + 1]
+              if not isinstance(node, (ast.Import, ast.ImportFrom))],
+        type_ignores=[])
+    namespace = {}
+    exec(compile(module, filename, "exec"), namespace)
+    return namespace["ODEs"]
+
+
+def roundoff(model, y, step, parameters=None):
+    """Bound the rounding error of a central difference with `step`, from
+    the gross reaction rates that cancel in the right-hand side.
+    """
+    rates = np.abs(model.propensities(0.0, y, parameters)).max(axis=-1)
+    return 100 * np.finfo(float).eps * rates[:, None] / np.abs(step)
+
+
+def random_states(model, number=50, seed=0):
+    """Draw positive states up to the scale of the model's time course,
+    log-uniformly to cover the thresholds of the Hill functions.
+    """
+    rng = np.random.default_rng(seed)
+    scale = np.abs(model.solve().y).max(axis=0)
+    return scale * 10**rng.uniform(-6, 0.2, size=(number, model.num_states))
+
+
+class TestModels(unittest.TestCase):
+
+    def test_rhs_matches_scripts(self):
+        for name, filename in SCRIPTS.items():
+            model = MODELS[name]()
+            odes = load_script_odes(filename)
+            y = random_states(model)
+            with self.subTest(model=name):
+                expected = np.array([odes(state, 0.0) for state in y])
+                np.testing.assert_allclose(
+                    model.rhs(0.0, y), expected, rtol=1e-12, atol=1e-300)
+
+    def test_solve_matches_script_odeint(self):
+        # Same integration as the script, on a shorter grid
+        model = AutoActivation()
+        t = model.time_points(num_points=1000)
+        expected = odeint(
+            load_script_odes(SCRIPTS["Auto-activation"]),
+            model.initial_conditions(), t)
+        np.testing.assert_allclose(
+            model.solve(t, jac=False).y, expected, rtol=1e-12, atol=1e-300)
+
+    def test_jacobian_matches_finite_differences(self):
+        for name, cls in MODELS.items():
+            model = cls()
+            y = random_states(model)
+            jacobian = model.jacobian(0.0, y)
+            with self.subTest(model=name):
+                for j in range(model.num_states):
+                    step = 1e-6 * y[:, j]
+                    dy = np.zeros_like(y)
+                    dy[:, j] = step
+                    expected = (model.rhs(0.0, y + dy)
+                                - model.rhs(0.0, y - dy)) / (2 * step[:, None])
+                    error = np.abs(jacobian[:, :, j] - expected)
+                    self.assertTrue(np.all(
+                        error <= 1e-5 * np.abs(expected)
+                        + roundoff(model, y, step[:, None])))
+
+    def test_implicit_methods_match_odeint(self):
+        for name, cls in MODELS.items():
+            model = cls()
+            t = model.time_points(num_points=200)
+            expected = model.solve(t).y
+            for method in ["BDF", "Radau", "LSODA"]:
+                with self.subTest(model=name, method=method):
+                    y = model.solve(t, method=method).y
+                    self.assertLess(
+                        np.abs(y - expected).max() / np.abs(expected).max(),
+                        1e-2)
+        # Above solve_ivp's own default atol, the auto-activation switch on
+        # from 1e-7 M of protein was lost
+        solution = AutoActivation().solve(method="BDF")
+        self.assertAlmostEqual(solution["Protein"][-1], 4.95, places=2)
+
+
+if __name__ == "__main__":
+    unittest.main()
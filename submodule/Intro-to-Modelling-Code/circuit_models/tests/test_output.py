@@ -0,0 +1,79 @@
+import unittest
+
+import numpy as np
+
+from circuit_models import BasicGeneExpression, Repressilator
+from circuit_models.events import extremum, threshold
+
+
+class TestOutput(unittest.TestCase):
+
+    def test_adaptive_output(self):
+        model = BasicGeneExpression()
+        solution = model.solve(output="adaptive")
+        self.assertEqual(solution.t[0], 0)
+        self.assertEqual(solution.t[-1], model.t_end)
+        self.assertLess(len(solution.t), 1000)
+        self.assertTrue(np.all(np.diff(solution.t) > 0))
+        expected = model.solve(solution.t).y
+        np.testing.assert_allclose(
+            solution.y, expected, rtol=1e-4, atol=1e-6 * expected.max())
+
+    def test_dense_output(self):
+        model = Repressilator()
+        solution = model.solve(output="dense")
+        t = model.time_points(num_points=500)
+        expected = model.solve(t).y
+        np.testing.assert_allclose(
+            solution(t), expected, rtol=1e-3, atol=1e-4 * expected.max())
+        self.assertIsNone(model.solve().interpolant)
+
+    def test_threshold_event(self):
+        model = BasicGeneExpression()
+        final = model.solve()["Protein"][-1]
+        events = {"half": threshold(model, "Protein", final / 2,
+                                    direction=1)}
+        solution = model.solve(output="events", events=events)
+        self.assertEqual(len(solution.t_events["half"]), 1)
+        self.assertAlmostEqual(
+            solution.y_events["half"][0, 1] / (final / 2), 1, places=6)
+        # The grid crosses half of the final value around the event
+        grid = model.solve(model.time_points(num_points=10001))
+        crossing = grid.t[np.argmax(grid["Protein"] >= final / 2)]
+        self.assertAlmostEqual(
+            solution.t_events["half"][0], crossing, delta=model.t_end / 1e4)
+
+    def test_terminal_event(self):
+        model = BasicGeneExpression()
+        events = {"on": threshold(model, "Protein", 1.0, terminal=True)}
+        solution = model.solve(output="adaptive", events=events)
+        self.assertAlmostEqual(solution.t[-1], solution.t_events["on"][0])
+        self.assertAlmostEqual(solution["Protein"][-1], 1.0, places=6)
+
+    def test_extremum_event(self):
+        model = Repressilator()
+        t = model.time_points(t_end=10 * model.t_end)
+        events = {"peak": extremum(model, "Protein1"),
+                  "dip": extremum(model, "Protein1", kind="min")}
+        solution = model.solve(t, output="events", events=events)
+        peaks = solution.y_events["peak"]
+        dips = solution.y_events["dip"]
+        self.assertGreater(len(peaks), 3)
+        self.assertLessEqual(abs(len(peaks) - len(dips)), 1)
+        self.assertGreater(peaks[-1, 1], dips[-1, 1])
+        # The derivative of Protein1 vanishes at both
+        scale = np.abs(model.rhs(0.0, model.solve(t).y)[:, 1]).max()
+        for y in (peaks, dips):
+            self.assertLess(np.abs(model.rhs(0.0, y)[:, 1]).max(),
+                            1e-6 * scale)
+
+    def test_invalid_output(self):
+        model = BasicGeneExpression()
+        with self.assertRaises(ValueError):
+            model.solve(output="sparse")
+        with self.assertRaises(ValueError):
+            extremum(model, "Protein", kind="inflection")
+
+
+if __name__ == "__main__":
+    unittest.main()
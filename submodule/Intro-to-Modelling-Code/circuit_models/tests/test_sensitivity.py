@@ -0,0 +1,81 @@
+import unittest
+
+import numpy as np
+
+from circuit_models import (
+    MODELS, BasicGeneExpression, sensitivities, sobol_indices)
+from circuit_models.tests.test_models import random_states, roundoff
+
+TOLERANCES = {"rtol": 1e-11, "atol": 1e-14}
+
+
+def finite_difference_sensitivities(model, t, names, step=1e-4):
+    """Get dy/dp by central differences of two solves per parameter."""
+    s = np.empty((len(t), len(model.state_names), len(names)))
+    for k, name in enumerate(names):
+        value = model.parameters[name]
+        h = step * abs(value)
+        y = [model.solve(t, parameters={name: value + sign * h},
+                         **TOLERANCES).y
+             for sign in (1, -1)]
+        s[:, :, k] = (y[0] - y[1]) / (2 * h)
+    return s
+
+
+class TestSensitivities(unittest.TestCase):
+
+    def test_parameter_jacobian_matches_finite_differences(self):
+        for name, cls in MODELS.items():
+            model = cls()
+            y = random_states(model)
+            derivatives = model.parameter_jacobian(0.0, y)
+            with self.subTest(model=name):
+                for k, parameter in enumerate(model.parameter_names):
+                    value = model.parameters[parameter]
+                    step = 1e-6 * value
+                    expected = (
+                        model.rhs(0.0, y, {parameter: value + step})
+                        - model.rhs(0.0, y, {parameter: value - step})
+                    ) / (2 * step)
+                    error = np.abs(derivatives[:, :, k] - expected)
+                    self.assertTrue(np.all(
+                        error <= 1e-5 * np.abs(expected)
+                        + roundoff(model, y, step)))
+
+    def test_sensitivities_match_finite_differences(self):
+        for name, cls in MODELS.items():
+            model = cls()
+            t = model.time_points(num_points=51)
+            with self.subTest(model=name):
+                result = sensitivities(model, t, **TOLERANCES)
+                expected = finite_difference_sensitivities(
+                    model, t, result.parameter_names)
+                # Scale by the largest sensitivity to each parameter, as
+                # some are zero up to the noise of the differences
+                scale = np.abs(expected).max(axis=(0, 1))
+                self.assertLess(
+                    (np.abs(result.s - expected) / scale).max(), 1e-4)
+
+    def test_getitem(self):
+        model = MODELS["BasicGeneExpression"]()
+        result = sensitivities(model, names=("ktx", "ktl"))
+        np.testing.assert_array_equal(
+            result["Protein", "ktl"], result.s[:, 1, 1])
+
+    def test_sobol_indices_of_product(self):
+        # The steady protein ktx*ktl/(delta_mRNA*delta_Protein) has an
+        # additive logarithm, so over equal log ranges every parameter
+        # explains a quarter of its variance, without interactions
+        model = BasicGeneExpression()
+        bounds = {name: (value / 2, value * 2)
+                  for name, value in model.parameters.items()}
+        result = sobol_indices(
+            model, bounds, num_samples=1024, t=np.linspace(0, 1e5, 11),
+            seed=0, outputs={"log Protein": lambda y: np.log(y[:, -1, 1])})
+        self.assertEqual(result.output_names, ("log Protein",))
+        np.testing.assert_allclose(result.first_order, 0.25, atol=0.01)
+        np.testing.assert_allclose(result.total_order, 0.25, atol=0.01)
+
+
+if __name__ == "__main__":
+    unittest.main()
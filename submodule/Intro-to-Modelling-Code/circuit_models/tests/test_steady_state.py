@@ -0,0 +1,61 @@
+import unittest
+
+import numpy as np
+
+from circuit_models import (
+    MODELS, AutoInhibition, Binding, Repressilator, dose_response,
+    steady_state)
+
+
+def integrate_to_plateau(model, parameters=None):
+    """Integrate a model over 50 times its time course."""
+    t = np.linspace(0, 50 * model.t_end, 2001)
+    return model.solve(t, parameters=parameters).y[-1]
+
+
+class TestSteadyState(unittest.TestCase):
+
+    def test_steady_state_matches_long_integration(self):
+        models = dict(MODELS)
+        # The default repressilator oscillates, with n = 1 it settles
+        models["Repressilator"] = lambda: Repressilator(n1=1, n2=1, n3=1)
+        for name, cls in models.items():
+            model = cls()
+            with self.subTest(model=name):
+                steady = steady_state(model)
+                self.assertTrue(steady.converged.all())
+                self.assertTrue(steady.stable.all())
+                np.testing.assert_allclose(
+                    steady.y[0], integrate_to_plateau(model), rtol=1e-5,
+                    atol=1e-12)
+
+    def test_vectorised_parameters(self):
+        model = AutoInhibition()
+        ktx = np.logspace(-5, -2, 5)
+        steady = steady_state(model, parameters={"ktx": ktx})
+        self.assertEqual(steady.y.shape, (5, 2))
+        for i, value in enumerate(ktx):
+            np.testing.assert_allclose(
+                steady.y[i], integrate_to_plateau(model, {"ktx": value}),
+                rtol=1e-5)
+
+    def test_unstable_steady_state(self):
+        steady = steady_state(Repressilator())
+        self.assertTrue(steady.converged.all())
+        self.assertFalse(steady.stable.any())
+
+    def test_binding_curve(self):
+        # Bound fraction of A against the exact solution of the quadratic
+        # for A + B <-> C with conserved totals
+        model = Binding()
+        B_0 = np.logspace(-4, 1, 6)
+        steady = dose_response(model, "B", B_0)
+        Kd = model.parameters["kd"] / model.parameters["ka"]
+        A_0 = 1.0
+        b = A_0 + B_0 + Kd
+        C = (b - np.sqrt(b**2 - 4 * A_0 * B_0)) / 2
+        np.testing.assert_allclose(steady["C"], C, rtol=1e-6)
+
+
+if __name__ == "__main__":
+    unittest.main()
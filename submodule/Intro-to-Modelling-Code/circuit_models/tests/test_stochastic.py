@@ -0,0 +1,43 @@
+import unittest
+
+import numpy as np
+
+from circuit_models import BasicGeneExpression, gillespie, system_size
+
+
+class TestStochastic(unittest.TestCase):
+
+    def test_system_size(self):
+        # About 600 molecules per uM in 1 fL
+        self.assertAlmostEqual(system_size(1e-15) * 1e-6, 602.214076)
+
+    def test_ensemble_mean_matches_ode(self):
+        # At high copy number the mean follows the ODE, within a few
+        # standard errors of the mean of the ensemble
+        model = BasicGeneExpression()
+        omega = 500
+        for method in ["direct", "tau_leaping"]:
+            with self.subTest(method=method):
+                solution = gillespie(model, omega, num_trajectories=50,
+                                     method=method, seed=1)
+                self.assertEqual(solution.y.shape, (50, 101, 2))
+                expected = model.solve(solution.t).y
+                mean = solution.y.mean(axis=0) / omega
+                stderr = solution.y.std(axis=0) / omega / np.sqrt(50)
+                self.assertTrue(np.all(
+                    np.abs(mean - expected) <= 5 * stderr + 1 / omega))
+
+    def test_seed(self):
+        model = BasicGeneExpression()
+        first, second = [
+            gillespie(model, 10, num_trajectories=5, seed=3)
+            for _ in range(2)]
+        np.testing.assert_array_equal(first.y, second.y)
+
+    def test_invalid_method(self):
+        with self.assertRaises(ValueError):
+            gillespie(BasicGeneExpression(), 10, method="exact")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,37 @@
+import unittest
+
+import numpy as np
+
+from circuit_models import Repressilator, parameter_grid, sweep
+
+
+class TestSweep(unittest.TestCase):
+
+    def test_parameter_grid(self):
+        grid = parameter_grid(n1=[1, 2], Kd1=[1e-7, 1e-6, 1e-5])
+        np.testing.assert_array_equal(grid["n1"], [1, 1, 1, 2, 2, 2])
+        np.testing.assert_array_equal(grid["Kd1"], [1e-7, 1e-6, 1e-5] * 2)
+
+    def test_sweep_matches_single_solves(self):
+        model = Repressilator()
+        grid = parameter_grid(n1=[1.5, 2.0, 3.0], Kd1=[1e-7, 1e-6])
+        t = model.time_points(num_points=50)
+        for chunk_size in [1, 4]:
+            result = sweep(model, grid, t=t, chunk_size=chunk_size)
+            self.assertEqual(result["y"].shape, (6, 50, 6))
+            for i in range(len(result)):
+                with self.subTest(chunk_size=chunk_size, index=i):
+                    expected = model.solve(t, parameters={
+                        "n1": result["n1"][i], "Kd1": result["Kd1"][i]}).y
+                    # Stacked systems share the solver's steps
+                    self.assertLess(
+                        np.abs(result["y"][i] - expected).max()
+                        / np.abs(expected).max(), 1e-4)
+
+    def test_sweep_rejects_unequal_lengths(self):
+        with self.assertRaises(ValueError):
+            sweep(Repressilator(), {"n1": [1, 2], "Kd1": [1e-6]})
+
+
+if __name__ == "__main__":
+    unittest.main()